@@ -1,19 +1,441 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+"""
+Export JSONL du corpus indexé (data/index/manifest.json) en fragments compressés
+- chaque document du manifest : texte extrait page par page (pypdf, ou fichiers .txt/.md),
+  découpé en chunks de --chunk-chars caractères avec recouvrement, métadonnées du catalogue
+  (data/rag_seed/rag_seed_catalog.csv : langue, niveau, matière, type, source, licence)
+- document sans fichier local (runner CI, corpus non téléchargé) ou sans texte extractible :
+  une ligne de métadonnées seules (status missing / no_text / no_extractor / error, text vide)
+- mémoire bornée : une page et un chunk en cours à la fois, écriture en flux
+- fragments data/export/corpus/part-NNNNN.jsonl.zst (zstd si le module zstandard est
+  installé, sinon gzip ; --compression none pour du JSONL brut), taille plafonnée
+  (--shard-mb, octets JSONL non compressés) ; chaque fragment est un fichier complet,
+  lisible indépendamment : les traitements en aval se répartissent les fragments
+- data/export/corpus/export_manifest.json (écrit en dernier) : fragments (lignes, octets,
+  sha256), documents (génération, fragments, chunks, statut, taille / date / sha256 de la
+  source) et filigrane (date de modification la plus récente des sources exportées)
+- génération : numéro de l'export (1, 2, ...), dans chaque ligne ("export_generation") et
+  pour chaque document du manifest ; un consommateur ne garde une ligne que si
+  export_generation == documents[doc_id]["generation"] (is_current) : les chunks remplacés
+  par un export incrémental restent dans les anciens fragments
+- --incremental : seuls les documents nouveaux, pas encore exportés en "ok" (absents, sans
+  texte, en échec) ou dont la source a changé (date après le filigrane ou --since, taille,
+  sinon sha256 si la date a changé) sont exportés dans de nouveaux fragments ; un document
+  réexporté remplace ses chunks précédents (nouvelle génération)
+- --verify : recalcule les sha256 et nombres de lignes des fragments du manifest
+Usage:
+  python rag/export_jsonl.py
+  python rag/export_jsonl.py --incremental
+  python rag/export_jsonl.py --since 2025-09-01 --shard-mb 16 --compression gzip
+  python rag/export_jsonl.py --verify
+Sorties: data/export/corpus/part-*.jsonl.{zst,gz} et data/export/corpus/export_manifest.json
+"""
+import argparse
+import csv
+import gzip
+import hashlib
+import io
 import json
 import sys
+from datetime import datetime
 from pathlib import Path
 
-def main():
-    print("Export JSONL - Pipeline RAG")
-    output_dir = Path("data/export")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    output_file = output_dir / "rag_export.jsonl"
-    data = {"id": "doc_001", "status": "ok"}
-    with open(output_file, "w") as f:
-        f.write(json.dumps(data))
-    print("Export OK")
+try:
+    import zstandard
+except ImportError:  # optionnel : gzip sinon
+    zstandard = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # requirements.txt ; sans lui, métadonnées seules pour les PDF
+    PdfReader = None
+
+ROOT = Path(__file__).resolve().parents[1]
+MANIFEST = ROOT / "data" / "index" / "manifest.json"
+CATALOG = ROOT / "data" / "rag_seed" / "rag_seed_catalog.csv"
+CORPUS_ROOT = ROOT / "data" / "rag_seed"
+OUT_DIR = ROOT / "data" / "export" / "corpus"
+EXPORT_MANIFEST = "export_manifest.json"
+SUFFIXES = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz", "none": ".jsonl"}
+# Colonnes du catalogue -> champs exportés
+CATALOG_FIELDS = {"langue": "language", "grade_level": "grade_level", "matiere": "subject",
+                  "type_doc": "doc_type", "source_url": "source_url", "licence": "licence"}
+TEXT_BLOCK_CHARS = 1 << 16
+
+
+# -- Lecture des sources --------------------------------------------------------
+def load_catalog(path: Path):
+    """Métadonnées du catalogue par id de document"""
+    catalog = {}
+    if path.exists():
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                catalog[row.get("id", "")] = {out: row.get(col, "") for col, out in CATALOG_FIELDS.items()}
+    return catalog
+
+
+def resolve_source(entry, corpus_root: Path):
+    """Fichier local d'une entrée du manifest (chemins Windows ou relatifs acceptés)"""
+    rel = (entry.get("file") or "").replace("\\", "/")
+    if not rel:
+        return None
+    for candidate in (ROOT / rel, corpus_root / rel, corpus_root / Path(rel).name):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def iter_pages(path: Path):
+    """(numéro de page, texte) ; les fichiers texte sont lus par blocs de lignes"""
+    if path.suffix.lower() == ".pdf":
+        for number, page in enumerate(PdfReader(str(path)).pages, 1):
+            try:
+                yield number, page.extract_text() or ""
+            except Exception as e:  # page illisible : on continue avec les suivantes
+                print(f"[export] {path.name} page {number} illisible : {e}")
+        return
+    with open(path, encoding="utf-8", errors="replace") as f:
+        block = []
+        size = 0
+        for line in f:
+            block.append(line)
+            size += len(line)
+            if size >= TEXT_BLOCK_CHARS:
+                yield 1, "".join(block)
+                block, size = [], 0
+        if block:
+            yield 1, "".join(block)
+
+
+def _break_before(text: str, start: int, end: int) -> int:
+    """Dernière fin de ligne (sinon dernier espace) de text[start:end], -1 si aucune"""
+    cut = text.rfind("\n", start, end)
+    return cut if cut >= 0 else text.rfind(" ", start, end)
+
+
+def iter_chunks(pages, chunk_chars: int, overlap: int):
+    """(texte, page de début, page de fin) ; lignes conservées (consignes, items numérotés),
+    coupe de préférence en fin de ligne, recouvrement d'environ overlap caractères"""
+    buffer, start_page, page = "", None, None
+    for page, text in pages:
+        text = "\n".join(" ".join(line.split()) for line in text.splitlines() if line.strip())
+        if not text:
+            continue
+        if start_page is None:
+            start_page = page
+        buffer = f"{buffer}\n{text}" if buffer else text
+        while len(buffer) >= chunk_chars:
+            cut = _break_before(buffer, chunk_chars // 2, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            yield buffer[:cut].strip(), start_page, page
+            restart = _break_before(buffer, cut - overlap, cut) if overlap else -1
+            buffer = buffer[restart + 1 if restart > cut - overlap else cut:].strip()
+            start_page = page
+    if buffer.strip():
+        yield buffer.strip(), start_page, page
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# -- Fragments compressés -----------------------------------------------------
+class _HashingFile:
+    """Fichier binaire qui compte et hache les octets écrits (sha256 du fragment compressé)"""
+
+    def __init__(self, path: Path):
+        self._f = open(path, "wb")
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return self._f.write(data)
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+
+class _Shard:
+    def __init__(self, path: Path, compression: str):
+        self.path = path
+        self.raw = _HashingFile(path)
+        if compression == "zstd":
+            self.stream = zstandard.ZstdCompressor(level=10).stream_writer(self.raw, closefd=False)
+        elif compression == "gzip":
+            self.stream = gzip.GzipFile(filename="", fileobj=self.raw, mode="wb", mtime=0)
+        else:
+            self.stream = self.raw
+        self.records = 0
+        self.raw_bytes = 0
+        self.documents = []
+
+    def write(self, line: bytes, doc_id: str):
+        self.stream.write(line)
+        self.records += 1
+        self.raw_bytes += len(line)
+        if not self.documents or self.documents[-1] != doc_id:
+            self.documents.append(doc_id)
+
+    def close(self) -> dict:
+        if self.stream is not self.raw:
+            self.stream.close()
+        self.raw.close()
+        return {"file": self.path.name, "records": self.records, "documents": len(self.documents),
+                "first_doc": self.documents[0] if self.documents else None,
+                "last_doc": self.documents[-1] if self.documents else None,
+                "raw_bytes": self.raw_bytes, "bytes": self.raw.bytes, "sha256": self.raw.sha256.hexdigest(),
+                "created": datetime.now().isoformat(timespec="seconds")}
+
+
+class ShardWriter:
+    """Écrit des enregistrements JSON dans des fragments numérotés de taille plafonnée"""
+
+    def __init__(self, out_dir: Path, compression: str, max_bytes: int, start_seq: int = 0):
+        self.out_dir = out_dir
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.seq = start_seq
+        self.shards = []
+        self._current = None
+
+    def write(self, record: dict) -> str:
+        """Écrit un enregistrement ; retourne le nom du fragment qui le contient"""
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        current = self._current
+        if current is not None and current.records and current.raw_bytes + len(line) > self.max_bytes:
+            self.shards.append(current.close())
+            current = None
+        if current is None:
+            current = self._current = _Shard(self.out_dir / f"part-{self.seq:05d}{SUFFIXES[self.compression]}",
+                                             self.compression)
+            self.seq += 1
+        current.write(line, record["doc_id"])
+        return current.path.name
+
+    def close(self):
+        if self._current is not None:
+            self.shards.append(self._current.close())
+            self._current = None
+        return self.shards
+
+
+def open_shard(path):
+    """Lecture texte d'un fragment (.jsonl, .jsonl.gz ou .jsonl.zst), ligne par ligne"""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"module zstandard requis pour lire {path.name}")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True),
+                                encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+# -- Export -----------------------------------------------------------------------
+def parse_since(value: str) -> float:
+    """Filigrane : timestamp Unix ou date ISO"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def load_export_manifest(out_dir: Path):
+    path = out_dir / EXPORT_MANIFEST
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {"shards": [], "documents": {}, "watermark": 0.0, "generation": 0}
+
+
+def is_current(record: dict, manifest: dict) -> bool:
+    """Ligne de la dernière exportation de son document (à appliquer par tout consommateur)"""
+    doc = manifest.get("documents", {}).get(record.get("doc_id"))
+    return doc is not None and record.get("export_generation") == doc.get("generation")
+
+
+def source_unchanged(before: dict, source: Path, since: float) -> bool:
+    """Source identique à l'export précédent : date <= filigrane et même taille, puis même
+    date ou, si la date a changé (copie, restauration), même sha256"""
+    st = source.stat()
+    if st.st_mtime > since or st.st_size != before.get("source_size"):
+        return False
+    return st.st_mtime == before.get("source_mtime") or file_sha256(source) == before.get("source_sha256")
+
+
+def export_document(entry, source, catalog, writer, args, exported_at, generation):
+    """Écrit les chunks d'un document ; retourne son entrée du manifest d'export"""
+    doc_id = entry["id"]
+    base = {"doc_id": doc_id, "title": entry.get("title", ""), "file": entry.get("file", ""),
+            **catalog.get(doc_id, {k: "" for k in CATALOG_FIELDS.values()}),
+            "export_generation": generation, "exported_at": exported_at}
+    info = {"status": "ok", "generation": generation, "chunks": 0, "shards": [], "source_mtime": None,
+            "source_size": None, "source_sha256": None}
+
+    def write(record):
+        shard = writer.write(record)
+        if not info["shards"] or info["shards"][-1] != shard:
+            info["shards"].append(shard)
+
+    if source is None:
+        info["status"] = "missing"
+    elif source.suffix.lower() == ".pdf" and PdfReader is None:
+        info["status"] = "no_extractor"
+    if info["status"] != "ok":
+        write({**base, "status": info["status"], "chunk_id": None, "chunk_index": None,
+               "page_start": None, "page_end": None, "text": ""})
+        return info
+
+    st = source.stat()
+    info["source_mtime"] = st.st_mtime
+    info["source_size"] = st.st_size
+    info["source_sha256"] = file_sha256(source)
+    try:
+        for index, (text, page_start, page_end) in enumerate(
+                iter_chunks(iter_pages(source), args.chunk_chars, args.overlap)):
+            write({**base, "status": "ok", "chunk_id": f"{doc_id}#{index:04d}", "chunk_index": index,
+                   "page_start": page_start, "page_end": page_end, "text": text})
+            info["chunks"] += 1
+    except Exception as e:
+        print(f"[export] Échec {doc_id} : {e}")
+        info["status"] = "error"
+    if info["status"] == "ok" and info["chunks"] == 0:
+        info["status"] = "no_text"
+        write({**base, "status": "no_text", "chunk_id": None, "chunk_index": None,
+               "page_start": None, "page_end": None, "text": ""})
+    return info
+
+
+def run_export(args) -> int:
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    compression = args.compression
+    if compression == "auto":
+        compression = "zstd" if zstandard is not None else "gzip"
+    elif compression == "zstd" and zstandard is None:
+        print("[export] Module zstandard absent : compression gzip")
+        compression = "gzip"
+    if PdfReader is None:
+        print("[export] pypdf absent : les PDF sont exportés sans texte (pip install pypdf)")
+
+    previous = load_export_manifest(out_dir)
+    incremental = args.incremental or args.since is not None
+    since = parse_since(args.since) if args.since is not None else float(previous.get("watermark") or 0.0)
+    known = previous.get("documents", {}) if incremental else {}
+    last_seq = max((int(s["file"].split("-")[1].split(".")[0]) for s in previous.get("shards", [])), default=-1)
+
+    entries = json.loads(Path(args.manifest).read_text(encoding="utf-8"))
+    if args.limit:
+        entries = entries[:args.limit]
+    catalog = load_catalog(Path(args.catalog))
+    corpus_root = Path(args.corpus_root)
+    exported_at = datetime.now().isoformat(timespec="seconds")
+    generation = int(previous.get("generation") or 0) + 1
+    writer = ShardWriter(out_dir, compression, int(args.shard_mb * 1024 * 1024), start_seq=last_seq + 1)
+
+    documents = dict(known)
+    watermark = float(previous.get("watermark") or 0.0) if incremental else 0.0
+    statuses, skipped = {}, 0
+    for entry in entries:
+        source = resolve_source(entry, corpus_root)
+        before = known.get(entry["id"])
+        # Seuls les documents déjà exportés en "ok" peuvent être sautés ; source absente ici
+        # (corpus non téléchargé) : l'export précédent est conservé
+        if before and before.get("status") == "ok" and (source is None or source_unchanged(before, source, since)):
+            skipped += 1
+            continue
+        info = export_document(entry, source, catalog, writer, args, exported_at, generation)
+        documents[entry["id"]] = info
+        statuses[info["status"]] = statuses.get(info["status"], 0) + 1
+        if info["source_mtime"]:
+            watermark = max(watermark, info["source_mtime"])
+    new_shards = writer.close()
+
+    shards = (previous.get("shards", []) if incremental else []) + new_shards
+    manifest = {
+        "version": 2,
+        "generation": generation,
+        "updated": exported_at,
+        "source_manifest": str(args.manifest),
+        "compression": compression,
+        "chunk_chars": args.chunk_chars,
+        "overlap": args.overlap,
+        "shard_max_bytes": writer.max_bytes,
+        "watermark": watermark,
+        "watermark_iso": datetime.fromtimestamp(watermark).isoformat(timespec="seconds") if watermark else None,
+        "shards": shards,
+        "documents": documents,
+    }
+    tmp = out_dir / (EXPORT_MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(out_dir / EXPORT_MANIFEST)
+
+    # Export complet : les fragments de l'export précédent ne sont supprimés qu'une fois
+    # le nouveau manifest en place (un export interrompu laisse l'ancien lisible)
+    if not incremental:
+        current = {s["file"] for s in shards}
+        for old in previous.get("shards", []):
+            if old["file"] not in current:
+                (out_dir / old["file"]).unlink(missing_ok=True)
+
+    records = sum(s["records"] for s in new_shards)
+    print(f"[export] {len(entries)} documents du manifest : {statuses or 'aucun à exporter'}"
+          f"{f', {skipped} inchangés' if incremental else ''} (génération {generation})")
+    print(f"[export] {records} lignes dans {len(new_shards)} fragments {compression} "
+          f"({sum(s['bytes'] for s in new_shards) / 1024:.0f} Ko, {sum(s['raw_bytes'] for s in new_shards) / 1024:.0f} Ko "
+          f"non compressés) -> {out_dir}")
     return 0
 
+
+def run_verify(args) -> int:
+    out_dir = Path(args.out)
+    manifest = load_export_manifest(out_dir)
+    bad = 0
+    for shard in manifest["shards"]:
+        path = out_dir / shard["file"]
+        if not path.exists():
+            print(f"[export] {shard['file']} : absent")
+            bad += 1
+            continue
+        with open_shard(path) as f:
+            lines = sum(1 for _ in f)
+        ok = file_sha256(path) == shard["sha256"] and lines == shard["records"]
+        bad += not ok
+        print(f"[export] {shard['file']} : {'OK' if ok else 'CORROMPU'} ({lines} lignes)")
+    print(f"[export] {len(manifest['shards'])} fragments vérifiés, {bad} en erreur")
+    return 1 if bad else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export JSONL - Pipeline RAG")
+    ap.add_argument("--manifest", default=str(MANIFEST))
+    ap.add_argument("--catalog", default=str(CATALOG))
+    ap.add_argument("--corpus-root", default=str(CORPUS_ROOT), help="dossier des fichiers du manifest")
+    ap.add_argument("--out", default=str(OUT_DIR))
+    ap.add_argument("--shard-mb", type=float, default=64.0, help="taille max d'un fragment (Mo non compressés)")
+    ap.add_argument("--chunk-chars", type=int, default=1200)
+    ap.add_argument("--overlap", type=int, default=150)
+    ap.add_argument("--compression", choices=["auto", "zstd", "gzip", "none"], default="auto")
+    ap.add_argument("--incremental", action="store_true", help="documents nouveaux ou modifiés depuis le filigrane")
+    ap.add_argument("--since", default=None, help="filigrane explicite (timestamp ou date ISO), implique --incremental")
+    ap.add_argument("--limit", type=int, default=0, help="nombre maximal de documents (0 = tous)")
+    ap.add_argument("--verify", action="store_true", help="vérifie sha256 et lignes des fragments")
+    args = ap.parse_args()
+    if not 0 <= args.overlap < args.chunk_chars // 2:
+        ap.error("--overlap doit être inférieur à la moitié de --chunk-chars")
+    return run_verify(args) if args.verify else run_export(args)
+
+
 if __name__ == "__main__":
     sys.exit(main())
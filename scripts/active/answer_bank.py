@@ -0,0 +1,202 @@
+# scripts/answer_bank.py
+"""
+Banque de réponses précalculées (data/index/answer_bank.db, SQLite)
+- construite hors ligne par tools/build_answer_bank.py : exercices extraits du corpus
+  du curriculum, explications générées dans chaque langue prise en charge
+- clé = question normalisée (mots porteurs de sens + nombres et opérateurs dans l'ordre,
+  voir semantic_cache.py) et code de langue ; index SQLite sur (clé, langue)
+- au runtime, une question de la banque est servie sans appel GPT : d'abord la clé exacte,
+  puis une question proche (MinHash/LSH, seuil MOTEYI_ANSWER_BANK_THRESHOLD, plus strict
+  que le cache sémantique car la banque n'a pas vu la question de l'élève)
+- lecture seule côté bot ; une banque reconstruite est prise en compte au redémarrage
+
+Configuration (.env) :
+  MOTEYI_ANSWER_BANK=1                          0 pour ignorer la banque (nouveaux prompts)
+  MOTEYI_ANSWER_BANK_DB=data/index/answer_bank.db
+  MOTEYI_ANSWER_BANK_THRESHOLD=0.8
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from perf_metrics import LatencyRecorder
+from prompt_templates import GPT_LANGUAGE_CODES, LANGUAGE_FILES
+from semantic_cache import SemanticCache, exact_key, exercise_type, math_key, normalize_words
+
+DEFAULT_DB = "data/index/answer_bank.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT NOT NULL,
+    language TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    exercise_type TEXT,
+    source TEXT,
+    model TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (key, language)
+);
+CREATE INDEX IF NOT EXISTS idx_answers_source ON answers (source);
+"""
+
+
+def language_code(language: str) -> str:
+    """'francais' / 'lingala' / code court -> code de langue (fr par défaut)"""
+    code = GPT_LANGUAGE_CODES.get(language, language)
+    return code if code in LANGUAGE_FILES else "fr"
+
+
+def question_key(question: str) -> str:
+    """Clé de la question normalisée : mêmes mots et mêmes nombres -> même clé"""
+    normalized = " ".join(normalize_words(question)) + "|" + " ".join(math_key(question))
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class AnswerBank:
+    """Réponses précalculées indexées par question normalisée et langue"""
+
+    def __init__(self, db_path=None, threshold: float = None, fuzzy: bool = True):
+        self.db_path = Path(db_path or os.getenv('MOTEYI_ANSWER_BANK_DB', DEFAULT_DB))
+        self.threshold = threshold if threshold is not None else float(
+            os.getenv('MOTEYI_ANSWER_BANK_THRESHOLD', '0.8'))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self.lookup_latency = LatencyRecorder()
+        self.counters = {"lookups": 0, "exact_hits": 0, "fuzzy_hits": 0, "misses": 0}
+        self._fuzzy: Optional[SemanticCache] = None
+        if fuzzy:
+            self._load_fuzzy()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.db_path), timeout=10)
+        try:
+            conn.row_factory = sqlite3.Row
+            yield conn
+        finally:
+            conn.close()
+
+    def _load_fuzzy(self):
+        """Index MinHash/LSH en mémoire des questions de la banque (réponse = clé SQLite)"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT key, language, question FROM answers").fetchall()
+        index = SemanticCache(threshold=self.threshold, thresholds={}, max_entries=max(len(rows), 1),
+                              ttl_s=0, path="")
+        for row in rows:
+            index.put(row["question"], row["key"], row["language"], persist=False)
+        self._fuzzy = index
+
+    # -- Construction (tools/build_answer_bank.py) -----------------------------
+    def has(self, question: str, language: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT 1 FROM answers WHERE key = ? AND language = ?",
+                               (question_key(question), language_code(language))).fetchone()
+        return row is not None
+
+    def put(self, question: str, language: str, answer: str, source: str = "", model: str = ""):
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO answers (key, language, question, answer, exercise_type, source, model, "
+                "created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (question_key(question), language_code(language), question, answer, exercise_type(question),
+                 source, model, time.time()))
+
+    # -- Runtime ---------------------------------------------------------------
+    def lookup(self, question: str, language: str = "fr") -> Optional[Dict]:
+        """{"answer", "question", "match": "exact" | "fuzzy", "similarity"} ou None"""
+        t0 = time.perf_counter()
+        code = language_code(language)
+        key, match, similarity = question_key(question), "exact", 1.0
+        with self._connect() as conn:
+            row = conn.execute("SELECT question, answer FROM answers WHERE key = ? AND language = ?",
+                               (key, code)).fetchone()
+            if row is None and self._fuzzy is not None:
+                near = self._fuzzy.lookup(question, code)
+                # Pas de GPT derrière : mêmes nombres, variables, unités et sujet, dans le même ordre
+                if near and exact_key(near["question"]) == exact_key(question):
+                    match, similarity = "fuzzy", near["similarity"]
+                    row = conn.execute("SELECT question, answer FROM answers WHERE key = ? AND language = ?",
+                                       (near["answer"], code)).fetchone()
+        with self._lock:
+            self.counters["lookups"] += 1
+            self.counters[f"{match}_hits" if row else "misses"] += 1
+        self.lookup_latency.record((time.perf_counter() - t0) * 1000)
+        if row is None:
+            return None
+        return {"answer": row["answer"], "question": row["question"], "match": match, "similarity": similarity}
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT language, COUNT(*) AS n FROM answers GROUP BY language").fetchall()
+        return {r["language"]: r["n"] for r in rows}
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.counters)
+        hits = stats["exact_hits"] + stats["fuzzy_hits"]
+        stats["hit_rate"] = round(hits / stats["lookups"], 3) if stats["lookups"] else 0.0
+        stats["answers"] = self.counts()
+        stats["lookup"] = self.lookup_latency.summary()
+        return stats
+
+
+_bank: Optional[AnswerBank] = None
+_bank_loaded = False
+_bank_lock = threading.Lock()
+
+
+def get_answer_bank() -> Optional[AnswerBank]:
+    """Banque partagée par le processus ; None tant qu'aucune banque n'a été construite
+    ou si MOTEYI_ANSWER_BANK=0"""
+    global _bank, _bank_loaded
+    if os.getenv('MOTEYI_ANSWER_BANK', '1') == '0':
+        return None
+    if not _bank_loaded:
+        with _bank_lock:
+            if not _bank_loaded:
+                path = Path(os.getenv('MOTEYI_ANSWER_BANK_DB', DEFAULT_DB))
+                if path.exists():
+                    try:
+                        _bank = AnswerBank(path)
+                        print(f"[BANK] Banque de réponses chargée : {_bank.counts()}")
+                    except sqlite3.Error as e:
+                        print(f"[BANK] Banque illisible ({path}) : {e}")
+                _bank_loaded = True
+    return _bank
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        bank = AnswerBank(Path(tmp) / "bank.db")
+        bank.put("Calcule 37 + 25.", "fr", "37 + 25 = 62", source="gold")
+        bank.put("Comment calculer l'aire d'un rectangle de 5 m sur 3 m ?", "fr", "5 × 3 = 15 m²", source="gold")
+        bank.put("Combien font deux plus trois ?", "fr", "2 + 3 = 5", source="gold")
+        bank.put("Convertis 5 km en m", "fr", "5 km = 5000 m", source="gold")
+        bank.put("Résous 2x + 3 = 11", "fr", "x = 4", source="gold")
+        bank = AnswerBank(Path(tmp) / "bank.db")  # index LSH rechargé depuis SQLite
+        # (question, réponse attendue) ; nombres et opérations en lettres : jamais la réponse d'un autre calcul
+        cases = [("calcule 37+25", "37 + 25 = 62"), ("Calcule 37 + 26.", None),
+                 ("aire d'un rectangle de 5 m sur 3 m, comment la calculer", "5 × 3 = 15 m²"),
+                 ("aire rectangle 5 m 3 m", None), ("combien font deux plus trois", "2 + 3 = 5"),
+                 ("Combien font deux fois trois ?", None), ("Combien font deux plus quatre ?", None),
+                 ("Convertis 5 m en km", None), ("Résous 2y + 3 = 11", None), ("résous 2x+3=11 ?", "x = 4"),
+                 ("Calcule le périmètre d'un rectangle de 5 m sur 3 m", None)]
+        failures = 0
+        for q, expected in cases:
+            match = bank.lookup(q, "fr")
+            answer = match["answer"] if match else None
+            failures += answer is not None and answer != expected
+            print(f"  {q!r:58} -> {answer + ' (' + match['match'] + ')' if match else 'absent'}")
+        print(" ", bank.get_stats())
+        print(f"  {failures} réponse(s) fausse(s)")
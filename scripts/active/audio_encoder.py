@@ -0,0 +1,160 @@
+# scripts/audio_encoder.py
+"""
+Encodage des réponses audio en notes vocales OGG/Opus
+- la sortie TTS (MP3 gTTS, WAV espeak) est réencodée en Opus mono bas débit réglé pour
+  la voix : ~3x plus léger que le MP3 pour les élèves sur données mobiles
+- encodeur local : ffmpeg (libopus), sinon opusenc pour les entrées WAV/FLAC ;
+  sans encodeur ou en cas d'échec, le fichier d'origine est gardé (MP3)
+- taille avant/après et temps d'encodage exposés dans /metrics
+
+Configuration (.env) :
+  MOTEYI_OPUS_BITRATE=12        débit Opus en kbit/s (12 : voix claire, 16-24 : plus de marge)
+  MOTEYI_OPUS_COMPLEXITY=5      0-10 : 10 = meilleure qualité mais ~2x plus lent que 5 à taille égale
+  MOTEYI_AUDIO_KEEP_SOURCE=0    1 = garder le fichier TTS d'origine après encodage
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from perf_metrics import LatencyRecorder
+
+# Type MIME d'upload WhatsApp selon l'extension du fichier audio
+AUDIO_MIME_TYPES = {
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".aac": "audio/aac",
+    ".amr": "audio/amr",
+}
+# Entrées lisibles par opusenc (pas de décodeur MP3)
+OPUSENC_INPUTS = {".wav", ".flac", ".aiff", ".aif"}
+# Opus n'accepte que 8/12/16/24/48 kHz ; 16 kHz (large bande) suffit pour la voix
+SAMPLE_RATE = 16000
+
+
+def mime_type_for(path: str) -> str:
+    """Type MIME d'un fichier audio d'après son extension (MP3 par défaut)"""
+    return AUDIO_MIME_TYPES.get(Path(path).suffix.lower(), "audio/mpeg")
+
+
+def parse_bitrate(value: str) -> int:
+    """'12', '12k' ou '12000' -> 12 (kbit/s)"""
+    value = str(value).strip().lower().rstrip("k")
+    kbps = float(value)
+    if kbps >= 1000:
+        kbps /= 1000
+    return max(6, min(int(kbps), 128))
+
+
+class OpusEncoder:
+    """Réencode un fichier audio en OGG/Opus ; encode(path) -> chemin à envoyer"""
+
+    def __init__(self, bitrate_kbps: int = None, complexity: int = None, keep_source: bool = None,
+                 timeout_s: float = 30.0):
+        if bitrate_kbps is None:
+            bitrate_kbps = parse_bitrate(os.getenv('MOTEYI_OPUS_BITRATE', '12'))
+        self.bitrate_kbps = bitrate_kbps
+        if complexity is None:
+            complexity = int(os.getenv('MOTEYI_OPUS_COMPLEXITY', '5'))
+        self.complexity = max(0, min(complexity, 10))
+        if keep_source is None:
+            keep_source = os.getenv('MOTEYI_AUDIO_KEEP_SOURCE', '0') == '1'
+        self.keep_source = keep_source
+        self.timeout_s = timeout_s
+        self.ffmpeg = shutil.which("ffmpeg")
+        self.opusenc = shutil.which("opusenc")
+        self.latency = LatencyRecorder()
+        self._lock = threading.Lock()
+        self.stats = {"encoded": 0, "skipped": 0, "failed": 0, "bytes_in": 0, "bytes_out": 0}
+        if not (self.ffmpeg or self.opusenc):
+            print("[AUDIO] Ni ffmpeg ni opusenc : réponses audio envoyées telles quelles (MP3)")
+
+    def available(self, source: str = ".mp3") -> bool:
+        return bool(self.ffmpeg or (self.opusenc and Path(source).suffix.lower() in OPUSENC_INPUTS))
+
+    def _command(self, source: Path, target: Path):
+        if self.ffmpeg:
+            return [self.ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+                    "-i", str(source), "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+                    "-c:a", "libopus", "-b:a", f"{self.bitrate_kbps}k", "-vbr", "on",
+                    "-application", "voip", "-compression_level", str(self.complexity),
+                    # Trames de 60 ms : moins d'en-têtes par seconde, utile à bas débit
+                    "-frame_duration", "60",
+                    str(target)]
+        return [self.opusenc, "--quiet", "--bitrate", str(self.bitrate_kbps), "--speech",
+                "--downmix-mono", "--framesize", "60", "--comp", str(self.complexity), str(source), str(target)]
+
+    def encode(self, source: str) -> str:
+        """Chemin du fichier .ogg encodé, ou source inchangée si l'encodage est impossible"""
+        source = Path(source)
+        if source.suffix.lower() in (".ogg", ".opus") or not self.available(str(source)):
+            with self._lock:
+                self.stats["skipped"] += 1
+            return str(source)
+
+        target = source.with_suffix(".ogg")
+        t0 = time.perf_counter()
+        try:
+            subprocess.run(self._command(source, target), check=True, capture_output=True,
+                           timeout=self.timeout_s)
+            if not target.exists() or target.stat().st_size == 0:
+                raise OSError("fichier OGG vide")
+        except (subprocess.SubprocessError, OSError) as e:
+            stderr = getattr(e, "stderr", b"") or b""
+            print(f"[AUDIO] Encodage Opus échoué ({source.name}) : {e} {stderr.decode(errors='replace')[:200]}")
+            target.unlink(missing_ok=True)
+            with self._lock:
+                self.stats["failed"] += 1
+            return str(source)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+
+        size_in, size_out = source.stat().st_size, target.stat().st_size
+        self.latency.record(elapsed_ms)
+        with self._lock:
+            self.stats["encoded"] += 1
+            self.stats["bytes_in"] += size_in
+            self.stats["bytes_out"] += size_out
+        print(f"[AUDIO] Opus {self.bitrate_kbps} kbit/s : {size_in / 1024:.1f} Ko -> "
+              f"{size_out / 1024:.1f} Ko en {elapsed_ms:.0f} ms")
+        if not self.keep_source:
+            source.unlink(missing_ok=True)
+        return str(target)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["ratio"] = round(stats["bytes_in"] / stats["bytes_out"], 2) if stats["bytes_out"] else 0.0
+        stats["bitrate_kbps"] = self.bitrate_kbps
+        stats["complexity"] = self.complexity
+        stats["backend"] = "ffmpeg" if self.ffmpeg else ("opusenc" if self.opusenc else None)
+        stats["encode"] = self.latency.summary()
+        return stats
+
+
+_encoder: Optional[OpusEncoder] = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder() -> OpusEncoder:
+    """Encodeur partagé par le processus"""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                _encoder = OpusEncoder()
+    return _encoder
+
+
+if __name__ == "__main__":
+    import sys
+    encoder = get_encoder()
+    for arg in sys.argv[1:]:
+        encoded = encoder.encode(arg)
+        print(f"  {arg} -> {encoded} ({mime_type_for(encoded)})")
+    print(encoder.get_stats())
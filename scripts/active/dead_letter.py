@@ -0,0 +1,294 @@
+# scripts/dead_letter.py
+"""
+File de messages non délivrés (dead letters)
+- un envoi Graph définitivement en échec (après les essais de send_scheduler.py) est écrit
+  dans data/dead_letters.db (SQLite, WAL) avec le message déjà rendu : texte complet ou
+  chemin du fichier audio (l'audio est ré-uploadé au renvoi, l'ID média Graph expire)
+- un thread de fond renvoie les messages dus avec un backoff exponentiel : la réponse
+  déjà payée (OCR + GPT + TTS) n'est jamais recalculée
+- seuls les échecs temporaires y entrent (SendResult.retryable) ; un renvoi refusé
+  définitivement (4xx) est marqué expiré sans nouvel essai
+- au-delà de MOTEYI_DLQ_MAX_AGE_H (24 h, fenêtre de conversation WhatsApp), le message
+  est marqué expiré
+- plusieurs workers gunicorn : chaque message est réservé (bail) avant d'être renvoyé
+- les audios en file restent protégés du nettoyage disque (referenced_paths())
+- inspection et relance : python tools/dlq.py
+
+Configuration (.env) :
+  MOTEYI_DLQ_MAX_AGE_H=24   MOTEYI_DLQ_POLL_S=30   MOTEYI_DLQ_BACKOFF_S=60
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_DB = "data/dead_letters.db"
+BACKOFF_MAX_S = 3600
+LEASE_S = 120
+BATCH_SIZE = 20
+
+PENDING, SENT, EXPIRED = "pending", "sent", "expired"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    audio_path TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_dead_letters_due ON dead_letters (status, next_attempt_at);
+"""
+
+# redeliver(kind, destinataire, payload) -> vrai si Graph a accepté le message
+# (SendResult de send_scheduler.py : retryable False = refus définitif)
+RedeliverFn = Callable[[str, str, Dict], bool]
+
+
+def _env_float(name: str, default: str) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return float(default)
+
+
+class DeadLetterQueue:
+    """File durable des envois échoués, partagée entre processus via SQLite"""
+
+    def __init__(self, db_path=None, max_age_s: float = None, poll_s: float = None, backoff_s: float = None):
+        self.db_path = Path(db_path or os.getenv('MOTEYI_DLQ_DB', DEFAULT_DB))
+        self.max_age_s = max_age_s if max_age_s is not None else _env_float('MOTEYI_DLQ_MAX_AGE_H', '24') * 3600
+        self.poll_s = poll_s if poll_s is not None else _env_float('MOTEYI_DLQ_POLL_S', '30')
+        self.backoff_s = backoff_s if backoff_s is not None else _env_float('MOTEYI_DLQ_BACKOFF_S', '60')
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.counters = {"added": 0, "redelivered": 0, "retry_failed": 0, "expired": 0}
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # lecteurs (tools/dlq.py) non bloqués par le worker
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connexion courte en autocommit (une par appel : utilisable depuis n'importe quel thread)"""
+        conn = sqlite3.connect(str(self.db_path), timeout=10, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    # -- Écriture ------------------------------------------------------------
+    def add(self, kind: str, recipient: str, payload: Dict, error: str = "",
+            audio_path: str = None) -> Optional[int]:
+        """Enregistre un message non délivré ; premier renvoi après backoff_s"""
+        now = time.time()
+        if audio_path:
+            audio_path = os.path.abspath(audio_path)
+        try:
+            with self._connect() as conn:
+                cur = conn.execute(
+                    "INSERT INTO dead_letters (kind, recipient, payload, audio_path, created_at, updated_at, "
+                    "next_attempt_at, last_error) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (kind, recipient, json.dumps(payload, ensure_ascii=False), audio_path,
+                     now, now, now + self.backoff_s, error[:500]))
+        except sqlite3.Error as e:
+            print(f"[DLQ] Écriture impossible, message pour {recipient} perdu : {e}")
+            return None
+        self._count("added")
+        print(f"[DLQ] Message {kind} pour {recipient} mis en file (#{cur.lastrowid})")
+        return cur.lastrowid
+
+    def requeue(self, ids: Iterable[int] = None, include_expired: bool = False) -> int:
+        """Rend des messages dus immédiatement (tous les messages en attente si ids est None)"""
+        now = time.time()
+        statuses = (PENDING, EXPIRED) if include_expired else (PENDING,)
+        query = (f"UPDATE dead_letters SET status = '{PENDING}', next_attempt_at = ?, claimed_until = 0, "
+                 f"created_at = CASE WHEN status = '{EXPIRED}' THEN ? ELSE created_at END, updated_at = ? "
+                 f"WHERE status IN ({','.join('?' * len(statuses))})")
+        params: List = [now, now, now, *statuses]
+        if ids is not None:
+            ids = list(ids)
+            if not ids:
+                return 0
+            query += f" AND id IN ({','.join('?' * len(ids))})"
+            params += ids
+        with self._connect() as conn:
+            return conn.execute(query, params).rowcount
+
+    def purge(self, statuses=(SENT, EXPIRED), older_than_s: float = 0) -> int:
+        """Supprime les messages terminés (délivrés ou expirés)"""
+        with self._connect() as conn:
+            return conn.execute(
+                f"DELETE FROM dead_letters WHERE status IN ({','.join('?' * len(statuses))}) AND updated_at <= ?",
+                (*statuses, time.time() - older_than_s)).rowcount
+
+    # -- Lecture -------------------------------------------------------------
+    def list(self, status: str = None, limit: int = 50) -> List[Dict]:
+        query = "SELECT * FROM dead_letters"
+        params: List = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [self._row(r) for r in rows]
+
+    def get(self, entry_id: int) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM dead_letters WHERE id = ?", (entry_id,)).fetchone()
+        return self._row(row) if row else None
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict:
+        entry = dict(row)
+        entry["payload"] = json.loads(entry["payload"])
+        return entry
+
+    def referenced_paths(self) -> List[str]:
+        """Audios de messages encore à renvoyer (fournisseur de références de storage_manager)"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT audio_path FROM dead_letters WHERE status = ? AND audio_path IS NOT NULL",
+                                (PENDING,)).fetchall()
+        return [r["audio_path"] for r in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM dead_letters GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    # -- Renvoi --------------------------------------------------------------
+    def _claim_due(self, now: float) -> List[Dict]:
+        """Réserve (bail LEASE_S) les messages dus ; un autre worker ne les prendra pas"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                expired = conn.execute(
+                    "UPDATE dead_letters SET status = ?, updated_at = ? WHERE status = ? AND created_at < ?",
+                    (EXPIRED, now, PENDING, now - self.max_age_s)).rowcount
+                rows = conn.execute(
+                    "SELECT * FROM dead_letters WHERE status = ? AND next_attempt_at <= ? AND claimed_until < ? "
+                    "ORDER BY id LIMIT ?", (PENDING, now, now, BATCH_SIZE)).fetchall()
+                if rows:
+                    conn.execute(f"UPDATE dead_letters SET claimed_until = ? "
+                                 f"WHERE id IN ({','.join('?' * len(rows))})",
+                                 (now + LEASE_S, *[r["id"] for r in rows]))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        if expired:
+            self._count("expired", expired)
+            print(f"[DLQ] {expired} message(s) expiré(s) (plus de {self.max_age_s / 3600:.0f} h)")
+        return [self._row(r) for r in rows]
+
+    def retry_due(self, redeliver: RedeliverFn) -> Dict[str, int]:
+        """Un passage : renvoie les messages dus, dans l'ordre d'arrivée"""
+        now = time.time()
+        done = {"redelivered": 0, "retry_failed": 0}
+        for entry in self._claim_due(now):
+            permanent = False
+            try:
+                result = redeliver(entry["kind"], entry["recipient"], entry["payload"])
+                ok = bool(result)
+                error = "" if ok else getattr(result, "detail", "") or "renvoi refusé"
+                permanent = not ok and getattr(result, "retryable", True) is False
+            except Exception as e:
+                ok, error = False, str(e)
+            attempts = entry["attempts"] + 1
+            with self._connect() as conn:
+                if ok:
+                    conn.execute("UPDATE dead_letters SET status = ?, attempts = ?, updated_at = ?, "
+                                 "claimed_until = 0 WHERE id = ?", (SENT, attempts, time.time(), entry["id"]))
+                elif permanent:
+                    conn.execute("UPDATE dead_letters SET status = ?, attempts = ?, updated_at = ?, "
+                                 "claimed_until = 0, last_error = ? WHERE id = ?",
+                                 (EXPIRED, attempts, time.time(), error[:500], entry["id"]))
+                    self._count("expired")
+                else:
+                    delay = min(BACKOFF_MAX_S, self.backoff_s * 2 ** attempts)
+                    conn.execute("UPDATE dead_letters SET attempts = ?, next_attempt_at = ?, updated_at = ?, "
+                                 "claimed_until = 0, last_error = ? WHERE id = ?",
+                                 (attempts, time.time() + delay, time.time(), error[:500], entry["id"]))
+            done["redelivered" if ok else "retry_failed"] += 1
+            print(f"[DLQ] #{entry['id']} ({entry['kind']} pour {entry['recipient']}) : "
+                  f"{'renvoyé' if ok else 'refus définitif, abandonné' if permanent else 'nouvel échec, essai ' + str(attempts)}")
+        self._count("redelivered", done["redelivered"])
+        self._count("retry_failed", done["retry_failed"])
+        return done
+
+    def start(self, redeliver: RedeliverFn):
+        """Lance (une seule fois) le thread de renvoi périodique"""
+        with self._lock:
+            if self._thread is None and self.poll_s > 0:
+                self._thread = threading.Thread(target=self._run, args=(redeliver,),
+                                                name="dead-letter-retry", daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, redeliver: RedeliverFn):
+        while not self._stop.wait(self.poll_s):
+            try:
+                self.retry_due(redeliver)
+            except Exception as e:
+                print(f"[DLQ] Passage de renvoi échoué : {e}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.counters)
+        try:
+            stats["by_status"] = self.counts()
+        except sqlite3.Error as e:
+            stats["by_status"] = {"error": str(e)}
+        return stats
+
+
+_dlq: Optional[DeadLetterQueue] = None
+_dlq_lock = threading.Lock()
+
+
+def get_dead_letters() -> DeadLetterQueue:
+    """File de messages non délivrés partagée par le processus"""
+    global _dlq
+    if _dlq is None:
+        with _dlq_lock:
+            if _dlq is None:
+                _dlq = DeadLetterQueue()
+    return _dlq
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        dlq = DeadLetterQueue(Path(tmp) / "dlq.db", backoff_s=0, poll_s=0)
+        dlq.add("text", "243000", {"type": "text", "text": {"body": "Réponse"}}, "HTTP 500")
+        dlq.add("audio", "243001", {"audio_path": f"{tmp}/a.ogg"}, "upload 503", audio_path=f"{tmp}/a.ogg")
+        print("  audios protégés :", dlq.referenced_paths())
+        outcomes = iter([False, True, True])
+        print("  passage 1 :", dlq.retry_due(lambda kind, to, payload: next(outcomes)))
+        dlq.requeue()
+        print("  passage 2 :", dlq.retry_due(lambda kind, to, payload: next(outcomes)))
+        print("  ", dlq.get_stats(), " audios protégés :", dlq.referenced_paths())
@@ -1,11 +1,21 @@
 # scripts/gpt_real.py
 import os
-import openai
 from dotenv import load_dotenv
 
+from llm_gateway import LLMUnavailable, get_gateway
+from prompt_templates import GPT_LANGUAGE_CODES, LANGUAGE_FILES, detect_math_type, get_prompts
+from token_budget import get_budget
+
 # Charger les variables d'environnement
 load_dotenv()
 
+
+def language_code(language):
+    """'francais' / 'lingala' / 'english' ou code déjà court -> code de langue (fr par défaut)"""
+    code = GPT_LANGUAGE_CODES.get(language, language)
+    return code if code in LANGUAGE_FILES else "fr"
+
+
 class RealGPT:
     """
     Le cerveau de Moteyi - Génère de vraies explications pédagogiques
@@ -22,79 +32,80 @@ class RealGPT:
             print("[INFO] OPENAI_API_KEY=sk-xxxxx")
             self.mock_mode = True
         else:
-            openai.api_key = self.api_key
             self.mock_mode = False
             print("[GPT] OpenAI initialisé avec succès")
         
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+        # Client partagé, concurrence bornée et disjoncteur (voir llm_gateway.py)
+        self.gateway = get_gateway()
+        self.prompts = get_prompts()
+        self.budget = get_budget()
     
-    def generate_explanation(self, exercise_text, language="francais"):
+    def generate_explanation(self, exercise_text, language="francais", context=None):
         """
         Génère une explication pédagogique pour un exercice
+        language : nom ("francais", "lingala", "english") ou code ("fr", "ln", "sw", "lu", "en")
+        context : résultat de CongoRAGConnector.query_rag (optionnel)
         """
         
         if self.mock_mode:
             return self._mock_explanation(exercise_text, language)
         
-        # Prompts adaptés pour chaque langue
-        system_prompts = {
-            "francais": """Tu es Moteyi, un tuteur pédagogique africain bienveillant.
-            Tu expliques les exercices simplement aux enfants de primaire en RDC.
-            Utilise des exemples avec des mangues, bananes, francs congolais.
-            Sois encourageant et patient.""",
-            
-            "lingala": """Tu es Moteyi, tuteur pédagogique africain.
-            Explique en lingala simple aux enfants.
-            Utilise des exemples de la vie quotidienne congolaise.
-            Sois patient et encourageant."""
-        }
-        
-        user_prompts = {
-            "francais": f"""Voici un exercice d'école primaire:
-            {exercise_text}
-            
-            Explique étape par étape comment le résoudre.
-            Maximum 100 mots, langage simple pour un enfant de 8-10 ans.""",
-            
-            "lingala": f"""Tala exercice oyo:
-            {exercise_text}
-            
-            Limbolá ndenge ya kosala yango na lingala pé na pasi te.
-            Pesá exemple ya mboka."""
-        }
+        # Budget de tokens (token_budget.py) puis prompts compilés depuis config/prompts
+        code = language_code(language)
+        exercise_type = detect_math_type(exercise_text)
+        plan = self.budget.plan(exercise_type, self.prompts.system_prompt(code), exercise_text, context)
+        messages = self.prompts.build_messages(plan["question"], code, plan["context"], exercise_type)
+        prompt_tokens = self.prompts.record_usage(messages)
         
         try:
             print(f"[GPT] Génération d'explication en {language}...")
             
-            # Appel à l'API OpenAI
-            response = openai.chat.completions.create(
+            # Appel à l'API OpenAI via la passerelle
+            result = self.gateway.chat(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompts.get(language, system_prompts["francais"])},
-                    {"role": "user", "content": user_prompts.get(language, user_prompts["francais"])}
-                ],
-                max_tokens=200,
+                messages=messages,
+                max_tokens=plan["max_tokens"],
                 temperature=0.7
             )
+            self.budget.record(exercise_type, prompt_tokens, result, plan["max_tokens"])
             
-            explanation = response.choices[0].message.content
+            explanation = result["content"]
             print(f"[GPT] Explication générée ({len(explanation)} caractères)")
             
             return explanation
             
         except Exception as e:
             print(f"[ERREUR GPT] {e}")
+            self.budget.record(exercise_type, prompt_tokens, None, plan["max_tokens"])
             return self._mock_explanation(exercise_text, language)
     
     def _mock_explanation(self, exercise_text, language):
-        """Fallback si pas de clé API"""
-        if "25" in exercise_text and "17" in exercise_text:
-            if language == "lingala":
-                return "Mpo na 25 + 17: Tanga 20 + 10 = 30, pe 5 + 7 = 12. Donc 30 + 12 = 42!"
-            else:
-                return "Pour 25 + 17: D'abord 20 + 10 = 30, puis 5 + 7 = 12. Donc 30 + 12 = 42!"
+        """Fallback si pas de clé API : solveur local pour les calculs et équations simples"""
+        from math_solver import get_solver
+        explanation = get_solver().solve_and_explain(exercise_text, language_code(language))
+        if explanation:
+            return explanation
         return f"[Mode démo] Explication pour: {exercise_text[:30]}..."
 
+# Ajout de la méthode manquante dans RealGPT si nécessaire
+class RealGPTExtended(RealGPT):
+    def generate_explanation_with_prompt(self, prompt):
+        """Génère une explication avec un prompt personnalisé"""
+        if self.mock_mode:
+            return self._mock_explanation(prompt, "francais")
+        try:
+            result = self.gateway.chat(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.7,
+                max_tokens=500
+            )
+            return result["content"]
+        except LLMUnavailable as e:
+            print(f"[ERREUR GPT] {e}")
+            return self._mock_explanation(prompt, "francais")
+
 # Test du module
 def test_gpt():
     print("\n" + "="*50)
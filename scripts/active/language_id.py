@@ -0,0 +1,188 @@
+# scripts/language_id.py
+"""
+Identification de langue par n-grammes de caractères (Bayes naïf multinomial)
+- modèle entraîné hors ligne par tools/train_language_id.py -> data/index/language_id_model.json
+- au chargement, les log-probabilités sont regroupées par n-gramme : une seule recherche
+  de dictionnaire par n-gramme, donc un score en O(longueur du texte) ; le vecteur de
+  chaque mot est mis en cache (les mots courants ne sont décomposés qu'une fois)
+- scores calibrés : softmax des log-vraisemblances divisées par une température
+  ajustée en validation croisée à l'entraînement
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_MODEL_PATH = Path(__file__).resolve().parents[2] / "data" / "index" / "language_id_model.json"
+
+# Lettres uniquement : chiffres, ponctuation et symboles mathématiques ne portent pas la langue
+NON_LETTER_RE = re.compile(r"[\W\d_]+", re.UNICODE)
+WORD_CACHE_SIZE = 50000
+
+
+def normalize(text: str) -> str:
+    """Minuscules, apostrophes unifiées, tout ce qui n'est pas une lettre -> espace"""
+    text = unicodedata.normalize("NFC", text.lower()).replace("’", "'")
+    return NON_LETTER_RE.sub(" ", text).strip()
+
+
+def word_ngrams(word: str, ngram_range: Tuple[int, int] = (1, 3)) -> List[str]:
+    """N-grammes de caractères d'un mot bordé d'espaces ('mbote' -> ' m', 'mb', ..., 'te ')"""
+    padded = f" {word} "
+    size = len(padded)
+    grams: List[str] = []
+    for n in range(ngram_range[0], ngram_range[1] + 1):
+        grams.extend([padded[i:i + n] for i in range(size - n + 1)])
+    if ngram_range[0] == 1:
+        grams = [g for g in grams if g != " "]
+    return grams
+
+
+def ngrams(text: str, ngram_range: Tuple[int, int] = (1, 3)) -> List[str]:
+    """N-grammes de tous les mots du texte normalisé"""
+    grams: List[str] = []
+    for word in normalize(text).split():
+        grams.extend(word_ngrams(word, ngram_range))
+    return grams
+
+
+def train(samples: List[Tuple[str, str]], ngram_range: Tuple[int, int] = (1, 3), alpha: float = 0.5,
+          min_count: int = 1) -> Dict:
+    """Entraîne le modèle sur [(texte, langue)] ; temperature=1.0 (calibrée ensuite)"""
+    counts: Dict[str, Dict[str, int]] = {}
+    docs: Dict[str, int] = {}
+    for text, lang in samples:
+        docs[lang] = docs.get(lang, 0) + 1
+        lang_counts = counts.setdefault(lang, {})
+        for gram in ngrams(text, ngram_range):
+            lang_counts[gram] = lang_counts.get(gram, 0) + 1
+
+    languages = sorted(counts)
+    vocabulary = {g for lang_counts in counts.values() for g, c in lang_counts.items() if c >= min_count}
+    size = len(vocabulary) + 1
+    totals = {lang: sum(c for g, c in counts[lang].items() if g in vocabulary) for lang in languages}
+    n_docs = sum(docs.values())
+    return {
+        "version": 1,
+        "ngram_range": list(ngram_range),
+        "alpha": alpha,
+        "languages": languages,
+        "log_priors": [math.log(docs[lang] / n_docs) for lang in languages],
+        "unseen": [math.log(alpha / (totals[lang] + alpha * size)) for lang in languages],
+        "ngrams": {
+            gram: [math.log((counts[lang].get(gram, 0) + alpha) / (totals[lang] + alpha * size))
+                   for lang in languages]
+            for gram in sorted(vocabulary)
+        },
+        "temperature": 1.0,
+    }
+
+
+class LanguageIdentifier:
+    """Modèle compilé : scores(texte) -> {langue: probabilité}"""
+
+    def __init__(self, model: Dict):
+        self.languages: List[str] = model["languages"]
+        self.ngram_range = tuple(model["ngram_range"])
+        self.temperature = float(model.get("temperature", 1.0))
+        self.log_priors = model["log_priors"]
+        unseen = model["unseen"]
+        # Log-probabilités relatives à "n-gramme inconnu" : les n-grammes hors vocabulaire
+        # n'ont pas besoin de recherche, seul leur nombre compte
+        self._ngrams = {
+            gram: tuple(lp - u for lp, u in zip(values, unseen))
+            for gram, values in model["ngrams"].items()
+        }
+        self._unseen = unseen
+        self._zeros = (0.0,) * len(self.languages)
+        # Les mots se répètent d'un message à l'autre ("na", "ya", "de") : score par mot mis en cache
+        self._word_cache: Dict[str, Tuple] = {}
+        self.stats = {"calls": 0}
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_MODEL_PATH) -> "LanguageIdentifier":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _word_vector(self, word: str) -> Tuple[Tuple[float, ...], int, int]:
+        """(somme des log-probabilités relatives, n-grammes lus, n-grammes connus) d'un mot, en cache"""
+        cached = self._word_cache.get(word)
+        if cached is None:
+            table = self._ngrams
+            grams = word_ngrams(word, self.ngram_range)
+            rows = [table[g] for g in grams if g in table]
+            totals = tuple(sum(column) for column in zip(*rows)) if rows else self._zeros
+            cached = (totals, len(grams), len(rows))
+            if len(self._word_cache) >= WORD_CACHE_SIZE:
+                self._word_cache.clear()
+            self._word_cache[word] = cached
+        return cached
+
+    def log_likelihoods(self, text: str) -> Tuple[List[float], int]:
+        """Log-vraisemblances (a priori inclus) et nombre de n-grammes connus lus"""
+        vectors = [self._word_vector(word) for word in normalize(text).split()]
+        if not vectors:
+            return list(self.log_priors), 0
+        totals = [sum(column) for column in zip(*[v[0] for v in vectors])]
+        n = sum(v[1] for v in vectors)
+        seen = sum(v[2] for v in vectors)
+        # Table stockée relativement à "inconnu" : chaque n-gramme lu apporte d'abord la constante inconnue
+        return [t + n * u + p for t, u, p in zip(totals, self._unseen, self.log_priors)], seen
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Probabilités calibrées par langue ({} si le texte ne contient aucune lettre connue)"""
+        self.stats["calls"] += 1
+        log_likelihoods, seen = self.log_likelihoods(text)
+        if not seen:
+            return {}
+        scaled = [ll / self.temperature for ll in log_likelihoods]
+        top = max(scaled)
+        exps = [math.exp(s - top) for s in scaled]
+        total = sum(exps)
+        return {lang: e / total for lang, e in zip(self.languages, exps)}
+
+    def detect(self, text: str, default: str = "fr", min_confidence: float = 0.0) -> Tuple[str, float]:
+        """(langue la plus probable, probabilité), ou (default, 0.0) sous le seuil"""
+        scores = self.scores(text)
+        if not scores:
+            return default, 0.0
+        lang = max(scores, key=scores.get)
+        if scores[lang] < min_confidence:
+            return default, scores[lang]
+        return lang, scores[lang]
+
+
+_identifier: Optional[LanguageIdentifier] = None
+_identifier_loaded = False
+_identifier_lock = threading.Lock()
+
+
+def get_identifier() -> Optional[LanguageIdentifier]:
+    """Modèle partagé (MOTEYI_LANGID_MODEL), None s'il n'a pas encore été entraîné"""
+    global _identifier, _identifier_loaded
+    if not _identifier_loaded:
+        with _identifier_lock:
+            if not _identifier_loaded:
+                path = Path(os.getenv('MOTEYI_LANGID_MODEL', str(DEFAULT_MODEL_PATH)))
+                try:
+                    _identifier = LanguageIdentifier.load(path)
+                    print(f"[LANGID] Modèle chargé ({len(_identifier._ngrams)} n-grammes, "
+                          f"{', '.join(_identifier.languages)})")
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"[LANGID] Modèle indisponible ({path}) : {e}")
+                    _identifier = None
+                _identifier_loaded = True
+    return _identifier
+
+
+if __name__ == "__main__":
+    identifier = get_identifier()
+    if identifier:
+        for sample in ["Mbote ndeko, nasepeli mingi", "Habari yako, karibu sana",
+                       "Comment calculer l'aire?", "What is the capital?", "Tuasakidila bikole", "2 + 3"]:
+            print(f"  {sample!r:35} -> {identifier.detect(sample)}")
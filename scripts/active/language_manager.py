@@ -7,9 +7,43 @@ Sprint Phoenix 72h - Point B
 """
 from datetime import datetime
 import json
+import os
+import re
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 
+from language_id import get_identifier
+from prompt_templates import get_prompts
+
+# Commandes de langue : reconnues seulement dans un message court ("lingala", "je veux le swahili"),
+# jamais au milieu d'une question ("conjugue ce verbe en français")
+COMMAND_MAX_WORDS = 4
+MENU_RE = re.compile(r"\b(?:langues?|languages?|monoko|lugha)\b")
+CHOICE_KEYWORDS = {
+    'francais': 'fr', 'français': 'fr', 'french': 'fr',
+    'lingala': 'ln',
+    'kiswahili': 'sw', 'swahili': 'sw',
+    'tshiluba': 'lu', 'ciluba': 'lu',
+    'english': 'en', 'anglais': 'en'
+}
+CHOICE_RE = re.compile(r"\b(" + "|".join(sorted(CHOICE_KEYWORDS, key=len, reverse=True)) + r")\b")
+
+# Repli si le modèle est absent ou peu sûr : mots caractéristiques, en mots entiers
+INDICATORS = {
+    "ln": ["mbote", "malamu", "naza", "nazali", "ndeko", "kobanga", "koloba"],
+    "sw": ["habari", "karibu", "asante", "tafadhali", "ndiyo", "hapana", "jambo"],
+    "lu": ["moyo", "bimpe", "ndi", "webe", "tshiena", "bualu"],
+    "en": ["hello", "thank", "please", "what", "how", "when", "where"],
+    "fr": ["bonjour", "merci", "comment", "pourquoi", "quelle", "exercice"]
+}
+INDICATOR_RE = re.compile(r"\b(" + "|".join(w for words in INDICATORS.values() for w in words) + r")\b")
+INDICATOR_LANG = {w: lang for lang, words in INDICATORS.items() for w in words}
+MIN_CONFIDENCE = float(os.getenv('MOTEYI_LANGID_MIN_CONF', '0.6'))
+
+
+def is_short_command(message: str) -> bool:
+    return len(message.split()) <= COMMAND_MAX_WORDS
+
 class LanguageManager:
     """Gère la sélection et les préférences de langue des utilisateurs"""
     
@@ -115,25 +149,19 @@ class LanguageManager:
                 codes = list(self.languages.keys())
                 return codes[choice - 1]
         
-        # Vérifier si c'est un nom de langue
-        for code, lang in self.languages.items():
-            if message in lang['name'].lower():
-                return code
-            if message == code:
-                return code
+        # Code exact ("ln") ou début de nom de langue ("fran", "eng")
+        if message in self.languages:
+            return message
+        if len(message) >= 3:
+            for code, lang in self.languages.items():
+                if lang['name'].lower().startswith(message):
+                    return code
         
-        # Mots-clés spécifiques
-        keywords = {
-            'francais': 'fr', 'français': 'fr', 'french': 'fr',
-            'lingala': 'ln',
-            'kiswahili': 'sw', 'swahili': 'sw',
-            'tshiluba': 'lu', 'ciluba': 'lu',
-            'english': 'en', 'anglais': 'en'
-        }
-        
-        for keyword, code in keywords.items():
-            if keyword in message:
-                return code
+        # Mots-clés spécifiques, en mots entiers et dans un message court
+        if is_short_command(message):
+            match = CHOICE_RE.search(message)
+            if match:
+                return CHOICE_KEYWORDS[match.group(1)]
         
         return None
     
@@ -183,31 +211,8 @@ class LanguageManager:
         Returns:
             Instructions pour GPT
         """
-        prompts = {
-            "fr": """Tu es un tuteur pédagogique expert du curriculum de la RDC.
-Réponds en FRANÇAIS avec un vocabulaire adapté au niveau de l'élève.
-Utilise des exemples locaux congolais.""",
-            
-            "ln": """Tu es un tuteur pédagogique expert du curriculum de la RDC.
-RÉPONDS UNIQUEMENT EN LINGALA. Utilise un lingala simple et pédagogique.
-Exemples : Ebale ya Kongo, zandu ya Kinshasa, mboka ya RDC.
-Format de réponse : Explique d'abord, puis donne la réponse.""",
-            
-            "sw": """Tu es un tuteur pédagogique expert du curriculum de la RDC.
-JIBU KWA KISWAHILI TU. Tumia Kiswahili rahisi kwa wanafunzi.
-Mifano : Mto Congo, soko la Lubumbashi, nchi ya DRC.
-Eleza kwanza, kisha toa jibu.""",
-            
-            "lu": """Tu es un tuteur pédagogique expert du curriculum de la RDC.
-RÉPONDS UNIQUEMENT EN TSHILUBA. Utilise un tshiluba simple.
-Tangila malu a ba RDC. Leja bimpe.""",
-            
-            "en": """You are an expert tutor for the DRC curriculum.
-RESPOND IN ENGLISH. Use simple, clear English adapted to the student's level.
-Use local Congolese examples when relevant."""
-        }
-        
-        return prompts.get(language_code, prompts["fr"])
+        # Consignes communes + consignes de langue (config/prompts, voir prompt_templates.py)
+        return get_prompts().system_prompt(language_code)
     
     def format_response_for_language(self, response: str, language_code: str) -> str:
         """
@@ -242,30 +247,28 @@ Use local Congolese examples when relevant."""
         Returns:
             Code de langue détecté
         """
-        text_lower = text.lower()
+        scores = self.detect_language_scores(text)
+        if scores:
+            lang = max(scores, key=scores.get)
+            # Une langue non prise en charge (kikongo) reste signalée : le bot propose alors le menu
+            if scores[lang] >= MIN_CONFIDENCE:
+                return lang
         
-        # Mots caractéristiques par langue
-        indicators = {
-            "ln": ["mbote", "malamu", "naza", "nazali", "ndeko", "kobanga", "koloba"],
-            "sw": ["habari", "karibu", "asante", "tafadhali", "ndiyo", "hapana", "jambo"],
-            "lu": ["moyo", "bimpe", "ndi", "webe", "tshiena", "bualu"],
-            "en": ["hello", "thank", "please", "what", "how", "when", "where"],
-            "fr": ["bonjour", "merci", "comment", "pourquoi", "quelle", "exercice"]
-        }
-        
-        scores = {lang: 0 for lang in indicators}
-        
-        for lang, words in indicators.items():
-            for word in words:
-                if word in text_lower:
-                    scores[lang] += 1
-        
-        # Retourner la langue avec le score le plus élevé
-        if max(scores.values()) > 0:
-            return max(scores, key=scores.get)
+        # Modèle absent ou peu sûr (salutations courtes : "Mbote", "Habari") : mots caractéristiques
+        hits = {}
+        for word in INDICATOR_RE.findall(text.lower()):
+            lang = INDICATOR_LANG[word]
+            hits[lang] = hits.get(lang, 0) + 1
+        if hits:
+            return max(hits, key=hits.get)
         
         return "fr"  # Défaut au français
     
+    def detect_language_scores(self, text: str) -> Dict[str, float]:
+        """Probabilités calibrées par langue (language_id.py), {} si modèle absent ou texte sans lettres"""
+        identifier = get_identifier()
+        return identifier.scores(text) if identifier else {}
+    
     def get_stats(self) -> Dict:
         """Retourne les statistiques d'utilisation des langues"""
         stats = {lang: 0 for lang in self.languages}
@@ -296,7 +299,8 @@ def handle_language_selection(message: str, phone_number: str, lang_manager: Lan
         (True si c'était une sélection de langue, Message de réponse)
     """
     # Vérifier si l'utilisateur demande le menu de langues
-    if any(keyword in message.lower() for keyword in ['langue', 'language', 'monoko', 'lugha']):
+    message_lower = message.lower()
+    if is_short_command(message_lower) and MENU_RE.search(message_lower):
         return True, lang_manager.get_language_menu()
     
     # Vérifier si c'est un choix de langue
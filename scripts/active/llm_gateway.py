@@ -0,0 +1,302 @@
+# scripts/llm_gateway.py
+"""
+Passerelle unique vers l'API OpenAI (GPT texte et Vision)
+- Un seul client partagé (pool de connexions HTTP réutilisé par tous les threads)
+- Sémaphore de concurrence par modèle : un OpenAI lent ne bloque pas tous les workers
+- Deadline par appel, retries avec backoff exponentiel (+ jitter) sur 429 / 5xx / timeouts
+- Disjoncteur par modèle : après N échecs consécutifs du fournisseur (timeouts, connexion,
+  429, 5xx), échec immédiat (LLMUnavailable) pour que l'appelant bascule tout de suite sur
+  son repli (mock, message d'erreur) ; une requête refusée (400...) ne compte pas
+- Métriques par modèle : latences p50/p95, tokens prompt/complétion, erreurs
+
+Configuration (.env) :
+  OPENAI_API_KEY, OPENAI_BASE_URL (optionnel)
+  MOTEYI_LLM_CONCURRENCY=8       appels simultanés max par modèle
+  MOTEYI_LLM_DEADLINE_S=30       budget total d'un appel (retries compris)
+  MOTEYI_LLM_MAX_RETRIES=2
+  MOTEYI_LLM_BREAKER_FAILURES=5  échecs consécutifs avant ouverture du disjoncteur
+  MOTEYI_LLM_BREAKER_RESET_S=30  durée d'ouverture avant un appel d'essai
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+from perf_metrics import LatencyRecorder
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+TRANSPORT_ERRORS = ('APITimeoutError', 'APIConnectionError', 'Timeout', 'ConnectError')
+
+
+class LLMUnavailable(Exception):
+    """Appel LLM impossible (disjoncteur ouvert, saturation, deadline ou retries épuisés)"""
+
+
+class CircuitBreaker:
+    """Disjoncteur simple : fermé -> ouvert après N échecs -> semi-ouvert après reset_s"""
+
+    def __init__(self, failure_threshold: int = 5, reset_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_s = reset_s
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.opened_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_s:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True  # un seul appel d'essai
+                return True
+            return False
+
+    def cancel_trial(self):
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    self.opened_count += 1
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class _ModelState:
+    def __init__(self, concurrency: int, breaker_failures: int, breaker_reset_s: float):
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset_s)
+        self.latency = LatencyRecorder()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.completion_tokens = 0
+        self.retries = 0
+        self.errors: Dict[str, int] = {}
+
+    def count_error(self, kind: str):
+        with self.lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+class LLMGateway:
+    """Point d'entrée unique des appels chat/vision"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 concurrency: Optional[int] = None, deadline_s: Optional[float] = None,
+                 max_retries: Optional[int] = None):
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.base_url = base_url or os.getenv('OPENAI_BASE_URL') or None
+        self.concurrency = concurrency or int(os.getenv('MOTEYI_LLM_CONCURRENCY', '8'))
+        self.deadline_s = deadline_s or float(os.getenv('MOTEYI_LLM_DEADLINE_S', '30'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('MOTEYI_LLM_MAX_RETRIES', '2'))
+        self.breaker_failures = int(os.getenv('MOTEYI_LLM_BREAKER_FAILURES', '5'))
+        self.breaker_reset_s = float(os.getenv('MOTEYI_LLM_BREAKER_RESET_S', '30'))
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._models: Dict[str, _ModelState] = {}
+        self._models_lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key) and self.api_key != 'sk-VOTRE_CLE_ICI'
+
+    @property
+    def client(self):
+        """Client OpenAI partagé, créé à la première utilisation (retries gérés ici, pas par le SDK)"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                          timeout=self.deadline_s, max_retries=0)
+        return self._client
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            with self._models_lock:
+                state = self._models.get(model)
+                if state is None:
+                    state = _ModelState(self.concurrency, self.breaker_failures, self.breaker_reset_s)
+                    self._models[model] = state
+        return state
+
+    @staticmethod
+    def _classify(error: Exception):
+        """(type d'erreur, réessayable ?, délai Retry-After éventuel)"""
+        status = getattr(error, 'status_code', None)
+        if status is not None:
+            retry_after = None
+            response = getattr(error, 'response', None)
+            if response is not None:
+                try:
+                    retry_after = float(response.headers.get('retry-after'))
+                except (TypeError, ValueError):
+                    retry_after = None
+            return f"http_{status}", status in RETRYABLE_STATUS, retry_after
+        name = type(error).__name__
+        if name in TRANSPORT_ERRORS:
+            return name, True, None
+        return name, False, None
+
+    @staticmethod
+    def _provider_failure(error: Exception) -> bool:
+        """Échec imputable au fournisseur (timeout, connexion, 429, 5xx) : compte pour le disjoncteur ;
+        une requête invalide (400, 401, 404...) ne doit pas couper le modèle pour tous les élèves"""
+        status = getattr(error, 'status_code', None)
+        if status is not None:
+            return status in (408, 429) or status >= 500
+        return type(error).__name__ in TRANSPORT_ERRORS
+
+    def chat(self, model: str, messages: List[Dict], max_tokens: int = 200,
+             temperature: float = 0.7, deadline_s: Optional[float] = None) -> Dict:
+        """
+        Appel chat/vision borné
+        Retourne {"content", "model", "prompt_tokens", "cached_tokens", "completion_tokens",
+                  "finish_reason", "latency_ms", "attempts"}
+        Lève LLMUnavailable si l'appel n'a pas pu aboutir
+        """
+        if not self.configured:
+            raise LLMUnavailable("clé OpenAI non configurée")
+
+        state = self._state(model)
+        if not state.breaker.allow():
+            state.count_error("circuit_open")
+            raise LLMUnavailable(f"disjoncteur ouvert pour {model}")
+
+        deadline = time.monotonic() + (deadline_s or self.deadline_s)
+        remaining = deadline - time.monotonic()
+        if not state.semaphore.acquire(timeout=max(remaining, 0)):
+            state.count_error("saturated")
+            # Pas un échec du fournisseur : on libère l'éventuel appel d'essai
+            state.breaker.cancel_trial()
+            raise LLMUnavailable(f"{model} saturé ({self.concurrency} appels en cours)")
+
+        with state.lock:
+            state.in_flight += 1
+        t0 = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    state.count_error("deadline")
+                    state.breaker.record_failure()
+                    raise LLMUnavailable(f"deadline dépassée pour {model}")
+                try:
+                    response = self.client.chat.completions.create(
+                        model=model, messages=messages, max_tokens=max_tokens,
+                        temperature=temperature, timeout=remaining,
+                    )
+                except Exception as e:
+                    kind, retryable, retry_after = self._classify(e)
+                    state.count_error(kind)
+                    backoff = retry_after if retry_after is not None else min(8.0, 0.5 * (2 ** (attempt - 1)))
+                    backoff *= random.uniform(0.8, 1.2)
+                    if not retryable or attempt > self.max_retries or time.monotonic() + backoff >= deadline:
+                        if self._provider_failure(e):
+                            state.breaker.record_failure()
+                        else:
+                            state.breaker.cancel_trial()
+                        raise LLMUnavailable(f"{model}: {kind} ({e})") from e
+                    with state.lock:
+                        state.retries += 1
+                    print(f"[LLM] {model}: {kind}, nouvel essai dans {backoff:.1f}s")
+                    time.sleep(backoff)
+                    continue
+
+                latency_ms = (time.perf_counter() - t0) * 1000
+                state.breaker.record_success()
+                state.latency.record(latency_ms)
+                usage = getattr(response, 'usage', None)
+                prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+                completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+                # Préfixe servi depuis le cache du fournisseur (prompts système identiques)
+                details = getattr(usage, 'prompt_tokens_details', None)
+                cached_tokens = getattr(details, 'cached_tokens', 0) or 0
+                with state.lock:
+                    state.prompt_tokens += prompt_tokens
+                    state.cached_prompt_tokens += cached_tokens
+                    state.completion_tokens += completion_tokens
+                choice = response.choices[0]
+                return {
+                    "content": choice.message.content or "",
+                    "model": model,
+                    "prompt_tokens": prompt_tokens,
+                    "cached_tokens": cached_tokens,
+                    "completion_tokens": completion_tokens,
+                    "finish_reason": getattr(choice, 'finish_reason', None),
+                    "latency_ms": latency_ms,
+                    "attempts": attempt,
+                }
+        except LLMUnavailable:
+            state.latency.record((time.perf_counter() - t0) * 1000, error=True)
+            raise
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+            state.semaphore.release()
+
+    def get_stats(self) -> Dict:
+        """Métriques par modèle"""
+        stats = {}
+        for model, state in list(self._models.items()):
+            with state.lock:
+                counters = {
+                    "in_flight": state.in_flight,
+                    "prompt_tokens": state.prompt_tokens,
+                    "cached_prompt_tokens": state.cached_prompt_tokens,
+                    "completion_tokens": state.completion_tokens,
+                    "retries": state.retries,
+                    "errors": dict(state.errors),
+                }
+            stats[model] = {
+                **counters,
+                "latency": state.latency.summary(),
+                "breaker": state.breaker.state,
+                "breaker_opened": state.breaker.opened_count,
+            }
+        return stats
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Passerelle partagée par tout le processus"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
@@ -0,0 +1,822 @@
+# scripts/math_solver.py
+"""
+Solveur mathématique local - réponse en quelques millisecondes, sans OpenAI
+- Analyseur d'expressions sûr (descente récursive, aucun eval)
+- Arithmétique exacte en rationnels (fractions.Fraction)
+- Calculs, équations du premier degré, équations du second degré
+  (discriminant, ou forme (x - a)² = b)
+- Explications étape par étape à partir de gabarits, en fr / ln / sw / lu / en
+  (gabarit manquant dans la langue de l'élève : None, GPT répond dans sa langue)
+
+Tout ce que le solveur ne sait pas traiter (problèmes rédigés, plusieurs
+inconnues, degré > 2...) retourne None : le bot passe alors par GPT.
+"""
+
+import math
+import re
+import threading
+import time
+from fractions import Fraction
+from typing import Dict, Optional
+
+MAX_INPUT_CHARS = 200
+MAX_EXPONENT = 6
+MAX_DIGITS = 15
+
+TOKEN_RE = re.compile(r"""
+    (?P<num>\d+(?:[.,]\d+)?)
+  | (?P<var>(?<![^\W\d_²³])[xyzXYZ](?![^\W\d_²³]))
+  | (?P<op>[+\-−–*/×÷·^²])
+  | (?P<lpar>\()
+  | (?P<rpar>\))
+  | (?P<eq>=)
+  | (?P<q>\?)
+  | (?P<word>[^\W\d_²³]+(?:['’][^\W\d_²³]+)?)
+  | (?P<ws>\s+)
+  | (?P<other>.)
+""", re.VERBOSE)
+
+MATH_KINDS = {"num", "var", "op", "lpar", "rpar", "eq", "q", "ws"}
+# Ponctuation tolérée entre consigne et expression ; tout autre symbole (%, €, $...) -> GPT
+SEPARATORS = set(":.,;!«»\"'’")
+DIVISION_COLON_RE = re.compile(r"(\d)\s*:\s*(\d)")
+# Numéro d'exercice en tête (« Exercice 2 : », « Question 3. », « Zoezi 1) ») : retiré, jamais une division
+LABEL_WORDS = r"exercices?|exercises?|questions?|probl[eè]mes?|zoezi|swali|n[°o]"
+LEADING_LABEL_RE = re.compile(rf"^\s*(?:{LABEL_WORDS})\s*\d+\s*(?:[:)]|\.(?!\d))", re.IGNORECASE)
+LABEL_NUMBER_RE = re.compile(rf"\b(?:{LABEL_WORDS})\s*\d", re.IGNORECASE)
+
+# Mots de consigne tolérés autour de l'expression (sinon : problème rédigé -> GPT)
+INSTRUCTION_WORDS = {
+    # fr
+    "calcule", "calculer", "calculez", "résous", "résoudre", "résolvez", "resous", "resoudre",
+    "effectue", "effectuer", "effectuez", "trouve", "trouver", "trouvez", "détermine", "déterminer",
+    "combien", "font", "fait", "égal", "égale", "quel", "quelle", "est", "la", "le", "valeur", "de",
+    "l'équation", "équation", "equation", "opération", "l'opération", "exercice", "et", "donne",
+    "simplifie", "résultat", "le résultat", "svp", "stp",
+    # en
+    "solve", "calculate", "compute", "find", "what", "is", "the", "value", "of", "equals", "please",
+    # ln
+    "tanga", "mituya", "sala", "kosala", "luka", "pesa", "ezali", "boni", "kokabola", "na",
+    # sw
+    "hesabu", "tatua", "tafuta", "ni", "ngapi", "jibu", "thamani", "ya",
+    # lu
+    "bala", "enza", "kebesha", "nshi",
+}
+
+OPERATOR_SYMBOLS = {"+": "+", "-": "-", "−": "-", "–": "-", "*": "×", "×": "×", "·": "×",
+                    "/": "÷", "÷": "÷", "^": "^", "²": "²"}
+
+
+class UnsupportedProblem(Exception):
+    """Exercice hors de portée du solveur local (on passera par GPT)"""
+
+
+# ---------- Polynômes d'une variable (degré <= 2), coefficients rationnels ----------
+
+class Poly:
+    __slots__ = ("c",)
+
+    def __init__(self, coeffs=None):
+        self.c = {d: v for d, v in (coeffs or {}).items() if v != 0}
+
+    @classmethod
+    def const(cls, value):
+        return cls({0: Fraction(value)})
+
+    @property
+    def degree(self):
+        return max(self.c, default=0)
+
+    @property
+    def is_const(self):
+        return self.degree == 0
+
+    def value(self):
+        return self.c.get(0, Fraction(0))
+
+    def coef(self, d):
+        return self.c.get(d, Fraction(0))
+
+    def __add__(self, other):
+        out = dict(self.c)
+        for d, v in other.c.items():
+            out[d] = out.get(d, 0) + v
+        return Poly(out)
+
+    def __neg__(self):
+        return Poly({d: -v for d, v in self.c.items()})
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __mul__(self, other):
+        out = {}
+        for d1, v1 in self.c.items():
+            for d2, v2 in other.c.items():
+                out[d1 + d2] = out.get(d1 + d2, 0) + v1 * v2
+        poly = Poly(out)
+        if poly.degree > 2:
+            raise UnsupportedProblem("degré > 2")
+        return poly
+
+    def evaluate(self, x):
+        return sum((v * x ** d for d, v in self.c.items()), Fraction(0))
+
+
+# ---------- Analyse syntaxique ----------
+
+def _tokenize(text: str):
+    text = LEADING_LABEL_RE.sub(" ", text)
+    if LABEL_NUMBER_RE.search(text):
+        # « l'exercice 2 : 5 + 3 », « Exercice 2.5 + 3 » : numéro ou opérande ? -> GPT
+        raise UnsupportedProblem("numéro d'exercice ambigu")
+    text = DIVISION_COLON_RE.sub(r"\1÷\2", text)
+    return [(m.lastgroup, m.group()) for m in TOKEN_RE.finditer(text)]
+
+
+def math_tokens(text: str):
+    """Nombres, variables, opérateurs, parenthèses et « = » dans l'ordre, normalisés
+    ("2X + 3 = 11" -> 2 x + 3 = 11) ; sert à comparer deux transcriptions d'un exercice"""
+    tokens = []
+    for m in TOKEN_RE.finditer(text):
+        kind, value = m.lastgroup, m.group()
+        if kind == "num":
+            tokens.append(value.replace(",", "."))
+        elif kind == "var":
+            tokens.append(value.lower())
+        elif kind == "op":
+            tokens.append(OPERATOR_SYMBOLS[value])
+        elif kind in ("lpar", "rpar", "eq"):
+            tokens.append(value)
+    for i in range(1, len(tokens) - 1):
+        if tokens[i] == "x" and tokens[i - 1][0].isdigit() and tokens[i + 1][0].isdigit():
+            tokens[i] = "×"  # « 3 x 4 »
+    return tuple(tokens)
+
+
+def extract_expression(text: str):
+    """
+    Isole l'unique segment mathématique du texte et vérifie que le reste n'est
+    qu'une consigne (« Calcule », « Résous : », « Hesabu: »...)
+    Retourne la liste de jetons (sans espaces) ou lève UnsupportedProblem
+    """
+    if len(text) > MAX_INPUT_CHARS:
+        raise UnsupportedProblem("texte trop long")
+    runs, current, words = [], [], []
+    for kind, value in _tokenize(text):
+        if kind in MATH_KINDS:
+            if kind != "ws":
+                current.append((kind, value))
+            continue
+        if current:
+            runs.append(current)
+            current = []
+        if kind == "word":
+            words.append(value.lower())
+        elif value not in SEPARATORS:
+            raise UnsupportedProblem(f"symbole non pris en charge {value!r}")
+    if current:
+        runs.append(current)
+
+    math_runs = [r for r in runs if any(k == "num" for k, _ in r)]
+    if len(math_runs) != 1:
+        raise UnsupportedProblem("aucun ou plusieurs segments")
+    run = math_runs[0]
+    # « 9 x 8 », « 2 x 3 x 4 » : un x seul entre deux nombres est un signe de multiplication
+    tokens = [("op", "×") if k == "var" and v in "xX" and 0 < i < len(run) - 1
+              and run[i - 1][0] == "num" and run[i + 1][0] == "num" else (k, v)
+              for i, (k, v) in enumerate(run)]
+    if not any(k in ("op", "eq") for k, _ in tokens):
+        raise UnsupportedProblem("pas d'opération")
+    # « Trouve x » : la variable isolée est une consigne
+    for other in runs:
+        if other is not run and any(k not in ("var", "q") for k, _ in other):
+            raise UnsupportedProblem("segment parasite")
+    if any(w not in INSTRUCTION_WORDS for w in words):
+        raise UnsupportedProblem("problème rédigé")
+    return tokens
+
+
+class _Parser:
+    """
+    expr   := term (('+'|'-') term)*
+    term   := unary (('×'|'÷'|implicite) unary)*
+    unary  := ('-'|'+') unary | power
+    power  := atom ('^' entier | '²')?   (2^3^2 : puissances enchaînées refusées -> GPT)
+    atom   := nombre | variable | '(' expr ')'
+    Nœuds : ("num", q) ("var", nom) ("neg", a) ("bin", op, a, b) ("pow", a, n) ("par", a)
+    """
+
+    def __init__(self, tokens, times_letter=False):
+        self.tokens = tokens
+        self.pos = 0
+        self.times_letter = times_letter
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.expr()
+        if self.pos != len(self.tokens):
+            raise UnsupportedProblem(f"jeton inattendu {self.peek()[1]!r}")
+        return node
+
+    def _is_times_letter(self):
+        kind, _ = self.peek()
+        if kind != "var" or not self.times_letter:
+            return False
+        prev_kind = self.tokens[self.pos - 1][0] if self.pos else None
+        next_kind = self.tokens[self.pos + 1][0] if self.pos + 1 < len(self.tokens) else None
+        return prev_kind in ("num", "rpar") and next_kind in ("num", "lpar")
+
+    def expr(self):
+        node = self.term()
+        while True:
+            kind, value = self.peek()
+            if kind == "op" and OPERATOR_SYMBOLS[value] in "+-":
+                self.take()
+                node = ("bin", OPERATOR_SYMBOLS[value], node, self.term())
+            else:
+                return node
+
+    def term(self):
+        node = self.unary()
+        while True:
+            kind, value = self.peek()
+            if kind == "op" and OPERATOR_SYMBOLS[value] in "×÷":
+                self.take()
+                node = ("bin", OPERATOR_SYMBOLS[value], node, self.unary())
+            elif self._is_times_letter():
+                self.take()
+                node = ("bin", "×", node, self.unary())
+            elif kind in ("var", "lpar") or (kind == "num" and self.tokens[self.pos - 1][0] == "rpar"):
+                # Multiplication implicite : 2x, 3(x + 1), (x + 1)(x - 1), (x + 1)2 refusé plus bas
+                if kind == "num":
+                    raise UnsupportedProblem("nombre après parenthèse")
+                node = ("bin", "×", node, self.unary(), "implicite")
+            else:
+                return node
+
+    def unary(self):
+        kind, value = self.peek()
+        if kind == "op" and OPERATOR_SYMBOLS[value] in "+-":
+            self.take()
+            inner = self.unary()
+            return ("neg", inner) if OPERATOR_SYMBOLS[value] == "-" else inner
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        while True:
+            kind, value = self.peek()
+            if kind == "op" and value in "²^" and node[0] == "pow":
+                raise UnsupportedProblem("puissances enchaînées")
+            if kind == "op" and value == "²":
+                self.take()
+                node = ("pow", node, 2)
+            elif kind == "op" and value == "^":
+                self.take()
+                exp_kind, exp_value = self.take()
+                if exp_kind != "num" or not exp_value.isdigit() or int(exp_value) > MAX_EXPONENT:
+                    raise UnsupportedProblem("exposant")
+                node = ("pow", node, int(exp_value))
+            else:
+                return node
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == "num":
+            if len(value) > MAX_DIGITS:
+                raise UnsupportedProblem("nombre trop grand")
+            return ("num", Fraction(value.replace(",", ".")))
+        if kind == "var":
+            if self.peek()[0] == "num":
+                raise UnsupportedProblem("x suivi d'un nombre (exposant mal lu ?)")
+            return ("var", value.lower())
+        if kind == "lpar":
+            node = self.expr()
+            if self.take()[0] != "rpar":
+                raise UnsupportedProblem("parenthèse non fermée")
+            return ("par", node)
+        raise UnsupportedProblem(f"jeton inattendu {value!r}")
+
+
+def _variables(node, found=None):
+    found = set() if found is None else found
+    if node[0] == "var":
+        found.add(node[1])
+    for child in node[1:]:
+        if isinstance(child, tuple):
+            _variables(child, found)
+    return found
+
+
+def _to_poly(node) -> Poly:
+    kind = node[0]
+    if kind == "num":
+        return Poly.const(node[1])
+    if kind == "var":
+        return Poly({1: Fraction(1)})
+    if kind == "par":
+        return _to_poly(node[1])
+    if kind == "neg":
+        return -_to_poly(node[1])
+    if kind == "pow":
+        base, result = _to_poly(node[1]), Poly.const(1)
+        for _ in range(node[2]):
+            result = result * base
+        return result
+    op, left, right = node[1], _to_poly(node[2]), _to_poly(node[3])
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "×":
+        return left * right
+    if not right.is_const or right.value() == 0:
+        raise UnsupportedProblem("division par une expression ou par zéro")
+    return left * Poly.const(1 / right.value())
+
+
+# ---------- Mise en forme ----------
+
+def format_number(q: Fraction, language: str = "fr") -> str:
+    """Entier, décimal exact (virgule sauf en anglais) ou fraction p/q"""
+    q = Fraction(q)
+    if q.denominator == 1:
+        return str(q.numerator)
+    den = q.denominator
+    for p in (2, 5):
+        while den % p == 0:
+            den //= p
+    if den == 1:
+        decimals = 0
+        while (q * 10 ** decimals).denominator != 1:
+            decimals += 1
+        if decimals <= 4:
+            text = f"{float(q):.{decimals}f}"
+            return text if language == "en" else text.replace(".", ",")
+    return f"{q.numerator}/{q.denominator}"
+
+
+def _approx(value: float, language: str) -> str:
+    text = f"{value:.2f}"
+    return text if language == "en" else text.replace(".", ",")
+
+
+def render_expression(node, language="fr", parent_prec=0) -> str:
+    kind = node[0]
+    if kind == "num":
+        return format_number(node[1], language)
+    if kind == "var":
+        return node[1]
+    if kind == "par":
+        return f"({render_expression(node[1], language)})"
+    if kind == "neg":
+        return f"-{render_expression(node[1], language, 3)}"
+    if kind == "pow":
+        base = render_expression(node[1], language, 4)
+        return f"{base}²" if node[2] == 2 else f"{base}^{node[2]}"
+    op = node[1]
+    prec = 1 if op in "+-" else 2
+    left = render_expression(node[2], language, prec)
+    right = render_expression(node[3], language, prec + 1)
+    if len(node) > 4:  # multiplication implicite : 2x, 3(x + 1)
+        text = f"{left}{right}"
+    else:
+        text = f"{left} {op} {right}"
+    return f"({text})" if prec < parent_prec else text
+
+
+def render_poly(poly: Poly, var: str, language="fr") -> str:
+    parts = []
+    for d in (2, 1, 0):
+        v = poly.coef(d)
+        if v == 0:
+            continue
+        sign = "-" if v < 0 else "+"
+        mag = abs(v)
+        if d == 0:
+            body = format_number(mag, language)
+        else:
+            body = ("" if mag == 1 else format_number(mag, language)) + var + ("²" if d == 2 else "")
+        parts.append((sign, body))
+    if not parts:
+        return "0"
+    first_sign, first = parts[0]
+    text = ("-" if first_sign == "-" else "") + first
+    for sign, body in parts[1:]:
+        text += f" {sign} {body}"
+    return text
+
+
+# ---------- Gabarits d'explication ----------
+
+# Formules sans texte, communes à toutes les langues
+FORMULAS = {
+    "op": "{a} {op} {b} = {r}",
+    "square": "{a}² = {r}",
+    "power": "{a}^{b} = {r}",
+}
+
+TEMPLATES = {
+    "fr": {
+        "calc_title": "🧮 Calcul : {expr}",
+        "linear_title": "🧮 Équation du premier degré : {expr}",
+        "quadratic_title": "🧮 Équation du second degré : {expr}",
+        "step": "Étape {n} : {text}",
+        "decompose": "On sépare dizaines et unités : {a} = {a_t} + {a_u} et {b} = {b_t} + {b_u}",
+        "tens": "Les dizaines : {a_t} + {b_t} = {t}",
+        "units": "Les unités : {a_u} + {b_u} = {u}",
+        "combine": "On rassemble : {t} + {u} = {total}",
+        "remainder": "{a} ÷ {b} = {q} reste {r} (soit ≈ {approx})",
+        "expand": "On développe et on simplifie : {poly} = 0",
+        "group": "On regroupe les {var} d'un côté et les nombres de l'autre : {lhs} = {rhs}",
+        "divide": "On divise par {a} : {var} = {rhs} ÷ {a} = {x}",
+        "check": "Vérification : avec {var} = {x}, le membre de gauche vaut {l} et le membre de droite {r} ✔",
+        "sqrt_both": "On prend la racine carrée des deux côtés : {inner} = {root} ou {inner} = -{root}",
+        "isolate": "On isole {var} : {var} = {x1} ou {var} = {x2}",
+        "coefficients": "On identifie a = {a}, b = {b}, c = {c}",
+        "delta": "Discriminant : Δ = b² - 4ac = {delta}",
+        "two_roots": "Δ > 0 : deux solutions {var} = (-b ± √Δ) ÷ 2a",
+        "one_root": "Δ = 0 : une seule solution {var} = -b ÷ 2a = {x}",
+        "no_root": "Δ < 0 : pas de solution réelle",
+        "answer": "✅ Réponse : {answer}",
+        "or": " ou ",
+        "none": "aucune solution réelle",
+        "approx": "≈",
+    },
+    "en": {
+        "calc_title": "🧮 Calculation: {expr}",
+        "linear_title": "🧮 Linear equation: {expr}",
+        "quadratic_title": "🧮 Quadratic equation: {expr}",
+        "step": "Step {n}: {text}",
+        "decompose": "Split tens and units: {a} = {a_t} + {a_u} and {b} = {b_t} + {b_u}",
+        "tens": "Tens: {a_t} + {b_t} = {t}",
+        "units": "Units: {a_u} + {b_u} = {u}",
+        "combine": "Put them together: {t} + {u} = {total}",
+        "remainder": "{a} ÷ {b} = {q} remainder {r} (about {approx})",
+        "expand": "Expand and simplify: {poly} = 0",
+        "group": "Move the {var} terms to one side and the numbers to the other: {lhs} = {rhs}",
+        "divide": "Divide by {a}: {var} = {rhs} ÷ {a} = {x}",
+        "check": "Check: with {var} = {x}, the left side is {l} and the right side is {r} ✔",
+        "sqrt_both": "Take the square root of both sides: {inner} = {root} or {inner} = -{root}",
+        "isolate": "Isolate {var}: {var} = {x1} or {var} = {x2}",
+        "coefficients": "Identify a = {a}, b = {b}, c = {c}",
+        "delta": "Discriminant: Δ = b² - 4ac = {delta}",
+        "two_roots": "Δ > 0: two solutions {var} = (-b ± √Δ) ÷ 2a",
+        "one_root": "Δ = 0: one solution {var} = -b ÷ 2a = {x}",
+        "no_root": "Δ < 0: no real solution",
+        "answer": "✅ Answer: {answer}",
+        "or": " or ",
+        "none": "no real solution",
+        "approx": "≈",
+    },
+    "ln": {
+        "calc_title": "🧮 Calcul : {expr}",
+        "linear_title": "🧮 Équation ya degré ya liboso : {expr}",
+        "quadratic_title": "🧮 Équation ya degré ya mibale : {expr}",
+        "step": "Etape {n} : {text}",
+        "decompose": "Kabola bazomi na bamoko : {a} = {a_t} + {a_u} pe {b} = {b_t} + {b_u}",
+        "tens": "Bazomi : {a_t} + {b_t} = {t}",
+        "units": "Bamoko : {a_u} + {b_u} = {u}",
+        "combine": "Sangisa : {t} + {u} = {total}",
+        "remainder": "{a} ÷ {b} = {q} etikali {r} (pene na {approx})",
+        "group": "Tia ba {var} na ngambo moko pe mituya na ngambo mosusu : {lhs} = {rhs}",
+        "divide": "Kabola na {a} : {var} = {rhs} ÷ {a} = {x}",
+        "check": "Tala soki ezali malamu : na {var} = {x}, ngambo ya mwasi ezali {l} pe ya mobali {r} ✔",
+        "sqrt_both": "Zwa racine carrée na ngambo nyonso mibale : {inner} = {root} to {inner} = -{root}",
+        "isolate": "Tika {var} yango moko : {var} = {x1} to {var} = {x2}",
+        "answer": "✅ Eyano : {answer}",
+        "or": " to ",
+        "none": "solution ya solo ezali te",
+    },
+    "sw": {
+        "calc_title": "🧮 Hesabu : {expr}",
+        "linear_title": "🧮 Mlinganyo wa daraja la kwanza : {expr}",
+        "quadratic_title": "🧮 Mlinganyo wa daraja la pili : {expr}",
+        "step": "Hatua {n} : {text}",
+        "decompose": "Tenganisha makumi na mamoja : {a} = {a_t} + {a_u} na {b} = {b_t} + {b_u}",
+        "tens": "Makumi : {a_t} + {b_t} = {t}",
+        "units": "Mamoja : {a_u} + {b_u} = {u}",
+        "combine": "Unganisha : {t} + {u} = {total}",
+        "remainder": "{a} ÷ {b} = {q} baki {r} (karibu {approx})",
+        "group": "Weka {var} upande mmoja na namba upande mwingine : {lhs} = {rhs}",
+        "divide": "Gawanya kwa {a} : {var} = {rhs} ÷ {a} = {x}",
+        "check": "Hakiki : {var} = {x}, upande wa kushoto ni {l} na wa kulia ni {r} ✔",
+        "sqrt_both": "Chukua kipeuo cha pili pande zote mbili : {inner} = {root} au {inner} = -{root}",
+        "isolate": "Tenga {var} : {var} = {x1} au {var} = {x2}",
+        "answer": "✅ Jibu : {answer}",
+        "or": " au ",
+        "none": "hakuna suluhisho halisi",
+    },
+    "lu": {
+        "calc_title": "🧮 Calcul : {expr}",
+        "step": "Etape {n} : {text}",
+        "combine": "Sangisha : {t} + {u} = {total}",
+        "answer": "✅ Diandamuna : {answer}",
+        "or": " anyi ",
+    },
+}
+
+
+def _t(language: str, key: str, **values) -> str:
+    table = TEMPLATES.get(language, TEMPLATES["fr"])
+    return (FORMULAS.get(key) or table[key]).format(**values)
+
+
+def _missing_templates(solution: Dict, language: str):
+    """Gabarits de l'explication absents de la langue (ex. lu : équations non traduites)"""
+    table = TEMPLATES.get(language, TEMPLATES["fr"])
+    needed = {"step", "answer", "or" if solution["answer"] else "none"}
+    needed.add({"calcul_arithmetique": "calc_title", "equation_lineaire": "linear_title",
+                "equation_quadratique": "quadratic_title"}[solution["kind"]])
+    needed.update(key for key, _ in solution["steps"])
+    return sorted(k for k in needed if k not in table and k not in FORMULAS)
+
+
+# ---------- Résolution ----------
+
+class MathSolver:
+    """Résout et explique les exercices simples ; solve() retourne None sinon"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {"solved": 0, "fallback": 0, "by_kind": {}}
+
+    def solve(self, text: str) -> Optional[Dict]:
+        """
+        Retourne {"kind", "expression", "steps": [(clé, valeurs)], "answer": [...]}
+        (les étapes restent indépendantes de la langue) ou None
+        """
+        try:
+            tokens = extract_expression(text)
+            solution = self._solve_tokens(tokens)
+        except (UnsupportedProblem, ZeroDivisionError, OverflowError, ValueError) as e:
+            with self._lock:
+                self.stats["fallback"] += 1
+            print(f"[MATH] Non résolu localement ({e}) -> GPT")
+            return None
+        with self._lock:
+            self.stats["solved"] += 1
+            self.stats["by_kind"][solution["kind"]] = self.stats["by_kind"].get(solution["kind"], 0) + 1
+        return solution
+
+    def _solve_tokens(self, tokens) -> Dict:
+        kinds = [k for k, _ in tokens]
+        eq_count = kinds.count("eq")
+        if eq_count > 1:
+            raise UnsupportedProblem("plusieurs signes =")
+        if eq_count == 1:
+            i = kinds.index("eq")
+            left, right = tokens[:i], [t for t in tokens[i + 1:] if t[0] != "q"]
+        else:
+            left, right = [t for t in tokens if t[0] != "q"], []
+        if not left:
+            raise UnsupportedProblem("membre de gauche vide")
+
+        if not right:
+            # Calcul : un « x » entre deux nombres est un signe de multiplication
+            node = _Parser(left, times_letter=True).parse()
+            if _variables(node):
+                raise UnsupportedProblem("expression littérale sans équation")
+            return self._arithmetic(node)
+
+        left_node = _Parser(left).parse()
+        right_node = _Parser(right).parse()
+        variables = _variables(left_node) | _variables(right_node)
+        if not variables:
+            # « 25 + 17 = 42 » : vérification d'un calcul, laissée à GPT
+            raise UnsupportedProblem("égalité sans inconnue")
+        if len(variables) > 1:
+            raise UnsupportedProblem("plusieurs inconnues")
+        var = variables.pop()
+        poly = _to_poly(left_node) - _to_poly(right_node)
+        if poly.degree == 1:
+            return self._linear(left_node, right_node, poly, var)
+        if poly.degree == 2:
+            return self._quadratic(left_node, right_node, poly, var)
+        raise UnsupportedProblem("équation sans inconnue après simplification")
+
+    def _arithmetic(self, node) -> Dict:
+        steps = []
+
+        def evaluate(n):
+            kind = n[0]
+            if kind == "num":
+                return n[1]
+            if kind == "par":
+                return evaluate(n[1])
+            if kind == "neg":
+                return -evaluate(n[1])
+            if kind == "pow":
+                base = evaluate(n[1])
+                if abs(base) > 10 ** 6:
+                    raise UnsupportedProblem("puissance trop grande")
+                result = base ** n[2]
+                if n[2] == 2:
+                    steps.append(("square", {"a": base, "r": result}))
+                else:
+                    steps.append(("power", {"a": base, "b": n[2], "r": result}))
+                return result
+            op, a, b = n[1], evaluate(n[2]), evaluate(n[3])
+            if op == "+":
+                r = a + b
+            elif op == "-":
+                r = a - b
+            elif op == "×":
+                r = a * b
+            else:
+                r = a / b
+            steps.append(("op", {"a": a, "op": op, "b": b, "r": r}))
+            return r
+
+        result = evaluate(node)
+        # Addition de deux entiers positifs : méthode dizaines / unités (primaire)
+        if len(steps) == 1 and steps[0][0] == "op":
+            s = steps[0][1]
+            a, b = s["a"], s["b"]
+            is_int = all(v.denominator == 1 and v >= 0 for v in (a, b))
+            if s["op"] == "+" and is_int and 10 <= a < 100 and 10 <= b < 100:
+                a_t, a_u, b_t, b_u = a // 10 * 10, a % 10, b // 10 * 10, b % 10
+                steps = [
+                    ("decompose", {"a": a, "b": b, "a_t": a_t, "a_u": a_u, "b_t": b_t, "b_u": b_u}),
+                    ("tens", {"a_t": a_t, "b_t": b_t, "t": a_t + b_t}),
+                    ("units", {"a_u": a_u, "b_u": b_u, "u": a_u + b_u}),
+                    ("combine", {"t": a_t + b_t, "u": a_u + b_u, "total": result}),
+                ]
+            elif s["op"] == "÷" and is_int and result.denominator != 1:
+                steps = [("remainder", {"a": a, "b": b, "q": a // b, "r": a % b, "approx": float(result)})]
+        return {"kind": "calcul_arithmetique", "expression": node, "steps": steps, "answer": [result]}
+
+    def _linear(self, left_node, right_node, poly: Poly, var: str) -> Dict:
+        a, b = poly.coef(1), poly.coef(0)
+        x = -b / a
+        steps = [("group", {"var": var, "lhs": Poly({1: a}), "rhs": -b})]
+        if a != 1:
+            steps.append(("divide", {"var": var, "a": a, "rhs": -b, "x": x}))
+        steps.append(("check", {"var": var, "x": x, "l": _to_poly(left_node).evaluate(x),
+                                "r": _to_poly(right_node).evaluate(x)}))
+        return {"kind": "equation_lineaire", "expression": ("eq", left_node, right_node),
+                "var": var, "steps": steps, "answer": [x]}
+
+    def _quadratic(self, left_node, right_node, poly: Poly, var: str) -> Dict:
+        expression = ("eq", left_node, right_node)
+        a, b, c = poly.coef(2), poly.coef(1), poly.coef(0)
+
+        # Forme (x - p)² = k : racine carrée des deux côtés
+        inner = left_node[1] if left_node[0] == "pow" and left_node[2] == 2 else None
+        if inner is not None and inner[0] == "par":
+            inner = inner[1]
+        right = _to_poly(right_node)
+        if inner is not None and right.is_const and _to_poly(inner).degree == 1:
+            k = right.value()
+            root = _rational_sqrt(k)
+            if root is not None:
+                lin = _to_poly(inner)
+                m, p = lin.coef(1), lin.coef(0)
+                x1, x2 = (root - p) / m, (-root - p) / m
+                answers = [x1] if x1 == x2 else [x1, x2]
+                steps = [
+                    ("sqrt_both", {"inner": inner, "root": root}),
+                    ("isolate", {"var": var, "x1": x1, "x2": x2}),
+                ] + [("check", {"var": var, "x": x, "l": _to_poly(left_node).evaluate(x),
+                                "r": right.evaluate(x)}) for x in answers]
+                return {"kind": "equation_quadratique", "expression": expression,
+                        "var": var, "steps": steps, "answer": answers}
+
+        delta = b * b - 4 * a * c
+        steps = [("expand", {"poly": poly, "var": var}),
+                 ("coefficients", {"a": a, "b": b, "c": c}),
+                 ("delta", {"delta": delta})]
+        if delta < 0:
+            steps.append(("no_root", {}))
+            answers = []
+        elif delta == 0:
+            x = -b / (2 * a)
+            steps.append(("one_root", {"var": var, "x": x}))
+            answers = [x]
+        else:
+            steps.append(("two_roots", {"var": var}))
+            root = _rational_sqrt(delta)
+            if root is not None:
+                answers = sorted({(-b + root) / (2 * a), (-b - root) / (2 * a)}, reverse=True)
+                steps.append(("isolate", {"var": var, "x1": answers[0], "x2": answers[1]}))
+            else:
+                r = math.sqrt(delta)
+                answers = [float((-b + Fraction(r)) / (2 * a)), float((-b - Fraction(r)) / (2 * a))]
+                steps.append(("isolate", {"var": var, "x1": answers[0], "x2": answers[1]}))
+        return {"kind": "equation_quadratique", "expression": expression,
+                "var": var, "steps": steps, "answer": answers}
+
+    # ---------- Rendu ----------
+
+    def explain(self, solution: Dict, language: str = "fr") -> Optional[str]:
+        """Explication dans la langue, ou None si un gabarit n'y est pas traduit"""
+        if _missing_templates(solution, language):
+            return None
+
+        def fmt(v):
+            if isinstance(v, Poly):
+                return render_poly(v, solution.get("var", "x"), language)
+            if isinstance(v, tuple):
+                return render_expression(v, language)
+            if isinstance(v, float):
+                return f"{TEMPLATES['fr']['approx']} {_approx(v, language)}"
+            if isinstance(v, Fraction):
+                return format_number(v, language)
+            return str(v)
+
+        def fmt_answer(v):
+            text = fmt(v)
+            if isinstance(v, Fraction) and "/" in text:
+                text += f" {TEMPLATES['fr']['approx']} {_approx(float(v), language)}"
+            return text
+
+        expression = solution["expression"]
+        if expression[0] == "eq":
+            expr_text = f"{render_expression(expression[1], language)} = {render_expression(expression[2], language)}"
+        else:
+            expr_text = render_expression(expression, language)
+        title_key = {"calcul_arithmetique": "calc_title", "equation_lineaire": "linear_title",
+                     "equation_quadratique": "quadratic_title"}[solution["kind"]]
+
+        lines = [_t(language, title_key, expr=expr_text), ""]
+        for n, (key, values) in enumerate(solution["steps"], 1):
+            rendered = {k: (_approx(v, language) if k == "approx" else fmt(v)) for k, v in values.items()}
+            lines.append(_t(language, "step", n=n, text=_t(language, key, **rendered)))
+
+        if solution["answer"]:
+            var = solution.get("var")
+            parts = [f"{var} = {fmt_answer(x)}" if var else fmt_answer(x) for x in solution["answer"]]
+            answer = _t(language, "or").join(parts)
+        else:
+            answer = _t(language, "none")
+        lines += ["", _t(language, "answer", answer=answer)]
+        return "\n".join(lines).replace("= ≈", "≈")
+
+    def solve_and_explain(self, text: str, language: str = "fr") -> Optional[str]:
+        t0 = time.perf_counter()
+        solution = self.solve(text)
+        if solution is None:
+            return None
+        explanation = self.explain(solution, language)
+        if explanation is None:
+            with self._lock:
+                self.stats["solved"] -= 1
+                self.stats["fallback"] += 1
+                self.stats["by_kind"][solution["kind"]] -= 1
+            print(f"[MATH] Gabarits {language} manquants ({', '.join(_missing_templates(solution, language))}) -> GPT")
+            return None
+        print(f"[MATH] Résolu localement ({solution['kind']}) en {(time.perf_counter() - t0) * 1000:.2f} ms")
+        return explanation
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            total = self.stats["solved"] + self.stats["fallback"]
+            return {**self.stats, "by_kind": dict(self.stats["by_kind"]),
+                    "local_rate": round(self.stats["solved"] / total, 3) if total else 0.0}
+
+
+def _rational_sqrt(q: Fraction) -> Optional[Fraction]:
+    """Racine carrée exacte d'un rationnel positif, ou None"""
+    if q < 0:
+        return None
+    n, d = math.isqrt(q.numerator), math.isqrt(q.denominator)
+    if n * n == q.numerator and d * d == q.denominator:
+        return Fraction(n, d)
+    return None
+
+
+_solver = None
+
+
+def get_solver() -> MathSolver:
+    global _solver
+    if _solver is None:
+        _solver = MathSolver()
+    return _solver
+
+
+if __name__ == "__main__":
+    samples = [
+        ("25 + 17 = ?", "fr"), ("25 + 17 = ?", "ln"), ("Hesabu: 9 x 8 = ?", "sw"), ("9 x 8", "fr"),
+        ("2 x 3 x 4", "en"), ("5² + 2^3", "fr"), ("Exercice 2: 2x + 3 = 11", "fr"), ("Exercice 2 : 5 + 3", "fr"),
+        ("100 - 25 %", "fr"), ("Calcule 37 + 25.", "fr"), ("2^3^2 = ?", "fr"), ("2x + 3 = 11", "lu"),
+        ("Calcule 348 - 129", "fr"), ("7 x 6 + 12 = ?", "en"), ("500 : 3", "fr"),
+        ("2x + 3 = 11", "fr"), ("Résous : 3x - 7 = 2x + 5", "fr"), ("(x - 2)² = 49", "fr"),
+        ("(x-2)² = 49", "ln"), ("2x² + 3x - 5 = 0", "fr"), ("x² + x + 1 = 0", "en"),
+        ("x² - 2 = 0", "fr"),
+        ("Quelle est la capitale de la RDC ?", "fr"),
+        ("Maman achète 6 mangues à 250 FC. Combien paie-t-elle ?", "fr"),
+    ]
+    solver = get_solver()
+    for text, lang in samples:
+        print(f"\n>>> [{lang}] {text}")
+        print(solver.solve_and_explain(text, lang))
+    print(solver.get_stats())
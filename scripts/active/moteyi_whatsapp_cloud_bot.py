@@ -1,9 +1,18 @@
 # scripts/moteyi_whatsapp_cloud_bot.py
 import sys
+import time
+_IMPORT_T0 = time.perf_counter()
 """
 Bot Moteyi avec WhatsApp Cloud API - Version 2.0
 Avec support Multilingue (FR, Lingala, Kiswahili, Tshiluba, EN) et RAG intégré
 Sprint Phoenix 72h - Points A & B validés
+
+Lancement:
+    python -X utf8 scripts/active/moteyi_whatsapp_cloud_bot.py          (dev, Flask)
+    gunicorn -w 4 --chdir scripts/active "moteyi_whatsapp_cloud_bot:create_app()"
+
+L'import du module reste léger : OCR, GPT, TTS, RAG et Flask ne sont chargés
+qu'à la première utilisation (ou par le préchauffage lancé par create_app()).
 """
 
 import os
@@ -11,133 +20,238 @@ import requests
 import json
 import base64
 import re
-from flask import Flask, request, jsonify
+import threading
 from dotenv import load_dotenv
 import logging
 from datetime import datetime
 
-# Nos modules existants
-from ocr_vision import VisionOCR as RealOCR
-from gpt_real import RealGPT  
-from tts_real import RealTTS
-from ocr_vision import VisionOCR as RealOCR  # Upgraded to GPT-4 Vision
-
-# NOUVEAUX MODULES - Multilingue et RAG
+# NOUVEAUX MODULES - Multilingue et RAG (stdlib uniquement, import léger)
 from language_manager import LanguageManager, handle_language_selection
 from rag_connector import CongoRAGConnector
+from math_solver import get_solver
+from speech_text import get_normalizer
+from prompt_templates import get_prompts
+from token_budget import get_budget
+from audio_encoder import get_encoder, mime_type_for
+from storage_manager import get_storage
+from outbound import OutboundComposer, get_outbound_stats, split_message
+from send_scheduler import SendResult, get_scheduler
+from dead_letter import get_dead_letters
+from single_flight import content_key, file_key, get_flight, get_single_flight_stats
+from semantic_cache import get_semantic_cache
+from answer_bank import get_answer_bank
 
 
-# ========== MATH LOGIC ENHANCEMENT - Point A.2 ==========
-def detect_math_type(text):
-    """Détecte le type de problème mathématique"""
-    text_lower = text.lower()
-    
-    if any(p in text_lower for p in ['(', ')', '²', 'second degré']):
-        if '²' in text or '^2' in text:
-            return 'equation_quadratique'
-    elif '=' in text and any(c in text for c in 'xyz'):
-        return 'equation_lineaire'
-    elif any(op in text for op in ['+', '-', '*', '/', '×', '÷']):
-        return 'calcul_arithmetique'
+# Charger les variables
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+
+# Configuration
+PHONE_NUMBER_ID = os.getenv('WHATSAPP_PHONE_NUMBER_ID')
+ACCESS_TOKEN = os.getenv('WHATSAPP_ACCESS_TOKEN')
+VERIFY_TOKEN = os.getenv('WHATSAPP_VERIFY_TOKEN')
+API_VERSION = os.getenv('WHATSAPP_API_VERSION', 'v17.0')
+# Hôte Graph API (surchargeable pour les tests de charge : tools/load_test.py)
+GRAPH_API_URL = (os.getenv('WHATSAPP_GRAPH_URL') or 'https://graph.facebook.com').rstrip('/')
+
+# URL de base pour l'API
+WHATSAPP_API_BASE = f"{GRAPH_API_URL}/{API_VERSION}"
+
+
+
+# ========== SOUS-SYSTÈMES PARESSEUX ==========
+class LazySubsystem:
+    """
+    Sous-système initialisé à la première demande, une seule fois,
+    même si plusieurs threads le demandent en même temps
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._instance = None
+        self._ready = False
+        self.init_ms = None
+        self.error = None
+
+    @property
+    def ready(self):
+        return self._ready
+
+    def get(self):
+        """Retourne l'instance, en la créant au premier appel"""
+        if self._ready:
+            return self._instance
+
+        with self._lock:
+            if not self._ready:
+                t0 = time.perf_counter()
+                try:
+                    self._instance = self._factory()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.init_ms = (time.perf_counter() - t0) * 1000
+                self.error = None
+                self._ready = True
+                print(f"[INIT] {self.name} prêt en {self.init_ms:.0f} ms")
+
+        return self._instance
+
+
+def _make_lang_manager():
+    manager = LanguageManager(default_language="fr")
+    print(f"🌍 Gestionnaire multilingue initialisé")
+    return manager
+
+
+def _make_rag():
+    # auto : index mmap partagé entre workers s'il a été construit
+    # (tools/build_shared_index.py), sinon lecture du manifest
+    backend = os.getenv('MOTEYI_RAG_BACKEND', 'auto')
+    index_path = os.path.join("data", "index", "shared_index.bin")
+    if backend == "shared" or (backend == "auto" and os.path.exists(index_path)):
+        from shared_index import SharedIndexRetriever
+        connector = SharedIndexRetriever(index_path)
     else:
-        return 'general'
+        connector = CongoRAGConnector(base_path="data")
+    print(f"📚 RAG connecté avec {len(connector.documents)} documents")
+    return connector
 
-def create_math_enhanced_prompt(ocr_text, context_rag=None):
-    """Crée un prompt mathématique optimisé"""
-    math_type = detect_math_type(ocr_text)
-    
-    if math_type == 'equation_quadratique':
-        return f"""Tu es un tuteur expert. 
-Exercice: {ocr_text}
 
-Pour (x-a)² = b:
-1. x-a = ±√b
-2. x = a±√b (DEUX solutions)
-3. Vérifie chaque solution
+def _make_bot():
+    return MoteyiCloudBot()
 
-Résous étape par étape."""
-    
-    return f"Résous: {ocr_text}\nMontre toutes les étapes."
-# ========== END MATH ENHANCEMENT ==========
 
+# Ordre = ordre de préchauffage
+SUBSYSTEMS = {
+    "lang_manager": LazySubsystem("lang_manager", _make_lang_manager),
+    "rag": LazySubsystem("rag", _make_rag),
+    "bot": LazySubsystem("bot", _make_bot),
+}
 
-# ========== MATH LOGIC ENHANCEMENT - Point A.2 ==========
-def detect_math_type(text):
-    """Détecte le type de problème mathématique"""
-    text_lower = text.lower()
-    
-    if any(p in text_lower for p in ['(', ')', '²', 'second degré']):
-        if '²' in text or '^2' in text:
-            return 'equation_quadratique'
-    elif '=' in text and any(c in text for c in 'xyz'):
-        return 'equation_lineaire'
-    elif any(op in text for op in ['+', '-', '*', '/', '×', '÷']):
-        return 'calcul_arithmetique'
-    else:
-        return 'general'
 
-def create_math_enhanced_prompt(ocr_text, context_rag=None):
-    """Crée un prompt mathématique optimisé"""
-    math_type = detect_math_type(ocr_text)
-    
-    if math_type == 'equation_quadratique':
-        return f"""Tu es un tuteur expert. 
-Exercice: {ocr_text}
+def get_lang_manager():
+    return SUBSYSTEMS["lang_manager"].get()
 
-Pour (x-a)² = b:
-1. x-a = ±√b
-2. x = a±√b (DEUX solutions)
-3. Vérifie chaque solution
 
-Résous étape par étape."""
-    
-    return f"Résous: {ocr_text}\nMontre toutes les étapes."
-# ========== END MATH ENHANCEMENT ==========
+def get_rag():
+    return SUBSYSTEMS["rag"].get()
 
-# Charger les variables
-load_dotenv()
 
-app = Flask(__name__)
-logging.basicConfig(level=logging.INFO)
+def get_bot():
+    return SUBSYSTEMS["bot"].get()
 
-# Configuration
-PHONE_NUMBER_ID = os.getenv('WHATSAPP_PHONE_NUMBER_ID')
-ACCESS_TOKEN = os.getenv('WHATSAPP_ACCESS_TOKEN')
-VERIFY_TOKEN = os.getenv('WHATSAPP_VERIFY_TOKEN')
-API_VERSION = os.getenv('WHATSAPP_API_VERSION', 'v17.0')
 
-# URL de base pour l'API
-WHATSAPP_API_BASE = f"https://graph.facebook.com/{API_VERSION}"
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+_warmup_done = threading.Event()
+
+
+def _warm_up():
+    for subsystem in SUBSYSTEMS.values():
+        try:
+            subsystem.get()
+        except Exception as e:
+            print(f"[ERROR] Préchauffage {subsystem.name} échoué: {e}")
+    _warmup_done.set()
+
+
+def start_warmup():
+    """Lance (une seule fois par processus) le préchauffage en arrière-plan"""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm_up, name="moteyi-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+
+def readiness():
+    """État de préparation : prêt seulement quand le préchauffage est terminé sans erreur"""
+    subsystems = {
+        name: {"ready": s.ready, "init_ms": round(s.init_ms, 1) if s.init_ms else None, "error": s.error}
+        for name, s in SUBSYSTEMS.items()
+    }
+    ready = _warmup_done.is_set() and all(s.ready for s in SUBSYSTEMS.values())
+    return {
+        "ready": ready,
+        "warmup_done": _warmup_done.is_set(),
+        "import_ms": round(IMPORT_TIME_MS, 1),
+        "subsystems": subsystems,
+    }
+
+
+def collect_metrics():
+    """Métriques d'exécution des composants partagés (exposées sur /metrics)"""
+    from llm_gateway import get_gateway
+    metrics = {
+        "llm": get_gateway().get_stats(),
+        "math_solver": get_solver().get_stats(),
+        "prompts": get_prompts().get_stats(),
+        "token_budget": get_budget().get_stats(),
+        "audio": get_encoder().get_stats(),
+        "storage": get_storage().get_stats(),
+        "outbound": get_outbound_stats(),
+        "send_scheduler": get_scheduler().get_stats(),
+        "dead_letters": get_dead_letters().get_stats(),
+        "single_flight": get_single_flight_stats(),
+        "semantic_cache": get_semantic_cache().get_stats() if get_semantic_cache() else None,
+        "answer_bank": get_answer_bank().get_stats() if get_answer_bank() else None,
+    }
+    if SUBSYSTEMS["bot"].ready:
+        bot = get_bot()
+        for name, component in (("ocr", bot.ocr), ("tts", bot.tts)):
+            if hasattr(component, 'get_stats'):
+                metrics[name] = component.get_stats()
+    return metrics
+# ========== FIN SOUS-SYSTÈMES ==========
 
-# INITIALISATION DES MODULES GLOBAUX
-lang_manager = LanguageManager(default_language="fr")
-rag = CongoRAGConnector(base_path="data")
-print(f"🌍 Gestionnaire multilingue initialisé")
-print(f"📚 RAG connecté avec {len(rag.documents)} documents")
 
 class MoteyiCloudBot:
     def __init__(self):
-        self.ocr = RealOCR()
+        # Imports lourds (openai, gTTS) différés jusqu'à la création du bot
+        from ocr_hedged import make_ocr  # GPT-4 Vision, ou Tesseract + Vision (MOTEYI_OCR_MODE=hedged)
+        from gpt_real import RealGPT
+        from tts_real import RealTTS
+
+        self.ocr = make_ocr()
         self.gpt = RealGPT()
         self.tts = RealTTS()
         print("[BOT] Moteyi Cloud Bot v2.0 initialisé !")
         print("[BOT] Support : FR, Lingala, Kiswahili, Tshiluba, English")
     
-    def call_gpt(self, prompt, language="francais"):
-        """Helper pour appeler GPT avec la bonne méthode"""
+    def call_gpt(self, question, language="fr", context=None):
+        """Helper pour appeler GPT (prompts de config/prompts dans la langue de l'élève)"""
+        return self.answer_question(question, language, context)[0]
+    
+    def answer_question(self, question, language="fr", context=None):
+        """
+        call_gpt avec la provenance de la réponse : (réponse, source)
+        source : "bank" (exercice du curriculum, réponse précalculée par answer_bank.py, sans GPT),
+        "semantic_cache" (question proche d'une question déjà traitée), "gpt",
+        "demo" (réponse de démonstration : clé absente ou appel GPT en échec) ou "error"
+        Questions identiques simultanées : un seul appel, résultat partagé (single_flight.py)
+        """
+        bank = get_answer_bank()
+        if bank is not None:
+            match = bank.lookup(question, language)
+            if match:
+                print(f"[BANK] Réponse précalculée ({match['match']}, similarité {match['similarity']}) : "
+                      f"{match['question'][:60]}")
+                return match["answer"], "bank"
+        cache = get_semantic_cache()
+        if cache is not None:
+            match = cache.lookup(question, language)
+            if match:
+                print(f"[SEMCACHE] Réponse reprise (similarité {match['similarity']}) : {match['question'][:60]}")
+                return match["answer"], "semantic_cache"
         try:
-            # Mapper les codes de langue vers les langues GPT
-            lang_map = {
-                "fr": "francais",
-                "en": "english",
-                "ln": "francais",  # Lingala utilise français pour l'instant
-                "sw": "francais",  # Swahili utilise français pour l'instant
-                "lu": "francais"   # Tshiluba utilise français pour l'instant
-            }
-            gpt_language = lang_map.get(language, "francais")
-            
-            # Utiliser la méthode existante de RealGPT
-            return self.gpt.generate_explanation(prompt, gpt_language)
+            answer = get_flight("gpt").do(content_key(question, language, context),
+                                          self._generate_and_cache, question, language, context)
+            return answer, ("gpt" if self._is_real_answer(answer) else "demo")
         except Exception as e:
             print(f"❌ Erreur GPT: {e}")
             # Messages d'erreur par langue
@@ -148,17 +262,43 @@ class MoteyiCloudBot:
                 "lu": "Tuasakidila, bualu bubi busambile. Enza kayi.",
                 "en": "Sorry, an error occurred. Please try again."
             }
-            return error_messages.get(language, error_messages["fr"])
-        
-    def send_message(self, to_number, text):
-        """Envoie un message texte via WhatsApp"""
-        url = f"{WHATSAPP_API_BASE}/{PHONE_NUMBER_ID}/messages"
-        
-        headers = {
-            'Authorization': f'Bearer {ACCESS_TOKEN}',
-            'Content-Type': 'application/json'
-        }
-        
+            return error_messages.get(language, error_messages["fr"]), "error"
+    
+    def _is_real_answer(self, answer):
+        """Réponse de GPT (pas de mode démo ni de repli après un appel en échec)"""
+        return bool(answer) and not self.gpt.mock_mode and not answer.startswith("[Mode démo]")
+        
+    def _generate_and_cache(self, question, language, context):
+        """Appel GPT ; seules les vraies réponses GPT entrent dans le cache sémantique"""
+        answer = self.gpt.generate_explanation(question, language, context)
+        cache = get_semantic_cache()
+        if cache is not None and self._is_real_answer(answer):
+            cache.put(question, answer, language)
+        return answer
+    
+    def read_image(self, image_path):
+        """OCR d'une photo ; photos identiques simultanées (même fiche) lues une seule fois"""
+        return get_flight("ocr").do(file_key(image_path), self.ocr.read_image, image_path)
+    
+    def text_to_speech(self, text, language="fr"):
+        """Audio d'une explication ; textes identiques simultanés synthétisés une seule fois
+        (le même fichier est envoyé à chaque élève : chaque réutilisation recule son éviction)"""
+        audio_path = get_flight("tts").do(content_key(text, language), self.tts.text_to_speech, text, language)
+        if audio_path:
+            get_storage().touch(audio_path)
+        return audio_path
+    
+    def send_message(self, to_number, text, priority=False, dead_letter=True):
+        """Envoie un message texte via WhatsApp (découpé au-delà de 4096 caractères)"""
+        ok = True
+        for part in split_message(text):
+            ok = self._post_text(to_number, part, priority, dead_letter) and ok
+        return ok
+    
+    def _post_text(self, to_number, text, priority=False, dead_letter=True):
+        """Un message texte d'au plus 4096 caractères, envoyé via l'ordonnanceur Graph
+        Après un échec temporaire (réseau, 429 / 5xx, file pleine), le message rendu part dans la
+        file des messages non délivrés ; un refus définitif (4xx) n'y entre pas"""
         data = {
             "messaging_product": "whatsapp",
             "to": to_number,
@@ -169,17 +309,44 @@ class MoteyiCloudBot:
             }
         }
         
-        response = requests.post(url, headers=headers, json=data)
-        
-        if response.status_code == 200:
+        result = get_scheduler().send(to_number, data, self._post_graph_message, priority=priority)
+        if result:
             print(f"[SENT] Message envoyé à {to_number}")
             return True
-        else:
-            print(f"[ERROR] Envoi échoué: {response.text}")
-            return False
+        print(f"[ERROR] Envoi échoué pour {to_number} ({result.describe()})")
+        if dead_letter and result.retryable:
+            get_dead_letters().add("text", to_number, data, f"envoi Graph échoué : {result.describe()}")
+        return False
+    
+    def _post_graph_message(self, data):
+        """Un appel POST /messages : (code HTTP, Retry-After en s ou None, corps de la réponse)"""
+        url = f"{WHATSAPP_API_BASE}/{PHONE_NUMBER_ID}/messages"
+        
+        headers = {
+            'Authorization': f'Bearer {ACCESS_TOKEN}',
+            'Content-Type': 'application/json'
+        }
+        
+        response = requests.post(url, headers=headers, json=data, timeout=15)
+        try:
+            retry_after = float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            retry_after = None
+        return response.status_code, retry_after, response.text
     
-    def send_audio(self, to_number, audio_path):
-        """Envoie un fichier audio via WhatsApp"""
+    def send_audio(self, to_number, audio_path, dead_letter=True):
+        """Envoie un fichier audio via WhatsApp (OGG/Opus ou MP3, type MIME selon l'extension)
+        Retourne un SendResult (vrai si envoyé) ; après un échec temporaire, le chemin de l'audio
+        part dans la file des messages non délivrés
+        Le fichier est épinglé pendant l'upload et l'envoi (storage_manager.py ne le supprime pas)"""
+        storage = get_storage()
+        storage.pin(audio_path)
+        try:
+            return self._upload_and_send_audio(to_number, audio_path, dead_letter)
+        finally:
+            storage.unpin(audio_path)
+    
+    def _upload_and_send_audio(self, to_number, audio_path, dead_letter):
         
         # D'abord, uploader le fichier audio
         upload_url = f"{WHATSAPP_API_BASE}/{PHONE_NUMBER_ID}/media"
@@ -187,25 +354,31 @@ class MoteyiCloudBot:
         headers = {
             'Authorization': f'Bearer {ACCESS_TOKEN}',
         }
+        mime_type = mime_type_for(audio_path)
         
         # Ouvrir et envoyer le fichier
         with open(audio_path, 'rb') as audio_file:
             files = {
-                'file': (os.path.basename(audio_path), audio_file, 'audio/mpeg'),
+                'file': (os.path.basename(audio_path), audio_file, mime_type),
                 'messaging_product': (None, 'whatsapp'),
-                'type': (None, 'audio/mpeg')
+                'type': (None, mime_type)
             }
             
             # Upload du fichier
-            upload_response = requests.post(upload_url, headers=headers, files=files)
+            try:
+                upload_response = requests.post(upload_url, headers=headers, files=files, timeout=60)
+            except requests.RequestException as e:
+                upload_response = None
+                result = SendResult(False, None, f"upload: {e}")
+                print(f"[ERROR] Upload audio échoué: {e}")
             
-            if upload_response.status_code == 200:
+            if upload_response is None:
+                pass
+            elif upload_response.status_code == 200:
                 media_id = upload_response.json().get('id')
-                print(f"[UPLOAD] Audio uploadé avec ID: {media_id}")
-                
-                # Maintenant envoyer le message avec l'audio
-                message_url = f"{WHATSAPP_API_BASE}/{PHONE_NUMBER_ID}/messages"
+                print(f"[UPLOAD] Audio uploadé avec ID: {media_id} ({mime_type})")
                 
+                # Maintenant envoyer le message avec l'audio (file d'envoi commune, ordre conservé)
                 message_data = {
                     "messaging_product": "whatsapp",
                     "to": to_number,
@@ -215,78 +388,65 @@ class MoteyiCloudBot:
                     }
                 }
                 
-                message_headers = {
-                    'Authorization': f'Bearer {ACCESS_TOKEN}',
-                    'Content-Type': 'application/json'
-                }
-                
-                send_response = requests.post(message_url, headers=message_headers, json=message_data)
-                
-                if send_response.status_code == 200:
+                result = get_scheduler().send(to_number, message_data, self._post_graph_message)
+                if result:
                     print(f"[AUDIO] Audio envoyé à {to_number}")
-                    return True
-                else:
-                    print(f"[ERROR] Envoi audio échoué: {send_response.text}")
+                    return result
+                print(f"[ERROR] Envoi audio échoué pour {to_number} ({result.describe()})")
             else:
+                result = SendResult(False, upload_response.status_code, f"upload: {upload_response.text[:200]}")
                 print(f"[ERROR] Upload audio échoué: {upload_response.text}")
         
-        return False
+        if dead_letter and result.retryable:
+            get_dead_letters().add("audio", to_number, {"audio_path": audio_path}, result.describe(),
+                                   audio_path=audio_path)
+        return result
     
-    def clean_text_for_speech(self, text):
-        """
-        Transforme le texte formaté en version naturelle pour l'audio
-        L'objectif est d'avoir un texte qui sonne naturel quand lu à voix haute
-        """
-        # Retirer tous les caractères de formatage Markdown
-        text = re.sub(r'\*+', '', text)  # Retirer les astérisques
-        text = re.sub(r'_+', '', text)   # Retirer les underscores
-        text = re.sub(r'#+', '', text)   # Retirer les dièses
-        text = re.sub(r'`+', '', text)   # Retirer les backticks
-        
-        # Retirer les émojis (plus complet)
-        emoji_pattern = re.compile(
-            "["
-            u"\U0001F600-\U0001F64F"  # emoticons
-            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-            u"\U0001F680-\U0001F6FF"  # transport & map symbols
-            u"\U0001F1E0-\U0001F1FF"  # flags
-            u"\U00002702-\U000027B0"
-            u"\U000024C2-\U0001F251"
-            "]+", flags=re.UNICODE
-        )
-        text = emoji_pattern.sub('', text)
-        
-        # Améliorer la ponctuation pour l'oral
-        text = text.replace(' : ', ', ')
-        text = text.replace(' - ', ', ')
-        text = text.replace('...', '.')
-        text = text.replace('!', '.')  # Les exclamations sont trop fortes en TTS
-        
-        # Transformer les listes numérotées
-        text = re.sub(r'(\d+)\.\s*', r'Numéro \1, ', text)
-        
-        # Ajouter des pauses naturelles
-        text = text.replace('\n\n', '. ')
-        text = text.replace('\n', '. ')
-        
-        # Retirer les espaces multiples
-        text = re.sub(r'\s+', ' ', text)
+    def redeliver(self, kind, to_number, payload):
+        """Renvoi d'un message de la file des messages non délivrés (sans nouvelle mise en file)"""
+        if kind == "audio":
+            if not os.path.exists(payload["audio_path"]):
+                raise FileNotFoundError(payload["audio_path"])
+            return self.send_audio(to_number, payload["audio_path"], dead_letter=False)
+        return get_scheduler().send(to_number, payload, self._post_graph_message)
+    
+    def solve_image(self, image_path, language="fr"):
+        """Étapes OCR -> solveur local ou RAG + GPT d'une photo, sans aucun envoi
+        (webhook et traitement par lots, tools/batch_process.py)
+        Retourne {"ocr_text", "explanation", "context", "solver", "source"} ; explanation None si
+        photo illisible ; source : "solver" ou celle de answer_question ("demo" / "error" : à retenter)"""
+        no_context = {'found': False, 'documents': []}
+        
+        # OCR
+        print("[OCR] Lecture en cours...")
+        ocr_text = self.read_image(image_path)
+        if not ocr_text:
+            return {"ocr_text": ocr_text, "explanation": None, "context": no_context, "solver": False,
+                    "source": None}
         
-        # Nettoyer les points multiples
-        text = re.sub(r'\.+', '.', text)
-        text = re.sub(r'\.\s*\.', '.', text)
+        # Calculs et équations simples : solveur local, sans RAG ni GPT
+        explanation = get_solver().solve_and_explain(ocr_text, language)
+        if explanation:
+            return {"ocr_text": ocr_text, "explanation": explanation, "context": no_context, "solver": True,
+                    "source": "solver"}
         
-        # Remplacer certaines abréviations pour une meilleure lecture
-        text = text.replace('OB.', 'option B')
-        text = text.replace('ex.', 'exemple')
-        text = text.replace('etc.', 'et cetera')
+        # RAG - Enrichir avec le contexte
+        context = get_rag().query_rag(ocr_text)
         
-        # S'assurer que le texte commence et finit proprement
-        text = text.strip()
-        if not text.endswith('.'):
-            text += '.'
-            
-        return text
+        # GPT avec contexte et langue
+        print("[GPT] Génération de l'explication...")
+        if context['found']:
+            print(f"📚 RAG: {len(context['documents'])} documents utilisés")
+        explanation, source = self.answer_question(ocr_text, language, context)
+        return {"ocr_text": ocr_text, "explanation": explanation, "context": context, "solver": False,
+                "source": source}
+    
+    def clean_text_for_speech(self, text, language="fr"):
+        """
+        Transforme le texte formaté en version naturelle pour l'audio
+        (règles compilées par langue : voir speech_text.py)
+        """
+        return get_normalizer(language).normalize(text)
     
     def create_audio_explanation(self, ocr_text, written_explanation, language_code="fr"):
         """
@@ -325,9 +485,9 @@ class MoteyiCloudBot:
             audio_text = f"""
             {intro}
             
-            {self.clean_text_for_speech(ocr_text[:200])}.
+            {ocr_text[:200]}.
             
-            {self.clean_text_for_speech(written_explanation)}
+            {written_explanation}.
             
             {outro}
             """
@@ -336,13 +496,13 @@ class MoteyiCloudBot:
             audio_text = f"""
             {intro}
             
-            {self.clean_text_for_speech(written_explanation)}
+            {written_explanation}.
             
             {outro}
             """
         
-        # Nettoyer une dernière fois
-        audio_text = self.clean_text_for_speech(audio_text)
+        # Une seule normalisation sur le texte assemblé
+        audio_text = self.clean_text_for_speech(audio_text, language_code)
         
         return audio_text
     
@@ -360,9 +520,8 @@ class MoteyiCloudBot:
             # Télécharger l'image
             media_response = requests.get(media_url, headers=headers)
             
-            # Sauvegarder localement
-            os.makedirs('data/whatsapp_images', exist_ok=True)
-            filename = f"data/whatsapp_images/{media_id}.jpg"
+            # Sauvegarder localement (sous-dossier haché, quota géré par storage_manager.py)
+            filename = str(get_storage().path_for("images", f"{media_id}.jpg"))
             
             with open(filename, 'wb') as f:
                 f.write(media_response.content)
@@ -375,6 +534,8 @@ class MoteyiCloudBot:
     def process_text_message(self, from_number, text):
         """Traite un message texte avec support multilingue et RAG"""
         print(f"\n[TEXT] De {from_number}: {text}")
+        lang_manager = get_lang_manager()
+        rag = get_rag()
         
         # 1. Vérifier si c'est une sélection de langue
         is_language_request, language_response = handle_language_selection(
@@ -398,48 +559,49 @@ class MoteyiCloudBot:
                 self.send_message(from_number, menu)
                 return
         
-        # 4. Utiliser le RAG pour enrichir la question
-        context = rag.query_rag(text)
-        
-        # Priorité aux documents de la langue de l'utilisateur
-        if user_language != "fr" and user_language in ["ln", "sw", "lu"]:
-            lang_keywords = {
-                "ln": ["lingala"],
-                "sw": ["kiswahili", "swahili"],
-                "lu": ["ciluba", "tshiluba"]
-            }
-            enhanced_query = f"{text} {' '.join(lang_keywords.get(user_language, []))}"
-            context = rag.query_rag(enhanced_query)
-        
-        # 5. Construire le prompt enrichi pour GPT
-        gpt_prefix = lang_manager.get_gpt_prompt_prefix(user_language)
+        # 4. Calculs et équations simples : solveur local, sans RAG ni GPT
+        written_explanation = get_solver().solve_and_explain(text, user_language)
         
-        if context['found']:
-            full_prompt = create_math_enhanced_prompt(text, context)
-            print(f"📚 RAG: {len(context['documents'])} documents utilisés")
-        else:
-            full_prompt = create_math_enhanced_prompt(text, context)
-        
-        # 6. Générer la réponse avec GPT
-        written_explanation = self.call_gpt(full_prompt, user_language)
+        if not written_explanation:
+            # 5. Utiliser le RAG pour enrichir la question
+            context = rag.query_rag(text)
+            
+            # Priorité aux documents de la langue de l'utilisateur
+            if user_language != "fr" and user_language in ["ln", "sw", "lu"]:
+                lang_keywords = {
+                    "ln": ["lingala"],
+                    "sw": ["kiswahili", "swahili"],
+                    "lu": ["ciluba", "tshiluba"]
+                }
+                enhanced_query = f"{text} {' '.join(lang_keywords.get(user_language, []))}"
+                context = rag.query_rag(enhanced_query)
+            
+            if context['found']:
+                print(f"📚 RAG: {len(context['documents'])} documents utilisés")
+            
+            # 6-7. Prompt compilé (config/prompts) et réponse GPT
+            written_explanation = self.call_gpt(text, user_language, context)
         
-        # 7. Formater la réponse
+        # 8. Formater la réponse
         formatted_response = lang_manager.format_response_for_language(written_explanation, user_language)
         
-        # 8. Créer l'audio si langue supportée
-        if user_language in ["fr", "en"]:
+        # 9. Créer l'audio si un moteur TTS a une voix pour cette langue
+        outbound = OutboundComposer(self, from_number)
+        if self.tts.supports(user_language):
             audio_text = self.create_audio_explanation(text, written_explanation, user_language)
-            audio_path = self.tts.text_to_speech(audio_text, user_language)
+            audio_path = self.text_to_speech(audio_text, user_language)
             
             if audio_path and os.path.exists(audio_path):
-                self.send_audio(from_number, audio_path)
+                outbound.audio(audio_path)
         
-        # 9. Envoyer la réponse
-        self.send_message(from_number, formatted_response)
+        # 10. Envoyer la réponse
+        outbound.text(formatted_response)
+        outbound.flush()
     
     def process_image_message(self, from_number, media_id):
         """Pipeline complet de traitement d'image avec multilingue"""
         print(f"\n[NOUVEAU] Image reçue de {from_number}")
+        lang_manager = get_lang_manager()
         
         # Récupérer la langue de l'utilisateur
         user_language = lang_manager.get_user_language(from_number)
@@ -453,8 +615,12 @@ class MoteyiCloudBot:
             "en": "📸 Photo received! Analyzing..."
         }
         
-        # 1. Envoyer accusé de réception
-        self.send_message(from_number, ack_messages.get(user_language, ack_messages["fr"]))
+        # Messages de la réponse : les textes consécutifs partent en un seul envoi Graph
+        outbound = OutboundComposer(self, from_number)
+        
+        # 1. Envoyer accusé de réception (tout de suite : l'élève sait que la photo est arrivée)
+        outbound.text(ack_messages.get(user_language, ack_messages["fr"]))
+        outbound.flush(priority=True)
         
         # 2. Télécharger l'image
         image_path = self.download_media(media_id)
@@ -466,12 +632,14 @@ class MoteyiCloudBot:
                 "lu": "❌ Bualu bubi mu téléchargement.",
                 "en": "❌ Error downloading the image."
             }
-            self.send_message(from_number, error_messages.get(user_language, error_messages["fr"]))
+            outbound.text(error_messages.get(user_language, error_messages["fr"]))
+            outbound.flush()
             return
         
-        # 3. OCR
-        print("[OCR] Lecture en cours...")
-        ocr_text = self.ocr.read_image(image_path)
+        # 3-5. OCR, puis solveur local ou RAG + GPT
+        result = self.solve_image(image_path, user_language)
+        ocr_text, context = result["ocr_text"], result["context"]
+        written_explanation = result["explanation"]
         
         if not ocr_text:
             unclear_messages = {
@@ -481,44 +649,31 @@ class MoteyiCloudBot:
                 "lu": "Ntshiakumona kubala exercice. Enza na photo ya bimpe.",
                 "en": "I couldn't read the exercise. Try with a clearer photo."
             }
-            self.send_message(from_number, unclear_messages.get(user_language, unclear_messages["fr"]))
+            outbound.text(unclear_messages.get(user_language, unclear_messages["fr"]))
+            outbound.flush()
             return
         
-        # 4. RAG - Enrichir avec le contexte
-        context = rag.query_rag(ocr_text)
-        
-        # 5. GPT avec contexte et langue
-        print("[GPT] Génération de l'explication...")
-        gpt_prefix = lang_manager.get_gpt_prompt_prefix(user_language)
-        
-        if context['found']:
-            full_prompt = f"{gpt_prefix}\n\n{context['prompt_enhancement']}"
-            print(f"📚 RAG: {len(context['documents'])} documents utilisés")
-        else:
-            full_prompt = f"{gpt_prefix}\n\nExercice: {ocr_text}\n\nExplique de manière pédagogique."
-        
-        written_explanation = self.call_gpt(full_prompt, user_language)
-        
         # 6. Créer une version optimisée pour l'audio
         print("[TTS] Préparation du texte pour l'audio...")
         audio_text = self.create_audio_explanation(ocr_text, written_explanation, user_language)
         print(f"[TTS] Texte audio préparé ({len(audio_text)} caractères)")
         
-        # 7. TTS si langue supportée
+        # 7. TTS si un moteur a une voix pour cette langue
         audio_sent = False
-        if user_language in ["fr", "en"]:
+        if self.tts.supports(user_language):
             print("[TTS] Création de l'audio...")
-            audio_path = self.tts.text_to_speech(audio_text, user_language)
+            audio_path = self.text_to_speech(audio_text, user_language)
             
             if audio_path and os.path.exists(audio_path):
                 print(f"[AUDIO] Envoi du fichier: {audio_path}")
-                if self.send_audio(from_number, audio_path):
+                if outbound.audio(audio_path):
                     audio_sent = True
                     audio_success_messages = {
                         "fr": "🎵 Explication audio envoyée ! Écoutez pour une meilleure compréhension.",
+                        "sw": "🎵 Maelezo ya sauti yametumwa! Sikiliza ili uelewe vizuri.",
                         "en": "🎵 Audio explanation sent! Listen for better understanding."
                     }
-                    self.send_message(from_number, audio_success_messages.get(user_language, "🎵"))
+                    outbound.text(audio_success_messages.get(user_language, "🎵"))
         
         # 8. Construire et envoyer la réponse texte
         response_headers = {
@@ -547,44 +702,26 @@ class MoteyiCloudBot:
         # Formater selon la langue
         formatted_response = lang_manager.format_response_for_language(response_message, user_language)
         
-        # 9. Envoyer la réponse
-        self.send_message(from_number, formatted_response)
+        # 9. Envoyer la réponse (avec la note audio qui précède, en un seul message)
+        outbound.text(formatted_response)
         
-        if not audio_sent and user_language not in ["fr", "en"]:
+        if not audio_sent and not self.tts.supports(user_language):
             no_audio_messages = {
                 "ln": "ℹ️ Audio ekoki te na lingala, kasi explication ezali awa na likolo.",
                 "sw": "ℹ️ Audio haipatikani kwa Kiswahili, lakini maelezo yako hapa juu.",
                 "lu": "ℹ️ Audio kayi mu Tshiluba, kasi explication idi apa muulu."
             }
-            self.send_message(from_number, no_audio_messages.get(user_language, ""))
+            outbound.text(no_audio_messages.get(user_language, ""))
+        outbound.flush()
         
         print(f"[SUCCÈS] Réponse complète envoyée à {from_number} en {user_language}")
 
-# Ajout de la méthode manquante dans RealGPT si nécessaire
-class RealGPTExtended(RealGPT):
-    def generate_explanation_with_prompt(self, prompt):
-        """Génère une explication avec un prompt personnalisé"""
-        try:
-            # Utiliser la méthode existante ou appeler directement l'API
-            return self.generate_explanation(prompt, "custom")
-        except:
-            # Fallback si la méthode n'existe pas
-            import openai
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=500
-            )
-            return response.choices[0].message.content
-
-# Instance globale
-bot = MoteyiCloudBot()
-
 # NOUVELLES FONCTIONS DE COMMANDES
 def handle_special_commands(message: str, phone_number: str) -> bool:
     """Gère les commandes spéciales du bot"""
     message_lower = message.lower().strip()
+    lang_manager = get_lang_manager()
+    bot = get_bot()
     
     # Commande pour afficher le menu de langues
     if message_lower in ["/langue", "/language", "/lang", "menu", "langue", "language"]:
@@ -595,7 +732,12 @@ def handle_special_commands(message: str, phone_number: str) -> bool:
     # Commande pour les statistiques
     if message_lower == "/stats":
         stats = lang_manager.get_stats()
-        rag_stats = rag.get_stats()
+        rag_stats = get_rag().get_stats()
+        memory = rag_stats.get('memory') or {}
+        memory_line = ""
+        if memory:
+            memory_line = (f"\n- Mémoire worker: RSS {memory.get('rss', 0):.0f} Mo, "
+                           f"PSS {memory.get('pss', 0):.0f} Mo (index {memory.get('index_rss', 0):.1f} Mo)")
         
         stats_message = f"""📊 *Statistiques Moteyi v2.0*
         
@@ -606,7 +748,7 @@ def handle_special_commands(message: str, phone_number: str) -> bool:
 📚 *RAG Curriculum RDC:*
 - Documents: {rag_stats['documents_loaded']} 
 - Requêtes: {rag_stats['queries']}
-- Succès: {rag_stats['hit_rate']:.1f}%
+- Succès: {rag_stats['hit_rate']:.1f}%{memory_line}
 
 🔥 *Sprint Phoenix 72h*
 - Points validés: A ✅ B ✅
@@ -696,58 +838,98 @@ Commands:
     
     return False
 
-@app.route('/webhook', methods=['GET'])
-def webhook_verify():
-    """Vérification du webhook par Meta"""
-    mode = request.args.get('hub.mode')
-    token = request.args.get('hub.verify_token')
-    challenge = request.args.get('hub.challenge')
-    
-    if mode == 'subscribe' and token == VERIFY_TOKEN:
-        print('[WEBHOOK] Vérifié avec succès')
-        return challenge, 200
-    
-    return 'Forbidden', 403
-
-@app.route('/webhook', methods=['POST'])
-def webhook_process():
-    """Traite les messages entrants avec support multilingue"""
-    try:
-        data = request.get_json()
-        
-        # Parser le message
-        if data.get('entry'):
-            for entry in data['entry']:
-                for change in entry.get('changes', []):
-                    value = change.get('value', {})
-                    
-                    # Vérifier les messages
-                    if 'messages' in value:
-                        for message in value['messages']:
-                            from_number = message['from']
-                            msg_type = message['type']
-                            
-                            if msg_type == 'image':
-                                # Traiter l'image
-                                media_id = message['image']['id']
-                                bot.process_image_message(from_number, media_id)
-                                
-                            elif msg_type == 'text':
-                                # Message texte
-                                text = message['text']['body']
-                                
-                                # Vérifier d'abord les commandes spéciales
-                                if not handle_special_commands(text, from_number):
-                                    # Sinon traiter normalement
-                                    bot.process_text_message(from_number, text)
-        
-        return jsonify({"status": "ok"}), 200
-        
-    except Exception as e:
-        print(f"[ERROR] {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"status": "error"}), 500
+def create_app(warm_up=True):
+    """
+    Fabrique de l'application Flask (utilisable par gunicorn, un appel par worker)
+    Les sous-systèmes sont préchauffés en arrière-plan ; /ready répond 200
+    seulement une fois le préchauffage terminé.
+    """
+    from flask import Flask, request, jsonify
+
+    app = Flask(__name__)
+
+    @app.route('/health', methods=['GET'])
+    def health():
+        """Liveness : le processus répond"""
+        return jsonify({"status": "alive"}), 200
+
+    @app.route('/ready', methods=['GET'])
+    def ready():
+        """Readiness : tous les sous-systèmes sont initialisés"""
+        state = readiness()
+        return jsonify(state), (200 if state["ready"] else 503)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Latences, tokens et disjoncteurs des dépendances externes"""
+        return jsonify(collect_metrics()), 200
+
+    @app.route('/webhook', methods=['GET'])
+    def webhook_verify():
+        """Vérification du webhook par Meta"""
+        mode = request.args.get('hub.mode')
+        token = request.args.get('hub.verify_token')
+        challenge = request.args.get('hub.challenge')
+
+        if mode == 'subscribe' and token == VERIFY_TOKEN:
+            print('[WEBHOOK] Vérifié avec succès')
+            return challenge, 200
+
+        return 'Forbidden', 403
+
+    @app.route('/webhook', methods=['POST'])
+    def webhook_process():
+        """Traite les messages entrants avec support multilingue"""
+        try:
+            data = request.get_json()
+
+            # Parser le message
+            if data.get('entry'):
+                for entry in data['entry']:
+                    for change in entry.get('changes', []):
+                        value = change.get('value', {})
+
+                        # Vérifier les messages
+                        if 'messages' in value:
+                            for message in value['messages']:
+                                from_number = message['from']
+                                msg_type = message['type']
+
+                                if msg_type == 'image':
+                                    # Traiter l'image
+                                    media_id = message['image']['id']
+                                    get_bot().process_image_message(from_number, media_id)
+
+                                elif msg_type == 'text':
+                                    # Message texte
+                                    text = message['text']['body']
+
+                                    # Vérifier d'abord les commandes spéciales
+                                    if not handle_special_commands(text, from_number):
+                                        # Sinon traiter normalement
+                                        get_bot().process_text_message(from_number, text)
+
+            return jsonify({"status": "ok"}), 200
+
+        except Exception as e:
+            print(f"[ERROR] {e}")
+            import traceback
+            traceback.print_exc()
+            return jsonify({"status": "error"}), 500
+
+    if warm_up:
+        start_warmup()
+    # Quotas disque de data/audio_responses et data/whatsapp_images, en arrière-plan
+    # (les audios en attente de renvoi ne sont jamais supprimés)
+    get_storage().add_reference_provider(get_dead_letters().referenced_paths)
+    get_storage().start()
+    # Renvoi des messages non délivrés (le bot n'est créé qu'au premier message dû)
+    get_dead_letters().start(lambda kind, to, payload: get_bot().redeliver(kind, to, payload))
+
+    return app
+
+# Mesure du temps d'import (suivi par tools/measure_import_time.py)
+IMPORT_TIME_MS = (time.perf_counter() - _IMPORT_T0) * 1000
 
 if __name__ == '__main__':
     print("\n" + "="*50)
@@ -757,7 +939,7 @@ if __name__ == '__main__':
     print(f"📱 Phone ID: {PHONE_NUMBER_ID}")
     print(f"🔑 Token: ...{ACCESS_TOKEN[-10:] if ACCESS_TOKEN else 'NON DÉFINI'}")
     print(f"🌍 Langues: FR, Lingala, Kiswahili, Tshiluba, English")
-    print(f"📚 Documents RAG: {len(rag.documents)} chargés")
+    print(f"⏱️ Import du module: {IMPORT_TIME_MS:.0f} ms")
     print("="*50)
     print("\n[NEXT] Lancez ngrok dans un autre terminal:")
     print("ngrok http 5000")
@@ -765,4 +947,5 @@ if __name__ == '__main__':
     print("="*50)
     
     # Lancer le serveur Flask
+    app = create_app()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
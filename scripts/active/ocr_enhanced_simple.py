@@ -100,6 +100,37 @@ class SimpleEnhancedOCR:
         
         return text.strip()
     
+    def read_image_with_confidence(self, image_path):
+        """
+        Lit le texte et retourne aussi la confiance Tesseract de chaque mot
+        (utilisé par l'OCR hedgé pour décider s'il peut se passer de Vision)
+        Retourne {"text", "raw", "words": [(mot, confiance 0-100)], "mean_conf"}
+        """
+        img = self.preprocess_image(image_path)
+        data = pytesseract.image_to_data(img, config=self.config, output_type=pytesseract.Output.DICT)
+
+        words, lines, current = [], [], None
+        for word, conf, block, par, line in zip(data['text'], data['conf'], data['block_num'],
+                                                data['par_num'], data['line_num']):
+            word = word.strip()
+            if not word:
+                continue
+            key = (block, par, line)
+            if key != current:
+                lines.append([])
+                current = key
+            lines[-1].append(word)
+            words.append((word, float(conf)))
+
+        raw_text = "\n".join(" ".join(line) for line in lines)
+        scored = [c for _, c in words if c >= 0]
+        return {
+            "text": self.correct_math_text(raw_text) if raw_text else "",
+            "raw": raw_text,
+            "words": words,
+            "mean_conf": sum(scored) / len(scored) if scored else 0.0,
+        }
+
     def read_image(self, image_path):
         """Lit le texte avec prétraitement et correction"""
         try:
@@ -0,0 +1,225 @@
+# scripts/ocr_hedged.py
+"""
+OCR « hedgé » : Tesseract local en course contre GPT-4 Vision
+- Tesseract (SimpleEnhancedOCR, CPU seul) démarre tout de suite
+- Vision démarre en parallèle, ou seulement après MOTEYI_OCR_HEDGE_DELAY_MS
+  si Tesseract n'a pas encore donné un résultat acceptable
+- L'arbitre accepte Tesseract quand la confiance par mot et les contrôles
+  de cohérence mathématique passent ; sinon on attend Vision
+- Taux de victoire et latences par moteur journalisés (get_stats)
+
+Activation : MOTEYI_OCR_MODE=hedged (défaut : vision)
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, as_completed
+from typing import Dict, Optional, Tuple
+
+from perf_metrics import LatencyRecorder
+
+MATH_CHARS_RE = re.compile(r"[=+\-*/×÷²^()]|\d")
+OPERATOR_RUN_RE = re.compile(r"[+*/×÷=^]\s*[+*/×÷=^]")
+MIXED_TOKEN_RE = re.compile(r"\b(?=\w*\d)(?=\w*[^\W\d_])\w+\b")
+# Jetons lettres+chiffres légitimes : 2x, 3y2, 5cm, 1er, 2ème...
+ALLOWED_MIXED_RE = re.compile(
+    r"^(\d*[xyzabn][\d²³]*|\d+(mm|cm|dm|m|km|g|kg|l|cl|ml|fc|h|min|s)|\d+(er|re|e|è|ème|eme))$",
+    re.IGNORECASE,
+)
+
+
+def check_math_text(text: str) -> Tuple[bool, str]:
+    """Contrôles de plausibilité d'une transcription d'exercice (sans appel externe)"""
+    if not MATH_CHARS_RE.search(text):
+        return True, "ok"
+    if text.count("(") != text.count(")"):
+        return False, "parentheses"
+    if text.count("=") > 1 and "\n" not in text:
+        return False, "egal_multiple"
+    if OPERATOR_RUN_RE.search(text):
+        return False, "operateurs_colles"
+    stripped = text.strip()
+    if stripped and stripped[0] in "+*/×÷=^":
+        return False, "operateur_initial"
+    if stripped and stripped[-1] in "+-*/×÷^":
+        return False, "operateur_final"
+    if "=" in stripped and not stripped.split("=", 1)[0].strip():
+        return False, "membre_gauche_vide"
+    for token in MIXED_TOKEN_RE.findall(text):
+        if not ALLOWED_MIXED_RE.match(token):
+            return False, f"jeton_suspect:{token}"
+    return True, "ok"
+
+
+class ConfidenceArbiter:
+    """Décide si le résultat Tesseract est assez sûr pour ne pas attendre Vision"""
+
+    def __init__(self, min_mean_conf: float = 75.0, min_word_conf: float = 45.0,
+                 min_math_conf: float = 80.0, min_chars: int = 3):
+        self.min_mean_conf = min_mean_conf
+        self.min_word_conf = min_word_conf
+        self.min_math_conf = min_math_conf
+        self.min_chars = min_chars
+
+    def accept(self, result: Optional[Dict]) -> Tuple[bool, str]:
+        if not result or len(result.get("text", "").strip()) < self.min_chars:
+            return False, "vide"
+        words = [(w, c) for w, c in result.get("words", []) if c >= 0]
+        if not words:
+            return False, "sans_confiance"
+        if result.get("mean_conf", 0) < self.min_mean_conf:
+            return False, "confiance_moyenne"
+        if min(c for _, c in words) < self.min_word_conf:
+            return False, "mot_incertain"
+        # Les chiffres et opérateurs comptent plus que les mots : une erreur change la réponse
+        math_confs = [c for w, c in words if MATH_CHARS_RE.search(w)]
+        if math_confs and min(math_confs) < self.min_math_conf:
+            return False, "chiffre_incertain"
+        return check_math_text(result["text"])
+
+
+class HedgedOCR:
+    """Même interface que VisionOCR : read_image(image_path) -> texte"""
+
+    ENGINES = ("tesseract", "vision")
+
+    def __init__(self, vision=None, local=None, hedge_delay_ms: Optional[float] = None,
+                 arbiter: Optional[ConfidenceArbiter] = None, max_workers: int = 8):
+        if vision is None:
+            from ocr_vision import VisionOCR
+            vision = VisionOCR()
+        self.vision = vision
+        self.local = local if local is not None else self._make_local()
+        if hedge_delay_ms is None:
+            hedge_delay_ms = float(os.getenv('MOTEYI_OCR_HEDGE_DELAY_MS', '0'))
+        self.hedge_delay_s = max(hedge_delay_ms, 0) / 1000
+        self.arbiter = arbiter or ConfidenceArbiter()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-hedge")
+
+        self._lock = threading.Lock()
+        self.latency = {name: LatencyRecorder() for name in self.ENGINES}
+        self.total_latency = LatencyRecorder()
+        self.wins = {name: 0 for name in self.ENGINES}
+        self.vision_skipped = 0
+        self.rejections: Dict[str, int] = {}
+
+        mode = f"Vision après {hedge_delay_ms:.0f} ms" if self.hedge_delay_s else "Vision en parallèle"
+        status = "Tesseract + " + mode if self.local else "Tesseract indisponible, Vision seule"
+        print(f"[OCR] Mode hedgé initialisé ({status})")
+
+    @staticmethod
+    def _make_local():
+        """
+        Moteur local si le binaire Tesseract est présent, sinon None :
+        pool de workers chauds si MOTEYI_OCR_POOL_WORKERS > 0, sinon SimpleEnhancedOCR
+        """
+        try:
+            import pytesseract
+            pytesseract.get_tesseract_version()
+            if int(os.getenv('MOTEYI_OCR_POOL_WORKERS', '0')) > 0:
+                from ocr_pool import OCRWorkerPool
+                return OCRWorkerPool()
+            from ocr_enhanced_simple import SimpleEnhancedOCR
+            return SimpleEnhancedOCR()
+        except Exception as e:
+            print(f"[OCR] Tesseract indisponible pour le mode hedgé: {e}")
+            return None
+
+    def _timed(self, engine: str, fn, image_path):
+        t0 = time.perf_counter()
+        try:
+            result = fn(image_path)
+            self.latency[engine].record((time.perf_counter() - t0) * 1000)
+            return result
+        except Exception as e:
+            self.latency[engine].record((time.perf_counter() - t0) * 1000, error=True)
+            print(f"[OCR-HEDGE] {engine} a échoué: {e}")
+            return None
+
+    def _finish(self, winner: Optional[str], text: str, t0: float, reason: str, vision_started: bool):
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        self.total_latency.record(elapsed_ms, error=not text)
+        with self._lock:
+            if winner:
+                self.wins[winner] += 1
+            if not vision_started:
+                self.vision_skipped += 1
+            if reason != "ok":
+                self.rejections[reason] = self.rejections.get(reason, 0) + 1
+        print(f"[OCR-HEDGE] gagnant={winner or 'aucun'} en {elapsed_ms:.0f} ms "
+              f"(tesseract: {reason}, vision {'lancée' if vision_started else 'évitée'})")
+        return text
+
+    def read_image(self, image_path):
+        t0 = time.perf_counter()
+        if self.local is None:
+            text = self._timed("vision", self.vision.read_image, image_path) or ""
+            return self._finish("vision" if text else None, text, t0, "indisponible", True)
+
+        local_future = self._pool.submit(self._timed, "tesseract", self.local.read_image_with_confidence, image_path)
+        reason = "lent"
+
+        if self.hedge_delay_s:
+            # Vision seulement si Tesseract n'a rien d'acceptable avant le délai
+            try:
+                local_future.result(timeout=self.hedge_delay_s)
+            except FutureTimeout:
+                pass
+            if local_future.done():
+                accepted, reason = self.arbiter.accept(local_future.result())
+                if accepted:
+                    return self._finish("tesseract", local_future.result()["text"], t0, reason, False)
+
+        vision_future = self._pool.submit(self._timed, "vision", self.vision.read_image, image_path)
+
+        # Premier arrivé : Tesseract gagne s'il est accepté, sinon on attend Vision
+        # (une requête Vision déjà partie ne s'annule pas : son résultat est ignoré)
+        for future in as_completed((local_future, vision_future)):
+            if future is local_future:
+                accepted, reason = self.arbiter.accept(future.result())
+                if accepted:
+                    return self._finish("tesseract", future.result()["text"], t0, reason, True)
+            elif future.result():
+                return self._finish("vision", future.result(), t0, reason, True)
+
+        # Vision en échec : mieux vaut une lecture locale incertaine que rien
+        fallback = (local_future.result() or {}).get("text", "")
+        return self._finish("tesseract" if fallback else None, fallback, t0, reason, True)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            decided = sum(self.wins.values())
+            return {
+                "calls": self.total_latency.summary()["total"],
+                "win_rate": {k: round(v / decided, 3) if decided else 0.0 for k, v in self.wins.items()},
+                "wins": dict(self.wins),
+                "vision_skipped": self.vision_skipped,
+                "tesseract_rejections": dict(self.rejections),
+                "latency": {
+                    "total": self.total_latency.summary(),
+                    **{name: rec.summary() for name, rec in self.latency.items()},
+                },
+            }
+
+
+def make_ocr():
+    """OCR du bot selon MOTEYI_OCR_MODE (vision | hedged)"""
+    mode = os.getenv('MOTEYI_OCR_MODE', 'vision').lower()
+    from ocr_vision import VisionOCR
+    if mode == 'hedged':
+        return HedgedOCR(vision=VisionOCR())
+    return VisionOCR()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/active/ocr_hedged.py <image> [<image> ...]")
+        sys.exit(1)
+    ocr = HedgedOCR()
+    for path in sys.argv[1:]:
+        print(f"{path}: {ocr.read_image(path)!r}")
+    print(ocr.get_stats())
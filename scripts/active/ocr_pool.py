@@ -0,0 +1,150 @@
+# scripts/ocr_pool.py
+"""
+Pool de workers OCR Tesseract persistants
+- Chaque processus garde son moteur chaud : tesserocr (API C, modèle chargé une fois)
+  si disponible, sinon pytesseract (un sous-processus par image, mais
+  prétraitement NumPy et imports déjà faits)
+- Les images sont envoyées par lots à chaque worker (moins d'allers-retours IPC)
+- Même interface que les autres moteurs : read_image(path) -> texte,
+  read_image_with_confidence(path) -> dict (utilisable par HedgedOCR)
+
+Configuration (.env) :
+  MOTEYI_OCR_POOL_WORKERS=0   0 = pas de pool (SimpleEnhancedOCR dans le thread appelant)
+  MOTEYI_OCR_BINARIZE=sauvola (sauvola | otsu | none)
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+DEFAULT_CONFIG = r'--oem 3 --psm 6'
+
+# État propre à chaque processus worker
+_engine = None
+_corrector = None
+_method = "sauvola"
+
+
+class _TesserocrEngine:
+    name = "tesserocr"
+
+    def __init__(self, lang: str):
+        import tesserocr
+        self.api = tesserocr.PyTessBaseAPI(lang=lang, psm=tesserocr.PSM.SINGLE_BLOCK)
+
+    def recognize(self, image):
+        self.api.SetImage(image)
+        text = self.api.GetUTF8Text()
+        words = [(w, float(c)) for w, c in zip(text.split(), self.api.AllWordConfidences())]
+        return text, words
+
+
+class _PytesseractEngine:
+    name = "pytesseract"
+
+    def __init__(self, lang: str, config: str):
+        import pytesseract
+        self.pytesseract = pytesseract
+        self.lang = lang
+        self.config = config
+
+    def recognize(self, image):
+        data = self.pytesseract.image_to_data(image, lang=self.lang, config=self.config,
+                                              output_type=self.pytesseract.Output.DICT)
+        lines, words, current = [], [], None
+        for word, conf, key in zip(data['text'], data['conf'],
+                                   zip(data['block_num'], data['par_num'], data['line_num'])):
+            word = word.strip()
+            if not word:
+                continue
+            if key != current:
+                lines.append([])
+                current = key
+            lines[-1].append(word)
+            words.append((word, float(conf)))
+        return "\n".join(" ".join(line) for line in lines), words
+
+
+def _init_worker(lang: str, config: str, method: str):
+    """Initialisation unique par processus : moteur OCR + correcteur math"""
+    global _engine, _corrector, _method
+    try:
+        _engine = _TesserocrEngine(lang)
+    except Exception:
+        _engine = _PytesseractEngine(lang, config)
+    from ocr_enhanced_simple import SimpleEnhancedOCR
+    _corrector = SimpleEnhancedOCR.__new__(SimpleEnhancedOCR)  # sans le print d'init
+    _method = method
+
+
+def _ocr_one(image_path: str) -> Dict:
+    from ocr_preprocess import preprocess, to_pil
+
+    t0 = time.perf_counter()
+    try:
+        binary = preprocess(image_path, method=_method)
+        t1 = time.perf_counter()
+        raw, words = _engine.recognize(to_pil(binary))
+        scored = [c for _, c in words if c >= 0]
+        return {
+            "path": image_path,
+            "text": _corrector.correct_math_text(raw) if raw.strip() else "",
+            "raw": raw,
+            "words": words,
+            "mean_conf": sum(scored) / len(scored) if scored else 0.0,
+            "preprocess_ms": (t1 - t0) * 1000,
+            "ocr_ms": (time.perf_counter() - t1) * 1000,
+            "engine": _engine.name,
+            "error": None,
+        }
+    except Exception as e:
+        return {"path": image_path, "text": "", "raw": "", "words": [], "mean_conf": 0.0,
+                "preprocess_ms": 0.0, "ocr_ms": (time.perf_counter() - t0) * 1000,
+                "engine": getattr(_engine, 'name', None), "error": str(e)}
+
+
+def _ocr_batch(image_paths: List[str]) -> List[Dict]:
+    return [_ocr_one(p) for p in image_paths]
+
+
+class OCRWorkerPool:
+    """Pool de processus OCR préchauffés"""
+
+    def __init__(self, workers: int = None, lang: str = "fra+eng", config: str = DEFAULT_CONFIG,
+                 method: str = None, batch_size: int = 4):
+        self.workers = workers or max(1, int(os.getenv('MOTEYI_OCR_POOL_WORKERS', '0')) or os.cpu_count() or 1)
+        self.method = method or os.getenv('MOTEYI_OCR_BINARIZE', 'sauvola')
+        self.batch_size = batch_size
+        # "spawn" : pas de fork d'un processus multi-thread (Flask, passerelle LLM)
+        ctx = multiprocessing.get_context("spawn")
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                         initializer=_init_worker, initargs=(lang, config, self.method))
+        print(f"[OCR] Pool Tesseract: {self.workers} workers, binarisation {self.method}")
+
+    def warm_up(self):
+        """Force le démarrage de tous les workers (évite la latence du premier appel)"""
+        list(self._pool.map(_ocr_batch, [[] for _ in range(self.workers)]))
+
+    def read_batch(self, image_paths: List[str]) -> List[Dict]:
+        """OCR d'un lot : découpé en paquets de batch_size répartis sur les workers, ordre conservé"""
+        paths = [str(p) for p in image_paths]
+        size = max(1, min(self.batch_size, -(-len(paths) // self.workers)))
+        chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+        results = []
+        for chunk_result in self._pool.map(_ocr_batch, chunks):
+            results.extend(chunk_result)
+        return results
+
+    def read_image_with_confidence(self, image_path) -> Dict:
+        return self._pool.submit(_ocr_one, str(image_path)).result()
+
+    def read_image(self, image_path) -> str:
+        result = self.read_image_with_confidence(image_path)
+        if result["error"]:
+            print(f"[OCR ERROR] {result['error']}")
+        return result["text"]
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,126 @@
+# scripts/ocr_preprocess.py
+"""
+Prétraitement OCR vectorisé (NumPy) sur tableaux uint8
+Remplace la chaîne PIL de SimpleEnhancedOCR.preprocess_image
+(contraste, netteté, LANCZOS 2x, SHARPEN, seuil pixel par pixel en Python) :
+- une seule conversion PIL -> tableau niveaux de gris
+- étirement de contraste par percentiles
+- agrandissement 2x uniquement si l'image est trop petite pour Tesseract
+- binarisation Otsu (globale) ou Sauvola (adaptative, images intégrales)
+  robuste aux photos de cahier mal éclairées
+"""
+
+import numpy as np
+from PIL import Image
+
+MIN_HEIGHT = 1000  # en dessous, Tesseract perd les petits caractères : on agrandit 2x
+
+
+def load_gray(image) -> np.ndarray:
+    """Chemin, image PIL ou tableau -> tableau uint8 en niveaux de gris"""
+    if isinstance(image, np.ndarray):
+        if image.ndim == 3:
+            # Luminance ITU-R 601-2, comme PIL convert('L')
+            image = image[..., 0] * 0.299 + image[..., 1] * 0.587 + image[..., 2] * 0.114
+        return np.ascontiguousarray(image, dtype=np.uint8)
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+    return np.asarray(image.convert('L'), dtype=np.uint8)
+
+
+def stretch_contrast(gray: np.ndarray, low_pct: float = 1.0, high_pct: float = 99.0) -> np.ndarray:
+    """Étire l'histogramme entre deux percentiles (table de correspondance 256 entrées)"""
+    hist = np.bincount(gray.ravel(), minlength=256)
+    cdf = np.cumsum(hist) / gray.size
+    lo = int(np.searchsorted(cdf, low_pct / 100))
+    hi = int(np.searchsorted(cdf, high_pct / 100))
+    if hi <= lo:
+        return gray
+    lut = np.clip((np.arange(256) - lo) * (255.0 / (hi - lo)), 0, 255).astype(np.uint8)
+    return lut[gray]
+
+
+def _upscale2x(a: np.ndarray) -> np.ndarray:
+    """Interpolation bilinéaire 2x par tranches (aucune indexation avancée ni copie PIL)"""
+    h, w = a.shape
+    out = np.empty((2 * h - 1, 2 * w - 1), dtype=np.float32)
+    out[0::2, 0::2] = a
+    out[0::2, 1::2] = (a[:, :-1] + a[:, 1:]) * 0.5
+    out[1::2, 0::2] = (a[:-1, :] + a[1:, :]) * 0.5
+    out[1::2, 1::2] = (a[:-1, :-1] + a[:-1, 1:] + a[1:, :-1] + a[1:, 1:]) * 0.25
+    return out
+
+
+def upscale2x(gray: np.ndarray) -> np.ndarray:
+    return (_upscale2x(gray.astype(np.float32)) + 0.5).astype(np.uint8)
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Seuil d'Otsu : maximise la variance inter-classes sur l'histogramme"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = gray.size - weight_bg
+    cum_mean = np.cumsum(hist * np.arange(256))
+    total_mean = cum_mean[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_bg = cum_mean / weight_bg
+        mean_fg = (total_mean - cum_mean) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    between = np.nan_to_num(between)
+    return int(np.argmax(between))
+
+
+def binarize_otsu(gray: np.ndarray) -> np.ndarray:
+    return np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+
+
+def sauvola_threshold(gray: np.ndarray, window: int = 25, k: float = 0.2, r: float = 128.0) -> np.ndarray:
+    """
+    Sauvola : seuil local T = m * (1 + k * (s / r - 1))
+    m et s (moyenne, écart-type locaux sur une fenêtre window²) calculés en O(1)
+    par pixel avec deux images intégrales entières (bords en miroir)
+    """
+    radius = window // 2
+    window = 2 * radius + 1
+    padded = np.zeros((gray.shape[0] + window, gray.shape[1] + window), dtype=np.int64)
+    padded[1:, 1:] = np.pad(gray, radius, mode='reflect')
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+    np.square(padded, out=padded)
+    integral_sq = padded.cumsum(axis=0).cumsum(axis=1)
+
+    def box_sum(table):
+        return (table[window:, window:] - table[:-window, window:]
+                - table[window:, :-window] + table[:-window, :-window])
+
+    area = float(window * window)
+    mean = box_sum(integral) / area
+    var = box_sum(integral_sq) / area - mean * mean
+    np.maximum(var, 0, out=var)
+    return (mean * (1 + k * (np.sqrt(var) / r - 1))).astype(np.float32)
+
+
+def binarize_sauvola(gray: np.ndarray, window: int = 25, k: float = 0.2, r: float = 128.0) -> np.ndarray:
+    return np.where(gray > sauvola_threshold(gray, window, k, r), 255, 0).astype(np.uint8)
+
+
+def preprocess(image, method: str = "sauvola", min_height: int = MIN_HEIGHT, window: int = 25) -> np.ndarray:
+    """Chaîne complète -> tableau uint8 binaire (0 = encre, 255 = fond)"""
+    gray = stretch_contrast(load_gray(image))
+    small = gray.shape[0] < min_height
+    if method == "sauvola" and small:
+        # Statistiques locales à la résolution d'origine (4x moins de pixels),
+        # seuil interpolé comme l'image : même résultat qu'en pleine résolution à l'échelle près
+        threshold = _upscale2x(sauvola_threshold(gray, window // 2))
+        big = upscale2x(gray)
+        return np.where(big > threshold, 255, 0).astype(np.uint8)
+    if small:
+        gray = upscale2x(gray)
+    if method == "otsu":
+        return binarize_otsu(gray)
+    if method == "none":
+        return gray
+    return binarize_sauvola(gray, window)
+
+
+def to_pil(array: np.ndarray) -> Image.Image:
+    return Image.fromarray(array)
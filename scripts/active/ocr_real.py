@@ -4,8 +4,13 @@ from PIL import Image
 import os
 from pathlib import Path
 
-# Configuration Tesseract
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+# Configuration Tesseract : variable TESSERACT_CMD, sinon l'installation Windows par défaut
+# si elle existe, sinon le tesseract du PATH
+WINDOWS_TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+_tesseract_cmd = os.getenv('TESSERACT_CMD') or (
+    WINDOWS_TESSERACT_CMD if os.path.exists(WINDOWS_TESSERACT_CMD) else None)
+if _tesseract_cmd:
+    pytesseract.pytesseract.tesseract_cmd = _tesseract_cmd
 
 class RealOCR:
     """
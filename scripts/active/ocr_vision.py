@@ -1,16 +1,18 @@
 # scripts/ocr_vision.py
 """OCR avec GPT-4 Vision - Version améliorée pour manuscrit"""
 
-import os
 import base64
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from llm_gateway import get_gateway
+from token_budget import get_budget
+
 load_dotenv()
 
 class VisionOCR:
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.gateway = get_gateway()
+        self.budget = get_budget()
         print("[OCR] GPT-4 Vision initialisé (v2)")
     
     def read_image(self, image_path):
@@ -20,7 +22,8 @@ class VisionOCR:
                 base64_image = base64.b64encode(image_file.read()).decode('utf-8')
             
             # Prompt amélioré pour manuscrit
-            response = self.client.chat.completions.create(
+            max_tokens = self.budget.max_tokens_for("transcription_ocr")
+            result = self.gateway.chat(
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -54,11 +57,12 @@ Transcris maintenant:"""
                         ]
                     }
                 ],
-                max_tokens=300,
+                max_tokens=max_tokens,
                 temperature=0.1  # Plus déterministe
             )
+            self.budget.record("transcription_ocr", 0, result, max_tokens)
             
-            text = response.choices[0].message.content.strip()
+            text = result["content"].strip()
             print(f"[VISION] Lu: {text}")
             return text
             
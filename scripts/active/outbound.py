@@ -0,0 +1,158 @@
+# scripts/outbound.py
+"""
+Composition des messages sortants WhatsApp
+- OutboundComposer : les textes consécutifs d'une même réponse sont regroupés en un seul
+  message ; un audio ou un flush() explicite (accusé de réception) les envoie, dans l'ordre
+- split_message : découpe un texte trop long pour la limite de 4096 caractères de WhatsApp,
+  aux paragraphes, puis aux lignes, puis aux phrases, puis aux espaces
+- compteurs : textes composés, envois Graph économisés, messages découpés (/metrics)
+"""
+
+import re
+import threading
+from typing import Dict, List
+
+# Limite du champ text.body de l'API WhatsApp Cloud
+MAX_BODY_CHARS = 4096
+SEPARATOR = "\n\n"
+
+# Séparateurs essayés du plus fort au plus faible (gardés en fin de morceau)
+SPLIT_PATTERNS = [
+    re.compile(r'\n\s*\n'),
+    re.compile(r'\n'),
+    re.compile(r'(?<=[.!?…])\s+'),
+    re.compile(r'\s+'),
+]
+
+
+def split_message(text: str, limit: int = MAX_BODY_CHARS) -> List[str]:
+    """Morceaux d'au plus limit caractères, coupés à la frontière la plus forte possible"""
+    text = text.strip()
+    if len(text) <= limit:
+        return [text] if text else []
+    parts = []
+    while len(text) > limit:
+        window = text[:limit + 1]
+        cut = 0
+        for pattern in SPLIT_PATTERNS:
+            ends = [m.start() for m in pattern.finditer(window) if 0 < m.start() <= limit]
+            # Une coupure trop tôt produirait un minuscule morceau : on préfère un séparateur plus faible
+            if ends and ends[-1] >= limit // 3:
+                cut = ends[-1]
+                break
+        if not cut:
+            cut = limit  # aucun séparateur : coupure franche
+        parts.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text:
+        parts.append(text)
+    return parts
+
+
+class OutboundStats:
+    """Compteurs partagés par tous les composeurs du processus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.replies = 0
+        self.texts = 0
+        self.text_sends = 0
+        self.audio_sends = 0
+        self.split_messages = 0
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            sends = self.text_sends + self.audio_sends
+            return {
+                "replies": self.replies,
+                "texts_composed": self.texts,
+                "text_sends": self.text_sends,
+                "audio_sends": self.audio_sends,
+                "sends_saved": max(self.texts - self.text_sends, 0),
+                "split_messages": self.split_messages,
+                "sends_per_reply": round(sends / self.replies, 2) if self.replies else 0.0,
+            }
+
+
+_stats = OutboundStats()
+
+
+def get_outbound_stats() -> Dict:
+    return _stats.get_stats()
+
+
+class OutboundComposer:
+    """
+    Messages d'une réponse à un utilisateur, envoyés dans l'ordre d'appel :
+        outbound = OutboundComposer(bot, numero)
+        outbound.text("accusé"); outbound.flush(priority=True)   # part tout de suite
+        outbound.audio(chemin)                        # textes en attente envoyés avant l'audio
+        outbound.text("note"); outbound.text("réponse")
+        outbound.flush()                              # note + réponse = un seul message
+    bot doit fournir send_message(numero, texte, priority) et send_audio(numero, chemin)
+    """
+
+    def __init__(self, bot, to_number: str, separator: str = SEPARATOR):
+        self.bot = bot
+        self.to_number = to_number
+        self.separator = separator
+        self._pending: List[str] = []
+        _stats.add(replies=1)
+
+    def text(self, body: str):
+        """Ajoute un texte ; envoyé au prochain audio ou flush()"""
+        if body and body.strip():
+            self._pending.append(body.strip())
+            _stats.add(texts=1)
+
+    def flush(self, priority: bool = False) -> bool:
+        """Envoie les textes en attente (regroupés, découpés si besoin) ; False si un envoi a échoué
+        priority=True : voie prioritaire de l'ordonnanceur d'envoi (accusés de réception)"""
+        if not self._pending:
+            return True
+        body = self.separator.join(self._pending)
+        self._pending = []
+        parts = split_message(body)
+        _stats.add(text_sends=len(parts), split_messages=int(len(parts) > 1))
+        ok = True
+        for part in parts:
+            ok = self.bot.send_message(self.to_number, part, priority=priority) and ok
+        return ok
+
+    def audio(self, audio_path: str) -> bool:
+        """Envoie l'audio après les textes déjà composés (l'ordre de lecture est conservé)"""
+        self.flush()
+        _stats.add(audio_sends=1)
+        return self.bot.send_audio(self.to_number, audio_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+
+if __name__ == "__main__":
+    class _PrintBot:
+        def send_message(self, to, text, priority=False):
+            print(f"  -> texte ({len(text)} car.) : {text[:60]!r}")
+            return True
+
+        def send_audio(self, to, path):
+            print(f"  -> audio {path}")
+            return True
+
+    with OutboundComposer(_PrintBot(), "243000") as outbound:
+        outbound.text("📸 Photo reçue !")
+        outbound.flush(priority=True)
+        outbound.audio("reponse.ogg")
+        outbound.text("🎵 Explication audio envoyée !")
+        outbound.text("Paragraphe. " * 300 + "\n\n" + "Fin de la réponse.")
+    print(get_outbound_stats())
+    print([len(p) for p in split_message("mot " * 3000)])
@@ -0,0 +1,82 @@
+# scripts/perf_metrics.py
+"""
+Petits outils de mesure de performance partagés (bot, évaluations, benchmarks)
+- percentile() : percentile par interpolation linéaire
+- LatencyRecorder : fenêtre glissante de latences, thread-safe
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List
+
+
+def percentile(values: Iterable[float], p: float) -> float:
+    """Percentile p (0-100) par interpolation linéaire, 0.0 si vide"""
+    data = sorted(values)
+    if not data:
+        return 0.0
+    if len(data) == 1:
+        return float(data[0])
+    rank = (len(data) - 1) * (p / 100.0)
+    low = int(rank)
+    high = min(low + 1, len(data) - 1)
+    return float(data[low] + (data[high] - data[low]) * (rank - low))
+
+
+def summarize(values: List[float]) -> Dict:
+    """Résumé standard d'une série de latences (ms)"""
+    if not values:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3),
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(max(values), 3),
+    }
+
+
+class LatencyRecorder:
+    """Garde les N dernières latences (ms) et les compteurs associés"""
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.total = 0
+        self.errors = 0
+
+    def record(self, elapsed_ms: float, error: bool = False):
+        with self._lock:
+            self._samples.append(elapsed_ms)
+            self.total += 1
+            if error:
+                self.errors += 1
+
+    def time(self):
+        """Context manager : with recorder.time(): ..."""
+        return _Timer(self)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            samples = list(self._samples)
+            total, errors = self.total, self.errors
+        result = summarize(samples)
+        result["total"] = total
+        result["errors"] = errors
+        return result
+
+
+class _Timer:
+    def __init__(self, recorder: LatencyRecorder):
+        self.recorder = recorder
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed_ms = (time.perf_counter() - self.t0) * 1000
+        self.recorder.record(self.elapsed_ms, error=exc_type is not None)
+        return False
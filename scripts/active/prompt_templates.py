@@ -0,0 +1,283 @@
+# scripts/prompt_templates.py
+"""
+Moteur de templates de prompts (config/prompts/*.txt)
+- chaque fichier est compilé une fois en segments texte / variables {{nom}}
+- rechargement à chaud : mtime vérifié au plus toutes les MOTEYI_PROMPTS_RELOAD_S secondes
+- lignes commençant par '#' = commentaires, retirées du prompt
+- build_messages() : texte système statique en premier (préfixe identique d'une requête
+  à l'autre -> cache de préfixe du fournisseur), partie variable dans le message utilisateur
+- comptage des tokens (tiktoken si installé, sinon approximation) et statistiques par requête
+"""
+
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from perf_metrics import summarize
+
+# Chemin absolu : gunicorn lance le bot avec --chdir scripts/active
+PROMPTS_DIR = Path(os.getenv('MOTEYI_PROMPTS_DIR') or Path(__file__).resolve().parents[2] / "config" / "prompts")
+
+VARIABLE_RE = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+LANGUAGE_FILES = {
+    "fr": "langue_francais",
+    "ln": "langue_lingala",
+    "sw": "langue_swahili",
+    "lu": "langue_tshiluba",
+    "en": "langue_anglais",
+}
+LANGUAGE_NAMES = {"fr": "Français", "ln": "Lingala", "sw": "Kiswahili", "lu": "Tshiluba", "en": "English"}
+# Noms utilisés par RealGPT.generate_explanation
+GPT_LANGUAGE_CODES = {"francais": "fr", "lingala": "ln", "english": "en"}
+
+
+def detect_math_type(text):
+    """Détecte le type de problème mathématique"""
+    text_lower = text.lower()
+
+    if any(p in text_lower for p in ['(', ')', '²', 'second degré']):
+        if '²' in text or '^2' in text:
+            return 'equation_quadratique'
+    if '=' in text and any(c in text for c in 'xyz'):
+        return 'equation_lineaire'
+    if any(op in text for op in ['+', '-', '*', '/', '×', '÷']):
+        return 'calcul_arithmetique'
+    return 'general'
+
+
+# ---------------------------------------------------------------------------
+# Comptage des tokens
+# ---------------------------------------------------------------------------
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+WORD_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception:
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Tokens d'un texte : tiktoken (o200k_base, gpt-4o*) ou approximation"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Approximation : ~1 token par mot court ou signe, ~4 caractères par token au-delà
+    return sum(max(1, (len(w) + 3) // 4) for w in WORD_RE.findall(text))
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """Tokens d'une liste de messages chat (+3 par message, +3 pour l'amorce de réponse)"""
+    total = 3
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):  # messages vision : seules les parties texte sont comptées
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        total += 3 + count_tokens(content or "")
+    return total
+
+
+# ---------------------------------------------------------------------------
+# Templates
+# ---------------------------------------------------------------------------
+class PromptTemplate:
+    """Template compilé : alternance de textes fixes et de noms de variables"""
+
+    def __init__(self, name: str, source: str, mtime: float = 0.0):
+        self.name = name
+        self.mtime = mtime
+        lines = [line for line in source.splitlines() if not line.lstrip().startswith('#')]
+        body = "\n".join(lines).strip()
+        self.literals: List[str] = []
+        self.variables: List[str] = []
+        pos = 0
+        for match in VARIABLE_RE.finditer(body):
+            self.literals.append(body[pos:match.start()])
+            self.variables.append(match.group(1))
+            pos = match.end()
+        self.literals.append(body[pos:])
+        self.static = not self.variables
+
+    def render(self, **values) -> str:
+        if self.static:
+            return self.literals[0]
+        parts = [self.literals[0]]
+        for variable, literal in zip(self.variables, self.literals[1:]):
+            parts.append(str(values.get(variable, "")))
+            parts.append(literal)
+        return "".join(parts)
+
+
+class PromptLibrary:
+    """Templates de config/prompts, compilés au chargement et rechargés si modifiés"""
+
+    def __init__(self, prompts_dir: Path = None, reload_interval_s: float = None):
+        self.prompts_dir = Path(prompts_dir or PROMPTS_DIR)
+        if reload_interval_s is None:
+            reload_interval_s = float(os.getenv('MOTEYI_PROMPTS_RELOAD_S', '2'))
+        self.reload_interval_s = reload_interval_s
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._system_cache: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.reloads = 0
+        self._usage_lock = threading.Lock()
+        self._usage: Dict[str, List[int]] = {"prompt_tokens": [], "system_tokens": []}
+        self.requests = 0
+        self._load_all()
+
+    def _load_all(self):
+        if not self.prompts_dir.is_dir():
+            print(f"[PROMPTS] Dossier {self.prompts_dir} absent")
+            return
+        for path in sorted(self.prompts_dir.glob("*.txt")):
+            self._load(path)
+        print(f"[PROMPTS] {len(self._templates)} templates compilés ({self.prompts_dir})")
+
+    def _load(self, path: Path):
+        template = PromptTemplate(path.stem, path.read_text(encoding="utf-8"), path.stat().st_mtime)
+        self._templates[path.stem] = template
+        return template
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval_s:
+            return
+        with self._lock:
+            if now - self._last_check < self.reload_interval_s:
+                return
+            self._last_check = now
+            if not self.prompts_dir.is_dir():
+                return
+            changed = False
+            for path in self.prompts_dir.glob("*.txt"):
+                current = self._templates.get(path.stem)
+                try:
+                    if current is None or path.stat().st_mtime != current.mtime:
+                        self._load(path)
+                        changed = True
+                        print(f"[PROMPTS] Template rechargé : {path.name}")
+                except OSError:
+                    continue
+            if changed:
+                self.reloads += 1
+                self._system_cache = {}
+
+    def get(self, name: str) -> Optional[PromptTemplate]:
+        self._maybe_reload()
+        return self._templates.get(name)
+
+    def render(self, name: str, **values) -> str:
+        template = self.get(name)
+        return template.render(**values) if template else ""
+
+    def system_prompt(self, language: str = "fr") -> str:
+        """Texte système statique : consignes communes puis consignes de la langue"""
+        self._maybe_reload()
+        cached = self._system_cache.get(language)
+        if cached is None:
+            language_file = LANGUAGE_FILES.get(language, LANGUAGE_FILES["fr"])
+            parts = [self.render("system_multilingue"), self.render(language_file)]
+            cached = "\n\n".join(p for p in parts if p)
+            self._system_cache[language] = cached
+        return cached
+
+    def build_messages(self, question: str, language: str = "fr", context: Optional[Dict] = None,
+                       exercise_type: str = None, output_format: str = None,
+                       history: Optional[List[Dict]] = None) -> List[Dict]:
+        """Messages chat : [système statique, historique éventuel, utilisateur (contexte RAG + question)]"""
+        if exercise_type is None:
+            exercise_type = detect_math_type(question)
+        context_text = "aucun document"
+        niveau = "à déduire de la question"
+        if context and context.get('found'):
+            context_text = self.render("rag_contexte", documents=context.get('context', ''))
+            niveaux = [d['niveau'] for d in context.get('documents', []) if d.get('niveau') != "Non spécifié"]
+            if niveaux:
+                niveau = niveaux[0]
+        if output_format is None:
+            output_format = "texte court" if exercise_type == 'general' else "étape-par-étape"
+
+        user = self.render("user_template", language=LANGUAGE_NAMES.get(language, LANGUAGE_NAMES["fr"]),
+                           context_brut=context_text, question=question,
+                           niveau_scolaire=niveau, format=output_format)
+        if exercise_type == 'equation_quadratique':
+            user = f"{user}\n\n{self.render('math_quadratique')}"
+        return [
+            {"role": "system", "content": self.system_prompt(language)},
+            *(history or []),
+            {"role": "user", "content": user},
+        ]
+
+    def record_usage(self, messages: List[Dict]) -> int:
+        """Compte les tokens d'entrée d'une requête et met à jour les statistiques"""
+        prompt_tokens = count_message_tokens(messages)
+        system_tokens = sum(count_tokens(m["content"]) for m in messages
+                            if m["role"] == "system" and isinstance(m["content"], str))
+        with self._usage_lock:
+            self.requests += 1
+            for key, value in (("prompt_tokens", prompt_tokens), ("system_tokens", system_tokens)):
+                series = self._usage[key]
+                series.append(value)
+                if len(series) > 1000:
+                    del series[:len(series) - 1000]
+        print(f"[PROMPTS] {prompt_tokens} tokens d'entrée (dont {system_tokens} système statique)")
+        return prompt_tokens
+
+    def get_stats(self) -> Dict:
+        with self._usage_lock:
+            prompt = list(self._usage["prompt_tokens"])
+            system = list(self._usage["system_tokens"])
+
+        def tokens_summary(values):
+            summary = summarize(values)
+            return {k.replace("_ms", ""): v for k, v in summary.items()}
+
+        return {
+            "templates": sorted(self._templates),
+            "reloads": self.reloads,
+            "requests": self.requests,
+            "tokenizer": "tiktoken" if _get_encoding() is not None else "approximation",
+            "prompt_tokens": tokens_summary(prompt),
+            "system_tokens": tokens_summary(system),
+        }
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_prompts() -> PromptLibrary:
+    """Bibliothèque de prompts partagée par le processus"""
+    global _library
+    if _library is None:
+        with _library_lock:
+            if _library is None:
+                _library = PromptLibrary()
+    return _library
+
+
+if __name__ == "__main__":
+    library = get_prompts()
+    for lang in ("fr", "ln", "en"):
+        messages = library.build_messages("Résous (x-2)² = 49", lang)
+        print(f"--- {lang} : {library.record_usage(messages)} tokens")
+    print(messages[1]["content"])
+    print(library.get_stats())
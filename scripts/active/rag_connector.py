@@ -10,6 +10,41 @@ import csv
 from pathlib import Path
 from typing import Dict, List, Optional
 import re
+import threading
+
+from prompt_templates import get_prompts
+
+STOPWORDS = {'le', 'la', 'les', 'un', 'une', 'de', 'du', 'des', 'et', 'ou', 'est', 'comment', 'que'}
+KEYWORD_RE = re.compile(r'\b[a-zàâäéèêëïîôùûüÿæœç]+\b')
+
+
+def extract_keywords(text: str) -> List[str]:
+    """Extrait les mots-clés d'une question (partagé avec shared_index)"""
+    words = KEYWORD_RE.findall(text.lower())
+    return [w for w in words if w not in STOPWORDS and len(w) > 2]
+
+
+def document_search_text(doc: Dict) -> str:
+    """Texte recherchable d'un document, enrichi selon niveau et matière (partagé avec shared_index)"""
+    doc_text = f"{doc.get('title', '')} {doc.get('file', '')} {doc.get('id', '')}".lower()
+    
+    # Détecter niveau et matière depuis le texte
+    if 'primaire' in doc_text:
+        doc_text += ' primaire école'
+    if 'secondaire' in doc_text or 'HS' in doc_text or 'EB' in doc_text:
+        doc_text += ' secondaire lycée'
+    if 'math' in doc_text:
+        doc_text += ' mathématiques calcul géométrie'
+    if 'lingala' in doc_text:
+        doc_text += ' lingala langue'
+    if 'kiswahili' in doc_text:
+        doc_text += ' kiswahili swahili langue'
+    if 'ciluba' in doc_text:
+        doc_text += ' ciluba tshiluba langue'
+    if 'svt' in doc_text:
+        doc_text += ' sciences biologie vie terre'
+    return doc_text
+
 
 class CongoRAGConnector:
     """Connecteur RAG pour les 117 documents du curriculum RDC"""
@@ -23,6 +58,7 @@ class CongoRAGConnector:
         self.documents = self._load_all_documents()
         self.cache = {}
         self.stats = {"queries": 0, "hits": 0}
+        self._stats_lock = threading.Lock()
         
         print(f"✅ RAG initialisé avec {len(self.documents)} documents")
     
@@ -59,30 +95,12 @@ class CongoRAGConnector:
     
     def _extract_keywords(self, text: str) -> List[str]:
         """Extrait les mots-clés d'une question"""
-        stopwords = {'le', 'la', 'les', 'un', 'une', 'de', 'du', 'des', 'et', 'ou', 'est', 'comment', 'que'}
-        words = re.findall(r'\b[a-zàâäéèêëïîôùûüÿæœç]+\b', text.lower())
-        return [w for w in words if w not in stopwords and len(w) > 2]
+        return extract_keywords(text)
     
     def _score_document(self, doc: Dict, keywords: List[str]) -> float:
         """Calcule la pertinence d'un document"""
         score = 0.0
-        doc_text = f"{doc.get('title', '')} {doc.get('file', '')} {doc.get('id', '')}".lower()
-        
-        # Détecter niveau et matière depuis le texte
-        if 'primaire' in doc_text:
-            doc_text += ' primaire école'
-        if 'secondaire' in doc_text or 'HS' in doc_text or 'EB' in doc_text:
-            doc_text += ' secondaire lycée'
-        if 'math' in doc_text:
-            doc_text += ' mathématiques calcul géométrie'
-        if 'lingala' in doc_text:
-            doc_text += ' lingala langue'
-        if 'kiswahili' in doc_text:
-            doc_text += ' kiswahili swahili langue'
-        if 'ciluba' in doc_text:
-            doc_text += ' ciluba tshiluba langue'
-        if 'svt' in doc_text:
-            doc_text += ' sciences biologie vie terre'
+        doc_text = document_search_text(doc)
         
         # Calculer le score
         for keyword in keywords:
@@ -93,7 +111,8 @@ class CongoRAGConnector:
     
     def query_rag(self, question: str, grade_level: Optional[str] = None, max_docs: int = 3) -> Dict:
         """Recherche les documents pertinents pour une question"""
-        self.stats["queries"] += 1
+        with self._stats_lock:
+            self.stats["queries"] += 1
         
         # Extraire les mots-clés
         keywords = self._extract_keywords(question)
@@ -112,7 +131,8 @@ class CongoRAGConnector:
         top_results = results[:max_docs]
         
         if top_results:
-            self.stats["hits"] += 1
+            with self._stats_lock:
+                self.stats["hits"] += 1
         
         return self._build_context(top_results, question)
     
@@ -160,6 +180,7 @@ class CongoRAGConnector:
                 matiere = "Français"
             
             doc_ref = {
+                'id': doc.get('id', ''),
                 'titre': doc.get('title', 'Document'),
                 'niveau': niveau,
                 'matiere': matiere,
@@ -169,23 +190,9 @@ class CongoRAGConnector:
             
             context_parts.append(f"📚 {doc_ref['titre']} ({niveau}, {matiere})")
         
-        # Construire le prompt enrichi
+        # Construire le prompt enrichi (template config/prompts/rag_contexte.txt)
         context_text = "\n".join(context_parts)
-        
-        prompt = f"""Tu es un tuteur pédagogique expert du curriculum de la RDC.
-
-📚 DOCUMENTS CONSULTÉS:
-{context_text}
-
-❓ QUESTION: {question}
-
-🎯 INSTRUCTIONS:
-- Utilise le contexte du programme national MEPST
-- Intègre des exemples locaux (Kinshasa, fleuve Congo, marché central)
-- Sois pédagogique et encourageant
-- Adapte ton langage au niveau scolaire
-
-Réponds de manière claire et culturellement appropriée pour un élève congolais."""
+        prompt = f"{get_prompts().render('rag_contexte', documents=context_text)}\n\n❓ QUESTION: {question}"
         
         return {
             'found': True,
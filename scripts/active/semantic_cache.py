@@ -0,0 +1,443 @@
+# scripts/semantic_cache.py
+"""
+Cache sémantique des réponses GPT (questions quasi identiques)
+- "Comment calculer l'aire d'un rectangle ?" et "calcul aire rectangle" : même réponse
+- question normalisée (minuscules, sans accents ni mots vides) -> trigrammes de caractères
+  par mot -> signature MinHash (64 permutations) -> index LSH (16 bandes de 4) en mémoire
+- candidats de l'index vérifiés par la similarité de Jaccard exacte des trigrammes ;
+  réponse réutilisée au-delà du seuil de la langue / du type d'exercice
+- nombres et opérateurs doivent être identiques : "2x + 3 = 11" ne réutilise jamais la
+  réponse de "2x + 5 = 11" (ils font partie de la clé des seaux LSH) ; nombres et opérations
+  écrits en toutes lettres (français, anglais, lingala, swahili) comptent aussi :
+  "deux fois trois" ne réutilise pas "deux plus trois" ; variables et unités aussi, dans
+  l'ordre ("2y + 3 = 11" != "2x + 3 = 11", "5 m en km" != "5 km en m") ; le sujet (aire,
+  périmètre, volume...) et la négation ("n'est pas") font aussi partie de la clé exacte
+- capacité bornée (LRU) et âge maximal ; persistance optionnelle en JSONL (ajout à chaque
+  réponse, relu et compacté au démarrage)
+- mesure du taux de réussite : python tools/replay_semantic_cache.py (data/eval/gold.jsonl)
+
+Configuration (.env) :
+  MOTEYI_SEMANTIC_CACHE=1                       0 pour désactiver
+  MOTEYI_SEMANTIC_THRESHOLD=0.7                 seuil de Jaccard par défaut
+  MOTEYI_SEMANTIC_THRESHOLDS=ln:0.8,calcul_arithmetique:0.85,fr/equation_lineaire:0.9
+  MOTEYI_SEMANTIC_CACHE_SIZE=5000   MOTEYI_SEMANTIC_CACHE_TTL_H=168
+  MOTEYI_SEMANTIC_CACHE_PATH=data/index/semantic_cache.jsonl   (vide : mémoire seule)
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from perf_metrics import LatencyRecorder
+from prompt_templates import detect_math_type
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# NUM_PERM hachages 32 bits par trigramme, tirés d'un seul SHAKE-128 (pas de NumPy à l'import
+# du bot ; identiques d'un processus à l'autre) et mémorisés : le vocabulaire des trigrammes est petit
+_UNPACK_HASHES = struct.Struct(f"<{NUM_PERM}I").unpack
+_EMPTY_SIGNATURE = (0xFFFFFFFF,) * NUM_PERM
+
+# Mots sans contenu (français / anglais), retirés avant le calcul des trigrammes
+# (les négations "ne", "pas" restent : elles changent le sens de la question)
+STOPWORDS = frozenset("""
+a au aux avec ce ces cet cette comment d de des du elle en est et il je j l la le les leur lui
+ma me mes moi mon nous on ou par pour qu que quel quelle quelles quels qui s sa se ses
+si son sur ta te tes toi ton tu un une vos votre vous y peux peut faut faire fait svp stp
+the an and are be can do does how i in is it me my of on or please the to what which with you
+""".split())
+
+# Nombres et opérations en toutes lettres (sans accents) -> jeton de la clé exacte.
+# "un"/"une" (articles) sont exclus ; un mot ambigu ("neuf") ne coûte qu'un échec de cache.
+NUMBER_WORDS = {
+    # français
+    "zero": "0", "deux": "2", "trois": "3", "quatre": "4", "cinq": "5", "six": "6", "sept": "7",
+    "huit": "8", "neuf": "9", "dix": "10", "onze": "11", "douze": "12", "treize": "13", "quatorze": "14",
+    "quinze": "15", "seize": "16", "vingt": "20", "vingts": "20", "trente": "30", "quarante": "40",
+    "cinquante": "50", "soixante": "60", "cent": "100", "cents": "100", "mille": "1000",
+    # anglais
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "seven": "7", "eight": "8",
+    "nine": "9", "ten": "10", "eleven": "11", "twelve": "12", "twenty": "20", "thirty": "30",
+    "forty": "40", "fifty": "50", "hundred": "100", "thousand": "1000",
+    # lingala
+    "moko": "1", "mibale": "2", "misato": "3", "minei": "4", "mitano": "5", "motoba": "6",
+    "nsambo": "7", "mwambe": "8", "libwa": "9", "zomi": "10", "nkama": "100", "nkoto": "1000",
+    # swahili
+    "moja": "1", "mbili": "2", "tatu": "3", "nne": "4", "tano": "5", "sita": "6", "saba": "7",
+    "nane": "8", "tisa": "9", "kumi": "10", "ishirini": "20", "thelathini": "30", "arobaini": "40",
+    "hamsini": "50", "mia": "100", "elfu": "1000",
+}
+OPERATOR_WORDS = {
+    # français
+    "plus": "+", "addition": "+", "additionne": "+", "additionner": "+", "somme": "+",
+    "moins": "-", "soustraction": "-", "soustrais": "-", "soustraire": "-", "difference": "-",
+    "fois": "×", "multiplie": "×", "multiplier": "×", "multiplication": "×", "produit": "×",
+    "divise": "÷", "divisee": "÷", "diviser": "÷", "division": "÷", "quotient": "÷",
+    "egal": "=", "egale": "=", "egalent": "=", "carre": "²", "carres": "²", "cube": "³", "cubes": "³",
+    "racine": "√", "pourcent": "%", "pourcentage": "%", "double": "double", "triple": "triple",
+    "moitie": "moitie", "tiers": "tiers", "quart": "quart",
+    # anglais
+    "minus": "-", "times": "×", "multiplied": "×", "multiply": "×", "divided": "÷", "divide": "÷",
+    "equals": "=", "squared": "²", "square": "²", "cubed": "³", "root": "√", "percent": "%",
+    "half": "moitie",
+    # lingala
+    "kobakisa": "+", "kolongola": "-", "mbala": "×", "kokabola": "÷",
+    # swahili
+    "jumlisha": "+", "kujumlisha": "+", "toa": "-", "kutoa": "-", "zidisha": "×", "kuzidisha": "×",
+    "mara": "×", "gawanya": "÷", "kugawanya": "÷", "sawa": "=",
+}
+MATH_WORDS = {**NUMBER_WORDS, **OPERATOR_WORDS}
+# Variables d'équation : un x entre deux nombres est le signe de multiplication
+VARIABLES = frozenset("xyzt")
+# Unités (sans accents) -> symbole ; clé exacte si précédées d'un nombre ou de "en" / "to" (conversion)
+UNITS = {
+    "mm": "mm", "cm": "cm", "dm": "dm", "m": "m", "dam": "dam", "hm": "hm", "km": "km",
+    "mg": "mg", "g": "g", "kg": "kg", "ml": "ml", "cl": "cl", "dl": "dl", "l": "l", "ha": "ha",
+    "h": "h", "min": "min", "s": "s", "fc": "fc",
+    "millimetre": "mm", "millimetres": "mm", "centimetre": "cm", "centimetres": "cm", "metre": "m",
+    "metres": "m", "kilometre": "km", "kilometres": "km", "gramme": "g", "grammes": "g",
+    "kilogramme": "kg", "kilogrammes": "kg", "litre": "l", "litres": "l", "heure": "h", "heures": "h",
+    "minute": "min", "minutes": "min", "seconde": "s", "secondes": "s", "franc": "fc", "francs": "fc",
+    "meter": "m", "meters": "m", "kilometer": "km", "kilometers": "km", "gram": "g", "grams": "g",
+    "liter": "l", "liters": "l", "hour": "h", "hours": "h", "second": "s", "seconds": "s",
+}
+CONVERSION_WORDS = frozenset("en in into to kwa".split())
+# Sujets qui changent la réponse pour les mêmes nombres ("aire" / "périmètre" d'un rectangle)
+TOPIC_WORDS = {
+    "aire": "aire", "aires": "aire", "surface": "aire", "superficie": "aire", "area": "aire", "eneo": "aire",
+    "perimetre": "perimetre", "perimetres": "perimetre", "perimeter": "perimetre", "mzunguko": "perimetre",
+    "circonference": "perimetre", "circumference": "perimetre",
+    "volume": "volume", "volumes": "volume", "ujazo": "volume",
+    "diametre": "diametre", "diameter": "diametre", "kipenyo": "diametre", "rayon": "rayon", "radius": "rayon",
+    "moyenne": "moyenne", "average": "moyenne", "mean": "moyenne", "wastani": "moyenne",
+    "vitesse": "vitesse", "speed": "vitesse", "kasi": "vitesse", "hypotenuse": "hypotenuse",
+    "pgcd": "pgcd", "gcd": "pgcd", "ppcm": "ppcm", "lcm": "ppcm",
+}
+# Négations : partie exacte de la clé ("pourquoi ... n'est pas ..." != "pourquoi ... est ...")
+NEGATION_WORDS = frozenset("ne n pas jamais aucun aucune sans not never without hapana".split())
+
+WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+# Nombres (virgule ou point décimal), opérateurs et mots : la clé exacte garde les nombres,
+# les opérateurs, les mots de MATH_WORDS, les variables et les unités
+MATH_RE = re.compile(r"\d+(?:[.,]\d+)?|[+\-*/×÷=^²³√<>%]|[^\W\d_]+", re.UNICODE)
+WORD_HYPHEN_RE = re.compile(r"(?<=[^\W\d_])[-/](?=[^\W\d_])", re.UNICODE)
+
+
+def _strip_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_words(text: str) -> List[str]:
+    """Mots porteurs de sens : minuscules, sans accents, sans mots vides"""
+    text = _strip_accents(text.lower())
+    return [w for w in WORD_RE.findall(text) if w not in STOPWORDS]
+
+
+def math_key(text: str) -> Tuple[str, ...]:
+    """Nombres, opérateurs, variables et unités dans l'ordre, chiffres ou toutes lettres
+    ("deux fois trois" -> 2 × 3, "2y + 3 = 11" -> 2 y + 3 = 11, "5 m en km" -> 5 m km) ;
+    "peut-être", "un/une" ne sont pas des opérations, "vingt-trois" donne 20 3"""
+    tokens = MATH_RE.findall(WORD_HYPHEN_RE.sub(" ", text.replace("−", "-")))
+    words = [_strip_accents(t.lower()) if t[0].isalpha() else t for t in tokens]
+
+    def is_number(i):
+        return 0 <= i < len(words) and (words[i][0].isdigit() or words[i] in NUMBER_WORDS)
+
+    def is_math(i):
+        return 0 <= i < len(words) and (not words[i][0].isalpha() or words[i] in MATH_WORDS)
+
+    key = []
+    for i, word in enumerate(words):
+        if word[0].isdigit():
+            key.append(word.replace(",", "."))
+        elif not word[0].isalpha():
+            key.append(word)
+        elif word in MATH_WORDS:
+            key.append(MATH_WORDS[word])
+        elif word in VARIABLES and (is_math(i - 1) or is_math(i + 1)):
+            key.append("×" if word == "x" and is_number(i - 1) and is_number(i + 1) else word)
+        elif word in UNITS and (is_number(i - 1) or i > 0 and words[i - 1] in CONVERSION_WORDS):
+            key.append(UNITS[word])
+    return tuple(key)
+
+
+def topic_key(text: str) -> Tuple[str, ...]:
+    """Sujets distinctifs de la question (aire, périmètre, volume...), triés"""
+    return tuple(sorted({TOPIC_WORDS[w] for w in normalize_words(text) if w in TOPIC_WORDS}))
+
+
+def is_negative(text: str) -> bool:
+    return any(_strip_accents(w.lower()) in NEGATION_WORDS for w in WORD_RE.findall(text))
+
+
+def exact_key(text: str) -> Tuple:
+    """Partie de la question qui doit être identique pour réutiliser une réponse :
+    (math_key, sujets, négation)"""
+    return math_key(text), topic_key(text), is_negative(text)
+
+
+def exercise_type(text: str, math: Tuple[str, ...] = None) -> str:
+    """Type d'exercice pour le choix du seuil (detect_math_type) ; sans nombre ni opérateur : general"""
+    if not (math if math is not None else math_key(text)):
+        return "general"
+    return detect_math_type(WORD_HYPHEN_RE.sub(" ", text.replace("−", "-")))
+
+
+def shingles(text: str, math: Tuple[str, ...] = None) -> FrozenSet[str]:
+    """Trigrammes de caractères de chaque mot (bordés) : robustes aux flexions (calculer / calcul)
+    Nombres et opérateurs ajoutés tels quels : « résoudre 2x+3=11 » reste proche de « Résous 2x + 3 = 11 »"""
+    grams = {f"#{t}" for t in (math if math is not None else math_key(text))}
+    for word in normalize_words(text):
+        padded = f"_{word}_"
+        if len(padded) <= SHINGLE_SIZE:
+            grams.add(padded)
+        else:
+            grams.update(padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1))
+    return frozenset(grams)
+
+
+@lru_cache(maxsize=1 << 16)
+def _gram_hashes(gram: str) -> Tuple[int, ...]:
+    return _UNPACK_HASHES(hashlib.shake_128(gram.encode("utf-8")).digest(4 * NUM_PERM))
+
+
+def minhash(grams: FrozenSet[str]) -> Tuple[int, ...]:
+    """Signature MinHash : minimum, pour chacun des NUM_PERM hachages, sur les trigrammes"""
+    if not grams:
+        return _EMPTY_SIGNATURE
+    return tuple(map(min, zip(*map(_gram_hashes, grams))))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def parse_thresholds(spec: str) -> Dict[str, float]:
+    """'ln:0.8,calcul_arithmetique:0.85,fr/equation_lineaire:0.9' -> {clé: seuil}"""
+    thresholds = {}
+    for item in (spec or "").split(","):
+        if ":" in item:
+            key, value = item.rsplit(":", 1)
+            try:
+                thresholds[key.strip()] = float(value)
+            except ValueError:
+                print(f"[SEMCACHE] Seuil ignoré : {item!r}")
+    return thresholds
+
+
+class _Entry:
+    __slots__ = ("id", "question", "answer", "language", "grams", "bands", "created", "hits")
+
+    def __init__(self, entry_id, question, answer, language, grams, bands, created):
+        self.id = entry_id
+        self.question = question
+        self.answer = answer
+        self.language = language
+        self.grams = grams
+        self.bands = bands
+        self.created = created
+        self.hits = 0
+
+
+class SemanticCache:
+    """Réponses GPT réutilisées pour les questions quasi identiques (MinHash + LSH en mémoire)"""
+
+    def __init__(self, threshold: float = None, thresholds: Dict[str, float] = None, max_entries: int = None,
+                 ttl_s: float = None, path=None):
+        self.threshold = threshold if threshold is not None else float(os.getenv('MOTEYI_SEMANTIC_THRESHOLD', '0.7'))
+        self.thresholds = thresholds if thresholds is not None else parse_thresholds(
+            os.getenv('MOTEYI_SEMANTIC_THRESHOLDS', ''))
+        self.max_entries = max_entries or int(os.getenv('MOTEYI_SEMANTIC_CACHE_SIZE', '5000'))
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.getenv('MOTEYI_SEMANTIC_CACHE_TTL_H', '168')) * 3600
+        if path is None:
+            path = os.getenv('MOTEYI_SEMANTIC_CACHE_PATH', '')
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()  # ordre LRU
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._next_id = 0
+        self.lookup_latency = LatencyRecorder()
+        self.counters = {"lookups": 0, "hits": 0, "misses": 0, "inserts": 0, "evictions": 0, "expired": 0}
+        if self.path:
+            self._load()
+
+    def threshold_for(self, language: str, exercise_type: str) -> float:
+        """Seuil le plus précis configuré : langue/type, type, langue, puis défaut"""
+        for key in (f"{language}/{exercise_type}", exercise_type, language):
+            if key in self.thresholds:
+                return self.thresholds[key]
+        return self.threshold
+
+    @staticmethod
+    def _band_keys(language: str, exact: Tuple, signature: Tuple[int, ...]) -> List[Tuple]:
+        return [(language, *exact, band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+    # -- Lecture -------------------------------------------------------------
+    def lookup(self, question: str, language: str = "fr") -> Optional[Dict]:
+        """{"answer", "question", "similarity", "exercise_type"} de la meilleure question proche, sinon None"""
+        t0 = time.perf_counter()
+        exact = exact_key(question)
+        grams = shingles(question, exact[0])
+        kind = exercise_type(question, exact[0])
+        threshold = self.threshold_for(language, kind)
+        best, best_sim = None, 0.0
+        if grams:
+            keys = self._band_keys(language, exact, minhash(grams))
+            with self._lock:
+                seen = set()
+                for key in keys:
+                    for entry_id in self._buckets.get(key, ()):
+                        if entry_id in seen:
+                            continue
+                        seen.add(entry_id)
+                        entry = self._entries.get(entry_id)
+                        if entry is None:
+                            continue
+                        sim = jaccard(grams, entry.grams)
+                        if sim > best_sim:
+                            best, best_sim = entry, sim
+                if best is not None and self.ttl_s > 0 and time.time() - best.created > self.ttl_s:
+                    self._remove(best.id)
+                    self.counters["expired"] += 1
+                    best = None
+                hit = best is not None and best_sim >= threshold
+                self.counters["lookups"] += 1
+                self.counters["hits" if hit else "misses"] += 1
+                if hit:
+                    best.hits += 1
+                    self._entries.move_to_end(best.id)
+                    result = {"answer": best.answer, "question": best.question,
+                              "similarity": round(best_sim, 3), "exercise_type": kind}
+        else:
+            hit = False
+            with self._lock:
+                self.counters["lookups"] += 1
+                self.counters["misses"] += 1
+        self.lookup_latency.record((time.perf_counter() - t0) * 1000)
+        return result if hit else None
+
+    def get(self, question: str, language: str = "fr") -> Optional[str]:
+        match = self.lookup(question, language)
+        return match["answer"] if match else None
+
+    # -- Écriture ------------------------------------------------------------
+    def put(self, question: str, answer: str, language: str = "fr", persist: bool = True,
+            created: float = None) -> bool:
+        """Mémorise la réponse ; False si la question n'a aucun mot porteur de sens"""
+        exact = exact_key(question)
+        grams = shingles(question, exact[0])
+        if not grams or not answer:
+            return False
+        bands = self._band_keys(language, exact, minhash(grams))
+        created = created or time.time()
+        with self._lock:
+            entry = _Entry(self._next_id, question, answer, language, grams, bands, created)
+            self._next_id += 1
+            self._entries[entry.id] = entry
+            for key in bands:
+                self._buckets.setdefault(key, []).append(entry.id)
+            self.counters["inserts"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.counters["evictions"] += 1
+        if persist and self.path:
+            self._append({"q": question, "a": answer, "lang": language, "t": round(created, 1)})
+        return True
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for key in entry.bands:
+            ids = self._buckets.get(key)
+            if ids:
+                try:
+                    ids.remove(entry_id)
+                except ValueError:
+                    pass
+                if not ids:
+                    del self._buckets[key]
+
+    # -- Persistance ---------------------------------------------------------
+    def _append(self, record: Dict):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"[SEMCACHE] Écriture impossible ({self.path}) : {e}")
+
+    def _load(self):
+        """Relit le journal (entrées récentes seulement) et le compacte s'il a trop grossi"""
+        if not self.path.exists():
+            return
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        now = time.time()
+        fresh = [r for r in records if self.ttl_s <= 0 or now - r.get("t", 0) <= self.ttl_s][-self.max_entries:]
+        for r in fresh:
+            self.put(r["q"], r["a"], r.get("lang", "fr"), persist=False, created=r.get("t"))
+        if len(records) > len(fresh) * 2 + 100:
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for r in fresh:
+                    f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.path)
+        print(f"[SEMCACHE] {len(fresh)} réponses rechargées depuis {self.path}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["buckets"] = len(self._buckets)
+        stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 3) if stats["lookups"] else 0.0
+        stats["threshold"] = self.threshold
+        stats["thresholds"] = dict(self.thresholds)
+        stats["lookup"] = self.lookup_latency.summary()
+        return stats
+
+
+_cache: Optional[SemanticCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Cache partagé par le processus ; None si MOTEYI_SEMANTIC_CACHE=0"""
+    global _cache
+    if os.getenv('MOTEYI_SEMANTIC_CACHE', '1') == '0':
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SemanticCache()
+    return _cache
+
+
+if __name__ == "__main__":
+    cache = SemanticCache(path="")
+    cache.put("Comment calculer l'aire d'un rectangle ?", "Aire = longueur × largeur.")
+    cache.put("Résous 2x + 3 = 11", "x = 4")
+    for q in ["calcul aire rectangle", "Comment calculer le périmètre d'un rectangle ?",
+              "résoudre 2x+3=11", "Résous 2x + 5 = 11"]:
+        match = cache.lookup(q)
+        print(f"  {q!r:52} -> {match['answer'] + ' (' + str(match['similarity']) + ')' if match else 'absent'}")
+    print(" ", cache.get_stats())
@@ -0,0 +1,341 @@
+# scripts/send_scheduler.py
+"""
+Ordonnanceur des envois Graph (POST /messages)
+- seau à jetons par PHONE_NUMBER_ID : MOTEYI_GRAPH_MPS messages/s pour le numéro, partagés
+  entre les WEB_CONCURRENCY workers gunicorn (chaque processus prend sa part)
+- file bornée (MOTEYI_SEND_QUEUE_MAX) : au-delà, l'envoi est refusé et compté comme perdu
+- voie prioritaire pour les accusés de réception
+- ordre conservé par destinataire : un seul message en vol par élève, les suivants attendent
+- 429 / 5xx / erreur réseau : nouvel essai planifié sur une roue temporelle (Retry-After
+  respecté, sinon backoff exponentiel) ; un 429 met aussi le seau en pause
+- messages trop vieux (MOTEYI_SEND_MAX_LAG_S) abandonnés plutôt qu'envoyés hors contexte
+- résultat d'un envoi : SendResult (vrai si accepté) avec le code HTTP final ; retryable
+  distingue les échecs temporaires (réseau, 429 / 5xx, file pleine, retard) des refus
+  définitifs (4xx : destinataire invalide, hors fenêtre de 24 h) à ne pas renvoyer
+- métriques : profondeur de file, retard d'envoi, essais, 429, pertes (/metrics)
+"""
+
+import itertools
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from perf_metrics import LatencyRecorder
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 30.0
+
+# post(payload) -> (code HTTP ou None si erreur réseau, Retry-After en s ou None, détail)
+PostFn = Callable[[Dict], Tuple[Optional[int], Optional[float], str]]
+
+
+class SendResult:
+    """Issue d'un envoi : ok, code HTTP final (None : erreur réseau ou message jamais envoyé), détail"""
+    __slots__ = ("ok", "status", "detail")
+
+    def __init__(self, ok: bool, status: Optional[int] = None, detail: str = ""):
+        self.ok = ok
+        self.status = status
+        self.detail = detail
+
+    def __bool__(self):
+        return self.ok
+
+    @property
+    def retryable(self) -> bool:
+        """Échec temporaire, à renvoyer plus tard (file des messages non délivrés)"""
+        return not self.ok and (self.status is None or self.status in RETRY_STATUSES)
+
+    def describe(self) -> str:
+        return f"{self.status or 'non envoyé'} : {self.detail[:200]}" if not self.ok else "ok"
+
+    def __repr__(self):
+        return f"SendResult({self.ok}, {self.status}, {self.detail[:60]!r})"
+
+
+class TokenBucket:
+    """rate jetons/s, au plus burst en réserve ; pause() suspend la distribution (après un 429)"""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = max(rate, 0.01)
+        self.burst = burst if burst is not None else max(self.rate, 1.0)
+        self.tokens = self.burst
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, now: float) -> float:
+        """0 si un jeton est disponible, sinon secondes avant le prochain"""
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, seconds: float, now: float):
+        self._paused_until = max(self._paused_until, now + seconds)
+        self.tokens = 0.0
+
+
+class TimerWheel:
+    """Roue temporelle hachée : schedule() en O(1), advance() rend les éléments échus"""
+
+    def __init__(self, tick_s: float = 0.05, slots: int = 512):
+        self.tick_s = tick_s
+        self.slots = slots
+        self._wheel: List[List] = [[] for _ in range(slots)]
+        self._current = 0
+        self._last = time.monotonic()
+        self.pending = 0
+
+    def schedule(self, delay_s: float, item):
+        ticks = max(1, math.ceil(delay_s / self.tick_s))
+        rounds, offset = divmod(ticks, self.slots)
+        if offset == 0:
+            rounds -= 1
+        self._wheel[(self._current + offset) % self.slots].append([rounds, item])
+        self.pending += 1
+
+    def advance(self, now: float) -> List:
+        if not self.pending:
+            self._last = now
+            return []
+        due = []
+        while self._last + self.tick_s <= now:
+            self._last += self.tick_s
+            self._current = (self._current + 1) % self.slots
+            slot = self._wheel[self._current]
+            if not slot:
+                continue
+            keep = []
+            for entry in slot:
+                if entry[0] <= 0:
+                    due.append(entry[1])
+                else:
+                    entry[0] -= 1
+                    keep.append(entry)
+            self._wheel[self._current] = keep
+        self.pending -= len(due)
+        return due
+
+
+class _Job:
+    __slots__ = ("seq", "to", "payload", "post", "priority", "future", "submitted", "attempts")
+
+    def __init__(self, seq, to, payload, post, priority):
+        self.seq = seq
+        self.to = to
+        self.payload = payload
+        self.post = post
+        self.priority = priority
+        self.future = Future()
+        self.submitted = time.monotonic()
+        self.attempts = 0
+
+
+class SendScheduler:
+    """File d'envoi commune aux threads du processus, vidée au rythme du seau à jetons"""
+
+    def __init__(self, rate: float = None, max_queue: int = None, max_lag_s: float = None,
+                 concurrency: int = None):
+        if rate is None:
+            workers = max(int(os.getenv('WEB_CONCURRENCY', '1')), 1)
+            rate = float(os.getenv('MOTEYI_GRAPH_MPS', '80')) / workers
+        self.bucket = TokenBucket(rate)
+        self.max_queue = max_queue or int(os.getenv('MOTEYI_SEND_QUEUE_MAX', '1000'))
+        self.max_lag_s = max_lag_s or float(os.getenv('MOTEYI_SEND_MAX_LAG_S', '120'))
+        concurrency = concurrency or int(os.getenv('MOTEYI_SEND_CONCURRENCY', '8'))
+        self.wheel = TimerWheel()
+        self._cv = threading.Condition()
+        self._seq = itertools.count()
+        self._queues: Dict[str, Deque[_Job]] = {}
+        self._lanes = {True: deque(), False: deque()}  # destinataires prêts, par priorité de leur tête
+        self._scheduled = set()
+        self._busy = set()
+        self._queued = 0
+        self._senders = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="graph-send")
+        self.lag = LatencyRecorder()
+        self.send_latency = LatencyRecorder()
+        self.counters = {"submitted": 0, "sent": 0, "failed": 0, "retries": 0, "throttled": 0,
+                         "dropped_full": 0, "dropped_lag": 0}
+        self._thread = threading.Thread(target=self._run, name="send-scheduler", daemon=True)
+        self._thread.start()
+
+    # -- Soumission ------------------------------------------------------------
+    def submit(self, to: str, payload: Dict, post: PostFn, priority: bool = False) -> Future:
+        """Future[SendResult] : vrai une fois le message accepté par Graph"""
+        with self._cv:
+            if self._queued >= self.max_queue:
+                self.counters["dropped_full"] += 1
+                future = Future()
+                future.set_result(SendResult(False, None, "file pleine"))
+                print(f"[SEND] File pleine ({self.max_queue}) : message pour {to} abandonné")
+                return future
+            job = _Job(next(self._seq), to, payload, post, priority)
+            self._queues.setdefault(to, deque()).append(job)
+            self._queued += 1
+            self.counters["submitted"] += 1
+            self._make_ready(to)
+            self._cv.notify()
+        return job.future
+
+    def send(self, to: str, payload: Dict, post: PostFn, priority: bool = False,
+             timeout: float = None) -> SendResult:
+        """submit() puis attente du résultat (échec temporaire si toujours en file après timeout)"""
+        timeout = timeout if timeout is not None else self.max_lag_s + BACKOFF_MAX_S
+        try:
+            return self.submit(to, payload, post, priority).result(timeout=timeout)
+        except Exception as e:
+            return SendResult(False, None, f"attente : {e or type(e).__name__}")
+
+    def _make_ready(self, to: str, front: bool = False):
+        """Place le destinataire dans la voie de sa tête de file s'il peut envoyer"""
+        queue = self._queues.get(to)
+        if not queue or to in self._busy or to in self._scheduled:
+            return
+        lane = self._lanes[queue[0].priority]
+        lane.appendleft(to) if front else lane.append(to)
+        self._scheduled.add(to)
+
+    # -- Distribution ------------------------------------------------------------
+    def _next_job(self, now: float) -> Optional[_Job]:
+        for priority in (True, False):
+            lane = self._lanes[priority]
+            while lane:
+                to = lane.popleft()
+                self._scheduled.discard(to)
+                queue = self._queues.get(to)
+                while queue:
+                    job = queue.popleft()
+                    self._queued -= 1
+                    if now - job.submitted > self.max_lag_s:
+                        self.counters["dropped_lag"] += 1
+                        job.future.set_result(SendResult(False, None, "trop de retard"))
+                        continue
+                    if not queue:
+                        del self._queues[to]
+                    self._busy.add(to)
+                    return job
+                self._queues.pop(to, None)
+        return None
+
+    def _run(self):
+        while True:
+            with self._cv:
+                now = time.monotonic()
+                for job in self.wheel.advance(now):
+                    # Nouvel essai : redevient la tête de file du destinataire, voie prioritaire
+                    self._queues.setdefault(job.to, deque()).appendleft(job)
+                    self._queued += 1
+                    self._busy.discard(job.to)
+                    self._lanes[True].appendleft(job.to)
+                    self._scheduled.add(job.to)
+                wait = self.bucket.wait_time(now)
+                job = self._next_job(now) if wait == 0 else None
+                if job is None:
+                    timeout = wait if wait else 1.0
+                    if self.wheel.pending:
+                        timeout = min(timeout, self.wheel.tick_s)
+                    self._cv.wait(timeout=timeout)
+                    continue
+                self.bucket.consume(now)
+            self._senders.submit(self._attempt, job)
+
+    def _attempt(self, job: _Job):
+        t0 = time.monotonic()
+        try:
+            status, retry_after, detail = job.post(job.payload)
+        except Exception as e:
+            status, retry_after, detail = None, None, str(e)
+        now = time.monotonic()
+        self.send_latency.record((now - t0) * 1000, error=status != 200)
+        job.attempts += 1
+
+        with self._cv:
+            if status == 200:
+                self.counters["sent"] += 1
+                self.lag.record((t0 - job.submitted) * 1000)
+                self._finish(job, SendResult(True, status))
+            elif (status is None or status in RETRY_STATUSES) and job.attempts < MAX_ATTEMPTS:
+                delay = retry_after if retry_after is not None else min(
+                    BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (job.attempts - 1)) * random.uniform(0.8, 1.2)
+                if status == 429:
+                    self.counters["throttled"] += 1
+                    self.bucket.pause(delay, now)
+                self.counters["retries"] += 1
+                self.wheel.schedule(delay, job)  # le destinataire reste bloqué jusqu'au nouvel essai
+                print(f"[SEND] {status or 'erreur réseau'} pour {job.to}, essai {job.attempts + 1} dans {delay:.1f}s")
+            else:
+                self.counters["failed"] += 1
+                print(f"[SEND] Échec définitif pour {job.to} ({status}) : {detail[:200]}")
+                self._finish(job, SendResult(False, status, detail))
+            self._cv.notify()
+
+    def _finish(self, job: _Job, result: SendResult):
+        self._busy.discard(job.to)
+        self._make_ready(job.to)
+        job.future.set_result(result)
+
+    def get_stats(self) -> Dict:
+        with self._cv:
+            stats = dict(self.counters)
+            stats.update({
+                "queued": self._queued,
+                "priority_ready": len(self._lanes[True]),
+                "recipients_in_flight": len(self._busy),
+                "retry_pending": self.wheel.pending,
+                "rate_per_s": round(self.bucket.rate, 2),
+            })
+        stats["lag"] = self.lag.summary()
+        stats["send"] = self.send_latency.summary()
+        return stats
+
+
+_scheduler: Optional[SendScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> SendScheduler:
+    """Ordonnanceur partagé par le processus (un par PHONE_NUMBER_ID : le bot n'en utilise qu'un)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = SendScheduler()
+    return _scheduler
+
+
+if __name__ == "__main__":
+    # Graph simulé : 20 % de 429 ; 3 élèves, 10 messages chacun, l'ordre doit être conservé
+    received: Dict[str, List[int]] = {}
+    lock = threading.Lock()
+
+    def fake_post(payload):
+        time.sleep(0.01)
+        if random.random() < 0.2:
+            return 429, 0.2, "rate limited"
+        with lock:
+            received.setdefault(payload["to"], []).append(payload["n"])
+        return 200, None, "ok"
+
+    scheduler = SendScheduler(rate=50, concurrency=4)
+    t0 = time.perf_counter()
+    futures = [scheduler.submit(to, {"to": to, "n": n}, fake_post, priority=(n == 0))
+               for n in range(10) for to in ("a", "b", "c")]
+    results = [bool(f.result(timeout=30)) for f in futures]
+    print(f"  {sum(results)}/{len(results)} envoyés en {time.perf_counter() - t0:.2f}s, "
+          f"ordre conservé : {all(v == sorted(v) for v in received.values())}")
+    print(scheduler.get_stats())
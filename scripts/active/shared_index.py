@@ -0,0 +1,380 @@
+# scripts/shared_index.py
+"""
+Index de retrieval en lecture seule, partagé entre workers via mmap
+- Un seul fichier (data/index/shared_index.bin) : vocabulaire, postings,
+  enregistrements de documents et vecteurs (float32), tableaux alignés
+- Chaque worker mappe le fichier : les pages physiques sont partagées par le
+  noyau (page cache), aucune copie par processus
+- Mise à jour atomique : construction dans un fichier temporaire puis os.replace ;
+  les workers détectent le nouveau fichier et remappent, les requêtes en cours
+  gardent l'ancienne version
+- Résultats identiques à CongoRAGConnector.query_rag (même score, même ordre)
+
+Construction : python tools/build_shared_index.py
+"""
+
+import bisect
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from rag_connector import CongoRAGConnector, document_search_text, extract_keywords
+
+try:
+    import numpy as np
+except ImportError:  # numpy optionnel : repli en Python pur
+    np = None
+
+DEFAULT_INDEX_PATH = Path("data/index/shared_index.bin")
+
+MAGIC = b"MOTEYIX1"
+VERSION = 1
+# magic, version, n_docs, n_terms, vector_dim, puis 7 offsets de section (u64)
+HEADER = struct.Struct("<8sIIII7Q")
+SECTIONS = ("terms_blob", "term_offsets", "posting_offsets", "postings", "doc_offsets", "doc_blob", "vectors")
+
+# Mêmes lettres que les mots-clés : un mot-clé est dans le texte d'un document
+# si et seulement s'il est sous-chaîne d'un de ces tokens
+TOKEN_RE = re.compile(r"[a-zàâäéèêëïîôùûüÿæœç]+")
+TERM_SEP = b"\n"
+
+
+def _align(f, boundary: int = 8) -> int:
+    pos = f.tell()
+    pad = (-pos) % boundary
+    if pad:
+        f.write(b"\0" * pad)
+    return pos + pad
+
+
+def build_shared_index(documents: Iterable[Dict], out_path=DEFAULT_INDEX_PATH,
+                       vectors: Optional[Sequence[Sequence[float]]] = None) -> Dict:
+    """
+    Construit le fichier d'index puis le publie atomiquement (tmp + os.replace)
+    vectors : optionnel, un vecteur float32 par document (même ordre)
+    """
+    from array import array
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    postings: Dict[str, List[int]] = {}
+    doc_records: List[bytes] = []
+    for doc_idx, doc in enumerate(documents):
+        doc_records.append(json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        for term in set(TOKEN_RE.findall(document_search_text(doc))):
+            postings.setdefault(term, []).append(doc_idx)
+
+    terms = sorted(postings)
+    n_docs, n_terms = len(doc_records), len(terms)
+    dim = len(vectors[0]) if vectors else 0
+    if vectors and len(vectors) != n_docs:
+        raise ValueError(f"{len(vectors)} vecteurs pour {n_docs} documents")
+
+    tmp_path = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+    offsets = {}
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+
+        # Vocabulaire : termes triés séparés par \n (recherche de sous-chaîne via mmap.find)
+        offsets["terms_blob"] = _align(f)
+        term_offsets = array("I", [0])
+        for term in terms:
+            data = term.encode("utf-8") + TERM_SEP
+            f.write(data)
+            term_offsets.append(term_offsets[-1] + len(data))
+
+        offsets["term_offsets"] = _align(f)
+        f.write(term_offsets.tobytes())
+
+        offsets["posting_offsets"] = _align(f)
+        posting_offsets = array("I", [0])
+        for term in terms:
+            posting_offsets.append(posting_offsets[-1] + len(postings[term]))
+        f.write(posting_offsets.tobytes())
+
+        offsets["postings"] = _align(f)
+        for term in terms:
+            f.write(array("I", postings[term]).tobytes())
+
+        offsets["doc_offsets"] = _align(f)
+        doc_offsets = array("Q", [0])
+        for record in doc_records:
+            doc_offsets.append(doc_offsets[-1] + len(record))
+        f.write(doc_offsets.tobytes())
+
+        offsets["doc_blob"] = _align(f)
+        for record in doc_records:
+            f.write(record)
+
+        offsets["vectors"] = _align(f)
+        for vector in vectors or []:
+            f.write(array("f", vector).tobytes())
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, n_docs, n_terms, dim, *(offsets[s] for s in SECTIONS)))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, out_path)
+    return {"path": str(out_path), "documents": n_docs, "terms": n_terms,
+            "vector_dim": dim, "bytes": out_path.stat().st_size}
+
+
+class SharedIndex:
+    """Vue mmap (lecture seule) d'un fichier d'index, sans copie des tableaux"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.n_docs, self.n_terms, self.vector_dim, *offs = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Index invalide ou version inconnue: {self.path}")
+        self._off = dict(zip(SECTIONS, offs))
+
+        buf = memoryview(self._mm)
+        o = self._off
+        self._terms_end = o["term_offsets"]
+        self.term_offsets = buf[o["term_offsets"]:o["term_offsets"] + 4 * (self.n_terms + 1)].cast("I")
+        self.posting_offsets = buf[o["posting_offsets"]:o["posting_offsets"] + 4 * (self.n_terms + 1)].cast("I")
+        n_postings = self.posting_offsets[self.n_terms] if self.n_terms else 0
+        self.postings = buf[o["postings"]:o["postings"] + 4 * n_postings].cast("I")
+        self.doc_offsets = buf[o["doc_offsets"]:o["doc_offsets"] + 8 * (self.n_docs + 1)].cast("Q")
+        self._doc_blob = o["doc_blob"]
+        vec_bytes = 4 * self.n_docs * self.vector_dim
+        self.vectors = buf[o["vectors"]:o["vectors"] + vec_bytes].cast("f") if vec_bytes else None
+
+        if np is not None:
+            self._np_postings = np.frombuffer(self._mm, dtype=np.uint32, count=n_postings, offset=o["postings"])
+        else:
+            self._np_postings = None
+
+    def document(self, idx: int) -> Dict:
+        start = self._doc_blob + self.doc_offsets[idx]
+        end = self._doc_blob + self.doc_offsets[idx + 1]
+        return json.loads(self._mm[start:end])
+
+    def term(self, idx: int) -> str:
+        start = self._off["terms_blob"] + self.term_offsets[idx]
+        end = self._off["terms_blob"] + self.term_offsets[idx + 1] - len(TERM_SEP)
+        return self._mm[start:end].decode("utf-8")
+
+    def terms_containing(self, keyword: str) -> List[int]:
+        """Indices des termes du vocabulaire contenant keyword (scan C via mmap.find)"""
+        needle = keyword.encode("utf-8")
+        base = self._off["terms_blob"]
+        pos, end = base, self._terms_end
+        found = []
+        while True:
+            pos = self._mm.find(needle, pos, end)
+            if pos < 0:
+                break
+            term_idx = bisect.bisect_right(self.term_offsets, pos - base) - 1
+            found.append(term_idx)
+            # Passer au terme suivant (un terme ne compte qu'une fois)
+            pos = base + self.term_offsets[term_idx + 1]
+        return found
+
+    def docs_for_terms(self, term_ids: List[int]):
+        """Union des postings de plusieurs termes"""
+        if self._np_postings is not None:
+            parts = [self._np_postings[self.posting_offsets[t]:self.posting_offsets[t + 1]] for t in term_ids]
+            if not parts:
+                return np.empty(0, dtype=np.uint32)
+            return np.unique(np.concatenate(parts))
+        docs = set()
+        for t in term_ids:
+            docs.update(self.postings[self.posting_offsets[t]:self.posting_offsets[t + 1]])
+        return docs
+
+    def close(self):
+        try:
+            self._mm.close()
+        except BufferError:
+            # Des vues sont encore vivantes : le GC fermera le mapping
+            pass
+
+
+class _DocumentsView(Sequence):
+    """Séquence de documents décodés à la demande depuis le mmap"""
+
+    def __init__(self, retriever: "SharedIndexRetriever"):
+        self._retriever = retriever
+
+    def __len__(self):
+        return self._retriever.index.n_docs
+
+    def __getitem__(self, idx):
+        index = self._retriever.index
+        if isinstance(idx, slice):
+            return [index.document(i) for i in range(*idx.indices(index.n_docs))]
+        if idx < 0:
+            idx += index.n_docs
+        if not 0 <= idx < index.n_docs:
+            raise IndexError(idx)
+        return index.document(idx)
+
+
+class SharedIndexRetriever(CongoRAGConnector):
+    """
+    Même interface que CongoRAGConnector (query_rag, get_stats, documents)
+    mais servie depuis l'index mmap partagé
+    """
+
+    def __init__(self, index_path=DEFAULT_INDEX_PATH, reload_interval: float = 5.0, keyword_cache_size: int = 4096):
+        self.index_path = Path(index_path)
+        self.reload_interval = reload_interval
+        self.index = SharedIndex(self.index_path)
+        self._swap_lock = threading.Lock()
+        self._next_check = time.monotonic() + reload_interval
+        self._keyword_cache = OrderedDict()
+        self._keyword_cache_size = keyword_cache_size
+        self._cache_lock = threading.Lock()
+        self.reloads = 0
+
+        self.cache = {}
+        self.stats = {"queries": 0, "hits": 0}
+        self._stats_lock = threading.Lock()
+        self.documents = _DocumentsView(self)
+        print(f"✅ RAG (index partagé) initialisé avec {len(self.documents)} documents")
+
+    # ----- Rechargement atomique -----
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._swap_lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.reload_interval
+            try:
+                stat = os.stat(self.index_path)
+            except OSError:
+                return
+            if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self.index.identity:
+                return
+            # Les requêtes en cours gardent leur référence à l'ancien index
+            self.index = SharedIndex(self.index_path)
+            with self._cache_lock:
+                self._keyword_cache.clear()
+            self.reloads += 1
+            print(f"[RAG] Index partagé rechargé ({self.index.n_docs} documents)")
+
+    def _keyword_docs(self, index: SharedIndex, keyword: str):
+        key = (index.identity, keyword)
+        with self._cache_lock:
+            docs = self._keyword_cache.get(key)
+            if docs is not None:
+                self._keyword_cache.move_to_end(key)
+                return docs
+        docs = index.docs_for_terms(index.terms_containing(keyword))
+        with self._cache_lock:
+            self._keyword_cache[key] = docs
+            if len(self._keyword_cache) > self._keyword_cache_size:
+                self._keyword_cache.popitem(last=False)
+        return docs
+
+    # ----- Requêtes -----
+    def _ranked(self, index: SharedIndex, keywords: List[str], max_docs: int):
+        """(doc_idx, score) triés comme CongoRAGConnector : score décroissant, ordre du manifest"""
+        denominator = max(len(keywords), 1)
+        if np is not None and isinstance(index._np_postings, np.ndarray):
+            parts = [self._keyword_docs(index, k) for k in keywords]
+            parts = [p for p in parts if len(p)]
+            if not parts:
+                return []
+            counts = np.bincount(np.concatenate(parts).astype(np.int64), minlength=index.n_docs)
+            candidates = np.nonzero(counts)[0]
+            # lexsort : dernière clé prioritaire -> score décroissant puis indice croissant
+            order = np.lexsort((candidates, -counts[candidates]))[:max_docs]
+            return [(int(candidates[i]), float(counts[candidates[i]]) / denominator) for i in order]
+
+        counts: Dict[int, int] = {}
+        for keyword in keywords:
+            for doc_idx in self._keyword_docs(index, keyword):
+                counts[doc_idx] = counts.get(doc_idx, 0) + 1
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:max_docs]
+        return [(doc_idx, count / denominator) for doc_idx, count in ranked]
+
+    def query_rag(self, question: str, grade_level: Optional[str] = None, max_docs: int = 3) -> Dict:
+        """Recherche les documents pertinents pour une question"""
+        self._maybe_reload()
+        index = self.index
+        with self._stats_lock:
+            self.stats["queries"] += 1
+
+        keywords = extract_keywords(question)
+        if grade_level:
+            keywords.extend(extract_keywords(grade_level))
+
+        top_results = [{"document": index.document(doc_idx), "score": score}
+                       for doc_idx, score in self._ranked(index, keywords, max_docs)]
+        if top_results:
+            with self._stats_lock:
+                self.stats["hits"] += 1
+
+        return self._build_context(top_results, question)
+
+    def get_stats(self) -> Dict:
+        stats = super().get_stats()
+        stats.update({
+            "backend": "shared_index",
+            "index_path": str(self.index_path),
+            "index_terms": self.index.n_terms,
+            "index_reloads": self.reloads,
+            "memory": memory_report(self.index_path),
+        })
+        return stats
+
+
+def memory_report(mapped_path=None) -> Dict:
+    """
+    Mémoire du processus courant (Linux, /proc) en Mo :
+    rss, pss (part proportionnelle des pages partagées), shared, private,
+    et la part résidente du fichier d'index mappé si mapped_path est donné
+    """
+    report = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"):
+                    report[key.lower()] = int(value.split()[0]) / 1024
+    except OSError:
+        return report
+
+    if mapped_path is not None:
+        target = str(Path(mapped_path).resolve())
+        rss = pss = 0
+        current = False
+        try:
+            with open("/proc/self/smaps") as f:
+                for line in f:
+                    first = line.split(None, 1)[0]
+                    if "-" in first and not first.endswith(":"):
+                        # Ligne d'en-tête de mapping : "adresse perms offset dev inode chemin"
+                        parts = line.split(None, 5)
+                        path = parts[5].strip() if len(parts) > 5 else ""
+                        current = path == target or path.startswith(target + " ")
+                    elif current and first == "Rss:":
+                        rss += int(line.split()[1])
+                    elif current and first == "Pss:":
+                        pss += int(line.split()[1])
+        except OSError:
+            pass
+        report["index_rss"] = rss / 1024
+        report["index_pss"] = pss / 1024
+
+    return {k: round(v, 2) for k, v in report.items()}
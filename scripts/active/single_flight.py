@@ -0,0 +1,155 @@
+# scripts/single_flight.py
+"""
+Regroupement des appels identiques en cours (single-flight)
+- une classe qui photographie la même fiche au même moment : une seule lecture Vision,
+  une seule explication GPT et une seule synthèse TTS par contenu identique
+- clé = empreinte du contenu (octets de l'image, texte + langue + contexte...)
+- le premier appelant (meneur) exécute l'appel ; les suivants attendent son résultat
+  et le reçoivent tous, exception comprise (pas de mise en cache : la clé est libérée
+  dès la fin de l'appel)
+- attente bornée (MOTEYI_SINGLE_FLIGHT_TIMEOUT_S) : si le meneur tarde, le suivant
+  fait son propre appel plutôt que de rester bloqué
+- compteurs par étape (appels, regroupés, expirations, erreurs) exposés sur /metrics
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict
+
+DEFAULT_TIMEOUT_S = float(os.getenv('MOTEYI_SINGLE_FLIGHT_TIMEOUT_S', '60'))
+
+
+def content_key(*parts) -> str:
+    """Empreinte sha256 de valeurs JSON (textes, langues, contexte RAG...)"""
+    data = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def file_key(path) -> str:
+    """Empreinte sha256 du contenu d'un fichier (même photo téléchargée plusieurs fois)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _Call:
+    __slots__ = ("future", "waiters")
+
+    def __init__(self):
+        self.future = Future()
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Groupe d'appels d'une étape (ocr, gpt, tts) : un seul appel en vol par clé"""
+
+    def __init__(self, name: str, timeout_s: float = None):
+        self.name = name
+        self.timeout_s = DEFAULT_TIMEOUT_S if timeout_s is None else timeout_s
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.counters = {"calls": 0, "executed": 0, "collapsed": 0, "timeouts": 0, "errors": 0, "max_waiters": 0}
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Résultat de fn(*args, **kwargs), partagé avec les appels concurrents de même clé"""
+        with self._lock:
+            self.counters["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.counters["max_waiters"] = max(self.counters["max_waiters"], call.waiters)
+
+        if not leader:
+            try:
+                result = call.future.result(timeout=self.timeout_s)
+                self._count("collapsed")
+                return result
+            except FutureTimeout:
+                # Meneur trop lent : appel indépendant (hors groupe) plutôt qu'une attente sans fin
+                self._count("timeouts")
+                print(f"[FLIGHT] {self.name} : attente > {self.timeout_s:.0f}s, appel indépendant")
+                return self._execute(fn, args, kwargs)
+            except Exception:
+                self._count("collapsed")
+                raise  # même erreur que le meneur
+
+        try:
+            result = self._execute(fn, args, kwargs)
+        except BaseException as e:
+            call.future.set_exception(e)
+            raise
+        else:
+            call.future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+
+    def _execute(self, fn, args, kwargs):
+        self._count("executed")
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            self._count("errors")
+            raise
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.counters)
+            stats["in_flight"] = len(self._calls)
+        stats["collapse_ratio"] = round(stats["collapsed"] / stats["calls"], 3) if stats["calls"] else 0.0
+        return stats
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    """Groupe partagé par le processus pour une étape"""
+    group = _groups.get(name)
+    if group is None:
+        with _groups_lock:
+            group = _groups.setdefault(name, SingleFlight(name))
+    return group
+
+
+def get_single_flight_stats() -> Dict[str, Dict]:
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: group.get_stats() for name, group in groups.items()}
+
+
+if __name__ == "__main__":
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls = []
+
+    def slow_square(x):
+        calls.append(x)
+        time.sleep(0.2)
+        if x < 0:
+            raise ValueError("négatif")
+        return x * x
+
+    flight = SingleFlight("demo", timeout_s=1)
+    with ThreadPoolExecutor(max_workers=30) as pool:
+        results = list(pool.map(lambda i: flight.do(content_key(i % 3), slow_square, i % 3), range(30)))
+        errors = list(pool.map(lambda i: type(pool.submit(flight.do, "neg", slow_square, -1).exception()).__name__,
+                               range(5)))
+    print(f"  30 appels -> {len(calls)} exécutions, résultats {sorted(set(results))}, erreurs {set(errors)}")
+    print(" ", flight.get_stats())
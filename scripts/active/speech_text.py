@@ -0,0 +1,131 @@
+# scripts/speech_text.py
+"""
+Normalisation du texte avant synthèse vocale (TTS)
+Remplace MoteyiCloudBot.clean_text_for_speech (une vingtaine de passes
+regex / replace, regex d'émojis recompilée à chaque appel) :
+- tables et regex compilées une fois au chargement du module
+- suppression Markdown + émojis en une seule passe (classe de caractères unique)
+- sauts de ligne -> pauses et espaces multiples traités en une seule passe
+- règles par langue : abréviations, listes numérotées, lecture des
+  symboles mathématiques (optionnelle)
+
+Pour le français, la sortie est identique à l'ancienne fonction
+(vérifié par tools/bench_speech_normalizer.py sur data/eval/speech_golden.jsonl).
+"""
+
+import os
+import re
+from typing import Dict
+
+# Markdown (* _ # `) et plages d'émojis de l'ancienne fonction, supprimés en une passe
+DELETE_RE = re.compile(
+    "["
+    "*_#`"
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "]+"
+)
+LIST_RE = re.compile(r'(\d+)\.\s*')
+WHITESPACE_RE = re.compile(r'\s+')
+DOTS_RE = re.compile(r'\.+')
+DOT_GAP_RE = re.compile(r'\.\s*\.')
+# Opérandes du moins : nombre, variable d'une lettre, parenthèse ou carré ; jamais le trait
+# d'union d'un mot ("Peut-être", "c'est-à-dire", "Twenty-one", "a-t-il")
+MINUS_RE = re.compile(r'(?:(?<=[\d)²])|(?<=(?<![^\W\d_])(?<!-)[^\W\d_]))\s*-\s*'
+                      r'(?=\d|\(|[^\W\d_](?![^\W\d_])(?!-[^\W\d_]))')
+# Fraction : deux nombres sans zéro en tête, hors dates ("12/05", "12/05/2024")
+FRACTION_RE = re.compile(r'(?<![\d/])(?!0\d)(\d+)\s*/\s*(?!0\d)(\d+)(?![\d/])')
+
+PROFILES = {
+    "fr": {
+        "list_word": "Numéro",
+        "abbreviations": [("OB.", "option B"), ("ex.", "exemple"), ("etc.", "et cetera")],
+        "math": {"=": " égale ", "+": " plus ", "×": " fois ", "÷": " divisé par ", "²": " au carré ",
+                 "√": " racine de ", "≈": " environ ", "±": " plus ou moins ", "Δ": " delta ",
+                 "-": " moins ", "/": " sur "},
+    },
+    "en": {
+        "list_word": "Number",
+        "abbreviations": [("OB.", "option B"), ("e.g.", "for example"), ("i.e.", "that is"),
+                          ("etc.", "et cetera")],
+        "math": {"=": " equals ", "+": " plus ", "×": " times ", "÷": " divided by ", "²": " squared ",
+                 "√": " square root of ", "≈": " about ", "±": " plus or minus ", "Δ": " delta ",
+                 "-": " minus ", "/": " over "},
+    },
+    "sw": {
+        "list_word": "Namba",
+        "abbreviations": [("OB.", "option B"), ("k.m.", "kwa mfano"), ("n.k.", "na kadhalika"),
+                          ("etc.", "et cetera")],
+        "math": {"=": " ni sawa na ", "+": " jumlisha ", "×": " zidisha ", "÷": " gawanya kwa ",
+                 "²": " kipeo cha pili ", "√": " kipeuo cha ", "≈": " takriban ", "±": " jumlisha au toa ",
+                 "Δ": " delta ", "-": " toa ", "/": " juu ya "},
+    },
+}
+# Lingala et Tshiluba : vocabulaire mathématique scolaire en français
+PROFILES["ln"] = dict(PROFILES["fr"])
+PROFILES["lu"] = dict(PROFILES["fr"])
+
+
+def _whitespace(match) -> str:
+    """Un bloc d'espaces : sauts de ligne -> pauses, puis un seul espace par sous-bloc"""
+    run = match.group()
+    if '\n' not in run:
+        return ' '
+    return WHITESPACE_RE.sub(' ', run.replace('\n\n', '. ').replace('\n', '. '))
+
+
+class SpeechNormalizer:
+    """Transforme le texte formaté en version naturelle pour l'audio"""
+
+    def __init__(self, language: str = "fr", speak_math: bool = False):
+        profile = PROFILES.get(language, PROFILES["fr"])
+        self.language = language
+        self.list_replacement = f"{profile['list_word']} \\1, "
+        self.abbreviations = profile["abbreviations"]
+        self.math_words = profile["math"] if speak_math else None
+        if self.math_words:
+            symbols = "".join(re.escape(s) for s in self.math_words if s not in "-/")
+            self._math_re = re.compile(f"[{symbols}]")
+
+    def _speak_math(self, text: str) -> str:
+        words = self.math_words
+        text = MINUS_RE.sub(words["-"], text)
+        text = FRACTION_RE.sub(lambda m: m.group(1) + words["/"] + m.group(2), text)
+        return self._math_re.sub(lambda m: words[m.group()], text)
+
+    def normalize(self, text: str) -> str:
+        text = DELETE_RE.sub('', text)
+        if self.math_words:
+            text = self._speak_math(text)
+
+        # Ponctuation adaptée à l'oral (les exclamations sont trop fortes en TTS)
+        text = text.replace(' : ', ', ').replace(' - ', ', ').replace('...', '.').replace('!', '.')
+        text = LIST_RE.sub(self.list_replacement, text)
+        text = WHITESPACE_RE.sub(_whitespace, text)
+        text = DOTS_RE.sub('.', text)
+        text = DOT_GAP_RE.sub('.', text)
+        for old, new in self.abbreviations:
+            text = text.replace(old, new)
+
+        text = text.strip()
+        if not text.endswith('.'):
+            text += '.'
+        return text
+
+
+_normalizers: Dict = {}
+
+
+def get_normalizer(language: str = "fr", speak_math: bool = None) -> SpeechNormalizer:
+    """Normaliseur partagé par langue (MOTEYI_TTS_SPEAK_MATH=1 pour lire les symboles)"""
+    if speak_math is None:
+        speak_math = os.getenv('MOTEYI_TTS_SPEAK_MATH', '0') == '1'
+    key = (language, speak_math)
+    normalizer = _normalizers.get(key)
+    if normalizer is None:
+        normalizer = _normalizers[key] = SpeechNormalizer(language, speak_math)
+    return normalizer
@@ -0,0 +1,310 @@
+# scripts/storage_manager.py
+"""
+Gestion de l'espace disque des fichiers produits par le bot
+- data/audio_responses (réponses TTS) et data/whatsapp_images (photos reçues) :
+  quota d'octets et âge maximal par dossier
+- fichiers rangés dans des sous-dossiers hachés (ab/<nom>) : listages courts même avec
+  des centaines de milliers de fichiers
+- nettoyage en arrière-plan (hors du chemin des requêtes) : suppression des fichiers
+  trop vieux, puis éviction LRU (plus ancienne utilisation = mtime, rafraîchi par touch() :
+  le bot l'appelle à chaque réutilisation d'un audio partagé par single-flight)
+  jusqu'à redescendre sous LOW_WATERMARK du quota
+- jamais supprimés : fichiers épinglés (pin/unpin : audio en cours d'upload et d'envoi
+  Graph, MoteyiCloudBot.send_audio), fichiers signalés par un fournisseur
+  de références (caches, file d'attente...) et fichiers de moins de MIN_AGE_S (en cours d'envoi)
+- seuls les sous-dossiers hachés sont gérés : les fichiers à la racine (échantillons
+  versionnés) ne sont jamais supprimés
+- avec plusieurs workers gunicorn, un verrou de fichier limite le nettoyage à un processus à la fois
+
+Configuration (.env) :
+  MOTEYI_AUDIO_MAX_MB=500        MOTEYI_AUDIO_MAX_AGE_H=24
+  MOTEYI_IMAGES_MAX_MB=1000      MOTEYI_IMAGES_MAX_AGE_H=72
+  MOTEYI_STORAGE_SWEEP_S=300     intervalle entre deux nettoyages
+"""
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from perf_metrics import LatencyRecorder
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+# Fichiers récents protégés : réponse en cours de synthèse, d'encodage ou d'upload
+MIN_AGE_S = 120
+# Après une éviction, on redescend à 90 % du quota pour ne pas nettoyer à chaque passage
+LOW_WATERMARK = 0.9
+LOCK_NAME = ".janitor.lock"
+
+
+def _env_float(name: str, default: str) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return float(default)
+
+
+class StorageArea:
+    """Dossier géré : quota (octets), âge maximal (s) et rangement haché des fichiers"""
+
+    def __init__(self, name: str, root, max_bytes: int, max_age_s: float):
+        self.name = name
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.max_age_s = max_age_s
+
+    def path_for(self, filename: str) -> Path:
+        """Chemin d'un nouveau fichier : <racine>/<2 premiers hex du sha1 du nom>/<nom>"""
+        shard = hashlib.sha1(filename.encode("utf-8")).hexdigest()[:2]
+        directory = self.root / shard
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / filename
+
+    def shards(self) -> List[Path]:
+        if not self.root.is_dir():
+            return []
+        return [Path(e.path) for e in os.scandir(self.root)
+                if e.is_dir() and len(e.name) == 2 and all(c in "0123456789abcdef" for c in e.name)]
+
+
+class StorageManager:
+    """Quotas et éviction LRU des dossiers gérés, nettoyés par un thread de fond"""
+
+    def __init__(self, areas: List[StorageArea] = None, sweep_interval_s: float = None):
+        if areas is None:
+            areas = [
+                StorageArea("audio", "data/audio_responses",
+                            _env_float('MOTEYI_AUDIO_MAX_MB', '500') * 1024 * 1024,
+                            _env_float('MOTEYI_AUDIO_MAX_AGE_H', '24') * 3600),
+                StorageArea("images", "data/whatsapp_images",
+                            _env_float('MOTEYI_IMAGES_MAX_MB', '1000') * 1024 * 1024,
+                            _env_float('MOTEYI_IMAGES_MAX_AGE_H', '72') * 3600),
+            ]
+        self.areas: Dict[str, StorageArea] = {a.name: a for a in areas}
+        if sweep_interval_s is None:
+            sweep_interval_s = _env_float('MOTEYI_STORAGE_SWEEP_S', '300')
+        self.sweep_interval_s = sweep_interval_s
+        self._pins: Dict[str, int] = {}
+        self._providers: List[Callable[[], Iterable[str]]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.sweep_latency = LatencyRecorder()
+        self._usage: Dict[str, Dict] = {}
+        self._totals = {name: {"expired": 0, "evicted": 0, "freed_bytes": 0, "sweeps": 0} for name in self.areas}
+
+    # -- API des appelants ---------------------------------------------------
+    def path_for(self, area: str, filename: str) -> Path:
+        return self.areas[area].path_for(filename)
+
+    def touch(self, path):
+        """Marque un fichier comme utilisé (réutilisation depuis un cache) : recule son éviction LRU"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def pin(self, path):
+        """Protège un fichier de l'éviction jusqu'à unpin() (compteur : pins imbriqués possibles)"""
+        key = os.path.abspath(path)
+        with self._lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+
+    def unpin(self, path):
+        key = os.path.abspath(path)
+        with self._lock:
+            count = self._pins.get(key, 0) - 1
+            if count > 0:
+                self._pins[key] = count
+            else:
+                self._pins.pop(key, None)
+
+    def add_reference_provider(self, provider: Callable[[], Iterable[str]]):
+        """provider() -> chemins encore référencés (lu à chaque nettoyage, peut être partagé entre processus)"""
+        with self._lock:
+            self._providers.append(provider)
+
+    def _protected(self) -> set:
+        with self._lock:
+            protected = set(self._pins)
+            providers = list(self._providers)
+        for provider in providers:
+            try:
+                protected.update(os.path.abspath(p) for p in provider())
+            except Exception as e:
+                print(f"[STORAGE] Fournisseur de références en échec : {e}")
+        return protected
+
+    # -- Nettoyage -----------------------------------------------------------
+    def start(self):
+        """Lance (une seule fois) le thread de nettoyage périodique"""
+        with self._lock:
+            if self._thread is None and self.sweep_interval_s > 0:
+                self._thread = threading.Thread(target=self._run, name="storage-janitor", daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[STORAGE] Nettoyage échoué : {e}")
+            self._stop.wait(self.sweep_interval_s)
+
+    def sweep(self) -> Dict:
+        """Un passage sur tous les dossiers ; retourne l'usage par dossier"""
+        t0 = time.perf_counter()
+        protected = self._protected()
+        for area in self.areas.values():
+            lock = self._acquire(area)
+            if lock is False:
+                continue  # un autre worker nettoie ce dossier
+            try:
+                self._usage[area.name] = self._sweep_area(area, protected)
+            finally:
+                if lock:
+                    lock.close()
+        self.sweep_latency.record((time.perf_counter() - t0) * 1000)
+        return dict(self._usage)
+
+    def _acquire(self, area: StorageArea):
+        """Verrou exclusif non bloquant : fichier ouvert, None sans fcntl, False si déjà pris"""
+        if fcntl is None:
+            return None
+        area.root.mkdir(parents=True, exist_ok=True)
+        handle = open(area.root / LOCK_NAME, "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        return handle
+
+    def _sweep_area(self, area: StorageArea, protected: set) -> Dict:
+        now = time.time()
+        files = []  # (mtime, taille, chemin)
+        for shard in area.shards():
+            for entry in os.scandir(shard):
+                if entry.is_file(follow_symlinks=False):
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        expired = evicted = freed = pinned = 0
+        keep = []
+        for mtime, size, path in files:
+            if now - mtime < MIN_AGE_S or os.path.abspath(path) in protected:
+                pinned += now - mtime >= MIN_AGE_S
+                keep.append((mtime, size, path, False))
+            elif area.max_age_s > 0 and now - mtime > area.max_age_s:
+                if self._remove(path):
+                    expired += 1
+                    freed += size
+                    total -= size
+            else:
+                keep.append((mtime, size, path, True))
+
+        removed = set()
+        if area.max_bytes > 0 and total > area.max_bytes:
+            target = area.max_bytes * LOW_WATERMARK
+            for mtime, size, path, evictable in sorted(keep):
+                if total <= target:
+                    break
+                if evictable and self._remove(path):
+                    evicted += 1
+                    freed += size
+                    total -= size
+                    removed.add(path)
+        remaining = [mtime for mtime, _, path, _ in keep if path not in removed]
+
+        # Sous-dossiers vides gardés (256 au plus) : path_for() peut y écrire à tout moment
+        totals = self._totals[area.name]
+        with self._lock:
+            totals["expired"] += expired
+            totals["evicted"] += evicted
+            totals["freed_bytes"] += freed
+            totals["sweeps"] += 1
+        if expired or evicted:
+            print(f"[STORAGE] {area.name} : {expired} expirés, {evicted} évincés, "
+                  f"{freed / 1024 / 1024:.1f} Mo libérés ({total / 1024 / 1024:.1f} Mo utilisés)")
+        return {
+            "bytes": total,
+            "files": len(remaining),
+            "max_bytes": area.max_bytes,
+            "usage_ratio": round(total / area.max_bytes, 3) if area.max_bytes else None,
+            "protected_files": pinned,
+            "oldest_age_s": round(now - min(remaining), 1) if remaining else 0.0,
+            "last_sweep": round(now, 1),
+        }
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            print(f"[STORAGE] Suppression impossible {path} : {e}")
+            return False
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            pins = len(self._pins)
+            totals = {name: dict(t) for name, t in self._totals.items()}
+        return {
+            "sweep_interval_s": self.sweep_interval_s,
+            "sweep": self.sweep_latency.summary(),
+            "pinned": pins,
+            "areas": {name: {**self._usage.get(name, {}), **totals[name],
+                             "max_age_s": area.max_age_s} for name, area in self.areas.items()},
+        }
+
+
+_storage: Optional[StorageManager] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageManager:
+    """Gestionnaire de stockage partagé par le processus"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = StorageManager()
+    return _storage
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = StorageManager([StorageArea("test", tmp, max_bytes=50_000, max_age_s=3600)], sweep_interval_s=0)
+        old = time.time() - 600
+        paths = []
+        for i in range(20):
+            path = manager.path_for("test", f"f{i:02d}.bin")
+            path.write_bytes(b"x" * 5000)
+            os.utime(path, (old + i, old + i))
+            paths.append(path)
+        manager.pin(paths[0])
+        manager.touch(paths[1])
+        stale = manager.path_for("test", "stale.bin")
+        stale.write_bytes(b"x" * 100)
+        os.utime(stale, (old - 7200, old - 7200))
+        print(manager.sweep())
+        print("  épinglé gardé :", paths[0].exists(), " récent gardé :", paths[1].exists(),
+              " plus ancien évincé :", not paths[2].exists(), " expiré :", not stale.exists())
+        print(manager.get_stats())
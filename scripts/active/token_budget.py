@@ -0,0 +1,256 @@
+# scripts/token_budget.py
+"""
+Budget de tokens par requête GPT
+- répartit MOTEYI_PROMPT_BUDGET_TOKENS entre système (jamais coupé), question / texte OCR,
+  documents RAG puis historique, et coupe dans cet ordre de priorité
+- choisit max_tokens selon le type d'exercice, plafonné pour tenir MOTEYI_LATENCY_TARGET_MS
+  d'après la latence observée (régression latence ~ base + ms/token généré)
+- enregistre tokens et latence par type d'exercice (/metrics, et MOTEYI_TOKEN_LOG en JSONL)
+  pour régler les budgets sur des données réelles
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from perf_metrics import LatencyRecorder, summarize
+from prompt_templates import count_tokens
+
+# max_tokens de réponse par type d'exercice (detect_math_type), avant plafond de latence
+MAX_TOKENS_BY_TYPE = {
+    "calcul_arithmetique": 200,
+    "equation_lineaire": 250,
+    "equation_quadratique": 350,
+    "general": 300,
+    "transcription_ocr": 300,  # VisionOCR : texte de l'énoncé uniquement
+}
+MIN_MAX_TOKENS = 120
+# Une transcription coupée fausse l'exercice : pas de plafond de latence, hors modèle de latence
+UNCAPPED_TYPES = {"transcription_ocr"}
+
+# Part maximale du budget (hors système) laissée à la question / au texte OCR
+QUESTION_SHARE = 0.5
+# Tokens ajoutés par le gabarit user_template.txt et l'enveloppe des messages
+TEMPLATE_OVERHEAD = 80
+
+# Hypothèses de départ tant que trop peu de mesures (gpt-4o-mini)
+DEFAULT_BASE_MS = 500.0
+DEFAULT_MS_PER_TOKEN = 15.0
+MIN_SAMPLES_FOR_FIT = 20
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Coupe un texte à max_tokens (recherche dichotomique sur la longueur)"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens - 1:
+            low = mid
+        else:
+            high = mid - 1
+    cut = text[:low]
+    space = cut.rfind(" ")
+    if space > len(cut) * 0.8:  # finir sur un mot entier si possible
+        cut = cut[:space]
+    return cut.rstrip() + "…"
+
+
+class LatencyModel:
+    """Latence ~ base_ms + ms_per_token x tokens générés (moindres carrés sur fenêtre glissante)"""
+
+    def __init__(self, window: int = 500):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, completion_tokens: int, latency_ms: float):
+        if completion_tokens > 0 and latency_ms > 0:
+            with self._lock:
+                self._samples.append((completion_tokens, latency_ms))
+
+    def coefficients(self):
+        with self._lock:
+            samples = list(self._samples)
+        n = len(samples)
+        if n < MIN_SAMPLES_FOR_FIT:
+            return DEFAULT_BASE_MS, DEFAULT_MS_PER_TOKEN
+        mean_x = sum(x for x, _ in samples) / n
+        mean_y = sum(y for _, y in samples) / n
+        var_x = sum((x - mean_x) ** 2 for x, _ in samples)
+        if var_x == 0:
+            return DEFAULT_BASE_MS, mean_y / mean_x
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x
+        slope = max(slope, 1.0)
+        return max(mean_y - slope * mean_x, 0.0), slope
+
+    def tokens_within(self, target_ms: float) -> int:
+        base_ms, ms_per_token = self.coefficients()
+        return int((target_ms - base_ms) / ms_per_token)
+
+
+class TokenBudget:
+    """Plan de tokens d'une requête + enregistrement de l'usage réel"""
+
+    def __init__(self, prompt_budget: int = None, latency_target_ms: float = None, log_path: str = None):
+        self.prompt_budget = prompt_budget or int(os.getenv('MOTEYI_PROMPT_BUDGET_TOKENS', '1500'))
+        if latency_target_ms is None:
+            latency_target_ms = float(os.getenv('MOTEYI_LATENCY_TARGET_MS', '8000'))
+        self.latency_target_ms = latency_target_ms
+        log_path = log_path if log_path is not None else os.getenv('MOTEYI_TOKEN_LOG', '')
+        self.log_path = Path(log_path) if log_path else None
+        self.latency_model = LatencyModel()
+        self._lock = threading.Lock()
+        self._by_type: Dict[str, Dict] = {}
+        self._log_lock = threading.Lock()
+
+    # -- Plan ---------------------------------------------------------------
+    def max_tokens_for(self, exercise_type: str) -> int:
+        """max_tokens du type d'exercice, réduit si la latence cible ne le permet pas"""
+        wanted = MAX_TOKENS_BY_TYPE.get(exercise_type, MAX_TOKENS_BY_TYPE["general"])
+        if exercise_type in UNCAPPED_TYPES:
+            return wanted
+        affordable = self.latency_model.tokens_within(self.latency_target_ms)
+        return max(MIN_MAX_TOKENS, min(wanted, affordable))
+
+    def plan(self, exercise_type: str, system: str, question: str, context: Optional[Dict] = None,
+             history: Optional[List[Dict]] = None) -> Dict:
+        """
+        Coupe question, documents RAG et historique pour tenir le budget d'entrée
+        Retourne {"question", "context", "history", "max_tokens", "trimmed"}
+        """
+        trimmed = {"question": 0, "documents": 0, "history": 0}
+        remaining = self.prompt_budget - count_tokens(system) - TEMPLATE_OVERHEAD
+
+        # 1. Question / texte OCR : jamais supprimée, coupée au-delà de sa part du budget
+        question_cap = max(int(remaining * QUESTION_SHARE), 64)
+        question_tokens = count_tokens(question)
+        if question_tokens > question_cap:
+            question = truncate_to_tokens(question, question_cap)
+            trimmed["question"] = question_tokens - question_cap
+            question_tokens = question_cap
+        remaining -= question_tokens
+
+        # 2. Documents RAG : déjà triés par score décroissant, on garde les meilleurs qui tiennent
+        if context and context.get('found'):
+            lines = [line for line in context.get('context', '').split("\n") if line]
+            documents = context.get('documents', [])
+            kept_lines, kept_docs = [], []
+            for i, line in enumerate(lines):
+                cost = count_tokens(line) + 1
+                if cost > remaining:
+                    break
+                remaining -= cost
+                kept_lines.append(line)
+                if i < len(documents):
+                    kept_docs.append(documents[i])
+            trimmed["documents"] = len(lines) - len(kept_lines)
+            if trimmed["documents"]:
+                context = dict(context, context="\n".join(kept_lines), documents=kept_docs,
+                               found=bool(kept_lines))
+
+        # 3. Historique : les échanges les plus récents d'abord
+        kept_history = []
+        for message in reversed(history or []):
+            cost = count_tokens(message.get("content", "")) + 3
+            if cost > remaining:
+                break
+            remaining -= cost
+            kept_history.append(message)
+        kept_history.reverse()
+        trimmed["history"] = len(history or []) - len(kept_history)
+
+        if any(trimmed.values()):
+            print(f"[BUDGET] Prompt coupé pour {self.prompt_budget} tokens : {trimmed}")
+        return {
+            "question": question,
+            "context": context,
+            "history": kept_history,
+            "max_tokens": self.max_tokens_for(exercise_type),
+            "trimmed": trimmed,
+        }
+
+    # -- Mesures ------------------------------------------------------------
+    def record(self, exercise_type: str, prompt_tokens_estimate: int, result: Optional[Dict], max_tokens: int):
+        """Usage d'une requête : result = retour de LLMGateway.chat (None si l'appel a échoué)"""
+        error = result is None
+        latency_ms = result["latency_ms"] if result else 0.0
+        completion_tokens = result.get("completion_tokens", 0) if result else 0
+        truncated = bool(result) and result.get("finish_reason") == "length"
+        if result and exercise_type not in UNCAPPED_TYPES:
+            self.latency_model.add(completion_tokens, latency_ms)
+
+        with self._lock:
+            stats = self._by_type.get(exercise_type)
+            if stats is None:
+                stats = self._by_type[exercise_type] = {
+                    "latency": LatencyRecorder(), "prompt_tokens": deque(maxlen=1000),
+                    "completion_tokens": deque(maxlen=1000), "cached_tokens": 0, "truncated": 0,
+                    "estimate_error": deque(maxlen=1000), "errors": 0,
+                }
+            if error:
+                stats["errors"] += 1
+            else:
+                stats["latency"].record(latency_ms)
+                stats["prompt_tokens"].append(result.get("prompt_tokens") or prompt_tokens_estimate)
+                stats["completion_tokens"].append(completion_tokens)
+                stats["cached_tokens"] += result.get("cached_tokens", 0)
+                stats["truncated"] += truncated
+                if result.get("prompt_tokens") and prompt_tokens_estimate:
+                    stats["estimate_error"].append(prompt_tokens_estimate - result["prompt_tokens"])
+
+        if self.log_path:
+            row = {"type": exercise_type, "prompt_tokens_estimate": prompt_tokens_estimate,
+                   "max_tokens": max_tokens, "latency_ms": round(latency_ms, 1), "error": error}
+            if result:
+                row.update({k: result.get(k) for k in ("model", "prompt_tokens", "cached_tokens",
+                                                       "completion_tokens", "finish_reason")})
+            with self._log_lock:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def get_stats(self) -> Dict:
+        base_ms, ms_per_token = self.latency_model.coefficients()
+        report = {
+            "prompt_budget": self.prompt_budget,
+            "latency_target_ms": self.latency_target_ms,
+            "latency_model": {"base_ms": round(base_ms, 1), "ms_per_token": round(ms_per_token, 2)},
+            "max_tokens": {t: self.max_tokens_for(t) for t in MAX_TOKENS_BY_TYPE},
+            "by_type": {},
+        }
+        with self._lock:
+            items = list(self._by_type.items())
+        for exercise_type, stats in items:
+            prompt = list(stats["prompt_tokens"])
+            completion = list(stats["completion_tokens"])
+            errors = list(stats["estimate_error"])
+            report["by_type"][exercise_type] = {
+                "latency": stats["latency"].summary(),
+                "prompt_tokens_mean": round(sum(prompt) / len(prompt), 1) if prompt else 0.0,
+                "completion_tokens_p95": summarize(completion)["p95_ms"] if completion else 0.0,
+                "cached_tokens": stats["cached_tokens"],
+                "truncated": stats["truncated"],
+                "errors": stats["errors"],
+                "estimate_error_mean": round(sum(errors) / len(errors), 1) if errors else 0.0,
+            }
+        return report
+
+
+_budget = None
+_budget_lock = threading.Lock()
+
+
+def get_budget() -> TokenBudget:
+    """Budget partagé par le processus"""
+    global _budget
+    if _budget is None:
+        with _budget_lock:
+            if _budget is None:
+                _budget = TokenBudget()
+    return _budget
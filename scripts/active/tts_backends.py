@@ -0,0 +1,370 @@
+# scripts/tts_backends.py
+"""
+Moteurs de synthèse vocale interchangeables
+- GTTSBackend   : Google TTS (réseau, un aller-retour par tranche de texte), MP3
+- EspeakBackend : espeak-ng / espeak en local, hors ligne, WAV
+- PiperBackend  : voix neuronales piper en local (modèles .onnx par langue), WAV
+- TTSEngine choisit le moteur par langue : le premier de MOTEYI_TTS_BACKENDS dont la
+  latence observée (moyenne glissante exponentielle) tient MOTEYI_TTS_LATENCY_BUDGET_MS,
+  sinon le plus rapide ; un moteur en échec est écarté FAILURE_COOLDOWN_S secondes
+- textes longs découpés en phrases, synthétisées en parallèle puis concaténées
+- latence et facteur temps réel (temps de synthèse / durée audio) par moteur dans /metrics
+
+Configuration (.env) :
+  MOTEYI_TTS_BACKENDS=gtts,espeak,piper    ordre de préférence
+  MOTEYI_TTS_LATENCY_BUDGET_MS=4000        latence acceptée avant de passer au moteur suivant
+  MOTEYI_TTS_PARALLEL=4                    tranches synthétisées en même temps
+  MOTEYI_PIPER_VOICES=fr=/models/fr_FR-siwis-medium.onnx,en=/models/en_US-lessac-medium.onnx
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from perf_metrics import LatencyRecorder
+
+# Noms de langue encore utilisés par d'anciens appelants (RealTTS acceptait "francais", ...)
+LANGUAGE_ALIASES = {
+    "francais": "fr", "français": "fr", "english": "en", "anglais": "en",
+    "lingala": "ln", "swahili": "sw", "kiswahili": "sw", "tshiluba": "lu", "ciluba": "lu",
+}
+
+SENTENCE_END_RE = re.compile(r'(?<=[.!?;:])\s+')
+# Taille des tranches : assez courte pour paralléliser, assez longue pour garder l'intonation
+CHUNK_CHARS = 220
+EWMA_ALPHA = 0.3
+FAILURE_COOLDOWN_S = 30.0
+
+# Débits MPEG Layer III (kbit/s) par index, pour estimer la durée d'un MP3 à débit constant
+MP3_BITRATES_V1 = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+MP3_BITRATES_V2 = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+# Fréquences par version MPEG (0 : 2.5, 2 : MPEG-2, 3 : MPEG-1)
+MP3_SAMPLE_RATES = {0: (11025, 12000, 8000), 1: (0, 0, 0), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+
+
+def language_code(language: str) -> str:
+    language = (language or "fr").lower()
+    return LANGUAGE_ALIASES.get(language, language)
+
+
+def split_sentences(text: str, max_chars: int = CHUNK_CHARS) -> List[str]:
+    """Tranches de phrases entières d'au plus max_chars (une phrase trop longue est coupée aux espaces)"""
+    chunks: List[str] = []
+    current = ""
+    for sentence in SENTENCE_END_RE.split(" ".join(text.split())):
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _mp3_duration_s(path: Path) -> float:
+    """
+    Durée d'un MP3 : nombre de trames de l'en-tête Xing/Info (LAME) s'il existe,
+    sinon taille utile / débit lu dans la première trame (débit constant)
+    """
+    data = path.read_bytes()
+    offset = 0
+    if data[:3] == b"ID3" and len(data) >= 10:  # en-tête ID3v2 : taille en entiers de 7 bits
+        offset = 10 + ((data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9])
+    while offset + 3 < len(data):
+        if data[offset] == 0xFF and data[offset + 1] & 0xE0 == 0xE0:
+            version = (data[offset + 1] >> 3) & 0x3
+            layer = (data[offset + 1] >> 1) & 0x3
+            index = data[offset + 2] >> 4
+            rate_index = (data[offset + 2] >> 2) & 0x3
+            if layer == 1 and 0 < index < 15 and rate_index < 3:
+                sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+                head = data[offset:offset + 64]
+                for tag in (b"Xing", b"Info"):
+                    pos = head.find(tag)
+                    if pos >= 0 and head[pos + 7] & 0x1:  # drapeau "nombre de trames présent"
+                        frames = int.from_bytes(head[pos + 8:pos + 12], "big")
+                        return frames * (1152 if version == 3 else 576) / sample_rate
+                table = MP3_BITRATES_V1 if version == 3 else MP3_BITRATES_V2
+                return (len(data) - offset) * 8 / (table[index] * 1000)
+        offset += 1
+    return 0.0
+
+
+def audio_duration_s(path: Path) -> float:
+    """Durée d'un fichier WAV ou MP3 (0.0 si illisible)"""
+    path = Path(path)
+    try:
+        if path.suffix.lower() == ".wav":
+            with wave.open(str(path), "rb") as w:
+                return w.getnframes() / float(w.getframerate())
+        if path.suffix.lower() == ".mp3":
+            return _mp3_duration_s(path)
+    except (OSError, EOFError, wave.Error):
+        pass
+    return 0.0
+
+
+def concatenate(parts: List[Path], target: Path):
+    """Assemble les tranches dans l'ordre : trames WAV réécrites sous un seul en-tête, MP3 mis bout à bout"""
+    if target.suffix.lower() == ".wav":
+        with wave.open(str(parts[0]), "rb") as first:
+            params = first.getparams()
+        with wave.open(str(target), "wb") as out:
+            out.setparams(params)
+            for part in parts:
+                with wave.open(str(part), "rb") as w:
+                    out.writeframes(w.readframes(w.getnframes()))
+    else:
+        # Trames MP3 autonomes : gTTS assemble déjà ses propres segments de cette façon
+        with open(target, "wb") as out:
+            for part in parts:
+                out.write(part.read_bytes())
+
+
+# ---------------------------------------------------------------------------
+# Moteurs
+# ---------------------------------------------------------------------------
+class TTSBackend:
+    """Interface : synthesize(texte, langue, chemin) écrit un fichier audio ou lève une exception"""
+
+    name = "base"
+    suffix = ".wav"
+
+    def __init__(self):
+        self.voices: Dict[str, str] = {}
+
+    def available(self) -> bool:
+        return False
+
+    def supports(self, language: str) -> bool:
+        return language in self.voices
+
+    def synthesize(self, text: str, language: str, out_path: Path):
+        raise NotImplementedError
+
+
+class GTTSBackend(TTSBackend):
+    name = "gtts"
+    suffix = ".mp3"
+
+    def __init__(self, timeout_s: float = 10.0):
+        super().__init__()
+        self.voices = {"fr": "fr", "en": "en", "sw": "sw"}
+        self.timeout_s = timeout_s
+        try:
+            from gtts import gTTS
+            self._gtts = gTTS
+        except ImportError:
+            self._gtts = None
+
+    def available(self) -> bool:
+        return self._gtts is not None
+
+    def synthesize(self, text: str, language: str, out_path: Path):
+        tts = self._gtts(text=text, lang=self.voices[language], slow=False, lang_check=False,
+                         timeout=self.timeout_s)
+        tts.save(str(out_path))
+
+
+class EspeakBackend(TTSBackend):
+    name = "espeak"
+    suffix = ".wav"
+
+    def __init__(self, speed_wpm: int = 150, timeout_s: float = 20.0):
+        super().__init__()
+        self.voices = {"fr": "fr", "en": "en", "sw": "sw"}
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        self.speed_wpm = speed_wpm
+        self.timeout_s = timeout_s
+
+    def available(self) -> bool:
+        return self.binary is not None
+
+    def synthesize(self, text: str, language: str, out_path: Path):
+        subprocess.run([self.binary, "-v", self.voices[language], "-s", str(self.speed_wpm),
+                        "-w", str(out_path), "--stdin"],
+                       input=text.encode("utf-8"), check=True, capture_output=True, timeout=self.timeout_s)
+
+
+class PiperBackend(TTSBackend):
+    name = "piper"
+    suffix = ".wav"
+
+    def __init__(self, voices: str = None, timeout_s: float = 30.0):
+        super().__init__()
+        voices = voices if voices is not None else os.getenv('MOTEYI_PIPER_VOICES', '')
+        for item in voices.split(","):
+            lang, _, model = item.partition("=")
+            if lang.strip() and model.strip() and Path(model.strip()).exists():
+                self.voices[lang.strip()] = model.strip()
+        self.binary = shutil.which("piper")
+        self.timeout_s = timeout_s
+
+    def available(self) -> bool:
+        return self.binary is not None and bool(self.voices)
+
+    def synthesize(self, text: str, language: str, out_path: Path):
+        subprocess.run([self.binary, "--model", self.voices[language], "--output_file", str(out_path)],
+                       input=text.encode("utf-8"), check=True, capture_output=True, timeout=self.timeout_s)
+
+
+BACKENDS = {"gtts": GTTSBackend, "espeak": EspeakBackend, "piper": PiperBackend}
+
+
+# ---------------------------------------------------------------------------
+# Sélection, découpage parallèle et mesures
+# ---------------------------------------------------------------------------
+class _BackendStats:
+    def __init__(self):
+        self.latency = LatencyRecorder()
+        self.rtf = deque(maxlen=500)
+        self.ewma_ms: Dict[str, float] = {}
+        self.successes = 0
+        self.failures = 0
+        self.chars = 0
+        self.audio_s = 0.0
+        self.cooldown_until = 0.0
+        self.last_error = None
+
+
+class TTSEngine:
+    """Synthèse d'une réponse : choix du moteur, tranches en parallèle, concaténation"""
+
+    def __init__(self, backends: List[TTSBackend] = None, latency_budget_ms: float = None,
+                 max_workers: int = None, chunk_chars: int = CHUNK_CHARS):
+        if backends is None:
+            order = os.getenv('MOTEYI_TTS_BACKENDS', 'gtts,espeak,piper')
+            backends = [BACKENDS[name.strip()]() for name in order.split(",") if name.strip() in BACKENDS]
+        self.backends = [b for b in backends if b.available()]
+        if latency_budget_ms is None:
+            latency_budget_ms = float(os.getenv('MOTEYI_TTS_LATENCY_BUDGET_MS', '4000'))
+        self.latency_budget_ms = latency_budget_ms
+        max_workers = max_workers or int(os.getenv('MOTEYI_TTS_PARALLEL', '4'))
+        self.chunk_chars = chunk_chars
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+        self._lock = threading.Lock()
+        self._stats = {b.name: _BackendStats() for b in self.backends}
+        names = ", ".join(f"{b.name} ({'/'.join(sorted(b.voices))})" for b in self.backends) or "aucun"
+        print(f"[TTS] Moteurs disponibles : {names}")
+
+    def supports(self, language: str) -> bool:
+        language = language_code(language)
+        return any(b.supports(language) for b in self.backends)
+
+    def candidates(self, language: str) -> List[TTSBackend]:
+        """
+        Moteurs à essayer dans l'ordre : d'abord le premier (ordre de préférence) encore
+        inconnu ou dans le budget de latence, sinon le plus rapide ; les autres en secours
+        """
+        now = time.monotonic()
+        with self._lock:
+            usable = [b for b in self.backends if b.supports(language)]
+            ready = [b for b in usable if self._stats[b.name].cooldown_until <= now] or usable
+            ewma = {b.name: self._stats[b.name].ewma_ms.get(language) for b in ready}
+        within = [b for b in ready if ewma[b.name] is None or ewma[b.name] <= self.latency_budget_ms]
+        first = within[0] if within else min(ready, key=lambda b: ewma[b.name], default=None)
+        if first is None:
+            return []
+        return [first] + [b for b in usable if b is not first]
+
+    def _synthesize_with(self, backend: TTSBackend, chunks: List[str], language: str, stem: Path) -> Path:
+        target = stem.with_suffix(backend.suffix)
+        if len(chunks) == 1:
+            backend.synthesize(chunks[0], language, target)
+            return target
+        parts = [stem.with_name(f"{stem.name}.part{i}{backend.suffix}") for i in range(len(chunks))]
+        try:
+            futures = [self._pool.submit(backend.synthesize, chunk, language, part)
+                       for chunk, part in zip(chunks, parts)]
+            for future in futures:
+                future.result()
+            concatenate(parts, target)
+        finally:
+            for part in parts:
+                part.unlink(missing_ok=True)
+        return target
+
+    def synthesize(self, text: str, language: str, stem: Path) -> Optional[str]:
+        """Fichier audio (stem + extension du moteur) ou None si aucun moteur n'a réussi"""
+        language = language_code(language)
+        chunks = split_sentences(text, self.chunk_chars)
+        if not chunks:
+            return None
+        for backend in self.candidates(language):
+            t0 = time.perf_counter()
+            try:
+                path = self._synthesize_with(backend, chunks, language, Path(stem))
+            except Exception as e:
+                # gTTS ouvre le fichier avant la requête : pas de fichier vide laissé derrière
+                Path(stem).with_suffix(backend.suffix).unlink(missing_ok=True)
+                self._record_failure(backend, language, (time.perf_counter() - t0) * 1000, e)
+                continue
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            duration = audio_duration_s(path)
+            self._record_success(backend, language, elapsed_ms, duration, len(text))
+            print(f"[TTS] {backend.name} : {len(chunks)} tranche(s), {duration:.1f} s d'audio "
+                  f"en {elapsed_ms:.0f} ms")
+            return str(path)
+        return None
+
+    def _record_success(self, backend, language, elapsed_ms, duration_s, chars):
+        stats = self._stats[backend.name]
+        stats.latency.record(elapsed_ms)
+        with self._lock:
+            previous = stats.ewma_ms.get(language)
+            stats.ewma_ms[language] = elapsed_ms if previous is None else \
+                EWMA_ALPHA * elapsed_ms + (1 - EWMA_ALPHA) * previous
+            stats.successes += 1
+            stats.chars += chars
+            stats.audio_s += duration_s
+            stats.cooldown_until = 0.0
+            if duration_s > 0:
+                stats.rtf.append(elapsed_ms / 1000 / duration_s)
+
+    def _record_failure(self, backend, language, elapsed_ms, error):
+        print(f"[TTS] {backend.name} en échec ({language}) : {error}")
+        stats = self._stats[backend.name]
+        stats.latency.record(elapsed_ms, error=True)
+        with self._lock:
+            stats.failures += 1
+            stats.last_error = str(error)[:200]
+            stats.cooldown_until = time.monotonic() + FAILURE_COOLDOWN_S
+
+    def get_stats(self) -> Dict:
+        report = {"latency_budget_ms": self.latency_budget_ms, "chunk_chars": self.chunk_chars, "backends": {}}
+        with self._lock:
+            for backend in self.backends:
+                stats = self._stats[backend.name]
+                rtf = sorted(stats.rtf)
+                report["backends"][backend.name] = {
+                    "languages": sorted(backend.voices),
+                    "latency": stats.latency.summary(),
+                    "ewma_ms": {lang: round(v, 1) for lang, v in stats.ewma_ms.items()},
+                    "rtf_p50": round(rtf[len(rtf) // 2], 3) if rtf else None,
+                    "successes": stats.successes,
+                    "failures": stats.failures,
+                    "chars": stats.chars,
+                    "audio_s": round(stats.audio_s, 1),
+                    "cooling_down": stats.cooldown_until > time.monotonic(),
+                    "last_error": stats.last_error,
+                }
+        return report
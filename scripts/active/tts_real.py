@@ -1,58 +1,63 @@
 # scripts/tts_real.py
-from gtts import gTTS
 import os
+import uuid
 from pathlib import Path
 from datetime import datetime
 
+from audio_encoder import get_encoder
+from storage_manager import get_storage
+from tts_backends import TTSEngine, language_code
+
 class RealTTS:
     """
     La voix de Moteyi - Transforme le texte en audio
     Comme un prof qui lit l'explication à haute voix
+    (moteurs gTTS / espeak / piper choisis par langue et latence : voir tts_backends.py)
     """
     
     def __init__(self):
         self.output_dir = Path("data/audio_responses")
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.engine = TTSEngine()
         print("[TTS] Module vocal initialisé")
     
+    def supports(self, language):
+        """Vrai si un moteur disponible a une voix pour cette langue"""
+        return self.engine.supports(language)
+    
     def text_to_speech(self, text, language="fr"):
         """
-        Convertit du texte en fichier audio MP3
+        Convertit du texte en fichier audio, réencodé en note vocale OGG/Opus
+        (audio_encoder.py ; reste en MP3/WAV si aucun encodeur n'est installé)
         """
-        
-        # Mapping des langues
-        lang_map = {
-            "francais": "fr",
-            "lingala": "fr",  # Pas de lingala, on utilise français
-            "swahili": "sw",
-            "english": "en"
-        }
-        
-        tts_lang = lang_map.get(language, "fr")
+        code = language_code(language)
         
         try:
             print(f"[TTS] Génération audio en {language}...")
             
-            # Créer l'audio
-            tts = gTTS(text=text, lang=tts_lang, slow=False)
-            
-            # Nom unique pour le fichier
+            # Nom unique pour le fichier (plusieurs réponses peuvent tomber dans la même seconde)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            audio_file = self.output_dir / f"response_{timestamp}_{language}.mp3"
+            # Rangé dans un sous-dossier haché, quota et âge gérés par storage_manager.py
+            stem = get_storage().path_for("audio", f"response_{timestamp}_{code}_{uuid.uuid4().hex[:6]}")
             
-            # Sauvegarder
-            tts.save(str(audio_file))
+            audio_file = self.engine.synthesize(text, code, stem)
+            if audio_file is None:
+                print(f"[ERREUR TTS] Aucun moteur n'a pu synthétiser l'audio ({language})")
+                return None
             
             # Vérifier la taille
-            file_size = audio_file.stat().st_size / 1024  # En KB
-            print(f"[TTS] Audio créé: {audio_file.name} ({file_size:.1f} KB)")
+            file_size = Path(audio_file).stat().st_size / 1024  # En KB
+            print(f"[TTS] Audio créé: {Path(audio_file).name} ({file_size:.1f} KB)")
             
-            return str(audio_file)
+            return get_encoder().encode(audio_file)
             
         except Exception as e:
             print(f"[ERREUR TTS] {e}")
             return None
     
+    def get_stats(self):
+        return self.engine.get_stats()
+    
     def estimate_duration(self, text):
         """
         Estime la durée de l'audio (approximatif)
@@ -73,11 +78,15 @@ def test_tts():
     # Textes de test
     texts = {
         "francais": "Pour calculer 25 plus 17, décompose: 20 plus 10 égale 30, puis 5 plus 7 égale 12. Donc 30 plus 12 égale 42!",
-        "lingala": "Mpo na kosala 25 na 17, tanga boye: 20 na 10 esali 30, pe 5 na 7 esali 12. Donc 30 na 12 esali 42!"
+        "lingala": "Mpo na kosala 25 na 17, tanga boye: 20 na 10 esali 30, pe 5 na 7 esali 12. Donc 30 na 12 esali 42!",
+        "swahili": "Ili kuhesabu 25 jumlisha 17, gawanya: 20 jumlisha 10 ni 30, kisha 5 jumlisha 7 ni 12. Kwa hiyo 30 jumlisha 12 ni 42!"
     }
     
     for lang, text in texts.items():
         print(f"\n[TEST] {lang.upper()}")
+        if not tts.supports(lang):
+            print("[INFO] Pas de voix pour cette langue")
+            continue
         print(f"Texte: {text[:50]}...")
         
         # Générer l'audio
@@ -92,17 +101,9 @@ def test_tts():
         else:
             print("[ERREUR] Échec génération audio")
     
-    print("\n[INFO] Les fichiers MP3 sont dans data/audio_responses/")
+    print("\n[INFO] Les fichiers audio (OGG/Opus, ou MP3/WAV sans encodeur) sont dans data/audio_responses/")
+    print(f"[INFO] Moteurs : {tts.get_stats()}")
     print("[INFO] Vous pouvez les écouter avec n'importe quel lecteur")
 
 if __name__ == "__main__":
-    # Installer gTTS si nécessaire
-    try:
-        import gtts
-    except ImportError:
-        print("[INSTALL] Installation de gTTS...")
-        os.system("pip install gtts")
-        print("[OK] gTTS installé, relancez le script")
-        exit()
-    
     test_tts()
\ No newline at end of file
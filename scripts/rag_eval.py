@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Évaluation RAG avec un VRAI retriever (remplace le retriever "oracle" de l'étape 6)
+- Exécute CongoRAGConnector.query_rag (ou un retriever branchable) sur data/eval/gold.jsonl
+- Requêtes en parallèle (pool de threads), latence mesurée par requête
+- Métriques : hit@1, coverage@5, mrr@5, latence p50/p95 par lang / grade / subject
+
+Sorties (format lu par tools/eval_diagnose.py) :
+- artifacts/metrics.csv  : une ligne par requête (id, lang, grade, subject, hit@1, coverage@5, mrr@5, latency_ms)
+- artifacts/summary.json : {"global": {...}, "by": [...]} agrégé par scope (global, lang, lang_grade, lang_subject)
+
+Retriever branchable (--retriever) :
+- "connector"         : CongoRAGConnector(base_path="data") (défaut)
+- "module:attribut"   : une fabrique/classe (sans argument) exposant query_rag(question, max_docs=k),
+                        ou une fonction retrieve(question, k) -> liste d'ids
+
+Usage:
+  python scripts/rag_eval.py --gold data/eval/gold.jsonl
+  python scripts/rag_eval.py --gold data/eval/gold.jsonl --workers 8 --k 5
+  python scripts/rag_eval.py --gold data/eval/gold.jsonl --retriever mon_module:MonRetriever
+"""
+import argparse
+import csv
+import importlib
+import json
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+
+from perf_metrics import percentile  # noqa: E402
+
+ARTIFACTS = Path("artifacts")
+THRESHOLD_COV = 0.50
+THRESHOLD_HIT = 0.35
+
+
+# ---------- Retrievers ----------
+def _from_query_rag(obj, k: int) -> Callable[[str], List[str]]:
+    def retrieve(question: str) -> List[str]:
+        context = obj.query_rag(question, max_docs=k)
+        return [d.get("id", "") for d in context.get("documents", [])]
+    return retrieve
+
+
+def load_retriever(spec: str, k: int, base_path: str) -> Callable[[str], List[str]]:
+    """Construit une fonction question -> liste ordonnée d'ids de documents"""
+    if spec == "connector":
+        from rag_connector import CongoRAGConnector
+        return _from_query_rag(CongoRAGConnector(base_path=base_path), k)
+
+    if ":" not in spec:
+        raise SystemExit(f"[rag_eval] Retriever inconnu: {spec} (attendu 'connector' ou 'module:attribut')")
+
+    module_name, attr = spec.split(":", 1)
+    target = getattr(importlib.import_module(module_name), attr)
+
+    if hasattr(target, "query_rag"):
+        return _from_query_rag(target, k)
+    if isinstance(target, type):
+        return _from_query_rag(target(), k)
+    return lambda question: list(target(question, k))
+
+
+# ---------- Métriques ----------
+def score_query(retrieved: List[str], expected: List[str], k: int) -> Dict[str, float]:
+    expected_set = set(expected)
+    top = retrieved[:k]
+    hit1 = 1.0 if top and top[0] in expected_set else 0.0
+    cov = 1.0 if any(d in expected_set for d in top) else 0.0
+    mrr = 0.0
+    for rank, doc_id in enumerate(top, 1):
+        if doc_id in expected_set:
+            mrr = 1.0 / rank
+            break
+    return {"hit@1": hit1, "coverage@5": cov, "mrr@5": mrr}
+
+
+def load_gold(path: Path) -> List[Dict]:
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                examples.append(json.loads(line))
+    return examples
+
+
+def evaluate(examples: List[Dict], retrieve: Callable[[str], List[str]], k: int, workers: int) -> List[Dict]:
+    def run(ex: Dict) -> Dict:
+        t0 = time.perf_counter()
+        error = ""
+        try:
+            retrieved = retrieve(ex.get("query", ""))
+        except Exception as e:
+            retrieved, error = [], str(e)
+        latency_ms = (time.perf_counter() - t0) * 1000
+        row = {
+            "id": ex.get("id", ""),
+            "lang": ex.get("lang", ""),
+            "grade": ex.get("grade", ""),
+            "subject": ex.get("subject", ""),
+            **score_query(retrieved, ex.get("expected_doc_ids", []), k),
+            "latency_ms": latency_ms,
+            "retrieved": retrieved[:k],
+            "error": error,
+        }
+        return row
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(run, examples))
+
+
+def aggregate(rows: List[Dict]) -> Dict:
+    """Agrège par scope, au format de artifacts/summary.json"""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[("global", "", "", "")].append(row)
+        groups[("lang", row["lang"], "", "")].append(row)
+        groups[("lang_grade", row["lang"], row["grade"], "")].append(row)
+        groups[("lang_subject", row["lang"], "", row["subject"])].append(row)
+
+    def summary(key, members):
+        scope, lang, grade, subject = key
+        n = len(members)
+        latencies = [m["latency_ms"] for m in members]
+        return {
+            "scope": scope, "lang": lang, "grade": grade, "subject": subject,
+            "count": n,
+            "hit@1": round(sum(m["hit@1"] for m in members) / n, 4),
+            "coverage@5": round(sum(m["coverage@5"] for m in members) / n, 4),
+            "mrr@5": round(sum(m["mrr@5"] for m in members) / n, 4),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+        }
+
+    by = [summary(key, members) for key, members in groups.items()]
+    return {"global": by[0], "by": by}
+
+
+def write_outputs(rows: List[Dict], summary: Dict, out_dir: Path):
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(out_dir / "metrics.csv", "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["id", "lang", "grade", "subject", "hit@1", "coverage@5", "mrr@5", "latency_ms", "retrieved", "error"])
+        for r in rows:
+            w.writerow([
+                r["id"], r["lang"], r["grade"], r["subject"],
+                f"{r['hit@1']:.0f}", f"{r['coverage@5']:.0f}", f"{r['mrr@5']:.4f}",
+                f"{r['latency_ms']:.3f}", "|".join(r["retrieved"]), r["error"],
+            ])
+
+    with open(out_dir / "summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--gold", default="data/eval/gold.jsonl")
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--retriever", default="connector")
+    ap.add_argument("--base-path", default="data")
+    ap.add_argument("--out-dir", default=str(ARTIFACTS))
+    args = ap.parse_args()
+
+    examples = load_gold(Path(args.gold))
+    if not examples:
+        print(f"[rag_eval] Gold vide: {args.gold}")
+        return 2
+
+    retrieve = load_retriever(args.retriever, args.k, args.base_path)
+
+    t0 = time.perf_counter()
+    rows = evaluate(examples, retrieve, args.k, args.workers)
+    wall_s = time.perf_counter() - t0
+
+    summary = aggregate(rows)
+    write_outputs(rows, summary, Path(args.out_dir))
+
+    g = summary["global"]
+    errors = sum(1 for r in rows if r["error"])
+    print(f"[rag_eval] Retriever: {args.retriever}  requêtes: {g['count']}  erreurs: {errors}  ({wall_s:.2f}s, {g['count'] / max(wall_s, 1e-9):.0f} q/s)")
+    print(f"  Hit@1     : {g['hit@1']:.2%}")
+    print(f"  Coverage@5: {g['coverage@5']:.2%}")
+    print(f"  MRR@5     : {g['mrr@5']:.3f}")
+    print(f"  Latence   : p50={g['p50_ms']:.2f} ms  p95={g['p95_ms']:.2f} ms")
+    print(f"[rag_eval] Écrit: {Path(args.out_dir) / 'metrics.csv'}, {Path(args.out_dir) / 'summary.json'}")
+
+    if g["coverage@5"] >= THRESHOLD_COV and g["hit@1"] >= THRESHOLD_HIT:
+        print("[rag_eval] SUCCESS - Seuils atteints !")
+    else:
+        print("[rag_eval] FAIL - Seuils non atteints")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
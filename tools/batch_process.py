@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Traitement par lots des photos d'exercices, hors webhook (rattrapage, nouveau passage après
+une modification des prompts)
+- mêmes étapes que le bot : MoteyiCloudBot.solve_image (OCR -> solveur local ou RAG + GPT),
+  sans aucun envoi WhatsApp
+- entrées : dossiers d'images (parcours récursif, sous-dossiers hachés compris) et/ou
+  --manifest (JSONL {"path", "lang"} ou une image par ligne)
+- pool de workers borné (--workers) ; au plus 2 x workers images en attente en mémoire
+- résultats en JSONL, une ligne par image écrite dès qu'elle est traitée ; ce fichier sert
+  de point de reprise : relancer la même commande saute les images déjà traitées
+  (même chemin, taille, date et langue) et retente celles en erreur ; --restart repart de zéro
+- réponse de démonstration ou message d'erreur à la place de GPT : image en erreur (retentée)
+- --no-cache : ni banque de réponses ni cache sémantique (réponses toutes régénérées après
+  un changement de prompts)
+- --fake-llm : endpoint OpenAI local (tools/fake_services.py), pour tester sans clé ni réseau
+Usage:
+  python tools/batch_process.py data/whatsapp_images --workers 4
+  python tools/batch_process.py --manifest backlog.jsonl --lang ln --out data/ocr_results/rerun.jsonl --no-cache
+  python tools/batch_process.py data/whatsapp_images --fake-llm --limit 20 --out /tmp/batch.jsonl
+Sorties: data/ocr_results/batch_results.jsonl (résultats), artifacts/batch_process.json (dernier run)
+         et artifacts/batch_process.csv (historique)
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+from answer_bank import language_code  # noqa: E402
+from perf_metrics import summarize  # noqa: E402
+
+OUT_JSON = ROOT / "artifacts" / "batch_process.json"
+OUT_CSV = ROOT / "artifacts" / "batch_process.csv"
+DEFAULT_OUT = ROOT / "data" / "ocr_results" / "batch_results.jsonl"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+DONE_STATUSES = ("ok", "unreadable")
+FAILED_SOURCES = ("demo", "error")  # MoteyiCloudBot.answer_question : pas une vraie réponse
+
+
+def iter_images(paths, manifest, default_lang):
+    """(chemin, code de langue) des dossiers / fichiers et du manifest"""
+    for path in map(Path, paths):
+        files = sorted(p for p in path.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES) if path.is_dir() else [path]
+        for file in files:
+            yield file, default_lang
+    if manifest:
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith("{"):
+                    record = json.loads(line)
+                    yield Path(record["path"]), language_code(record.get("lang") or default_lang)
+                else:
+                    yield Path(line), default_lang
+
+
+def job_key(path: Path, language: str) -> str:
+    """Identité d'une image pour la reprise : chemin, taille, date de modification, langue"""
+    st = path.stat()
+    return f"{path.resolve()}|{st.st_size}|{st.st_mtime_ns}|{language}"
+
+
+def load_checkpoint(out_path: Path):
+    """Clés déjà traitées (ok / illisible) du fichier de résultats ; ligne tronquée ignorée"""
+    done = set()
+    if out_path.exists():
+        with open(out_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("status") in DONE_STATUSES:
+                    done.add(record["key"])
+    return done
+
+
+def start_fake_llm():
+    from fake_services import FakeOpenAI
+    server = FakeOpenAI(latency="uniform:50:150").start()
+    os.environ["OPENAI_BASE_URL"] = f"{server.url}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-batch"
+    print(f"[batch] Faux LLM : {server.url}/v1")
+    return server
+
+
+def process(bot, key: str, path: Path, language: str) -> dict:
+    t0 = time.perf_counter()
+    record = {"key": key, "path": str(path), "language": language}
+    try:
+        result = bot.solve_image(str(path), language)
+        context = result["context"]
+        if not result["explanation"]:
+            status = "unreadable"
+        elif result["source"] in FAILED_SOURCES:
+            status = "error"
+            record["error"] = f"réponse {result['source']} (appel GPT en échec ou clé absente)"
+        else:
+            status = "ok"
+        record.update({
+            "status": status,
+            "ocr_text": result["ocr_text"],
+            "explanation": result["explanation"],
+            "solver": result["solver"],
+            "source": result["source"],
+            "documents": [doc.get("titre") for doc in context.get("documents", [])] if context.get("found") else [],
+        })
+    except Exception as e:
+        record.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    record["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    record["processed_at"] = datetime.now().isoformat(timespec="seconds")
+    return record
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("paths", nargs="*", help="dossiers ou fichiers d'images")
+    ap.add_argument("--manifest", help="JSONL {path, lang} ou une image par ligne")
+    ap.add_argument("--lang", default="fr", help="langue des explications (code ou nom)")
+    ap.add_argument("--out", default=str(DEFAULT_OUT), help="résultats JSONL (et point de reprise)")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--limit", type=int, default=0, help="nombre maximal d'images à traiter (0 = toutes)")
+    ap.add_argument("--restart", action="store_true", help="ignore et remplace les résultats existants")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="désactive la banque de réponses et le cache sémantique GPT")
+    ap.add_argument("--fake-llm", action="store_true", help="endpoint OpenAI local au lieu de l'API")
+    args = ap.parse_args()
+    if not args.paths and not args.manifest:
+        ap.error("indiquer des dossiers d'images et/ou --manifest")
+
+    out_path = Path(args.out).resolve()
+    default_lang = language_code(args.lang)
+    if args.restart and out_path.exists():
+        out_path.unlink()
+    done = load_checkpoint(out_path)
+
+    jobs, skipped, missing = [], 0, 0
+    for path, language in iter_images(args.paths, args.manifest, default_lang):
+        path = path if path.is_absolute() else Path.cwd() / path
+        if not path.is_file():
+            missing += 1
+            continue
+        key = job_key(path, language)
+        if key in done:
+            skipped += 1
+            continue
+        jobs.append((key, path, language))
+    if args.limit:
+        jobs = jobs[:args.limit]
+    print(f"[batch] {len(jobs)} images à traiter, {skipped} déjà traitées (reprise), {missing} introuvables")
+    if not jobs:
+        return 0
+
+    if args.no_cache:
+        os.environ["MOTEYI_ANSWER_BANK"] = "0"
+        os.environ["MOTEYI_SEMANTIC_CACHE"] = "0"
+    fake = start_fake_llm() if args.fake_llm else None
+    os.chdir(ROOT)  # le bot résout data/ relativement au dossier courant
+    import moteyi_whatsapp_cloud_bot as botmod
+    bot = botmod.get_bot()
+    botmod.get_rag()
+
+    counts = {"ok": 0, "unreadable": 0, "error": 0}
+    latencies, solver = [], 0
+    interrupted = False
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    with open(out_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=args.workers) as pool:
+        pending = set()
+        queue = iter(jobs)
+        try:
+            while True:
+                # File bornée : pas plus de 2 x workers images soumises à la fois
+                while len(pending) < 2 * args.workers:
+                    job = next(queue, None)
+                    if job is None:
+                        break
+                    pending.add(pool.submit(process, bot, *job))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    counts[record["status"]] += 1
+                    latencies.append(record["elapsed_ms"])
+                    solver += bool(record.get("solver"))
+                    if record["status"] == "error":
+                        print(f"[batch] Échec {record['path']} : {record['error']}")
+                n = sum(counts.values())
+                if n % 25 == 0 or n == len(jobs):
+                    print(f"[batch] {n}/{len(jobs)}  {n / (time.perf_counter() - t0):.2f} img/s  "
+                          f"({counts['error']} échecs)")
+        except KeyboardInterrupt:
+            interrupted = True
+            print("[batch] Interrompu : fin des images en cours puis arrêt (relancer pour reprendre)")
+            for future in pending:
+                future.cancel()
+            for future in pending:
+                if not future.cancelled():
+                    out.write(json.dumps(future.result(), ensure_ascii=False) + "\n")
+    wall_s = time.perf_counter() - t0
+    if fake:
+        fake.stop()
+
+    processed = sum(counts.values())
+    metrics = botmod.collect_metrics()
+    report = {
+        "run": datetime.now().isoformat(timespec="seconds"),
+        "out": str(out_path),
+        "workers": args.workers,
+        "fake_llm": args.fake_llm,
+        "no_cache": args.no_cache,
+        "skipped_existing": skipped,
+        "missing": missing,
+        "processed": processed,
+        **counts,
+        "solver": solver,
+        "interrupted": interrupted,
+        "wall_s": round(wall_s, 2),
+        "images_per_s": round(processed / wall_s, 3) if wall_s > 0 else 0.0,
+        "latency": summarize(latencies),
+        "llm_gateway": metrics["llm"],
+        "single_flight": metrics["single_flight"],
+        "semantic_cache": metrics["semantic_cache"],
+    }
+    lat = report["latency"]
+    print(f"[batch] {processed} images en {wall_s:.1f}s -> {report['images_per_s']:.2f} img/s  "
+          f"ok={counts['ok']}  illisibles={counts['unreadable']}  échecs={counts['error']}  solveur={solver}")
+    print(f"[batch] Latence par image : p50={lat['p50_ms']:.0f} ms  p95={lat['p95_ms']:.0f} ms  "
+          f"max={lat['max_ms']:.0f} ms")
+
+    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    OUT_JSON.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    new_file = not OUT_CSV.exists()
+    with open(OUT_CSV, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["run", "workers", "fake_llm", "skipped_existing", "processed", "ok", "unreadable", "error",
+                        "wall_s", "images_per_s", "p50_ms", "p95_ms"])
+        w.writerow([report["run"], args.workers, args.fake_llm, skipped, processed, counts["ok"],
+                    counts["unreadable"], counts["error"], report["wall_s"], report["images_per_s"],
+                    lat["p50_ms"], lat["p95_ms"]])
+    print(f"[batch] Résultats: {out_path} ; rapport {OUT_JSON} / {OUT_CSV}")
+    return 130 if interrupted else (1 if counts["error"] else 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de l'encodage des réponses audio : MP3 gTTS -> OGG/Opus (audio_encoder.py)
+- octets envoyés (upload) et téléchargés par l'élève : MP3 d'origine vs Opus à plusieurs débits
+- temps d'encodage (ms/fichier) et facteur temps réel (durée audio / temps d'encodage, via ffprobe)
+- entrées : --input (fichiers ou dossiers), sinon data/audio_responses/*.mp3,
+  sinon quelques explications synthétisées avec gTTS (réseau nécessaire)
+Usage:
+  python tools/bench_audio_encoder.py
+  python tools/bench_audio_encoder.py --input data/audio_responses --bitrates 12 16 24
+Sorties: artifacts/audio_encoder_bench.json (dernier run) et artifacts/audio_encoder_bench.csv (historique)
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+
+from audio_encoder import OpusEncoder  # noqa: E402
+
+OUT_JSON = ROOT / "artifacts" / "audio_encoder_bench.json"
+OUT_CSV = ROOT / "artifacts" / "audio_encoder_bench.csv"
+AUDIO_DIR = ROOT / "data" / "audio_responses"
+
+# Explications typiques (30-60 s lues) pour synthétiser des entrées si aucun MP3 n'existe
+SAMPLE_TEXTS = {
+    "fr": "Bonjour, je vais t'expliquer cet exercice. On cherche x tel que deux x plus trois égale onze. "
+          "On retire trois des deux côtés : deux x égale huit. On divise par deux : x égale quatre. "
+          "Vérifions : deux fois quatre plus trois égale onze. La réponse est donc x égale quatre. "
+          "J'espère que cette explication t'a aidé. N'hésite pas à m'envoyer d'autres exercices.",
+    "en": "Hello, let me explain this exercise to you. We want the area of a rectangle that is six "
+          "centimetres long and four centimetres wide. The area is the length times the width, so six "
+          "times four gives twenty four square centimetres. I hope this explanation helped you.",
+}
+
+
+def collect_inputs(paths):
+    files = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files += sorted(p for p in path.iterdir() if p.suffix.lower() in (".mp3", ".wav"))
+        elif path.exists():
+            files.append(path)
+    return files
+
+
+def synthesize(out_dir: Path):
+    """MP3 gTTS des textes d'exemple (vide si gTTS ou le réseau manquent)"""
+    try:
+        from gtts import gTTS
+    except ImportError:
+        return []
+    files = []
+    for lang, text in SAMPLE_TEXTS.items():
+        path = out_dir / f"sample_{lang}.mp3"
+        try:
+            gTTS(text=text, lang=lang, slow=False).save(str(path))
+            files.append(path)
+        except Exception as e:
+            print(f"[audio] gTTS indisponible ({lang}) : {e}")
+    return files
+
+
+def duration_s(path: Path) -> float:
+    """Durée d'un fichier audio via ffprobe (0.0 si indisponible)"""
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return 0.0
+    try:
+        out = subprocess.run([ffprobe, "-v", "error", "-show_entries", "format=duration",
+                              "-of", "default=noprint_wrappers=1:nokey=1", str(path)],
+                             check=True, capture_output=True, timeout=10).stdout
+        return float(out.strip() or 0)
+    except (subprocess.SubprocessError, OSError, ValueError):
+        return 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", nargs="*", default=[str(AUDIO_DIR)], help="fichiers ou dossiers MP3/WAV")
+    ap.add_argument("--bitrates", nargs="*", type=int, default=[12, 16, 24], help="kbit/s")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        with contextlib.redirect_stdout(io.StringIO()):
+            probe = OpusEncoder(keep_source=True)
+        if not probe.available():
+            print("[audio] ffmpeg (libopus) introuvable : rien à mesurer, les réponses restent en MP3")
+            return 1
+        inputs = collect_inputs(args.input) or synthesize(tmp)
+        if not inputs:
+            print("[audio] Aucun fichier d'entrée (data/audio_responses vide et gTTS indisponible)")
+            return 1
+
+        total_in = sum(p.stat().st_size for p in inputs)
+        total_duration = sum(duration_s(p) for p in inputs)
+        report = {"run": datetime.now().isoformat(timespec="seconds"), "files": len(inputs),
+                  "source_bytes": total_in, "duration_s": round(total_duration, 1), "bitrates": {}}
+        print(f"[audio] {len(inputs)} fichiers, {total_in / 1024:.1f} Ko, {total_duration:.1f} s d'audio")
+
+        for kbps in args.bitrates:
+            with contextlib.redirect_stdout(io.StringIO()):
+                encoder = OpusEncoder(bitrate_kbps=kbps, keep_source=True)
+            total_out, elapsed, failed = 0, 0.0, 0
+            for i, source in enumerate(inputs):
+                copy = tmp / f"{kbps}_{i}{source.suffix}"
+                shutil.copy2(source, copy)
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    encoded = Path(encoder.encode(str(copy)))
+                elapsed += time.perf_counter() - t0
+                if encoded.suffix != ".ogg":
+                    failed += 1
+                    continue
+                total_out += encoded.stat().st_size
+            row = {
+                "bytes": total_out,
+                "ratio": round(total_in / total_out, 2) if total_out else 0.0,
+                "encode_ms_per_file": round(elapsed * 1000 / len(inputs), 1),
+                "realtime_factor": round(total_duration / elapsed, 1) if elapsed and total_duration else None,
+                "failed": failed,
+            }
+            report["bitrates"][kbps] = row
+            print(f"[audio] Opus {kbps:>2} kbit/s : {total_out / 1024:8.1f} Ko  x{row['ratio']:<5} plus léger  "
+                  f"{row['encode_ms_per_file']} ms/fichier  temps réel x{row['realtime_factor']}  échecs {failed}")
+
+    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    OUT_JSON.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    new_file = not OUT_CSV.exists()
+    with open(OUT_CSV, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["run", "files", "source_bytes", "bitrate_kbps", "opus_bytes", "ratio",
+                        "encode_ms_per_file", "realtime_factor"])
+        for kbps, row in report["bitrates"].items():
+            w.writerow([report["run"], report["files"], total_in, kbps, row["bytes"], row["ratio"],
+                        row["encode_ms_per_file"], row["realtime_factor"]])
+    print(f"[audio] Résultats: {OUT_JSON} / {OUT_CSV}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
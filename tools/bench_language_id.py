@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de l'identification de langue
+- débit (messages/s) : ancienne détection par sous-chaînes vs modèle n-grammes (language_id.py)
+- exactitude sur le gold set et les phrases de data/eval/language_id_seed.jsonl
+  (données d'entraînement : le chiffre hors échantillon est cv_accuracy, affiché à côté)
+- salutations de premier contact ("Mbote", "Habari"...) : détection complète du bot
+  (modèle puis mots caractéristiques si le modèle est peu sûr)
+- faux positifs : mots-clés trouvés à l'intérieur d'autres mots ("ndi" dans "lundi")
+- commandes : ancien parse_language_choice vs matcher compilé
+Usage:
+  python tools/bench_language_id.py
+  python tools/bench_language_id.py --repeat 50
+Sorties: artifacts/language_id_bench.json (dernier run) et artifacts/language_id_bench.csv (historique)
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from language_id import get_identifier  # noqa: E402
+from train_language_id import GOLD, SEED, read_jsonl  # noqa: E402
+
+OUT_JSON = ROOT / "artifacts" / "language_id_bench.json"
+OUT_CSV = ROOT / "artifacts" / "language_id_bench.csv"
+
+# Phrases françaises où l'ancienne détection trouvait une autre langue dans un mot
+FALSE_POSITIVES = [
+    "Lundi je dois rendre un exercice",
+    "Le somewhat étrange cas du mot anglais",
+    "Dimanche on révise les additions",
+    "Un hôtel, un château et un chemin",
+    "La moyenne de la classe est bonne",
+    "Calcule la somme de ces nombres",
+]
+# Premiers messages courts (déclenchent le menu des langues) : (texte, langue attendue)
+GREETINGS = [
+    ("Mbote", "ln"), ("Mbote ndeko", "ln"), ("Habari", "sw"), ("Jambo", "sw"), ("Asante sana", "sw"),
+    ("Moyo webe", "lu"), ("Hello", "en"), ("Bonjour", "fr"), ("Salut", "fr"),
+]
+COMMANDS = ["1", "5", "lingala", "kiswahili", "fran", "je veux le swahili", "a",
+            "Conjugue le verbe aller en français s'il te plaît", "Bonjour, 25 + 17 ?"]
+
+
+def legacy_detect(text):
+    """Copie de l'ancien LanguageManager.detect_language_from_text"""
+    text_lower = text.lower()
+    indicators = {
+        "ln": ["mbote", "malamu", "naza", "nazali", "ndeko", "kobanga", "koloba"],
+        "sw": ["habari", "karibu", "asante", "tafadhali", "ndiyo", "hapana", "jambo"],
+        "lu": ["moyo", "bimpe", "ndi", "webe", "tshiena", "bualu"],
+        "en": ["hello", "thank", "please", "what", "how", "when", "where"],
+        "fr": ["bonjour", "merci", "comment", "pourquoi", "quelle", "exercice"]
+    }
+    scores = {lang: 0 for lang in indicators}
+    for lang, words in indicators.items():
+        for word in words:
+            if word in text_lower:
+                scores[lang] += 1
+    if max(scores.values()) > 0:
+        return max(scores, key=scores.get)
+    return "fr"
+
+
+def legacy_parse_choice(languages, message):
+    """Copie de l'ancien LanguageManager.parse_language_choice"""
+    message = message.strip().lower()
+    if message.isdigit():
+        choice = int(message)
+        if 1 <= choice <= len(languages):
+            return list(languages.keys())[choice - 1]
+    for code, lang in languages.items():
+        if message in lang['name'].lower():
+            return code
+        if message == code:
+            return code
+    keywords = {
+        'francais': 'fr', 'français': 'fr', 'french': 'fr', 'lingala': 'ln',
+        'kiswahili': 'sw', 'swahili': 'sw', 'tshiluba': 'lu', 'ciluba': 'lu',
+        'english': 'en', 'anglais': 'en'
+    }
+    for keyword, code in keywords.items():
+        if keyword in message:
+            return code
+    return None
+
+
+def throughput(fn, texts, repeat):
+    for t in texts:
+        fn(t)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for t in texts:
+            fn(t)
+    elapsed = time.perf_counter() - t0
+    return len(texts) * repeat / elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    identifier = get_identifier()
+    if identifier is None:
+        print("[langid] Modèle absent : lancer d'abord python tools/train_language_id.py")
+        return 1
+    from language_manager import LanguageManager
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = LanguageManager()
+
+    samples = read_jsonl(GOLD, "query") + read_jsonl(SEED, "text")
+    texts = [t for t, _ in samples]
+    supported = [(t, lang) for t, lang in samples if lang in manager.languages]
+
+    def model_detect(text):
+        return identifier.detect(text)[0]
+
+    report = {"run": datetime.now().isoformat(timespec="seconds"), "samples": len(samples),
+              "cv_accuracy": identifier_cv_accuracy()}
+    report["accuracy"] = {
+        "legacy": round(sum(legacy_detect(t) == lang for t, lang in supported) / len(supported), 4),
+        "model": round(sum(model_detect(t) == lang for t, lang in supported) / len(supported), 4),
+    }
+    report["greetings"] = {
+        "legacy": round(sum(legacy_detect(t) == lang for t, lang in GREETINGS) / len(GREETINGS), 4),
+        "model": round(sum(manager.detect_language_from_text(t) == lang for t, lang in GREETINGS) / len(GREETINGS), 4),
+    }
+    report["false_positives"] = {
+        "legacy": sum(legacy_detect(t) != "fr" for t in FALSE_POSITIVES),
+        "model": sum(manager.detect_language_from_text(t) != "fr" for t in FALSE_POSITIVES),
+    }
+    report["messages_per_s"] = {
+        "legacy": round(throughput(legacy_detect, texts, args.repeat)),
+        "model": round(throughput(model_detect, texts, args.repeat)),
+    }
+    report["commands_per_s"] = {
+        "legacy": round(throughput(lambda m: legacy_parse_choice(manager.languages, m), COMMANDS, args.repeat * 50)),
+        "compiled": round(throughput(manager.parse_language_choice, COMMANDS, args.repeat * 50)),
+    }
+    report["commands"] = {m: {"legacy": legacy_parse_choice(manager.languages, m),
+                              "compiled": manager.parse_language_choice(m)} for m in COMMANDS}
+
+    print(f"[langid] {len(samples)} phrases ({len(supported)} dans les 5 langues du bot)")
+    print(f"[langid] Exactitude (données d'entraînement) : ancienne {report['accuracy']['legacy']:.1%}  "
+          f"modèle {report['accuracy']['model']:.1%}  (validation croisée : {report['cv_accuracy']})")
+    print(f"[langid] Salutations ({len(GREETINGS)}) : ancienne {report['greetings']['legacy']:.1%}  "
+          f"bot {report['greetings']['model']:.1%}")
+    for text, lang in GREETINGS:
+        detected = manager.detect_language_from_text(text)
+        if detected != lang:
+            print(f"  salutation {text!r}: {detected} (attendu {lang})")
+    print(f"[langid] Faux positifs sur {len(FALSE_POSITIVES)} phrases françaises : "
+          f"ancienne {report['false_positives']['legacy']}  modèle {report['false_positives']['model']}")
+    print(f"[langid] Débit détection : ancienne {report['messages_per_s']['legacy']:,} msg/s  "
+          f"modèle {report['messages_per_s']['model']:,} msg/s")
+    print(f"[langid] Débit commandes : ancienne {report['commands_per_s']['legacy']:,}/s  "
+          f"compilée {report['commands_per_s']['compiled']:,}/s")
+    for message, result in report["commands"].items():
+        if result["legacy"] != result["compiled"]:
+            print(f"  commande {message!r}: {result['legacy']} -> {result['compiled']}")
+
+    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    OUT_JSON.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    new_file = not OUT_CSV.exists()
+    with open(OUT_CSV, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["run", "variant", "accuracy", "greetings", "false_positives", "messages_per_s", "commands_per_s"])
+        w.writerow([report["run"], "legacy", report["accuracy"]["legacy"], report["greetings"]["legacy"],
+                    report["false_positives"]["legacy"],
+                    report["messages_per_s"]["legacy"], report["commands_per_s"]["legacy"]])
+        w.writerow([report["run"], "model", report["accuracy"]["model"], report["greetings"]["model"],
+                    report["false_positives"]["model"],
+                    report["messages_per_s"]["model"], report["commands_per_s"]["compiled"]])
+    print(f"[langid] Résultats: {OUT_JSON} / {OUT_CSV}")
+    return 0
+
+
+def identifier_cv_accuracy():
+    from language_id import DEFAULT_MODEL_PATH
+    try:
+        with open(DEFAULT_MODEL_PATH, encoding="utf-8") as f:
+            return json.load(f).get("training", {}).get("cv_accuracy")
+    except (OSError, ValueError):
+        return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
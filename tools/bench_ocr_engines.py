@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Comparaison des moteurs OCR sur le jeu étiqueté data/ocr_fixtures (tools/ocr_fixtures.py)
+- moteurs : vision (VisionOCR, GPT-4 Vision), tesseract (RealOCR, Tesseract brut),
+  simple_enhanced (SimpleEnhancedOCR, prétraitement PIL + corrections maths) et
+  enhanced_generated (copie embarquée dans tools/create_enhanced_ocr.py, pour voir si elle dérive)
+- qualité : CER, WER, exactitude des nombres et opérateurs (suite exacte, et rappel des jetons)
+- latence par image (p50 / p95 / p99, après un appel d'échauffement) et mémoire : pic des
+  allocations Python (tracemalloc, sur quelques images) et RSS max des sous-processus Tesseract
+- Vision sans réseau, via le faux OpenAI local (tools/fake_services.py) :
+    --vision replay : réponses Vision enregistrées (data/ocr_fixtures/vision_responses.jsonl)
+    --vision stub   : le faux renvoie l'étiquette -> latence et surcoût client seuls, qualité non mesurée
+    --vision live   : vraie API (OPENAI_API_KEY) ; --record enregistre les réponses pour replay
+    --vision off
+  par défaut replay si des réponses sont enregistrées, sinon stub
+- moteurs Tesseract ignorés si Tesseract est absent (TESSERACT_CMD ou PATH)
+Usage:
+  python tools/bench_ocr_engines.py
+  python tools/bench_ocr_engines.py --engines vision simple_enhanced --vision live --record
+  python tools/bench_ocr_engines.py --vision stub --vision-latency lognormal:900:0.3
+Sorties: artifacts/ocr_engines_bench.json (dernier run) et artifacts/ocr_engines_bench.csv (historique)
+"""
+import argparse
+import ast
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+import types
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_ocr_pool import tesseract_available  # noqa: E402
+from ocr_fixtures import FIXTURES_DIR, cer, load_fixtures, wer  # noqa: E402
+from math_solver import math_tokens  # noqa: E402
+from perf_metrics import summarize  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+OUT_JSON = ROOT / "artifacts" / "ocr_engines_bench.json"
+OUT_CSV = ROOT / "artifacts" / "ocr_engines_bench.csv"
+ENGINES = ["vision", "tesseract", "simple_enhanced", "enhanced_generated"]
+TESSERACT_ENGINES = {"tesseract", "simple_enhanced", "enhanced_generated"}
+
+
+def image_digest(path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def load_recordings(path: Path):
+    """Réponses Vision enregistrées : sha256 de l'image -> texte"""
+    responses = {}
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    responses[row["sha256"]] = row["text"]
+    return responses
+
+
+def load_generated_ocr():
+    """SimpleEnhancedOCR tel que tools/create_enhanced_ocr.py l'écrirait (source embarquée)"""
+    tree = ast.parse((ROOT / "tools" / "create_enhanced_ocr.py").read_text(encoding="utf-8"))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", None) == "enhanced_ocr":
+            module = types.ModuleType("ocr_enhanced_generated")
+            exec(compile(ast.literal_eval(node.value), "create_enhanced_ocr.py:enhanced_ocr", "exec"),
+                 module.__dict__)
+            return module.SimpleEnhancedOCR
+    raise RuntimeError("source enhanced_ocr introuvable dans tools/create_enhanced_ocr.py")
+
+
+def make_engine(name: str):
+    """Fonction chemin -> texte du moteur"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        if name == "vision":
+            from ocr_vision import VisionOCR
+            return VisionOCR().read_image
+        if name == "tesseract":
+            from ocr_real import RealOCR
+            return RealOCR().read_image
+        if name == "simple_enhanced":
+            from ocr_enhanced_simple import SimpleEnhancedOCR
+            return SimpleEnhancedOCR().read_image
+        if name == "enhanced_generated":
+            return load_generated_ocr()().read_image
+    raise ValueError(f"Moteur inconnu: {name}")
+
+
+def math_scores(reference: str, hypothesis: str):
+    """(suite exacte des nombres/variables/opérateurs, part des jetons de référence retrouvés) ou None"""
+    ref, hyp = math_tokens(reference), math_tokens(hypothesis or "")
+    if not ref:
+        return None
+    remaining = list(hyp)
+    found = 0
+    for token in ref:
+        if token in remaining:
+            remaining.remove(token)
+            found += 1
+    return ref == hyp, found / len(ref)
+
+
+def bench_engine(name, read, fixtures, memory_images: int, quality: bool):
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        read(fixtures[0]["path"])  # échauffement (imports, connexion, chargement Tesseract)
+
+    latencies, texts = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for fx in fixtures:
+            t0 = time.perf_counter()
+            texts.append(read(fx["path"]) or "")
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    # Mémoire sur une passe séparée : tracemalloc ralentit les appels mesurés
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for fx in fixtures[:memory_images]:
+            read(fx["path"])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = {"engine": name, "images": len(fixtures), "quality_measured": quality,
+              "empty": sum(1 for t in texts if not t.strip()),
+              "latency": summarize(latencies), "peak_alloc_kb": round(peak / 1024, 1)}
+    if resource is not None and name in TESSERACT_ENGINES:
+        # Maximum cumulé des sous-processus terminés (Tesseract est le seul ici)
+        result["child_maxrss_kb"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if quality:
+        scores = [s for s in (math_scores(fx["text"], t) for fx, t in zip(fixtures, texts)) if s]
+        result.update({
+            "cer": round(sum(cer(fx["text"], t) for fx, t in zip(fixtures, texts)) / len(fixtures), 4),
+            "wer": round(sum(wer(fx["text"], t) for fx, t in zip(fixtures, texts)) / len(fixtures), 4),
+            "math_exact": round(sum(exact for exact, _ in scores) / len(scores), 4) if scores else None,
+            "math_token_recall": round(sum(r for _, r in scores) / len(scores), 4) if scores else None,
+        })
+    result["samples"] = [{"id": fx["id"], "expected": fx["text"], "read": t}
+                         for fx, t in zip(fixtures, texts)][:10]
+    return result, texts
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixtures", default=str(FIXTURES_DIR))
+    ap.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    ap.add_argument("--vision", choices=["replay", "stub", "live", "off"], default=None)
+    ap.add_argument("--vision-latency", default="fixed:0", help="latence du faux OpenAI (replay / stub)")
+    ap.add_argument("--recordings", default=None, help="réponses Vision enregistrées (JSONL sha256/text)")
+    ap.add_argument("--record", action="store_true", help="avec --vision live : enregistre les réponses")
+    ap.add_argument("--memory-images", type=int, default=5, help="images de la passe mémoire")
+    args = ap.parse_args()
+
+    fixtures = load_fixtures(Path(args.fixtures))
+    recordings_path = Path(args.recordings or Path(args.fixtures) / "vision_responses.jsonl")
+    recordings = load_recordings(recordings_path)
+    vision_mode = args.vision or ("replay" if recordings else "stub")
+    print(f"[bench-ocr] {len(fixtures)} images ({args.fixtures}), Vision : {vision_mode}")
+
+    fake = None
+    engines = [e for e in args.engines if e != "vision" or vision_mode != "off"]
+    if "vision" in engines and vision_mode in ("replay", "stub"):
+        from fake_services import FakeOpenAI
+        if vision_mode == "replay":
+            responses = recordings
+            missing = sum(1 for fx in fixtures if image_digest(fx["path"]) not in responses)
+            if missing:
+                print(f"[bench-ocr] {missing} images sans réponse enregistrée (texte vide)")
+        else:
+            responses = {image_digest(fx["path"]): fx["text"] for fx in fixtures}
+        fake = FakeOpenAI(latency=args.vision_latency, vision_responses=responses).start()
+        os.environ["OPENAI_BASE_URL"] = f"{fake.url}/v1"
+        os.environ["OPENAI_API_KEY"] = "sk-bench-ocr"
+    elif "vision" in engines and not os.getenv("OPENAI_API_KEY"):
+        print("[bench-ocr] OPENAI_API_KEY absente : moteur vision ignoré")
+        engines.remove("vision")
+    if TESSERACT_ENGINES & set(engines) and not tesseract_available():
+        print("[bench-ocr] Tesseract absent (TESSERACT_CMD / PATH) : moteurs Tesseract ignorés")
+        engines = [e for e in engines if e not in TESSERACT_ENGINES]
+
+    report = {"run": datetime.now().isoformat(timespec="seconds"), "images": len(fixtures),
+              "vision_mode": vision_mode, "vision_latency": args.vision_latency, "results": []}
+    for name in engines:
+        quality = not (name == "vision" and vision_mode == "stub")
+        result, texts = bench_engine(name, make_engine(name), fixtures, args.memory_images, quality)
+        report["results"].append(result)
+        lat = result["latency"]
+        scores = (f"CER={result['cer']:.3f}  WER={result['wer']:.3f}  maths exactes={result['math_exact']:.1%}"
+                  if quality else "qualité non mesurée (stub)")
+        print(f"  {name:<19} {scores}  p50={lat['p50_ms']:.1f} ms  p95={lat['p95_ms']:.1f} ms  "
+              f"pic mémoire={result['peak_alloc_kb']:.0f} Ko  vides={result['empty']}")
+        if name == "vision" and vision_mode == "live" and args.record:
+            recordings_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(recordings_path, "w", encoding="utf-8") as f:
+                for fx, text in zip(fixtures, texts):
+                    f.write(json.dumps({"sha256": image_digest(fx["path"]), "id": fx["id"], "text": text},
+                                       ensure_ascii=False) + "\n")
+            print(f"[bench-ocr] Réponses Vision enregistrées : {recordings_path}")
+    if fake:
+        fake.stop()
+
+    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    OUT_JSON.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    new_file = not OUT_CSV.exists()
+    with open(OUT_CSV, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["run", "engine", "vision_mode", "images", "cer", "wer", "math_exact", "math_token_recall",
+                        "p50_ms", "p95_ms", "p99_ms", "peak_alloc_kb", "child_maxrss_kb", "empty"])
+        for r in report["results"]:
+            w.writerow([report["run"], r["engine"], vision_mode if r["engine"] == "vision" else "", r["images"],
+                        r.get("cer", ""), r.get("wer", ""), r.get("math_exact", ""), r.get("math_token_recall", ""),
+                        r["latency"]["p50_ms"], r["latency"]["p95_ms"], r["latency"]["p99_ms"],
+                        r["peak_alloc_kb"], r.get("child_maxrss_kb", ""), r["empty"]])
+    print(f"[bench-ocr] Résultats: {OUT_JSON} / {OUT_CSV}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark OCR local : SimpleEnhancedOCR (PIL + un sous-processus Tesseract par appel)
+contre le pool de workers chauds (ocr_pool.py, prétraitement NumPy)
+- Prétraitement seul : ms/image, chaîne PIL historique vs NumPy (otsu, sauvola)
+- OCR complet (si Tesseract est installé) : images/s, CER et WER moyens
+  sur le jeu synthétique data/ocr_fixtures (tools/ocr_fixtures.py)
+Usage:
+  python tools/bench_ocr_pool.py
+  python tools/bench_ocr_pool.py --workers 1 2 4 --binarize sauvola otsu
+Sorties: artifacts/ocr_pool_bench.json (dernier run) et artifacts/ocr_pool_bench.csv (historique)
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ocr_fixtures import FIXTURES_DIR, cer, load_fixtures, wer  # noqa: E402
+
+OUT_JSON = ROOT / "artifacts" / "ocr_pool_bench.json"
+OUT_CSV = ROOT / "artifacts" / "ocr_pool_bench.csv"
+
+
+def tesseract_available() -> bool:
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def bench_preprocess(fixtures, methods, repeat: int):
+    """ms/image du prétraitement, sans OCR"""
+    from ocr_enhanced_simple import SimpleEnhancedOCR
+    from ocr_preprocess import preprocess
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy = SimpleEnhancedOCR()
+    candidates = {"pil_legacy": legacy.preprocess_image}
+    for method in methods:
+        candidates[f"numpy_{method}"] = lambda path, m=method: preprocess(path, method=m)
+
+    results = {}
+    for name, fn in candidates.items():
+        fn(fixtures[0]["path"])  # échauffement
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for fx in fixtures:
+                fn(fx["path"])
+        results[name] = round((time.perf_counter() - t0) * 1000 / (repeat * len(fixtures)), 2)
+    return results
+
+
+def _quality(fixtures, texts):
+    cers = [cer(fx["text"], t) for fx, t in zip(fixtures, texts)]
+    wers = [wer(fx["text"], t) for fx, t in zip(fixtures, texts)]
+    return round(sum(cers) / len(cers), 4), round(sum(wers) / len(wers), 4)
+
+
+def bench_legacy(fixtures):
+    from ocr_enhanced_simple import SimpleEnhancedOCR
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ocr = SimpleEnhancedOCR()
+        t0 = time.perf_counter()
+        texts = [ocr.read_image_with_confidence(fx["path"])["text"] for fx in fixtures]
+    elapsed = time.perf_counter() - t0
+    mean_cer, mean_wer = _quality(fixtures, texts)
+    return {"engine": "simple_enhanced", "workers": 1, "binarize": "pil",
+            "images_per_s": round(len(fixtures) / elapsed, 2), "cer": mean_cer, "wer": mean_wer}
+
+
+def bench_pool(fixtures, workers: int, method: str, batch_size: int):
+    from ocr_pool import OCRWorkerPool
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        pool = OCRWorkerPool(workers=workers, method=method, batch_size=batch_size)
+        pool.warm_up()
+    t0 = time.perf_counter()
+    results = pool.read_batch([fx["path"] for fx in fixtures])
+    elapsed = time.perf_counter() - t0
+    pool.close()
+    mean_cer, mean_wer = _quality(fixtures, [r["text"] for r in results])
+    return {"engine": f"pool:{results[0]['engine']}", "workers": workers, "binarize": method,
+            "images_per_s": round(len(fixtures) / elapsed, 2), "cer": mean_cer, "wer": mean_wer,
+            "errors": sum(1 for r in results if r["error"]),
+            "preprocess_ms": round(sum(r["preprocess_ms"] for r in results) / len(results), 2),
+            "ocr_ms": round(sum(r["ocr_ms"] for r in results) / len(results), 2)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fixtures", default=str(FIXTURES_DIR))
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--binarize", nargs="+", default=["sauvola", "otsu"])
+    ap.add_argument("--batch-size", type=int, default=4)
+    ap.add_argument("--repeat", type=int, default=3, help="répétitions du bench de prétraitement")
+    args = ap.parse_args()
+
+    fixtures = load_fixtures(Path(args.fixtures))
+    print(f"[bench-ocr] {len(fixtures)} images ({args.fixtures})")
+
+    report = {"run": datetime.now().isoformat(timespec="seconds"), "images": len(fixtures)}
+    report["preprocess_ms"] = bench_preprocess(fixtures, args.binarize, args.repeat)
+    for name, ms in report["preprocess_ms"].items():
+        print(f"  prétraitement {name:<16} {ms:8.2f} ms/image")
+
+    report["ocr"] = []
+    if not tesseract_available():
+        print("[bench-ocr] Tesseract absent : OCR complet ignoré (prétraitement seul)")
+    else:
+        runs = [bench_legacy(fixtures)]
+        for workers in args.workers:
+            for method in args.binarize:
+                runs.append(bench_pool(fixtures, workers, method, args.batch_size))
+        for r in runs:
+            print(f"  {r['engine']:<20} w={r['workers']}  {r['binarize']:<8} "
+                  f"{r['images_per_s']:7.2f} img/s  CER={r['cer']:.3f}  WER={r['wer']:.3f}")
+        report["ocr"] = runs
+
+    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    OUT_JSON.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    new_file = not OUT_CSV.exists()
+    with open(OUT_CSV, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["run", "engine", "workers", "binarize", "images_per_s", "cer", "wer", "preprocess_ms"])
+        for name, ms in report["preprocess_ms"].items():
+            w.writerow([report["run"], name, "", "", "", "", "", ms])
+        for r in report["ocr"]:
+            w.writerow([report["run"], r["engine"], r["workers"], r["binarize"], r["images_per_s"],
+                        r["cer"], r["wer"], r.get("preprocess_ms", "")])
+    print(f"[bench-ocr] Résultats: {OUT_JSON} / {OUT_CSV}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
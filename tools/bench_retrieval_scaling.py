@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de passage à l'échelle du retrieval sur corpus synthétiques
+- Génère des manifests synthétiques (1k, 10k, 100k, 1M entrées) à partir du
+  vocabulaire réel du catalogue (titres, chemins, matières, niveaux)
+- Pour chaque retriever enregistré : temps de construction hors ligne (prepare_s),
+  temps de chargement dans un worker (build_s), mémoire (RSS avant/après/pic)
+  et latences de requête p50/p95/p99
+- Chaque mesure tourne dans un sous-processus dédié (mémoire non polluée)
+
+Sorties comparables d'un run à l'autre :
+- artifacts/retrieval_scaling.json : dernier run complet (métadonnées + résultats)
+- artifacts/retrieval_scaling.csv  : une ligne par (run, retriever, taille), en ajout
+
+Usage:
+  python tools/bench_retrieval_scaling.py
+  python tools/bench_retrieval_scaling.py --sizes 1000 10000 --queries 100
+  python tools/bench_retrieval_scaling.py --retrievers connector --max-query-seconds 30
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+ACTIVE_DIR = ROOT / "scripts" / "active"
+sys.path.insert(0, str(ACTIVE_DIR))
+
+from perf_metrics import summarize  # noqa: E402
+
+CATALOG = ROOT / "data" / "rag_seed" / "rag_seed_catalog.csv"
+MANIFEST = ROOT / "data" / "index" / "manifest.json"
+GOLD = ROOT / "data" / "eval" / "gold.jsonl"
+OUT_JSON = ROOT / "artifacts" / "retrieval_scaling.json"
+OUT_CSV = ROOT / "artifacts" / "retrieval_scaling.csv"
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+WORD_RE = re.compile(r"[A-Za-zÀ-ÿ0-9]+")
+
+
+# ---------- Retrievers ----------
+# "prepare" (optionnel) : construction hors ligne, mesurée à part (prepare_s)
+# "load" : chargement dans un worker, retourne un objet exposant query_rag(question, max_docs=k)
+def load_connector(base_path: Path):
+    from rag_connector import CongoRAGConnector
+    return CongoRAGConnector(base_path=str(base_path))
+
+
+def prepare_shared_index(base_path: Path):
+    from shared_index import build_shared_index
+    documents = json.loads((base_path / "index" / "manifest.json").read_text(encoding="utf-8"))
+    build_shared_index(documents, base_path / "index" / "shared_index.bin")
+
+
+def load_shared_index(base_path: Path):
+    from shared_index import SharedIndexRetriever
+    return SharedIndexRetriever(base_path / "index" / "shared_index.bin")
+
+
+RETRIEVERS = {
+    "connector": {"prepare": None, "load": load_connector},
+    "shared_index": {"prepare": prepare_shared_index, "load": load_shared_index},
+}
+
+
+# ---------- Corpus synthétique ----------
+def load_vocabulary():
+    """Vocabulaire réel : mots des titres/chemins, dossiers du manifest, pondérés par fréquence"""
+    words = Counter()
+    folders = Counter()
+
+    with open(CATALOG, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            for col in ("titre", "file_path", "matiere", "grade_level", "langue", "type_doc"):
+                words.update(w.lower() for w in WORD_RE.findall(row.get(col) or ""))
+
+    for doc in json.loads(MANIFEST.read_text(encoding="utf-8")):
+        path = re.sub(r"[\\/]+", "/", doc.get("file", ""))
+        words.update(w.lower() for w in WORD_RE.findall(doc.get("title", "")))
+        folders[path.rsplit("/", 1)[0] if "/" in path else ""] += 1
+
+    return words, folders
+
+
+def generate_manifest(size: int, words: Counter, folders: Counter, seed: int):
+    """Entrées au format du manifest réel (id, file, title, chunks)"""
+    rng = random.Random(seed)
+    vocab, weights = zip(*words.items())
+    dirs, dir_weights = zip(*folders.items())
+
+    for i in range(size):
+        title_words = rng.choices(vocab, weights=weights, k=rng.randint(3, 8))
+        title = " ".join(title_words).title()
+        doc_id = f"SYN-{i:07d}-{'-'.join(title_words[:3])}.pdf"
+        folder = rng.choices(dirs, weights=dir_weights, k=1)[0]
+        yield {
+            "id": doc_id,
+            "file": f"{folder}/{doc_id}" if folder else doc_id,
+            "title": title,
+            "chunks": rng.randint(1, 40),
+        }
+
+
+def write_manifest(size: int, data_dir: Path, words, folders, seed: int) -> Path:
+    """Écrit data_dir/index/manifest.json en flux (mémoire bornée)"""
+    index_dir = data_dir / "index"
+    index_dir.mkdir(parents=True, exist_ok=True)
+    path = index_dir / "manifest.json"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n")
+        for i, doc in enumerate(generate_manifest(size, words, folders, seed)):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(doc, ensure_ascii=False))
+        f.write("\n]\n")
+    return path
+
+
+def build_queries(n: int, words: Counter, seed: int):
+    """Mélange de vraies questions gold et de requêtes synthétiques issues du vocabulaire"""
+    rng = random.Random(seed)
+    gold = []
+    if GOLD.exists():
+        with open(GOLD, encoding="utf-8") as f:
+            gold = [json.loads(line)["query"] for line in f if line.strip()]
+    vocab, weights = zip(*words.items())
+    queries = []
+    for i in range(n):
+        if gold and i % 2 == 0:
+            queries.append(rng.choice(gold))
+        else:
+            queries.append(" ".join(rng.choices(vocab, weights=weights, k=rng.randint(2, 6))))
+    return queries
+
+
+# ---------- Mesure (sous-processus) ----------
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return 0.0
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : kilo-octets, macOS : octets
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def run_child(args) -> int:
+    import io
+    import contextlib
+
+    spec = RETRIEVERS[args.retriever]
+
+    if args.phase == "prepare":
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            spec["prepare"](Path(args.data_dir))
+        print(json.dumps({"prepare_s": round(time.perf_counter() - t0, 4), "prepare_peak_rss_mb": round(peak_rss_mb(), 1)}))
+        return 0
+
+    queries = json.loads(Path(args.queries_file).read_text(encoding="utf-8"))
+    rss_before = rss_mb()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        retriever = spec["load"](Path(args.data_dir))
+    build_s = time.perf_counter() - t0
+    rss_after = rss_mb()
+
+    latencies, hits = [], 0
+    budget_end = time.perf_counter() + args.max_query_seconds
+    for q in queries:
+        t0 = time.perf_counter()
+        ctx = retriever.query_rag(q, max_docs=args.k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        hits += 1 if ctx.get("found") else 0
+        if time.perf_counter() > budget_end:
+            break
+
+    result = {
+        "build_s": round(build_s, 4),
+        "rss_before_mb": round(rss_before, 1),
+        "rss_after_build_mb": round(rss_after, 1),
+        "index_mb": round(rss_after - rss_before, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "queries_run": len(latencies),
+        "found_rate": round(hits / max(len(latencies), 1), 4),
+        **summarize(latencies),
+    }
+    print(json.dumps(result))
+    return 0
+
+
+def _run_child(phase: str, retriever: str, data_dir: Path, queries_file: Path, k: int,
+               max_query_seconds: float) -> dict:
+    cmd = [
+        sys.executable, str(Path(__file__).resolve()), "--child", "--phase", phase,
+        "--retriever", retriever, "--data-dir", str(data_dir),
+        "--queries-file", str(queries_file), "--k", str(k),
+        "--max-query-seconds", str(max_query_seconds),
+    ]
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["échec"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(retriever: str, data_dir: Path, queries_file: Path, k: int, max_query_seconds: float) -> dict:
+    """Construction hors ligne (si le retriever en a une) puis chargement + requêtes, chacun dans son processus"""
+    result = {"prepare_s": 0.0, "prepare_peak_rss_mb": 0.0}
+    if RETRIEVERS[retriever]["prepare"] is not None:
+        result.update(_run_child("prepare", retriever, data_dir, queries_file, k, max_query_seconds))
+        if "error" in result:
+            return result
+    result.update(_run_child("load", retriever, data_dir, queries_file, k, max_query_seconds))
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except Exception:
+        return ""
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    ap.add_argument("--retrievers", nargs="+", default=list(RETRIEVERS))
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--max-query-seconds", type=float, default=60.0,
+                    help="budget de temps des requêtes par mesure (les grands corpus s'arrêtent plus tôt)")
+    ap.add_argument("--work-dir", default=None, help="dossier des manifests synthétiques (défaut: temporaire)")
+    ap.add_argument("--out-json", default=str(OUT_JSON))
+    ap.add_argument("--out-csv", default=str(OUT_CSV))
+    # Mode interne : une mesure dans un processus neuf
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--phase", choices=["prepare", "load"], default="load", help=argparse.SUPPRESS)
+    ap.add_argument("--retriever", help=argparse.SUPPRESS)
+    ap.add_argument("--data-dir", help=argparse.SUPPRESS)
+    ap.add_argument("--queries-file", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        return run_child(args)
+
+    unknown = [r for r in args.retrievers if r not in RETRIEVERS]
+    if unknown:
+        print(f"[bench] Retrievers inconnus: {unknown} (disponibles: {list(RETRIEVERS)})")
+        return 2
+
+    words, folders = load_vocabulary()
+    print(f"[bench] Vocabulaire: {len(words)} mots, {len(folders)} dossiers")
+
+    run_id = datetime.now().isoformat(timespec="seconds")
+    results = []
+    with tempfile.TemporaryDirectory(prefix="moteyi_scaling_") as tmp:
+        work = Path(args.work_dir or tmp)
+        queries_file = work / "queries.json"
+        work.mkdir(parents=True, exist_ok=True)
+        queries_file.write_text(json.dumps(build_queries(args.queries, words, args.seed), ensure_ascii=False),
+                                encoding="utf-8")
+
+        for size in args.sizes:
+            data_dir = work / f"data_{size}"
+            t0 = time.perf_counter()
+            manifest = write_manifest(size, data_dir, words, folders, args.seed)
+            gen_s = time.perf_counter() - t0
+            manifest_mb = manifest.stat().st_size / 1e6
+            print(f"\n[bench] {size:>9,} entrées  manifest={manifest_mb:.1f} MB  (généré en {gen_s:.1f}s)")
+
+            for name in args.retrievers:
+                m = measure(name, data_dir, queries_file, args.k, args.max_query_seconds)
+                row = {"run": run_id, "retriever": name, "size": size, "manifest_mb": round(manifest_mb, 2), **m}
+                results.append(row)
+                if "error" in m:
+                    print(f"  - {name:12s} ERREUR: {m['error']}")
+                else:
+                    print(f"  - {name:12s} prepare={m['prepare_s']:.2f}s  load={m['build_s']:.2f}s  "
+                          f"index={m['index_mb']:.1f} MB  "
+                          f"peak={m['peak_rss_mb']:.0f} MB  p50={m['p50_ms']:.2f} ms  "
+                          f"p95={m['p95_ms']:.2f} ms  (n={m['queries_run']})")
+
+    meta = {
+        "run": run_id, "commit": git_commit(), "python": platform.python_version(),
+        "machine": platform.machine(), "cpus": os.cpu_count(), "seed": args.seed, "k": args.k,
+    }
+    out_json = Path(args.out_json)
+    out_json.parent.mkdir(parents=True, exist_ok=True)
+    out_json.write_text(json.dumps({"meta": meta, "results": results}, ensure_ascii=False, indent=2),
+                        encoding="utf-8")
+
+    fields = ["run", "commit", "retriever", "size", "manifest_mb", "prepare_s", "build_s", "index_mb", "peak_rss_mb",
+              "queries_run", "found_rate", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "error"]
+    out_csv = Path(args.out_csv)
+    new_file = not out_csv.exists()
+    with open(out_csv, "a", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        if new_file:
+            w.writeheader()
+        for row in results:
+            w.writerow({**row, "commit": meta["commit"]})
+
+    print(f"\n[bench] Résultats: {out_json} / {out_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
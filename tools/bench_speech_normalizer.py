@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vérifie et mesure la normalisation texte -> parole (scripts/active/speech_text.py)
+- Golden : data/eval/speech_golden.jsonl (entrée -> sortie attendue de l'ancienne
+  fonction clean_text_for_speech) doit être reproduit à l'identique en français
+- Golden mathématique : data/eval/speech_math_golden.jsonl (lecture des symboles,
+  MOTEYI_TTS_SPEAK_MATH=1) ; traits d'union des mots et dates ne sont pas des opérations
+- Différentiel : textes aléatoires (Markdown, émojis, listes, ponctuation, sauts de
+  ligne) comparés à la copie de référence de l'ancienne fonction ci-dessous
+- Micro-benchmark : µs par appel, ancienne fonction vs SpeechNormalizer, et
+  assemblage audio complet (3 nettoyages imbriqués vs une seule normalisation)
+Usage:
+  python tools/bench_speech_normalizer.py
+  python tools/bench_speech_normalizer.py --fuzz 50000 --repeat 2000
+  python tools/bench_speech_normalizer.py --regenerate-golden   (après un changement voulu)
+Sorties: artifacts/speech_bench.json (dernier run) et artifacts/speech_bench.csv (historique)
+"""
+import argparse
+import csv
+import json
+import random
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+
+from speech_text import SpeechNormalizer  # noqa: E402
+
+GOLDEN = ROOT / "data" / "eval" / "speech_golden.jsonl"
+MATH_GOLDEN = ROOT / "data" / "eval" / "speech_math_golden.jsonl"
+OUT_JSON = ROOT / "artifacts" / "speech_bench.json"
+OUT_CSV = ROOT / "artifacts" / "speech_bench.csv"
+
+INTRO = "Bonjour, je vais t'expliquer cet exercice."
+OUTRO = ("J'espère que cette explication t'a aidé. N'hésite pas à m'envoyer d'autres exercices "
+         "si tu as besoin d'aide. Bonne continuation dans tes études !")
+
+
+def legacy_clean_text_for_speech(text):
+    """Copie de référence de MoteyiCloudBot.clean_text_for_speech (avant speech_text.py)"""
+    text = re.sub(r'\*+', '', text)
+    text = re.sub(r'_+', '', text)
+    text = re.sub(r'#+', '', text)
+    text = re.sub(r'`+', '', text)
+
+    emoji_pattern = re.compile(
+        "["
+        u"\U0001F600-\U0001F64F"  # emoticons
+        u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+        u"\U0001F680-\U0001F6FF"  # transport & map symbols
+        u"\U0001F1E0-\U0001F1FF"  # flags
+        u"\U00002702-\U000027B0"
+        u"\U000024C2-\U0001F251"
+        "]+", flags=re.UNICODE
+    )
+    text = emoji_pattern.sub('', text)
+
+    text = text.replace(' : ', ', ')
+    text = text.replace(' - ', ', ')
+    text = text.replace('...', '.')
+    text = text.replace('!', '.')
+
+    text = re.sub(r'(\d+)\.\s*', r'Numéro \1, ', text)
+
+    text = text.replace('\n\n', '. ')
+    text = text.replace('\n', '. ')
+
+    text = re.sub(r'\s+', ' ', text)
+
+    text = re.sub(r'\.+', '.', text)
+    text = re.sub(r'\.\s*\.', '.', text)
+
+    text = text.replace('OB.', 'option B')
+    text = text.replace('ex.', 'exemple')
+    text = text.replace('etc.', 'et cetera')
+
+    text = text.strip()
+    if not text.endswith('.'):
+        text += '.'
+
+    return text
+
+
+# Textes représentatifs : réponses GPT, messages du bot, sorties du solveur local
+GOLDEN_INPUTS = [
+    "Pour 25 + 17: D'abord 20 + 10 = 30, puis 5 + 7 = 12. Donc 30 + 12 = 42!",
+    "**Étape 1** : On sépare les dizaines.\n**Étape 2** : On additionne les unités.",
+    "🤖 MOTEYI - Tuteur IA\n\n📖 Exercice lu : 2x + 3 = 11...\n\n💡 Explication :\nx = 4",
+    "1. Lis l'énoncé\n2. Identifie les données\n3. Calcule\n\nBravo !!!",
+    "La réponse est *B. 42* car 6 × 7 = 42.",
+    "Voici un ex. simple : 3 mangues + 2 mangues = 5 mangues, etc.",
+    "OB. est la bonne réponse - vérifie bien...",
+    "# Titre\n## Sous-titre\n`code` et _italique_ et __gras__",
+    "Bonjour, je vais t'expliquer cet exercice.\n\n            Résous: (x-2)² = 49.\n\n            x - 2 = ±7",
+    "🧮 Calcul : 25 + 17\n\nÉtape 1 : On sépare dizaines et unités : 25 = 20 + 5 et 17 = 10 + 7\n\n✅ Réponse : 42",
+    "Mbote, nakoyebisa yo exercice oyo. Tanga 20 + 10 = 30 !",
+    "Habari, nitakueleza zoezi hili.\n\nJibu : 72",
+    "Numbers: 1.5 and 2.25 and 10.",
+    "   espaces    multiples\t\tet tabulations   ",
+    "Fin sans point",
+    "Fin avec point.",
+    "...",
+    "",
+    "!!!",
+    "Prix : 250 FC... ou 300 FC !",
+    "1.\n2.\n3.",
+    "a . . b",
+    "a .. . b",
+    "x² + 3x - 5 = 0 ; Δ = 49 ; x = (-3 ± 7) ÷ 4",
+    "Le 2. exemple : 12. 13. 14.",
+    "Vérification ✔ avec ★ et ☀ et → flèches",
+    "Texte avec\r\nretours Windows\r\n\r\nfin",
+    "J'espère que cette explication t'a aidé. Bonne continuation dans tes études !",
+    "I hope this explanation helped you. Good luck with your studies!",
+    "complex. index. ex. EX.",
+]
+
+
+def random_text(rng: random.Random) -> str:
+    pieces = ["*", "**", "_", "#", "`", " : ", " - ", "...", "!", ".", "..", " ", "  ", "\n", "\n\n",
+              "\t", "1.", "12. ", "3.5", "OB.", "ex.", "etc.", "🤖", "📚", "✅", "✔", "é", "Numéro",
+              "abc", "x", "=", "+", "²", ":", "-", "(", ")", "FC", " ", "\r\n", "e.g.", "Δ"]
+    return "".join(rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+
+
+def check_golden(normalizer) -> int:
+    if not GOLDEN.exists():
+        print(f"[speech] {GOLDEN} absent (--regenerate-golden pour le créer)")
+        return 1
+    failures = 0
+    with open(GOLDEN, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    for case in cases:
+        got = normalizer.normalize(case["input"])
+        if got != case["expected"]:
+            failures += 1
+            print(f"  ≠ {case['input']!r}\n    attendu={case['expected']!r}\n    obtenu ={got!r}")
+    print(f"[speech] Golden : {len(cases) - failures}/{len(cases)} identiques")
+    return failures
+
+
+def check_math_golden() -> int:
+    if not MATH_GOLDEN.exists():
+        print(f"[speech] {MATH_GOLDEN} absent")
+        return 1
+    failures = 0
+    with open(MATH_GOLDEN, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    for case in cases:
+        got = SpeechNormalizer(case["language"], speak_math=True).normalize(case["input"])
+        if got != case["expected"]:
+            failures += 1
+            print(f"  ≠ [{case['language']}] {case['input']!r}\n    attendu={case['expected']!r}\n    obtenu ={got!r}")
+    print(f"[speech] Golden maths : {len(cases) - failures}/{len(cases)} identiques")
+    return failures
+
+
+def check_fuzz(normalizer, n: int, seed: int) -> int:
+    rng = random.Random(seed)
+    failures = 0
+    for _ in range(n):
+        text = random_text(rng)
+        expected, got = legacy_clean_text_for_speech(text), normalizer.normalize(text)
+        if expected != got:
+            failures += 1
+            if failures <= 5:
+                print(f"  ≠ {text!r}\n    attendu={expected!r}\n    obtenu ={got!r}")
+    print(f"[speech] Différentiel : {n - failures}/{n} identiques")
+    return failures
+
+
+def legacy_audio(ocr_text, explanation):
+    """Ancien create_audio_explanation : OCR et explication nettoyés, puis le tout"""
+    audio_text = f"""
+            {INTRO}
+            
+            {legacy_clean_text_for_speech(ocr_text[:200])}.
+            
+            {legacy_clean_text_for_speech(explanation)}
+            
+            {OUTRO}
+            """
+    return legacy_clean_text_for_speech(audio_text)
+
+
+def single_pass_audio(normalizer, ocr_text, explanation):
+    """Nouveau create_audio_explanation : une seule normalisation du texte assemblé"""
+    audio_text = f"""
+            {INTRO}
+            
+            {ocr_text[:200]}.
+            
+            {explanation}.
+            
+            {OUTRO}
+            """
+    return normalizer.normalize(audio_text)
+
+
+def bench_audio(normalizer, repeat: int):
+    pairs = list(zip(GOLDEN_INPUTS, reversed(GOLDEN_INPUTS)))
+    same = sum(legacy_audio(o, e) == single_pass_audio(normalizer, o, e) for o, e in pairs)
+    timings = {}
+    for name, fn in (("audio_legacy_3_passes", legacy_audio),
+                     ("audio_single_pass", lambda o, e: single_pass_audio(normalizer, o, e))):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for o, e in pairs:
+                fn(o, e)
+        timings[name] = (time.perf_counter() - t0) * 1e6 / (repeat * len(pairs))
+    print(f"[speech] Audio 3 passes     : {timings['audio_legacy_3_passes']:.2f} µs/message")
+    print(f"[speech] Audio passe unique : {timings['audio_single_pass']:.2f} µs/message "
+          f"(x{timings['audio_legacy_3_passes'] / timings['audio_single_pass']:.2f}, "
+          f"{same}/{len(pairs)} sorties identiques)")
+    return timings, same, len(pairs)
+
+
+def bench(normalizer, repeat: int):
+    texts = GOLDEN_INPUTS
+    results = {}
+    for name, fn in (("legacy", legacy_clean_text_for_speech), ("speech_text", normalizer.normalize)):
+        for t in texts:
+            fn(t)
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for t in texts:
+                fn(t)
+        results[name] = (time.perf_counter() - t0) * 1e6 / (repeat * len(texts))
+    print(f"[speech] Ancienne fonction : {results['legacy']:.2f} µs/appel")
+    print(f"[speech] SpeechNormalizer  : {results['speech_text']:.2f} µs/appel "
+          f"(x{results['legacy'] / results['speech_text']:.2f})")
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fuzz", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--regenerate-golden", action="store_true")
+    args = ap.parse_args()
+
+    if args.regenerate_golden:
+        GOLDEN.parent.mkdir(parents=True, exist_ok=True)
+        with open(GOLDEN, "w", encoding="utf-8") as f:
+            for text in GOLDEN_INPUTS:
+                row = {"input": text, "expected": legacy_clean_text_for_speech(text)}
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        print(f"[speech] {len(GOLDEN_INPUTS)} cas écrits -> {GOLDEN}")
+
+    normalizer = SpeechNormalizer("fr")
+    failures = check_golden(normalizer) + check_math_golden() + check_fuzz(normalizer, args.fuzz, args.seed)
+    timings = bench(normalizer, args.repeat)
+    audio_timings, audio_same, audio_total = bench_audio(normalizer, args.repeat)
+    timings.update(audio_timings)
+
+    report = {"run": datetime.now().isoformat(timespec="seconds"), "failures": failures,
+              "fuzz": args.fuzz, "audio_identical": f"{audio_same}/{audio_total}",
+              "us_per_call": {k: round(v, 2) for k, v in timings.items()}}
+    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    OUT_JSON.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    new_file = not OUT_CSV.exists()
+    with open(OUT_CSV, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["run", "variant", "us_per_call", "failures"])
+        for name, us in report["us_per_call"].items():
+            w.writerow([report["run"], name, us, failures])
+    print(f"[speech] Résultats: {OUT_JSON} / {OUT_CSV}")
+
+    if failures:
+        print(f"[speech] FAIL - {failures} différences")
+        return 1
+    print("[speech] OK - sortie identique à l'ancienne fonction")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
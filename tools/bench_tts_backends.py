@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark des moteurs TTS (scripts/active/tts_backends.py)
+- pour chaque moteur disponible (gTTS, espeak, piper) et chaque langue : latence d'une
+  réponse complète et facteur temps réel (temps de synthèse / durée audio)
+- texte entier en un appel vs découpé en phrases synthétisées en parallèle
+- --simulate : moteur simulé (aller-retour réseau fixe + coût par caractère, WAV silencieux)
+  pour mesurer le gain du découpage parallèle sans réseau ni moteur installé
+Usage:
+  python tools/bench_tts_backends.py
+  python tools/bench_tts_backends.py --simulate --parallel 1 2 4 8
+Sorties: artifacts/tts_backends_bench.json (dernier run) et artifacts/tts_backends_bench.csv (historique)
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+import tempfile
+import time
+import wave
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+
+from tts_backends import BACKENDS, TTSBackend, TTSEngine, split_sentences  # noqa: E402
+
+OUT_JSON = ROOT / "artifacts" / "tts_backends_bench.json"
+OUT_CSV = ROOT / "artifacts" / "tts_backends_bench.csv"
+
+# Réponses audio typiques (intro + énoncé + explication + conclusion, ~40-60 s lues)
+SAMPLE_TEXTS = {
+    "fr": "Bonjour, je vais t'expliquer cet exercice. Résous l'équation deux x plus trois égale onze. "
+          "On commence par isoler le terme en x : on retire trois des deux côtés, ce qui donne deux x égale huit. "
+          "Ensuite on divise les deux côtés par deux, donc x égale quatre. "
+          "Vérifions : deux fois quatre égale huit, et huit plus trois égale bien onze. "
+          "La solution de l'équation est donc x égale quatre. "
+          "J'espère que cette explication t'a aidé. N'hésite pas à m'envoyer d'autres exercices si tu as besoin "
+          "d'aide. Bonne continuation dans tes études !",
+    "en": "Hello, let me explain this exercise to you. Find the area of a rectangle six centimetres long and "
+          "four centimetres wide. The area of a rectangle is its length multiplied by its width. "
+          "Six times four equals twenty four, so the area is twenty four square centimetres. "
+          "Remember that an area is always written in square units. "
+          "I hope this explanation helped you. Feel free to send me other exercises if you need help. "
+          "Good luck with your studies!",
+    "sw": "Habari, nitakueleza zoezi hili. Tafuta thamani ya x katika mlinganyo mbili x jumlisha tatu ni "
+          "sawa na kumi na moja. Kwanza toa tatu pande zote mbili, tunapata mbili x ni sawa na nane. "
+          "Kisha gawanya pande zote kwa mbili, kwa hiyo x ni sawa na nne. "
+          "Natumaini maelezo haya yamekusaidia. Endelea vizuri na masomo yako !",
+}
+
+
+class SimulatedBackend(TTSBackend):
+    """Moteur réseau simulé : base_ms par appel + ms_per_char, WAV silencieux à 15 caractères/s"""
+
+    name = "simulated"
+    suffix = ".wav"
+
+    def __init__(self, base_ms: float, ms_per_char: float):
+        super().__init__()
+        self.voices = {lang: lang for lang in SAMPLE_TEXTS}
+        self.base_ms = base_ms
+        self.ms_per_char = ms_per_char
+
+    def available(self) -> bool:
+        return True
+
+    def synthesize(self, text, language, out_path):
+        time.sleep((self.base_ms + self.ms_per_char * len(text)) / 1000)
+        rate = 16000
+        with wave.open(str(out_path), "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            w.writeframes(b"\x00\x00" * int(rate * len(text) / 15))
+
+
+def run_case(backend, language, text, parallel, chunk_chars, repeat, out_dir):
+    """(ms par réponse, facteur temps réel médian, tranches, échecs)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = TTSEngine([backend], latency_budget_ms=float("inf"), max_workers=parallel,
+                           chunk_chars=chunk_chars)
+    timings, failures = [], 0
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            path = engine.synthesize(text, language, out_dir / f"{backend.name}_{language}_{parallel}_{i}")
+        if path is None:
+            failures += 1
+            continue
+        timings.append((time.perf_counter() - t0) * 1000)
+        Path(path).unlink(missing_ok=True)
+    stats = engine.get_stats()["backends"][backend.name]
+    mean_ms = round(sum(timings) / len(timings), 1) if timings else None
+    return mean_ms, stats["rtf_p50"], len(split_sentences(text, chunk_chars)), failures
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--simulate", action="store_true", help="moteur simulé au lieu des moteurs installés")
+    ap.add_argument("--base-ms", type=float, default=400.0, help="aller-retour simulé par appel")
+    ap.add_argument("--ms-per-char", type=float, default=6.0, help="coût simulé par caractère")
+    ap.add_argument("--parallel", nargs="*", type=int, default=[1, 4])
+    ap.add_argument("--chunk-chars", type=int, default=220)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    if args.simulate:
+        backends = [SimulatedBackend(args.base_ms, args.ms_per_char)]
+    else:
+        backends = [cls() for cls in BACKENDS.values()]
+        backends = [b for b in backends if b.available()]
+    if not backends:
+        print("[tts] Aucun moteur disponible (gTTS, espeak-ng, piper) : essayer --simulate")
+        return 1
+
+    report = {"run": datetime.now().isoformat(timespec="seconds"), "simulate": args.simulate, "cases": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            for language, text in SAMPLE_TEXTS.items():
+                if not backend.supports(language):
+                    continue
+                # Référence : texte entier en un seul appel
+                variants = [("entier", 1, len(text) + 1)] + [
+                    (f"phrases x{p}", p, args.chunk_chars) for p in args.parallel]
+                for label, parallel, chunk_chars in variants:
+                    mean_ms, rtf, chunks, failures = run_case(backend, language, text, parallel, chunk_chars,
+                                                              args.repeat, Path(tmp))
+                    case = {"backend": backend.name, "language": language, "variant": label,
+                            "chars": len(text), "chunks": chunks, "mean_ms": mean_ms, "rtf_p50": rtf,
+                            "failures": failures}
+                    report["cases"].append(case)
+                    print(f"[tts] {backend.name:9} {language}  {label:12} {chunks} tranche(s)  "
+                          f"{mean_ms} ms/réponse  RTF {rtf}  échecs {failures}")
+
+    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    OUT_JSON.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    new_file = not OUT_CSV.exists()
+    with open(OUT_CSV, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["run", "backend", "language", "variant", "chars", "chunks", "mean_ms", "rtf_p50", "failures"])
+        for case in report["cases"]:
+            w.writerow([report["run"], case["backend"], case["language"], case["variant"], case["chars"],
+                        case["chunks"], case["mean_ms"], case["rtf_p50"], case["failures"]])
+    print(f"[tts] Résultats: {OUT_JSON} / {OUT_CSV}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Construction hors ligne de la banque de réponses (scripts/active/answer_bank.py)
+- extraction d'exercices du texte du corpus : consignes (Calcule, Résous, Effectue, Trouve,
+  Complète, Convertis, Hesabu, Solve...), items numérotés contenant des nombres, questions
+- sources : --corpus (JSONL avec un champ text/content/chunk, compressé ou non, fichiers
+  .txt/.md ou dossiers ; par défaut les fragments data/export/corpus de rag/export_jsonl.py,
+  dont seuls les chunks de la dernière génération de chaque document sont lus)
+  et --questions (JSONL avec un champ query ; par défaut data/eval/gold.jsonl)
+- explications générées comme au runtime (RealGPT : prompts, budget de tokens, contexte RAG)
+  dans chaque langue prise en charge, par un pool de workers à débit limité (--rpm)
+- reprise : les couples (question, langue) déjà en banque sont sautés ; chaque réponse est
+  écrite dès qu'elle arrive (un arrêt Ctrl-C ne perd que les appels en cours)
+- --fake-llm : endpoint OpenAI local (tools/fake_services.py), pour tester sans clé ni réseau ;
+  écrit dans une banque temporaire (jamais dans data/index/answer_bank.db, lue par le bot)
+Usage:
+  python tools/build_answer_bank.py --dry-run
+  python tools/build_answer_bank.py --fake-llm
+  python tools/build_answer_bank.py --corpus data/export/corpus --languages fr ln --rpm 120 --workers 4
+Sorties: data/index/answer_bank.db (banque), artifacts/answer_bank_build.json (dernier run)
+         et artifacts/answer_bank_build.csv (historique)
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+sys.path.insert(0, str(ROOT / "tools"))
+sys.path.insert(0, str(ROOT / "rag"))
+
+from answer_bank import DEFAULT_DB as BANK_DB, AnswerBank, question_key  # noqa: E402
+from export_jsonl import EXPORT_MANIFEST, is_current, load_export_manifest, open_shard  # noqa: E402
+from prompt_templates import LANGUAGE_FILES  # noqa: E402
+from send_scheduler import TokenBucket  # noqa: E402
+
+OUT_JSON = ROOT / "artifacts" / "answer_bank_build.json"
+OUT_CSV = ROOT / "artifacts" / "answer_bank_build.csv"
+TEXT_FIELDS = ("text", "content", "chunk")
+ID_FIELDS = ("doc_id", "id", "source", "file")
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst")
+CORPUS_SUFFIXES = JSONL_SUFFIXES + (".txt", ".md")
+EXPORT_DIR = ROOT / "data" / "export" / "corpus"
+DEFAULT_DB = ROOT / BANK_DB
+
+# Consignes en début de ligne (après un éventuel "Exercice 3 :" ou "1)")
+INSTRUCTION_RE = re.compile(
+    r"^\s*(?:(?:exercice|exercise|zoezi|probl[eè]me)\s*\d*\s*[:.)\-–]\s*)?(?:\d+|[a-h])?[.)]?\s*"
+    r"(?P<q>(?:calcule[rz]?|r[ée]sou?s|r[ée]solve[zr]?|effectue[rz]?|trouve[rz]?|compl[èe]te[rz]?|"
+    r"convertis(?:sez)?|simplifie[rz]?|d[ée]compose[rz]?|compare[rz]?|range[rz]?|[ée]cris|[ée]crivez|"
+    r"explique[rz]?|donne[rz]?|combien|quel(?:le)?s?|hesabu|tafuta|suluhisha|eleza|solve|calculate|"
+    r"compute|find|explain|how)\b.*)$",
+    re.IGNORECASE)
+NUMBERED_RE = re.compile(r"^\s*(?:\d{1,2}|[a-h])[.)]\s+(?P<q>.*\d.*)$")
+MIN_CHARS, MAX_CHARS = 8, 300
+
+
+def mine_exercises(text: str):
+    """Exercices d'un texte : consignes, items numérotés avec nombres, questions"""
+    found = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not MIN_CHARS <= len(line) <= MAX_CHARS:
+            continue
+        match = INSTRUCTION_RE.match(line) or NUMBERED_RE.match(line)
+        if match:
+            found.append(match.group("q").strip())
+        elif line.endswith("?") and len(line.split()) >= 3:
+            found.append(line)
+    return found
+
+
+def iter_corpus(paths):
+    """(texte, source) des fichiers JSONL / texte donnés (dossiers parcourus)"""
+    exports = {}  # dossier -> manifest d'export (None si ce ne sont pas des fragments exportés)
+    for path in paths:
+        path = Path(path)
+        files = sorted(p for p in path.rglob("*") if p.name.endswith(CORPUS_SUFFIXES)) if path.is_dir() else [path]
+        for file in files:
+            if not file.exists():
+                print(f"[bank] Source absente : {file}")
+                continue
+            if file.name.endswith(JSONL_SUFFIXES):
+                # Fragments de rag/export_jsonl.py : chunks remplacés par un export incrémental ignorés
+                if file.parent not in exports:
+                    exports[file.parent] = (load_export_manifest(file.parent)
+                                            if (file.parent / EXPORT_MANIFEST).exists() else None)
+                export = exports[file.parent]
+                with open_shard(file) as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if export is not None and not is_current(record, export):
+                            continue
+                        text = next((record[k] for k in TEXT_FIELDS if isinstance(record.get(k), str)), "")
+                        source = next((str(record[k]) for k in ID_FIELDS if record.get(k)), file.name)
+                        if text:
+                            yield text, source
+            else:
+                yield file.read_text(encoding="utf-8", errors="replace"), file.name
+
+
+def iter_questions(paths):
+    for path in paths:
+        path = Path(path)
+        if not path.exists():
+            print(f"[bank] Questions absentes : {path}")
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("query"):
+                    yield record["query"], record.get("id", path.name)
+
+
+def collect_exercises(args):
+    """Exercices dédoublonnés (question normalisée) : [(question, source)]"""
+    seen, exercises, mined = set(), [], 0
+    candidates = []
+    for text, source in iter_corpus(args.corpus):
+        for question in mine_exercises(text):
+            mined += 1
+            candidates.append((question, source))
+    candidates.extend(iter_questions(args.questions))
+    for question, source in candidates:
+        key = question_key(question)
+        if key not in seen:
+            seen.add(key)
+            exercises.append((question, source))
+    return exercises[:args.limit] if args.limit else exercises, mined
+
+
+class RateLimiter:
+    """Débit global des appels LLM (requêtes par minute), partagé par les workers"""
+
+    def __init__(self, per_minute: float):
+        self.bucket = TokenBucket(per_minute / 60.0, burst=1)
+        self._lock = threading.Lock()
+
+    def wait(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = self.bucket.wait_time(now)
+                if delay == 0:
+                    self.bucket.consume(now)
+                    return
+            time.sleep(delay)
+
+
+def start_fake_llm():
+    from fake_services import FakeOpenAI
+    server = FakeOpenAI(latency="uniform:50:150").start()
+    os.environ["OPENAI_BASE_URL"] = f"{server.url}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-answer-bank"
+    print(f"[bank] Faux LLM : {server.url}/v1")
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--corpus", nargs="*", default=[str(EXPORT_DIR)] if EXPORT_DIR.exists() else [])
+    ap.add_argument("--questions", nargs="*", default=[str(ROOT / "data" / "eval" / "gold.jsonl")])
+    ap.add_argument("--languages", nargs="*", default=list(LANGUAGE_FILES))
+    ap.add_argument("--db", default=None, help=f"banque SQLite (défaut : {DEFAULT_DB}, "
+                                                "ou un fichier temporaire avec --fake-llm)")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--rpm", type=float, default=60.0, help="appels LLM par minute (tous workers confondus)")
+    ap.add_argument("--limit", type=int, default=0, help="nombre maximal d'exercices (0 = tous)")
+    ap.add_argument("--fake-llm", action="store_true", help="endpoint OpenAI local au lieu de l'API")
+    ap.add_argument("--dry-run", action="store_true", help="affiche les exercices extraits sans appel LLM")
+    args = ap.parse_args()
+
+    exercises, mined = collect_exercises(args)
+    print(f"[bank] {mined} exercices extraits du corpus, {len(exercises)} questions uniques "
+          f"x {len(args.languages)} langues")
+    if args.dry_run:
+        for question, source in exercises[:50]:
+            print(f"  [{source}] {question}")
+        return 0
+
+    if args.fake_llm:
+        args.db = args.db or str(Path(tempfile.gettempdir()) / "answer_bank_fake_llm.db")
+        production = {DEFAULT_DB.resolve(), Path(os.getenv('MOTEYI_ANSWER_BANK_DB', DEFAULT_DB)).resolve()}
+        if Path(args.db).resolve() in production:
+            print(f"[bank] --fake-llm refusé sur la banque lue par le bot {args.db} (choisir un autre --db)")
+            return 1
+        print(f"[bank] Banque de test : {args.db}")
+    args.db = args.db or str(DEFAULT_DB)
+
+    fake = start_fake_llm() if args.fake_llm else None
+    with contextlib.redirect_stdout(io.StringIO()):
+        from gpt_real import RealGPT
+        from rag_connector import CongoRAGConnector
+        gpt = RealGPT()
+        rag = CongoRAGConnector(base_path=str(ROOT / "data"))
+    if gpt.mock_mode:
+        print("[bank] OPENAI_API_KEY absente : réponses de démonstration refusées (utiliser --fake-llm)")
+        return 1
+
+    bank = AnswerBank(args.db, fuzzy=False)
+    jobs = [(q, lang, src) for q, src in exercises for lang in args.languages if not bank.has(q, lang)]
+    skipped = len(exercises) * len(args.languages) - len(jobs)
+    print(f"[bank] {skipped} réponses déjà en banque (reprise), {len(jobs)} à générer "
+          f"({args.workers} workers, {args.rpm:.0f}/min)")
+
+    limiter = RateLimiter(args.rpm)
+    counts = {"generated": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def generate(question, language, source):
+        limiter.wait()
+        context = rag.query_rag(question)
+        answer = gpt.generate_explanation(question, language, context)
+        if not answer or answer.startswith("[Mode démo]"):
+            raise RuntimeError("réponse de démonstration (appel LLM en échec)")
+        bank.put(question, language, answer, source=source, model=gpt.model)
+
+    t0 = time.perf_counter()
+    interrupted = False
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+    try:
+        futures = {pool.submit(generate, *job): job for job in jobs}
+        for i, future in enumerate(as_completed(futures), 1):
+            try:
+                future.result()
+                key = "generated"
+            except Exception as e:
+                key = "failed"
+                print(f"[bank] Échec {futures[future][1]} : {futures[future][0][:60]!r} ({e})")
+            with lock:
+                counts[key] += 1
+            if i % 50 == 0 or i == len(jobs):
+                print(f"[bank] {i}/{len(jobs)}  ({counts['failed']} échecs)")
+    except KeyboardInterrupt:
+        interrupted = True
+        print("[bank] Interrompu : relancer la même commande pour reprendre")
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if fake:
+            fake.stop()
+    elapsed = time.perf_counter() - t0
+
+    report = {
+        "run": datetime.now().isoformat(timespec="seconds"),
+        "db": args.db,
+        "fake_llm": args.fake_llm,
+        "languages": args.languages,
+        "mined": mined,
+        "questions": len(exercises),
+        "skipped_existing": skipped,
+        **counts,
+        "interrupted": interrupted,
+        "elapsed_s": round(elapsed, 1),
+        "answers_per_min": round(counts["generated"] / elapsed * 60, 1) if elapsed > 0 else 0.0,
+        "bank": bank.counts(),
+    }
+    print(f"[bank] {counts['generated']} réponses générées, {counts['failed']} échecs en {elapsed:.1f}s "
+          f"-> banque {report['bank']}")
+
+    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    OUT_JSON.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    new_file = not OUT_CSV.exists()
+    with open(OUT_CSV, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["run", "fake_llm", "mined", "questions", "skipped_existing", "generated", "failed",
+                        "elapsed_s", "answers_per_min"])
+        w.writerow([report["run"], args.fake_llm, mined, len(exercises), skipped, counts["generated"],
+                    counts["failed"], report["elapsed_s"], report["answers_per_min"]])
+    print(f"[bank] Résultats: {OUT_JSON} / {OUT_CSV}")
+    return 130 if interrupted else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Construit l'index de retrieval partagé (mmap) à partir du manifest
+- Écrit data/index/shared_index.bin de façon atomique (tmp + rename) :
+  les workers en cours basculent sur la nouvelle version sans redémarrer
+- --check   : compare les résultats avec CongoRAGConnector sur les requêtes gold
+- --workers : lance N processus qui mappent l'index et rapporte la mémoire
+              résidente de chacun (RSS, PSS, part de l'index)
+Usage:
+  python tools/build_shared_index.py
+  python tools/build_shared_index.py --check --workers 4
+  python tools/build_shared_index.py --manifest /tmp/data/index/manifest.json --out /tmp/data/index/shared_index.bin
+"""
+import argparse
+import io
+import json
+import contextlib
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+
+from shared_index import (  # noqa: E402
+    DEFAULT_INDEX_PATH, SharedIndexRetriever, build_shared_index, memory_report,
+)
+
+GOLD = ROOT / "data" / "eval" / "gold.jsonl"
+
+
+def load_manifest(path: Path):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(data, dict):
+        data = data.get("docs") or data.get("documents") or []
+    return data
+
+
+def gold_queries():
+    if not GOLD.exists():
+        return []
+    with open(GOLD, encoding="utf-8") as f:
+        return [json.loads(line)["query"] for line in f if line.strip()]
+
+
+def check_parity(base_path: Path, index_path: Path, queries, k: int) -> int:
+    """Nombre de requêtes dont le classement diffère de CongoRAGConnector"""
+    from rag_connector import CongoRAGConnector
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        reference = CongoRAGConnector(base_path=str(base_path))
+        shared = SharedIndexRetriever(index_path)
+
+    mismatches = 0
+    for q in queries:
+        expected = reference.query_rag(q, max_docs=k)["documents"]
+        got = shared.query_rag(q, max_docs=k)["documents"]
+        if expected != got:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  ≠ {q[:60]!r}\n    attendu={[d['id'] for d in expected]}\n    obtenu ={[d['id'] for d in got]}")
+    return mismatches
+
+
+def _worker(index_path: str, queries, k: int, results):
+    with contextlib.redirect_stdout(io.StringIO()):
+        retriever = SharedIndexRetriever(index_path)
+    t0 = time.perf_counter()
+    for q in queries:
+        retriever.query_rag(q, max_docs=k)
+    elapsed = time.perf_counter() - t0
+    # Toucher toutes les pages de l'index pour mesurer le pire cas résident
+    index = retriever.index
+    for i in range(0, len(index._mm), 4096):
+        index._mm[i]
+    report = memory_report(index_path)
+    report["queries_per_s"] = round(len(queries) / max(elapsed, 1e-9), 1)
+    results.put(report)
+
+
+def report_workers(index_path: Path, queries, k: int, n: int):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(str(index_path), queries, k, results)) for _ in range(n)]
+    # Démarrage simultané : les mappings coexistent au moment de la mesure
+    for p in procs:
+        p.start()
+    reports = [results.get(timeout=300) for _ in procs]
+    for p in procs:
+        p.join()
+
+    print(f"\n[index] Mémoire par worker ({n} processus, Mo) :")
+    for i, r in enumerate(reports, 1):
+        print(f"  worker {i}: rss={r.get('rss', 0):7.1f}  pss={r.get('pss', 0):7.1f}  "
+              f"index_rss={r.get('index_rss', 0):6.1f}  index_pss={r.get('index_pss', 0):6.1f}  "
+              f"({r['queries_per_s']} q/s)")
+    return reports
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--manifest", default=str(ROOT / "data" / "index" / "manifest.json"))
+    ap.add_argument("--out", default=str(ROOT / DEFAULT_INDEX_PATH))
+    ap.add_argument("--check", action="store_true", help="vérifie l'égalité avec CongoRAGConnector")
+    ap.add_argument("--workers", type=int, default=0, help="mesure la mémoire de N workers")
+    ap.add_argument("--k", type=int, default=5)
+    args = ap.parse_args()
+
+    manifest = Path(args.manifest)
+    documents = load_manifest(manifest)
+    t0 = time.perf_counter()
+    info = build_shared_index(documents, args.out)
+    print(f"[index] {info['documents']} documents, {info['terms']} termes, "
+          f"{info['bytes'] / 1e6:.2f} Mo -> {info['path']} ({time.perf_counter() - t0:.2f}s)")
+
+    queries = gold_queries()
+    status = 0
+    if args.check:
+        base_path = manifest.parent.parent
+        mismatches = check_parity(base_path, Path(args.out), queries, args.k)
+        if mismatches:
+            print(f"[index] FAIL - {mismatches}/{len(queries)} requêtes diffèrent du connecteur")
+            status = 1
+        else:
+            print(f"[index] OK - résultats identiques au connecteur sur {len(queries)} requêtes")
+
+    if args.workers:
+        report_workers(Path(args.out), queries, args.k, args.workers)
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inspection et relance de la file des messages non délivrés (scripts/active/dead_letter.py)
+- stats  : nombre de messages par statut (pending / sent / expired)
+- list   : derniers messages (destinataire, type, essais, âge, dernière erreur)
+- show   : message complet (payload rendu)
+- replay : rend des messages dus tout de suite ; le thread de renvoi du bot les envoie
+           au passage suivant (MOTEYI_DLQ_POLL_S). --expired relance aussi les expirés
+- purge  : supprime les messages délivrés / expirés
+Usage:
+  python tools/dlq.py stats
+  python tools/dlq.py list --status pending --limit 20
+  python tools/dlq.py show 42
+  python tools/dlq.py replay --all
+  python tools/dlq.py replay 42 43 --expired
+  python tools/dlq.py purge --older-than-h 48
+Sorties: console uniquement (la file elle-même est data/dead_letters.db)
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+
+from dead_letter import EXPIRED, PENDING, SENT, DeadLetterQueue  # noqa: E402
+
+
+def _age(ts: float) -> str:
+    seconds = max(time.time() - ts, 0)
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+def _summary(entry) -> str:
+    payload = entry["payload"]
+    if entry["kind"] == "audio":
+        return Path(payload.get("audio_path", "")).name
+    body = payload.get("text", {}).get("body", "")
+    return body[:50].replace("\n", " ")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="File des messages non délivrés")
+    ap.add_argument("--db", default=str(ROOT / "data" / "dead_letters.db"))
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats")
+    p_list = sub.add_parser("list")
+    p_list.add_argument("--status", choices=[PENDING, SENT, EXPIRED])
+    p_list.add_argument("--limit", type=int, default=50)
+    p_show = sub.add_parser("show")
+    p_show.add_argument("id", type=int)
+    p_replay = sub.add_parser("replay")
+    p_replay.add_argument("ids", nargs="*", type=int)
+    p_replay.add_argument("--all", action="store_true", help="tous les messages en attente")
+    p_replay.add_argument("--expired", action="store_true", help="relancer aussi les messages expirés")
+    p_purge = sub.add_parser("purge")
+    p_purge.add_argument("--older-than-h", type=float, default=0.0)
+    args = ap.parse_args()
+
+    if not Path(args.db).exists():
+        print(f"[dlq] Aucune file : {args.db}")
+        return 1
+    dlq = DeadLetterQueue(args.db, poll_s=0)
+
+    if args.command == "stats":
+        counts = dlq.counts()
+        print(f"[dlq] {args.db}")
+        for status in (PENDING, SENT, EXPIRED):
+            print(f"  {status:8} {counts.get(status, 0)}")
+    elif args.command == "list":
+        entries = dlq.list(args.status, args.limit)
+        for e in entries:
+            print(f"  #{e['id']:<5} {e['status']:8} {e['kind']:5} {e['recipient']:15} essais={e['attempts']}  "
+                  f"âge={_age(e['created_at']):>8}  {_summary(e)!r}  {e['last_error'] or ''}")
+        print(f"[dlq] {len(entries)} message(s)")
+    elif args.command == "show":
+        entry = dlq.get(args.id)
+        if entry is None:
+            print(f"[dlq] Message #{args.id} introuvable")
+            return 1
+        print(json.dumps(entry, ensure_ascii=False, indent=2))
+    elif args.command == "replay":
+        if not args.ids and not args.all:
+            print("[dlq] Préciser des identifiants ou --all")
+            return 1
+        n = dlq.requeue(None if args.all else args.ids, include_expired=args.expired)
+        print(f"[dlq] {n} message(s) dû(s) maintenant : renvoi par le bot au prochain passage")
+    elif args.command == "purge":
+        n = dlq.purge(older_than_s=args.older_than_h * 3600)
+        print(f"[dlq] {n} message(s) supprimé(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
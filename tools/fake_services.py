@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Faux services locaux pour tester le bot sans Meta ni OpenAI
+- FakeGraphAPI  : /{version}/{phone_id}/messages, /{version}/{phone_id}/media (upload),
+                  /{version}/{media_id} (métadonnées) et /media-bytes/{media_id} (octets)
+- FakeOpenAI    : /v1/chat/completions compatible OpenAI (texte et vision) ; transcriptions
+                  Vision par image possibles (empreinte sha256 des octets -> texte, réponses
+                  enregistrées ou étiquettes, voir tools/bench_ocr_engines.py)
+- Latences configurables : "fixed:200", "uniform:100:400", "lognormal:300:0.5", "exp:250" (ms)
+- Taux d'erreur configurable (HTTP 429/500) pour tester la résilience
+
+Usage autonome:
+  python tools/fake_services.py --graph-port 8081 --openai-port 8082 --openai-latency lognormal:400:0.4
+  -> WHATSAPP_GRAPH_URL=http://127.0.0.1:8081  OPENAI_BASE_URL=http://127.0.0.1:8082/v1
+"""
+import argparse
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_IMAGES_DIR = ROOT / "data" / "whatsapp_images"
+
+
+class LatencyModel:
+    """Distribution de latence (ms) décrite par une chaîne 'type:param[:param]'"""
+
+    def __init__(self, spec: str = "fixed:0", seed: int = None):
+        self.spec = spec
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        kind, *params = spec.split(":")
+        values = [float(p) for p in params]
+        if kind == "fixed":
+            self._draw = lambda: values[0] if values else 0.0
+        elif kind == "uniform":
+            self._draw = lambda: self._rng.uniform(values[0], values[1])
+        elif kind == "lognormal":
+            # lognormal:médiane_ms:sigma
+            mu = math.log(max(values[0], 1e-6))
+            sigma = values[1] if len(values) > 1 else 0.5
+            self._draw = lambda: self._rng.lognormvariate(mu, sigma)
+        elif kind == "exp":
+            self._draw = lambda: self._rng.expovariate(1.0 / max(values[0], 1e-6))
+        else:
+            raise ValueError(f"Distribution de latence inconnue: {spec}")
+
+    def sample_ms(self) -> float:
+        with self._lock:
+            return max(0.0, self._draw())
+
+    def sleep(self):
+        time.sleep(self.sample_ms() / 1000.0)
+
+
+class _FakeServer:
+    """Base commune : serveur HTTP threadé, latence, erreurs injectées, compteurs"""
+
+    name = "fake"
+
+    def __init__(self, host="127.0.0.1", port=0, latency="fixed:0", error_rate=0.0, seed=None):
+        self.latency = LatencyModel(latency, seed)
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str, n: int = 1):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def inject_error(self) -> bool:
+        with self._lock:
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=f"{self.name}-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, fmt, *args):  # silencieux
+                pass
+
+            def _body(self) -> bytes:
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def _send(self, status: int, payload, content_type="application/json"):
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _dispatch(self, method: str):
+                body = self._body() if method == "POST" else b""
+                server.latency.sleep()
+                if server.inject_error():
+                    status = 429 if server._rng.random() < 0.5 else 500
+                    server.count(f"injected_{status}")
+                    self._send(status, {"error": {"message": "injected failure", "code": status}})
+                    return
+                status, payload, content_type = server.handle(method, self.path, self.headers, body)
+                self._send(status, payload, content_type)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+        return Handler
+
+    def handle(self, method, path, headers, body):
+        raise NotImplementedError
+
+
+class FakeGraphAPI(_FakeServer):
+    """Graph API WhatsApp : envoi de messages, upload et téléchargement de médias"""
+
+    name = "graph"
+    MESSAGES_RE = re.compile(r"^/v[\d.]+/[^/]+/messages$")
+    MEDIA_UPLOAD_RE = re.compile(r"^/v[\d.]+/[^/]+/media$")
+    MEDIA_META_RE = re.compile(r"^/v[\d.]+/([^/?]+)$")
+    MEDIA_BYTES_RE = re.compile(r"^/media-bytes/([^/?]+)$")
+
+    def __init__(self, images_dir=DEFAULT_IMAGES_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.images = sorted(Path(images_dir).glob("*.jpg")) if images_dir else []
+        self.uploaded_bytes = 0
+        self.sent_messages = []
+        self.keep_messages = 1000
+
+    def media_bytes(self, media_id: str) -> bytes:
+        if not self.images:
+            return b"\xff\xd8\xff\xd9"  # JPEG vide mais valide en en-tête
+        index = sum(map(ord, media_id)) % len(self.images)
+        return self.images[index].read_bytes()
+
+    def handle(self, method, path, headers, body):
+        if method == "POST" and self.MESSAGES_RE.match(path):
+            try:
+                message = json.loads(body or b"{}")
+            except ValueError:
+                return 400, {"error": {"message": "invalid json"}}, "application/json"
+            self.count(f"messages_{message.get('type', 'unknown')}")
+            with self._lock:
+                self.sent_messages.append(message)
+                del self.sent_messages[:-self.keep_messages]
+            return 200, {"messaging_product": "whatsapp",
+                         "messages": [{"id": f"wamid.{uuid.uuid4().hex}"}]}, "application/json"
+
+        if method == "POST" and self.MEDIA_UPLOAD_RE.match(path):
+            self.count("media_uploads")
+            with self._lock:
+                self.uploaded_bytes += len(body)
+            return 200, {"id": f"media-{uuid.uuid4().hex[:12]}"}, "application/json"
+
+        match = self.MEDIA_BYTES_RE.match(path)
+        if method == "GET" and match:
+            self.count("media_downloads")
+            return 200, self.media_bytes(match.group(1)), "image/jpeg"
+
+        match = self.MEDIA_META_RE.match(path)
+        if method == "GET" and match:
+            self.count("media_lookups")
+            media_id = match.group(1)
+            return 200, {"id": media_id, "url": f"{self.url}/media-bytes/{media_id}",
+                         "mime_type": "image/jpeg"}, "application/json"
+
+        return 404, {"error": {"message": f"unknown route {method} {path}"}}, "application/json"
+
+
+class FakeOpenAI(_FakeServer):
+    """Endpoint compatible OpenAI /v1/chat/completions (texte et vision)"""
+
+    name = "openai"
+
+    def __init__(self, vision_text="25 + 17 = ?", answer_text=None, vision_responses=None, **kwargs):
+        super().__init__(**kwargs)
+        self.vision_text = vision_text
+        self.vision_responses = vision_responses or {}  # sha256 des octets de l'image -> transcription
+        self.answer_text = answer_text or (
+            "Pour 25 + 17 : d'abord 20 + 10 = 30, puis 5 + 7 = 12. Donc 30 + 12 = 42 ! "
+            "Bravo, continue comme ça."
+        )
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    @staticmethod
+    def _is_vision(messages) -> bool:
+        for m in messages:
+            content = m.get("content")
+            if isinstance(content, list) and any(part.get("type") == "image_url" for part in content):
+                return True
+        return False
+
+    @staticmethod
+    def _image_digest(messages):
+        """sha256 des octets de la première image data:...;base64 de la requête"""
+        for m in messages:
+            content = m.get("content")
+            if not isinstance(content, list):
+                continue
+            for part in content:
+                url = part.get("image_url", {}).get("url", "") if part.get("type") == "image_url" else ""
+                if ";base64," in url:
+                    return hashlib.sha256(base64.b64decode(url.split(";base64,", 1)[1])).hexdigest()
+        return None
+
+    def handle(self, method, path, headers, body):
+        if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+            return 404, {"error": {"message": f"unknown route {method} {path}"}}, "application/json"
+
+        request = json.loads(body or b"{}")
+        messages = request.get("messages", [])
+        vision = self._is_vision(messages)
+        text = self.vision_text if vision else self.answer_text
+        if vision and self.vision_responses:
+            text = self.vision_responses.get(self._image_digest(messages), "")
+        self.count("vision_calls" if vision else "chat_calls")
+
+        prompt_chars = sum(len(m["content"]) if isinstance(m.get("content"), str) else 1000 for m in messages)
+        prompt_tokens = max(1, prompt_chars // 4)
+        completion_tokens = max(1, len(text) // 4)
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+
+        return 200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:16]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o-mini"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": text}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }, "application/json"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--graph-port", type=int, default=8081)
+    ap.add_argument("--openai-port", type=int, default=8082)
+    ap.add_argument("--graph-latency", default="fixed:20")
+    ap.add_argument("--openai-latency", default="lognormal:400:0.4")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    args = ap.parse_args()
+
+    graph = FakeGraphAPI(port=args.graph_port, latency=args.graph_latency, error_rate=args.error_rate).start()
+    openai = FakeOpenAI(port=args.openai_port, latency=args.openai_latency, error_rate=args.error_rate).start()
+    print(f"[fake] Graph API : {graph.url}   (WHATSAPP_GRAPH_URL={graph.url})")
+    print(f"[fake] OpenAI    : {openai.url}/v1   (OPENAI_BASE_URL={openai.url}/v1)")
+    print("[fake] Ctrl+C pour arrêter")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"[fake] graph={graph.counters} openai={openai.counters}")
+    except KeyboardInterrupt:
+        graph.stop()
+        openai.stop()
+
+
+if __name__ == "__main__":
+    main()
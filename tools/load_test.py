@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test de charge bout-en-bout du webhook, sans Meta ni OpenAI
+- Démarre les faux services locaux (tools/fake_services.py) : Graph API + OpenAI
+- Pointe le bot dessus via sa configuration (WHATSAPP_GRAPH_URL, OPENAI_BASE_URL)
+- Sert create_app() sur un vrai serveur HTTP local, dans un dossier de travail
+  temporaire (les images et audios produits ne touchent pas data/) et envoie des webhooks
+  synthétiques (texte / image) à débit contrôlé (boucle ouverte)
+- Mesure : débit, latences p50/p95/p99 du chemin webhook_process, taux d'erreur,
+  appels sortants observés par les faux services
+
+Le TTS est remplacé par défaut par un faux moteur local (--tts fake) pour ne pas
+appeler Google ; --tts real garde gTTS.
+
+Usage:
+  python tools/load_test.py --rate 5 --duration 30
+  python tools/load_test.py --rate 20 --duration 60 --image-ratio 0.7 --openai-latency lognormal:600:0.5
+Sorties: artifacts/load_test.json (dernier run) et artifacts/load_test.csv (historique)
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+ACTIVE_DIR = ROOT / "scripts" / "active"
+sys.path.insert(0, str(ACTIVE_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_services import FakeGraphAPI, FakeOpenAI  # noqa: E402
+from perf_metrics import summarize  # noqa: E402
+
+OUT_JSON = ROOT / "artifacts" / "load_test.json"
+OUT_CSV = ROOT / "artifacts" / "load_test.csv"
+
+TEXT_QUESTIONS = [
+    "Comment calculer l'aire d'un rectangle de 5 m sur 3 m ?",
+    "25 + 17 = ?",
+    "Résous 2x + 3 = 11",
+    "Quelle est la capitale de la RDC ?",
+    "Explique la photosynthèse simplement",
+    "Comment conjuguer le verbe aller au futur ?",
+]
+
+
+class FakeTTS:
+    """Remplace RealTTS pendant le test : écrit un petit fichier local sans réseau"""
+
+    def __init__(self, out_dir: Path):
+        self.out_dir = out_dir
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+    def supports(self, language):
+        return language in ("fr", "en")
+
+    def text_to_speech(self, text, language="fr"):
+        from storage_manager import get_storage  # même rangement haché que RealTTS
+        path = get_storage().path_for("audio", f"load_{uuid.uuid4().hex}.mp3")
+        path.write_bytes(b"ID3" + b"\x00" * 2048)
+        return str(path)
+
+
+def webhook_payload(kind: str, sender: str, rng: random.Random) -> dict:
+    if kind == "image":
+        message = {"from": sender, "id": f"wamid.{uuid.uuid4().hex}", "type": "image",
+                   "image": {"id": f"{rng.randrange(10**15, 10**16)}", "mime_type": "image/jpeg"}}
+    else:
+        message = {"from": sender, "id": f"wamid.{uuid.uuid4().hex}", "type": "text",
+                   "text": {"body": rng.choice(TEXT_QUESTIONS)}}
+    return {"object": "whatsapp_business_account",
+            "entry": [{"id": "load-test", "changes": [{"field": "messages", "value": {
+                "messaging_product": "whatsapp", "messages": [message]}}]}]}
+
+
+def configure_environment(graph_url: str, openai_url: str):
+    os.environ["WHATSAPP_GRAPH_URL"] = graph_url
+    os.environ["OPENAI_BASE_URL"] = f"{openai_url}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-load-test"
+    os.environ["WHATSAPP_PHONE_NUMBER_ID"] = "000000000000000"
+    os.environ["WHATSAPP_ACCESS_TOKEN"] = "load-test-token"
+    os.environ["WHATSAPP_VERIFY_TOKEN"] = "load-test-verify"
+
+
+def prepare_workdir(workdir: Path):
+    """
+    Dossier de travail jetable : le bot y écrit images et audios (chemins relatifs data/...)
+    tandis que l'index et le catalogue réels sont liés en lecture
+    """
+    data = workdir / "data"
+    data.mkdir(parents=True, exist_ok=True)
+    for name in ("index", "rag_seed"):
+        (data / name).symlink_to(ROOT / "data" / name, target_is_directory=True)
+    prefs = ROOT / "data" / "user_language_preferences.json"
+    if prefs.exists():
+        shutil.copy2(prefs, data / prefs.name)
+
+
+def start_bot_server(args, audio_dir: Path):
+    """Importe le bot (après configuration), attend la fin du préchauffage et le sert en HTTP"""
+    from werkzeug.serving import make_server
+    import moteyi_whatsapp_cloud_bot as botmod
+
+    app = botmod.create_app()
+    deadline = time.time() + 120
+    while not botmod.readiness()["warmup_done"] and time.time() < deadline:
+        time.sleep(0.05)
+    state = botmod.readiness()
+    if not state["ready"]:
+        raise SystemExit(f"[load] Bot non prêt: {state['subsystems']}")
+
+    if args.tts == "fake":
+        botmod.get_bot().tts = FakeTTS(audio_dir)
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bot-server", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def run_load(bot_url: str, args):
+    import requests
+
+    rng = random.Random(args.seed)
+    total = int(args.rate * args.duration)
+    local = threading.local()
+    lock = threading.Lock()
+    service_ms, response_ms = [], []
+    outcomes = {"ok": 0, "http_error": 0, "exception": 0}
+    by_kind = {"text": [], "image": []}
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def fire(scheduled: float, payload: dict, kind: str):
+        started = time.perf_counter()
+        try:
+            r = session().post(f"{bot_url}/webhook", json=payload, timeout=args.timeout)
+            outcome = "ok" if r.status_code == 200 else "http_error"
+        except Exception:
+            outcome = "exception"
+        done = time.perf_counter()
+        with lock:
+            outcomes[outcome] += 1
+            service_ms.append((done - started) * 1000)
+            # Latence vue depuis l'instant prévu (inclut l'attente : pas d'omission coordonnée)
+            response_ms.append((done - scheduled) * 1000)
+            by_kind[kind].append((done - started) * 1000)
+
+    senders = [f"2438{rng.randrange(10**7, 10**8)}" for _ in range(args.users)]
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for i in range(total):
+            scheduled = t_start + i / args.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind = "image" if rng.random() < args.image_ratio else "text"
+            pool.submit(fire, scheduled, webhook_payload(kind, rng.choice(senders), rng), kind)
+    wall_s = time.perf_counter() - t_start
+
+    return {
+        "requests": total,
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(total / max(wall_s, 1e-9), 3),
+        "error_rate": round((outcomes["http_error"] + outcomes["exception"]) / max(total, 1), 4),
+        "outcomes": outcomes,
+        "service": summarize(service_ms),
+        "response": summarize(response_ms),
+        "by_kind": {k: summarize(v) for k, v in by_kind.items()},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=float, default=5.0, help="webhooks par seconde")
+    ap.add_argument("--duration", type=float, default=30.0, help="durée d'injection (s)")
+    ap.add_argument("--concurrency", type=int, default=32, help="requêtes simultanées max")
+    ap.add_argument("--users", type=int, default=50, help="nombre d'expéditeurs distincts")
+    ap.add_argument("--image-ratio", type=float, default=0.5)
+    ap.add_argument("--graph-latency", default="uniform:20:80")
+    ap.add_argument("--openai-latency", default="lognormal:400:0.4")
+    ap.add_argument("--graph-error-rate", type=float, default=0.0)
+    ap.add_argument("--openai-error-rate", type=float, default=0.0)
+    ap.add_argument("--tts", choices=["fake", "real"], default="fake")
+    ap.add_argument("--timeout", type=float, default=120.0)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out-json", default=str(OUT_JSON))
+    ap.add_argument("--out-csv", default=str(OUT_CSV))
+    args = ap.parse_args()
+
+    graph = FakeGraphAPI(latency=args.graph_latency, error_rate=args.graph_error_rate, seed=args.seed).start()
+    openai = FakeOpenAI(latency=args.openai_latency, error_rate=args.openai_error_rate, seed=args.seed).start()
+    configure_environment(graph.url, openai.url)
+    print(f"[load] Faux Graph: {graph.url}  Faux OpenAI: {openai.url}/v1")
+
+    with tempfile.TemporaryDirectory(prefix="moteyi_load_") as tmp:
+        # Le bot résout data/ relativement au dossier courant
+        prepare_workdir(Path(tmp))
+        os.chdir(tmp)
+        server, bot_url = start_bot_server(args, Path(tmp) / "data" / "audio_responses")
+        print(f"[load] Bot servi sur {bot_url} — {args.rate}/s pendant {args.duration}s "
+              f"(images {args.image_ratio:.0%}, concurrence {args.concurrency})")
+        result = run_load(bot_url, args)
+        server.shutdown()
+        import moteyi_whatsapp_cloud_bot as botmod
+        botmod.get_storage().sweep()  # usage disque en fin de test
+        metrics = botmod.collect_metrics()
+        result["llm_gateway"] = metrics["llm"]
+        result["token_budget"] = metrics["token_budget"]["by_type"]
+        result["storage"] = metrics["storage"]["areas"]
+        result["send_scheduler"] = metrics["send_scheduler"]
+        result["dead_letters"] = metrics["dead_letters"]
+        result["single_flight"] = metrics["single_flight"]
+        result["semantic_cache"] = metrics["semantic_cache"]
+        result["answer_bank"] = metrics["answer_bank"]
+        os.chdir(ROOT)
+
+    graph.stop()
+    openai.stop()
+
+    result.update({
+        "run": datetime.now().isoformat(timespec="seconds"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out_json", "out_csv")},
+        "graph_calls": graph.counters,
+        "openai_calls": openai.counters,
+        "openai_tokens": {"prompt": openai.prompt_tokens, "completion": openai.completion_tokens},
+    })
+
+    s = result["service"]
+    print(f"[load] {result['requests']} webhooks en {result['wall_s']:.1f}s -> {result['throughput_rps']:.2f} req/s")
+    print(f"[load] Latence service : p50={s['p50_ms']:.0f} ms  p95={s['p95_ms']:.0f} ms  p99={s['p99_ms']:.0f} ms")
+    r = result["response"]
+    print(f"[load] Latence réponse : p50={r['p50_ms']:.0f} ms  p95={r['p95_ms']:.0f} ms  (depuis l'instant prévu)")
+    print(f"[load] Erreurs: {result['error_rate']:.2%}  {result['outcomes']}")
+    print(f"[load] Graph: {graph.counters}")
+    print(f"[load] OpenAI: {openai.counters}")
+    for model, m in result["llm_gateway"].items():
+        print(f"[load] Passerelle {model}: p95={m['latency']['p95_ms']:.0f} ms  retries={m['retries']}  "
+              f"erreurs={m['errors']}  disjoncteur={m['breaker']}")
+    for exercise_type, t in result["token_budget"].items():
+        print(f"[load] Tokens {exercise_type}: entrée~{t['prompt_tokens_mean']:.0f}  "
+              f"sortie p95={t['completion_tokens_p95']:.0f}  tronquées={t['truncated']}  "
+              f"p95={t['latency']['p95_ms']:.0f} ms")
+    for area, u in result["storage"].items():
+        print(f"[load] Stockage {area}: {u.get('files', 0)} fichiers  {u.get('bytes', 0) / 1024:.0f} Ko  "
+              f"évincés={u['evicted']}  expirés={u['expired']}")
+    q = result["send_scheduler"]
+    print(f"[load] Envois Graph: {q['sent']} envoyés  retard p95={q['lag']['p95_ms']:.0f} ms  "
+          f"essais={q['retries']}  429={q['throttled']}  échecs={q['failed']}  "
+          f"perdus={q['dropped_full'] + q['dropped_lag']}")
+    print(f"[load] Messages non délivrés: {result['dead_letters']['by_status']}")
+    for stage, f in result["single_flight"].items():
+        print(f"[load] Single-flight {stage}: {f['calls']} appels  {f['executed']} exécutés  "
+              f"{f['collapsed']} regroupés  expirations={f['timeouts']}")
+    if result["semantic_cache"]:
+        c = result["semantic_cache"]
+        print(f"[load] Cache sémantique: {c['hits']}/{c['lookups']} réussites  {c['entries']} réponses  "
+              f"recherche p95={c['lookup']['p95_ms']:.3f} ms")
+    if result["answer_bank"]:
+        b = result["answer_bank"]
+        print(f"[load] Banque de réponses: {b['exact_hits']} exactes + {b['fuzzy_hits']} proches / {b['lookups']}  "
+              f"recherche p95={b['lookup']['p95_ms']:.3f} ms")
+
+    out_json = Path(args.out_json)
+    out_json.parent.mkdir(parents=True, exist_ok=True)
+    out_json.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    out_csv = Path(args.out_csv)
+    new_file = not out_csv.exists()
+    with open(out_csv, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["run", "rate", "duration", "image_ratio", "openai_latency", "requests", "throughput_rps",
+                        "error_rate", "p50_ms", "p95_ms", "p99_ms", "graph_calls", "openai_calls"])
+        w.writerow([result["run"], args.rate, args.duration, args.image_ratio, args.openai_latency,
+                    result["requests"], result["throughput_rps"], result["error_rate"],
+                    s["p50_ms"], s["p95_ms"], s["p99_ms"],
+                    sum(graph.counters.values()), sum(openai.counters.values())])
+    print(f"[load] Résultats: {out_json} / {out_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
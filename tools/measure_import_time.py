@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mesure le temps d'import du module bot (scripts/active/moteyi_whatsapp_cloud_bot.py)
+- N imports à froid, chacun dans un processus Python neuf
+- Ajoute une ligne à artifacts/import_time.csv pour suivre l'évolution
+- Liste les modules les plus lents (python -X importtime)
+Usage:
+  python tools/measure_import_time.py --runs 5
+  python tools/measure_import_time.py --runs 5 --max-ms 500   # échoue au-delà du seuil
+"""
+import argparse
+import csv
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+ACTIVE_DIR = ROOT / "scripts" / "active"
+MODULE = "moteyi_whatsapp_cloud_bot"
+OUT_CSV = ROOT / "artifacts" / "import_time.csv"
+
+PROBE = (
+    "import time; t0 = time.perf_counter(); "
+    f"import {MODULE} as m; "
+    "print((time.perf_counter() - t0) * 1000, m.IMPORT_TIME_MS)"
+)
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(ACTIVE_DIR), env.get("PYTHONPATH", "")])
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def measure_once():
+    """Un import à froid -> (ms mesurées autour de l'import, ms mesurées par le module lui-même)"""
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, timeout=120,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "import échoué")
+    total_ms, module_ms = proc.stdout.strip().splitlines()[-1].split()
+    return float(total_ms), float(module_ms)
+
+
+def slowest_imports(top=10):
+    """Top des imports directs du module bot les plus lents (python -X importtime)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {MODULE}"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, timeout=120,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  self_us | cumulative_us | [indentation]module"
+        try:
+            _, cumul_us, name = line.split("|", 2)
+            rows.append((int(cumul_us.strip()), name.rstrip()))
+        except ValueError:
+            continue
+    # Imports directs du module bot : profondeur 1 (" " + 2 espaces par niveau)
+    direct = []
+    for us, name in rows:
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            direct.append((us, name.strip()))
+    direct.sort(reverse=True)
+    return direct[:top]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--out", default=str(OUT_CSV))
+    ap.add_argument("--max-ms", type=float, default=None, help="seuil (médiane) au-delà duquel on échoue")
+    args = ap.parse_args()
+
+    totals, modules = [], []
+    for _ in range(args.runs):
+        total_ms, module_ms = measure_once()
+        totals.append(total_ms)
+        modules.append(module_ms)
+
+    median_ms = statistics.median(totals)
+    print(f"[import] {MODULE}: médiane={median_ms:.1f} ms  min={min(totals):.1f}  max={max(totals):.1f}  (runs={args.runs})")
+    print(f"[import] mesure interne IMPORT_TIME_MS: médiane={statistics.median(modules):.1f} ms")
+
+    print("[import] Modules les plus lents (cumulé):")
+    for us, name in slowest_imports():
+        print(f"  - {name:30s} {us / 1000:8.1f} ms")
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not out.exists()
+    with open(out, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["timestamp", "commit", "runs", "median_ms", "min_ms", "max_ms", "module_median_ms"])
+        w.writerow([
+            datetime.now().isoformat(timespec="seconds"), git_commit(), args.runs,
+            f"{median_ms:.1f}", f"{min(totals):.1f}", f"{max(totals):.1f}",
+            f"{statistics.median(modules):.1f}",
+        ])
+    print(f"[import] Résultat ajouté à {out}")
+
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"[import] FAIL - médiane {median_ms:.1f} ms > seuil {args.max_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
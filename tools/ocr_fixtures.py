@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Jeu d'images OCR synthétiques étiquetées + métriques CER / WER
+- Rend des énoncés d'exercices (maths, français, lingala, swahili) sur fond
+  de cahier : éclairage inégal, bruit, léger flou, rotation, compression JPEG
+- Écrit data/ocr_fixtures/*.jpg et data/ocr_fixtures/labels.jsonl (texte exact)
+- Déterministe (--seed) : les benchmarks OCR comparent toujours les mêmes images
+Usage:
+  python tools/ocr_fixtures.py
+  python tools/ocr_fixtures.py --count 60 --out /tmp/ocr_fixtures
+"""
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURES_DIR = ROOT / "data" / "ocr_fixtures"
+
+EXERCISES = [
+    "25 + 17 = ?",
+    "2x + 3 = 11",
+    "(x - 2)² = 49",
+    "2x² + 3x - 5 = 0",
+    "500 / 4 = ?",
+    "Calcule 348 - 129",
+    "Un rectangle mesure 12 cm sur 5 cm. Calcule son aire.",
+    "Maman achète 6 mangues à 250 FC. Combien paie-t-elle ?",
+    "Résous : 3x - 7 = 2x + 5",
+    "Quelle est la capitale de la RDC ?",
+    "Conjugue le verbe aller au futur.",
+    "Nini maana ya photosynthèse ?",
+    "Tanga mituya: 45 + 38",
+    "Kokabola 84 na 7",
+    "Hesabu: 9 x 8 = ?",
+    "Trouve la moitié de 150.",
+    "Un bus transporte 48 élèves. Combien de bus pour 192 élèves ?",
+    "Écris en chiffres : trois cent quatre",
+    "7 x 6 + 12 = ?",
+    "Périmètre d'un carré de côté 9 m",
+]
+
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+    "C:/Windows/Fonts/times.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+]
+
+
+def _fonts(size: int):
+    fonts = [ImageFont.truetype(p, size) for p in FONT_CANDIDATES if Path(p).exists()]
+    return fonts or [ImageFont.load_default(size)]
+
+
+def render(text: str, rng: random.Random, width: int = 900) -> Image.Image:
+    """Un énoncé sur une page de cahier dégradée"""
+    font = rng.choice(_fonts(rng.randint(30, 40)))
+    words, lines, line = text.split(), [], ""
+    draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+    for word in words:
+        candidate = f"{line} {word}".strip()
+        if draw.textlength(candidate, font=font) > width - 80 and line:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    lines.append(line)
+    line_h = int(font.size * 1.6)
+    height = 80 + line_h * len(lines)
+
+    page = Image.new("L", (width, height), 235)
+    draw = ImageDraw.Draw(page)
+    for y in range(20, height, line_h // 2 + 6):  # lignes de cahier
+        draw.line([(0, y), (width, y)], fill=205, width=1)
+    ink = rng.randint(15, 60)
+    for i, content in enumerate(lines):
+        draw.text((40 + rng.randint(-5, 5), 40 + i * line_h), content, fill=ink, font=font)
+
+    page = page.rotate(rng.uniform(-2.0, 2.0), resample=Image.BICUBIC, expand=False, fillcolor=235)
+    if rng.random() < 0.6:
+        page = page.filter(ImageFilter.GaussianBlur(rng.uniform(0.3, 1.0)))
+
+    arr = np.asarray(page, dtype=np.float32)
+    # Éclairage inégal (photo au téléphone) + bruit capteur
+    gy, gx = np.mgrid[0:height, 0:width].astype(np.float32)
+    cx, cy = rng.uniform(0, width), rng.uniform(0, height)
+    shade = 1.0 - rng.uniform(0.15, 0.45) * np.hypot(gx - cx, gy - cy) / np.hypot(width, height)
+    noise = np.random.default_rng(rng.randrange(2**32)).normal(0, rng.uniform(3, 10), arr.shape)
+    arr = np.clip(arr * shade + noise, 0, 255).astype(np.uint8)
+    return Image.fromarray(arr)
+
+
+def generate(out_dir: Path = FIXTURES_DIR, count: int = 40, seed: int = 7):
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    labels = []
+    for i in range(count):
+        text = EXERCISES[i % len(EXERCISES)]
+        name = f"fixture_{i:03d}.jpg"
+        render(text, rng).save(out_dir / name, quality=rng.randint(60, 90))
+        labels.append({"id": f"fixture_{i:03d}", "file": name, "text": text})
+    with open(out_dir / "labels.jsonl", "w", encoding="utf-8") as f:
+        for row in labels:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return labels
+
+
+def load_fixtures(fixtures_dir: Path = FIXTURES_DIR, count: int = 40, seed: int = 7):
+    """[{id, path, text}] — génère le jeu s'il n'existe pas encore"""
+    fixtures_dir = Path(fixtures_dir)
+    labels_path = fixtures_dir / "labels.jsonl"
+    if not labels_path.exists():
+        generate(fixtures_dir, count, seed)
+    with open(labels_path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [{"id": r["id"], "path": str(fixtures_dir / r["file"]), "text": r["text"]} for r in rows]
+
+
+def _levenshtein(a, b) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def cer(reference: str, hypothesis: str) -> float:
+    """Taux d'erreur caractère (espaces normalisés)"""
+    ref, hyp = _normalize(reference), _normalize(hypothesis)
+    return _levenshtein(ref, hyp) / max(len(ref), 1)
+
+
+def wer(reference: str, hypothesis: str) -> float:
+    """Taux d'erreur mot"""
+    ref, hyp = _normalize(reference).split(), _normalize(hypothesis).split()
+    return _levenshtein(ref, hyp) / max(len(ref), 1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default=str(FIXTURES_DIR))
+    ap.add_argument("--count", type=int, default=40)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+    labels = generate(Path(args.out), args.count, args.seed)
+    print(f"[fixtures] {len(labels)} images -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rejeu des questions de data/eval/gold.jsonl dans le cache sémantique (scripts/active/semantic_cache.py)
+- rejeu séquentiel : chaque question est cherchée puis mémorisée ; une réussite sur une autre
+  question du jeu est "correcte" si elle a la même compétence (skill_tag), sinon fausse
+- paraphrases : le cache contient toutes les questions, on cherche des variantes déterministes
+  (normalisée, télégraphique, mot retiré, formule de politesse ajoutée, mots permutés) ;
+  réussite vraie = question d'origine retrouvée, fausse = autre compétence
+- cas négatifs : couples de questions proches dont la réponse diffère (nombres ou opérations
+  en toutes lettres, négation) ; toute réussite du second après mise en cache du premier est fausse
+- balayage de seuils de Jaccard : choisir MOTEYI_SEMANTIC_THRESHOLD(S) d'après ce compromis
+- latence des recherches (p50 / p99, en ms)
+Usage:
+  python tools/replay_semantic_cache.py
+  python tools/replay_semantic_cache.py --thresholds 0.5 0.6 0.7 0.8 --gold data/eval/gold.jsonl
+Sorties: artifacts/semantic_cache_replay.json (dernier run) et artifacts/semantic_cache_replay.csv (historique)
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+
+from semantic_cache import SemanticCache, math_key, normalize_words  # noqa: E402
+
+OUT_JSON = ROOT / "artifacts" / "semantic_cache_replay.json"
+OUT_CSV = ROOT / "artifacts" / "semantic_cache_replay.csv"
+FILLERS = ["Bonjour, ", "Svp ", "Aide-moi : ", "Please ", "Mbote, "]
+# (question en cache, question proche qui ne doit PAS la réutiliser, langue)
+NEGATIVE_PAIRS = [
+    ("Combien font deux plus trois ?", "Combien font deux fois trois ?", "fr"),
+    ("Calcule l'aire d'un rectangle de longueur cinq et de largeur deux",
+     "Calcule l'aire d'un rectangle de longueur six et de largeur deux", "fr"),
+    ("Calcule le carré de sept", "Calcule le cube de sept", "fr"),
+    ("Quelle est la moitié de douze ?", "Quel est le double de douze ?", "fr"),
+    ("Pourquoi le triangle est rectangle ?", "Pourquoi le triangle n'est pas rectangle ?", "fr"),
+    ("What is seven times eight?", "What is seven minus eight?", "en"),
+    ("Mibale kobakisa misato ezali boni ?", "Mibale mbala misato ezali boni ?", "ln"),
+    ("Hesabu mbili jumlisha tatu", "Hesabu mbili zidisha tatu", "sw"),
+    ("Calcule l'aire d'un rectangle de longueur 5 cm et de largeur 3 cm",
+     "Calcule le périmètre d'un rectangle de longueur 5 cm et de largeur 3 cm", "fr"),
+    ("Convertis 5 km en m", "Convertis 5 m en km", "fr"),
+    ("2x + 3 = 11", "Résous 2y + 3 = 11", "fr"),
+    ("Convert 3 hours to minutes", "Convert 3 minutes to hours", "en"),
+]
+
+
+def load_gold(path: Path):
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                item = json.loads(line)
+                if item.get("query"):
+                    items.append(item)
+    return items
+
+
+def variants(query: str, rng: random.Random):
+    """Paraphrases de surface d'une question (nom, texte) ; nombres et opérateurs gardés dans l'ordre"""
+    words = normalize_words(query)
+    numbers = [" ".join(math_key(query))] if math_key(query) else []
+    out = [("normalisée", " ".join(normalize_words(query) + numbers)),
+           ("politesse", rng.choice(FILLERS) + query[0].lower() + query[1:])]
+    telegraphic = " ".join(words + numbers)
+    out.append(("télégraphique", telegraphic))
+    if len(words) >= 4:
+        dropped = list(words)
+        del dropped[rng.randrange(len(dropped))]
+        out.append(("mot retiré", " ".join(dropped + numbers)))
+        swapped = list(words)
+        i = rng.randrange(len(swapped) - 1)
+        swapped[i], swapped[i + 1] = swapped[i + 1], swapped[i]
+        out.append(("mots permutés", " ".join(swapped + numbers)))
+    return out
+
+
+def replay(items, threshold: float, seed: int):
+    by_id = {item["id"]: item for item in items}
+    rng = random.Random(seed)
+
+    # 1. Rejeu séquentiel : cherche puis mémorise
+    cache = SemanticCache(threshold=threshold, thresholds={}, path="")
+    seq = {"lookups": 0, "hits": 0, "correct": 0, "wrong": 0}
+    for item in items:
+        answer = cache.get(item["query"], item.get("lang", "fr"))
+        seq["lookups"] += 1
+        if answer is not None:
+            seq["hits"] += 1
+            same_skill = by_id[answer].get("skill_tag") == item.get("skill_tag")
+            seq["correct" if same_skill else "wrong"] += 1
+        cache.put(item["query"], item["id"], item.get("lang", "fr"))
+
+    # 2. Paraphrases de chaque question, cache rempli avec tout le jeu
+    para = {"lookups": 0, "true_hits": 0, "false_hits": 0}
+    by_kind = defaultdict(lambda: [0, 0])
+    by_lang = defaultdict(lambda: [0, 0])
+    for item in items:
+        for kind, text in variants(item["query"], rng):
+            answer = cache.get(text, item.get("lang", "fr"))
+            para["lookups"] += 1
+            by_kind[kind][1] += 1
+            by_lang[item.get("lang", "?")][1] += 1
+            if answer == item["id"]:
+                para["true_hits"] += 1
+                by_kind[kind][0] += 1
+                by_lang[item.get("lang", "?")][0] += 1
+            elif answer is not None and by_id[answer].get("skill_tag") != item.get("skill_tag"):
+                para["false_hits"] += 1
+
+    # 3. Cas négatifs : aucune réussite attendue
+    negative = {"lookups": len(NEGATIVE_PAIRS), "false_hits": 0, "failed": []}
+    for cached, query, lang in NEGATIVE_PAIRS:
+        cache.put(cached, cached, lang)
+        if cache.get(query, lang) is not None:
+            negative["false_hits"] += 1
+            negative["failed"].append(query)
+
+    lookup = cache.get_stats()["lookup"]
+    return {
+        "threshold": threshold,
+        "sequential": seq,
+        "paraphrase": {**para,
+                       "true_hit_rate": round(para["true_hits"] / para["lookups"], 3) if para["lookups"] else 0.0,
+                       "false_hit_rate": round(para["false_hits"] / para["lookups"], 3) if para["lookups"] else 0.0},
+        "negative": negative,
+        "by_variant": {k: round(h / n, 3) for k, (h, n) in by_kind.items()},
+        "by_language": {k: round(h / n, 3) for k, (h, n) in sorted(by_lang.items())},
+        "lookup_p50_ms": lookup["p50_ms"],
+        "lookup_p99_ms": lookup["p99_ms"],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--gold", default=str(ROOT / "data" / "eval" / "gold.jsonl"))
+    ap.add_argument("--thresholds", nargs="*", type=float, default=[0.5, 0.6, 0.7, 0.8, 0.9])
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    items = load_gold(Path(args.gold))
+    if not items:
+        print(f"[semcache] Aucune question dans {args.gold}")
+        return 1
+    print(f"[semcache] {len(items)} questions ({args.gold})")
+
+    report = {"run": datetime.now().isoformat(timespec="seconds"), "gold": args.gold, "questions": len(items),
+              "results": []}
+    for threshold in args.thresholds:
+        r = replay(items, threshold, args.seed)
+        report["results"].append(r)
+        s, p = r["sequential"], r["paraphrase"]
+        print(f"[semcache] seuil {threshold:.2f}  paraphrases : vraies {p['true_hit_rate']:.1%}  "
+              f"fausses {p['false_hit_rate']:.1%}  | séquentiel : {s['hits']} réussites "
+              f"({s['wrong']} fausses)  | négatifs : {r['negative']['false_hits']}/{r['negative']['lookups']} "
+              f"fausses  | recherche p50={r['lookup_p50_ms']:.3f} ms  p99={r['lookup_p99_ms']:.3f} ms")
+        print(f"           par variante {r['by_variant']}")
+        for query in r["negative"]["failed"]:
+            print(f"           réussite fausse : {query!r}")
+
+    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    OUT_JSON.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    new_file = not OUT_CSV.exists()
+    with open(OUT_CSV, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if new_file:
+            w.writerow(["run", "questions", "threshold", "true_hit_rate", "false_hit_rate", "sequential_hits",
+                        "sequential_wrong", "negative_false_hits", "lookup_p50_ms", "lookup_p99_ms"])
+        for r in report["results"]:
+            w.writerow([report["run"], len(items), r["threshold"], r["paraphrase"]["true_hit_rate"],
+                        r["paraphrase"]["false_hit_rate"], r["sequential"]["hits"], r["sequential"]["wrong"],
+                        r["negative"]["false_hits"], r["lookup_p50_ms"], r["lookup_p99_ms"]])
+    print(f"[semcache] Résultats: {OUT_JSON} / {OUT_CSV}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
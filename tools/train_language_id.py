@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Entraîne l'identifiant de langue (scripts/active/language_id.py)
+Sources étiquetées :
+- data/eval/gold.jsonl (requêtes du gold set, champ lang)
+- data/eval/language_id_seed.jsonl (phrases d'élèves par langue)
+- textes multilingues du bot (LanguageManager, gabarits du solveur math_solver)
+- --corpus : JSONL supplémentaires {"text", "lang"} (ex. export du corpus RAG)
+Validation croisée (k plis) : exactitude par langue, température de calibration
+(minimise la log-perte hors échantillon) et erreur de calibration (ECE)
+Usage:
+  python tools/train_language_id.py
+  python tools/train_language_id.py --corpus data/export/rag_export.jsonl --folds 10
+Sortie: data/index/language_id_model.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import random
+import re
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "scripts" / "active"))
+
+from language_id import DEFAULT_MODEL_PATH, LanguageIdentifier, train  # noqa: E402
+
+GOLD = ROOT / "data" / "eval" / "gold.jsonl"
+SEED = ROOT / "data" / "eval" / "language_id_seed.jsonl"
+
+LANG_CODES = {
+    "français": "fr", "francais": "fr", "fr": "fr",
+    "anglais": "en", "english": "en", "en": "en",
+    "lingala": "ln", "ln": "ln",
+    "swahili": "sw", "kiswahili": "sw", "sw": "sw",
+    "tshiluba": "lu", "ciluba": "lu", "lu": "lu",
+    "kikongo": "kg", "kg": "kg",
+}
+PLACEHOLDER_RE = re.compile(r"\{[^}]*\}")
+
+
+def read_jsonl(path: Path, text_key: str):
+    samples = []
+    if not path.exists():
+        return samples
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            lang = LANG_CODES.get(str(row.get("lang") or row.get("langue") or "").lower())
+            text = row.get(text_key) or row.get("text")
+            if lang and text:
+                samples.append((text, lang))
+    return samples
+
+
+def bot_texts():
+    """Messages multilingues déjà présents dans le code du bot"""
+    from language_manager import LanguageManager
+    from math_solver import TEMPLATES
+
+    samples = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        manager = LanguageManager()
+    for code, lang in manager.languages.items():
+        for key in ("welcome", "menu_prompt", "confirmation", "help_prompt"):
+            samples.append((lang[key], code))
+    for code, templates in TEMPLATES.items():
+        for text in templates.values():
+            text = PLACEHOLDER_RE.sub(" ", text)
+            if len(text.split()) >= 2:
+                samples.append((text, code))
+    return samples
+
+
+def cross_validate(samples, folds: int, seed: int, ngram_range, alpha: float):
+    """Log-vraisemblances hors échantillon de chaque exemple : [(log_likelihoods, langue, langues)]"""
+    rng = random.Random(seed)
+    indices = list(range(len(samples)))
+    rng.shuffle(indices)
+    held_out = []
+    for k in range(folds):
+        test = set(indices[k::folds])
+        model = LanguageIdentifier(train([s for i, s in enumerate(samples) if i not in test], ngram_range, alpha))
+        for i in test:
+            text, lang = samples[i]
+            log_likelihoods, seen = model.log_likelihoods(text)
+            if seen:
+                held_out.append((log_likelihoods, lang, model.languages))
+    return held_out
+
+
+def softmax(values, temperature):
+    scaled = [v / temperature for v in values]
+    top = max(scaled)
+    exps = [math.exp(v - top) for v in scaled]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+def evaluate(held_out, temperature: float):
+    """(log-perte moyenne, exactitude, ECE sur 10 classes de confiance, exactitude par langue)"""
+    nll, correct, bins, per_lang = 0.0, 0, [[0, 0, 0.0] for _ in range(10)], {}
+    for log_likelihoods, lang, languages in held_out:
+        probs = softmax(log_likelihoods, temperature)
+        best = max(range(len(probs)), key=probs.__getitem__)
+        hit = languages[best] == lang
+        p_true = probs[languages.index(lang)] if lang in languages else 1e-12
+        nll -= math.log(max(p_true, 1e-12))
+        correct += hit
+        b = bins[min(int(probs[best] * 10), 9)]
+        b[0] += 1
+        b[1] += hit
+        b[2] += probs[best]
+        stats = per_lang.setdefault(lang, [0, 0])
+        stats[0] += 1
+        stats[1] += hit
+    n = len(held_out)
+    ece = sum(abs(b[1] - b[2]) for b in bins if b[0]) / n
+    return nll / n, correct / n, ece, {lang: hits / total for lang, (total, hits) in sorted(per_lang.items())}
+
+
+def fit_temperature(held_out):
+    candidates = [round(0.5 * 1.15 ** i, 3) for i in range(40)]
+    return min(candidates, key=lambda t: evaluate(held_out, t)[0])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--corpus", nargs="*", default=[], help="JSONL supplémentaires {text, lang}")
+    ap.add_argument("--folds", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=13)
+    ap.add_argument("--alpha", type=float, default=0.5)
+    ap.add_argument("--ngram-max", type=int, default=3)
+    ap.add_argument("--out", default=str(DEFAULT_MODEL_PATH))
+    args = ap.parse_args()
+
+    samples = read_jsonl(GOLD, "query") + read_jsonl(SEED, "text") + bot_texts()
+    for path in args.corpus:
+        samples += read_jsonl(Path(path), "text")
+    counts = {}
+    for _, lang in samples:
+        counts[lang] = counts.get(lang, 0) + 1
+    print(f"[langid] {len(samples)} exemples : {dict(sorted(counts.items()))}")
+
+    ngram_range = (1, args.ngram_max)
+    held_out = cross_validate(samples, args.folds, args.seed, ngram_range, args.alpha)
+    nll_raw, accuracy, ece_raw, per_lang = evaluate(held_out, 1.0)
+    temperature = fit_temperature(held_out)
+    nll, _, ece, _ = evaluate(held_out, temperature)
+    print(f"[langid] Validation croisée {args.folds} plis : exactitude {accuracy:.1%}")
+    print("[langid] Par langue : " + "  ".join(f"{lang}={acc:.0%}" for lang, acc in per_lang.items()))
+    print(f"[langid] Calibration : température {temperature}  log-perte {nll_raw:.3f} -> {nll:.3f}  "
+          f"ECE {ece_raw:.3f} -> {ece:.3f}")
+
+    model = train(samples, ngram_range, args.alpha)
+    model["temperature"] = temperature
+    model["ngrams"] = {g: [round(v, 4) for v in values] for g, values in model["ngrams"].items()}
+    model["training"] = {"samples": len(samples), "by_language": counts, "cv_accuracy": round(accuracy, 4),
+                         "cv_per_language": {k: round(v, 4) for k, v in per_lang.items()},
+                         "cv_ece": round(ece, 4)}
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(model, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    print(f"[langid] {len(model['ngrams'])} n-grammes -> {out} ({out.stat().st_size // 1024} Ko)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())